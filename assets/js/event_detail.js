@@ -0,0 +1,125 @@
+// Opciones de la plantilla (data-* del <script>); currentScript solo existe al cargar
+const EVENT_DETAIL_OPTIONS = document.currentScript.dataset;
+const SHOW_SOURCE_ACTIONS = EVENT_DETAIL_OPTIONS.showActions === 'true';
+
+// Fila clicable (sin interferir con botones/enlaces/form); delegado, sirve para filas nuevas
+document.addEventListener('click', function (e) {
+  const row = e.target.closest('#sourcesTable tbody tr[data-href]');
+  if (!row || e.target.closest('a,button,.btn,form')) return;
+  window.location = row.getAttribute('data-href');
+});
+
+// Mantener #sources al cambiar filtros
+document.addEventListener('DOMContentLoaded', function(){
+  const sel = document.getElementById('sourceTypeSelect');
+  const chk = document.getElementById('showArchived');
+  function go(){
+    const u = new URL(window.location.href);
+    if (sel && sel.value && sel.value !== 'ALL') u.searchParams.set('source_type', sel.value);
+    else u.searchParams.delete('source_type');
+    if (chk && chk.checked) u.searchParams.set('show_archived','1');
+    else u.searchParams.delete('show_archived');
+    u.hash = 'sources';
+    window.location = u.toString();
+  }
+  sel && sel.addEventListener('change', go);
+  chk && chk.addEventListener('change', go);
+});
+
+// DataTables
+if (window.jQuery && $.fn.DataTable) {
+  $(function () {
+    const columnDefs = [];
+    if (SHOW_SOURCE_ACTIONS) {
+      columnDefs.push({ targets: -1, orderable: false, searchable: false, className: 'no-sort' });
+    }
+    $('#sourcesTable').DataTable({
+      order: [[2,'desc']],
+      pageLength: 10,
+      lengthMenu: [[10,20,50,-1],[10,20,50,'All']],
+      columnDefs: columnDefs,
+      language: {
+        emptyTable: 'No sources available',
+        info: 'Showing _START_ to _END_ of _TOTAL_ <strong>sources</strong>',
+        infoEmpty: 'Showing 0 to 0 of 0 <strong>sources</strong>',
+        infoFiltered: '(filtered from _MAX_ total sources)',
+        lengthMenu: 'Show _MENU_ <strong>sources</strong>',
+        search: 'Search sources:',
+        paginate: { first: 'First', last: 'Last', next: 'Next', previous: 'Previous' }
+      }
+    });
+
+    // mover buscador a la derecha (opcional)
+    $('#sourcesTable_wrapper').find('.dataTables_filter').addClass('ms-auto');
+  });
+}
+
+/* =========================
+   En vivo: tarjetas del evento y filas de bundles
+   ========================= */
+if (window.TrackerLive) {
+  const SUMMARY_FIELDS = ['theme', 'date_identified', 'risk_rating', 'status', 'is_active'];
+
+  function memberIds(node){
+    return (node.getAttribute('data-sources') || '').trim().split(/\s+/).filter(Boolean);
+  }
+
+  // Mismos filtros que la página (?show_archived, ?source_type)
+  function pageFilters(){
+    const params = new URLSearchParams(window.location.search);
+    const out = new URLSearchParams();
+    ['show_archived', 'source_type'].forEach(k => { if (params.get(k)) out.set(k, params.get(k)); });
+    return out;
+  }
+
+  function updateCount(dt){
+    const n = dt.rows().count();
+    document.querySelectorAll('[data-bundle-count]').forEach(el => { el.textContent = n; });
+    document.querySelectorAll('[data-bundle-count-label]').forEach(el => {
+      el.textContent = `${n} ${n === 1 ? 'source' : 'sources'}`;
+    });
+  }
+
+  function patchSummary(change){
+    if (change.action === 'delete') {
+      TrackerLive.showReload('This event was deleted.');
+      return;
+    }
+    if ((change.fields || []).some(f => !SUMMARY_FIELDS.includes(f))) {
+      TrackerLive.showReload('This event was edited.');
+    }
+    return TrackerLive.fragment('event-summary', change.id).then(html => {
+      const current = document.getElementById('event-summary');
+      if (html && current) current.replaceWith(TrackerLive.toElement(html));
+    });
+  }
+
+  function patchBundle(dt, sourceId){
+    sourceId = String(sourceId);
+    return TrackerLive.fragment('source-bundle', sourceId, pageFilters()).then(html => {
+      const row = html ? TrackerLive.toElement(html) : null;
+      const ids = row ? memberIds(row) : [];
+      const stale = dt.rows((idx, data, node) => memberIds(node).some(id => id === sourceId || ids.includes(id)));
+      // lo que quede del bundle anterior (p. ej. la fuente cambió de nombre o se borró)
+      const orphans = [];
+      stale.nodes().each(node => memberIds(node).forEach(id => {
+        if (id !== sourceId && !ids.includes(id)) orphans.push(id);
+      }));
+      stale.remove();
+      if (row) dt.row.add(row);
+      dt.draw(false);
+      updateCount(dt);
+      if (orphans.length) return patchBundle(dt, orphans[0]);
+    });
+  }
+
+  TrackerLive.on(function(change){
+    if (change.type === 'event') return patchSummary(change);
+    if (change.type !== 'source') return;
+    if (!(window.jQuery && $.fn.DataTable && $('#sourcesTable').length)) {
+      TrackerLive.showReload('New sources were added.');
+      return;
+    }
+    return patchBundle($('#sourcesTable').DataTable(), change.id);
+  });
+}
@@ -0,0 +1,260 @@
+// Opciones de la plantilla (data-* del <script>); currentScript solo existe al cargar
+const EVENT_EDIT_OPTIONS = document.currentScript.dataset;
+
+/* ---------- Name counter ---------- */
+function updateCharCount(input){
+  const n = (input?.value || '').length;
+  const max = Number(input?.getAttribute('maxlength') || 30);
+  const el = document.getElementById('name-char-count');
+  if (!el) return;
+  el.textContent = n;
+  el.classList.remove('text-muted','text-warning','text-danger');
+  if (n >= max) el.classList.add('text-danger');
+  else if (n > max*0.8) el.classList.add('text-warning');
+  else el.classList.add('text-muted');
+}
+document.addEventListener('DOMContentLoaded', () => {
+  const nameInput = document.querySelector('input[name="name"]');
+  if (nameInput) updateCharCount(nameInput);
+
+/* ---------- Theme title live ---------- */
+  const themeSel = document.getElementById('id_theme');
+  themeSel?.addEventListener('change', () => {
+    const opt = themeSel.options[themeSel.selectedIndex];
+    const h = document.getElementById('theme-title');
+    h.textContent = opt && opt.dataset.themeName ? ('for ' + opt.dataset.themeName) : '';
+  });
+
+/* ---------- Risk cards ---------- */
+  const riskSelect = document.getElementById('risk_select');
+  const cards = document.querySelectorAll('#risk_cards .risk-card');
+  const selectCard = (val) => {
+    cards.forEach(c => c.classList.toggle('selected', c.dataset.value === val));
+    riskSelect.value = val;
+  };
+  cards.forEach(c => c.addEventListener('click', () => selectCard(c.dataset.value)));
+  if (riskSelect.value) selectCard(riskSelect.value);
+
+/* ---------- Business lines "All" (excluye 'Evaluation in progress') ---------- */
+(() => {
+  const allCb = document.querySelector('input[name="impacted_lines"][value="All"]');
+  if (!allCb) return;
+
+  const cbs     = Array.from(document.querySelectorAll('input[name="impacted_lines"]'));
+  const evalCb  = cbs.find(cb => cb.value === 'Evaluation in progress');
+  const targets = cbs.filter(cb => cb !== allCb && cb !== evalCb); // solo LOBs reales
+
+  function applyAll(on){
+    // Con All ON: marcar y deshabilitar targets; forzar Eval OFF + deshabilitada
+    targets.forEach(cb => { cb.checked = on; cb.disabled = on; });
+    if (evalCb){ evalCb.checked = false; evalCb.disabled = on; }
+  }
+
+  function recompute(){
+    const allOn = targets.length && targets.every(cb => cb.checked);
+    allCb.checked = allOn;
+    targets.forEach(cb => cb.disabled = allOn);
+    if (evalCb){
+      if (allOn){ evalCb.checked = false; evalCb.disabled = true; }
+      else { evalCb.disabled = false; }
+    }
+  }
+
+  allCb.addEventListener('change', () => applyAll(allCb.checked));
+  targets.forEach(cb => cb.addEventListener('change', recompute));
+  // Guardrail: si intentan marcar Eval con All activo, la apaga
+  evalCb && evalCb.addEventListener('change', () => { if (allCb.checked) evalCb.checked = false; });
+
+  // Estado inicial al entrar a editar
+  if (allCb.checked) applyAll(true); else recompute();
+})();
+
+/* ---------- Taxonomy (LV1 → LV2 → LV3) ---------- */
+  let taxonomy = { hierarchical: [], flat: {} };
+  try { taxonomy = JSON.parse(EVENT_EDIT_OPTIONS.taxonomy || '{}'); } catch(e) { console.warn('taxonomy_json parse error', e); }
+
+  const sel = { lv1: [], lv2: [], lv3: [] };
+  const parentOfLv2 = {};
+  const parentOfLv3 = {};
+
+  (taxonomy.hierarchical || []).forEach(l1 => {
+    (l1.children || []).forEach(l2 => {
+      parentOfLv2[l2.key] = l1.key;
+      (l2.children || []).forEach(l3 => {
+        parentOfLv3[l3.key] = l2.key;
+      });
+    });
+  });
+
+  (taxonomy.hierarchical || []).forEach(l1 => {
+    if (l1.selected) sel.lv1.push(l1.key);
+    (l1.children || []).forEach(l2 => {
+      if (l2.selected) sel.lv2.push(l2.key);
+      (l2.children || []).forEach(l3 => {
+        if (l3.selected) sel.lv3.push(l3.key);
+      });
+    });
+  });
+
+  const lv1Box = document.getElementById('taxonomy-lv1-container');
+  const lv2Wrap = document.getElementById('lv2-container');
+  const lv3Wrap = document.getElementById('lv3-container');
+  const lv2Options = document.getElementById('lv2-options');
+  const lv3Options = document.getElementById('lv3-options');
+
+  const genId = (t) => String(t).toLowerCase().replace(/[^a-z0-9]+/g,'-');
+
+  function readLv1(){
+    sel.lv1 = [...document.querySelectorAll('input[name="risk_taxonomy_lv1"]:checked')].map(x => x.value);
+  }
+
+  function pruneAfterLv1Change(){
+    sel.lv2 = sel.lv2.filter(k2 => sel.lv1.includes(parentOfLv2[k2]));
+    sel.lv3 = sel.lv3.filter(k3 => sel.lv2.includes(parentOfLv3[k3]));
+  }
+  function pruneAfterLv2Change(){
+    sel.lv3 = sel.lv3.filter(k3 => sel.lv2.includes(parentOfLv3[k3]));
+  }
+
+  function buildLv2(){
+    readLv1();
+    pruneAfterLv1Change();
+
+    if (!sel.lv1.length){
+      lv2Options.innerHTML = '';
+      lv2Wrap.style.display = 'none';
+      lv3Options.innerHTML = '';
+      lv3Wrap.style.display = 'none';
+      return;
+    }
+
+    let html = '';
+    sel.lv1.forEach(k1 => {
+      const n1 = (taxonomy.hierarchical || []).find(x => x.key === k1);
+      if (!n1) return;
+      html += `<div class="taxonomy-group mb-2">`;
+      html += `<div class="fw-bold small text-muted">${n1.label}</div>`;
+      (n1.children || []).forEach(l2 => {
+        const checked = sel.lv2.includes(l2.key) ? 'checked' : '';
+        html += `
+          <div class="form-check">
+            <input class="form-check-input" type="checkbox" name="risk_taxonomy_lv2"
+                   value="${l2.key}" id="lv2-${genId(l2.key)}" ${checked}>
+            <label class="form-check-label" for="lv2-${genId(l2.key)}">${l2.label}</label>
+          </div>`;
+      });
+      html += `</div>`;
+    });
+    lv2Options.innerHTML = html;
+    lv2Wrap.style.display = 'block';
+
+    document.querySelectorAll('input[name="risk_taxonomy_lv2"]').forEach(el => {
+      el.addEventListener('change', () => {
+        if (el.checked) {
+          if (!sel.lv2.includes(el.value)) sel.lv2.push(el.value);
+        } else {
+          sel.lv2 = sel.lv2.filter(v => v !== el.value);
+          sel.lv3 = sel.lv3.filter(k3 => parentOfLv3[k3] !== el.value);
+        }
+        buildLv3();
+      });
+    });
+
+    buildLv3();
+    setTimeout(() => lv2Wrap.scrollIntoView({behavior:'smooth', block:'center'}), 50);
+  }
+
+  function buildLv3(){
+    pruneAfterLv2Change();
+
+    if (!sel.lv2.length){
+      lv3Options.innerHTML = '';
+      lv3Wrap.style.display = 'none';
+      return;
+    }
+
+    let html = '';
+    sel.lv2.forEach(k2 => {
+      let node2 = null;
+      for (const n1 of (taxonomy.hierarchical || [])){
+        const f = (n1.children || []).find(c => c.key === k2);
+        if (f) { node2 = f; break; }
+      }
+      if (!node2 || !(node2.children || []).length) return;
+
+      html += `<div class="taxonomy-group mb-2">`;
+      html += `<div class="fw-bold small text-muted">${node2.label}</div>`;
+      (node2.children || []).forEach(l3 => {
+        const checked = sel.lv3.includes(l3.key) ? 'checked' : '';
+        html += `
+          <div class="form-check">
+            <input class="form-check-input" type="checkbox" name="risk_taxonomy_lv3"
+                   value="${l3.key}" id="lv3-${genId(l3.key)}" ${checked}>
+            <label class="form-check-label" for="lv3-${genId(l3.key)}">${l3.label}</label>
+          </div>`;
+      });
+      html += `</div>`;
+    });
+    lv3Options.innerHTML = html;
+    lv3Wrap.style.display = 'block';
+
+    document.querySelectorAll('input[name="risk_taxonomy_lv3"]').forEach(el => {
+      el.addEventListener('change', () => {
+        if (el.checked) {
+          if (!sel.lv3.includes(el.value)) sel.lv3.push(el.value);
+        } else {
+          sel.lv3 = sel.lv3.filter(v => v !== el.value);
+        }
+      });
+    });
+
+    setTimeout(() => lv3Wrap.scrollIntoView({behavior:'smooth', block:'center'}), 50);
+  }
+
+  lv1Box.querySelectorAll('input[type="checkbox"]').forEach(cb => {
+    cb.addEventListener('change', () => { buildLv2(); });
+  });
+
+  (function bootstrapTaxonomy(){
+    const lv1FromDom = [...document.querySelectorAll('input[name="risk_taxonomy_lv1"]:checked')].map(x => x.value);
+    if (lv1FromDom.length) sel.lv1 = lv1FromDom;
+    buildLv2();
+  })();
+
+/* ---------- Submit validation ---------- */
+  document.getElementById('submit-btn').addEventListener('click', function(e){
+    let ok = true;
+
+    ['id_theme','id_date_identified','id_status','risk_select','id_description'].forEach(id => {
+      const el = document.getElementById(id) || document.querySelector(`[name="${id}"]`);
+      if (!el || !el.value) { ok = false; el?.classList.add('is-invalid'); }
+      else el.classList.remove('is-invalid');
+    });
+
+    const d = document.getElementById('id_date_identified');
+    if (d && d.value){
+      const selD = new Date(d.value);
+      const t = new Date(); t.setHours(0,0,0,0);
+      if (selD > t){ ok = false; d.classList.add('is-invalid'); }
+    }
+
+    if (![...document.querySelectorAll('input[name="risk_taxonomy_lv1"]:checked')].length){
+      ok = false; document.getElementById('lv1-error').style.display='block';
+    } else document.getElementById('lv1-error').style.display='none';
+
+    const lv2Wrap = document.getElementById('lv2-container');
+    const lv3Wrap = document.getElementById('lv3-container');
+
+    if (lv2Wrap.style.display !== 'none' &&
+        ![...document.querySelectorAll('input[name="risk_taxonomy_lv2"]:checked')].length){
+      ok = false; document.getElementById('lv2-error').style.display='block';
+    } else document.getElementById('lv2-error').style.display='none';
+
+    if (lv3Wrap.style.display !== 'none' &&
+        ![...document.querySelectorAll('input[name="risk_taxonomy_lv3"]:checked')].length){
+      ok = false; document.getElementById('lv3-error').style.display='block';
+    } else document.getElementById('lv3-error').style.display='none';
+
+    if (!ok) { e.preventDefault(); (document.querySelector('.is-invalid') || document.querySelector('.invalid-feedback[style*="block"]'))?.scrollIntoView({behavior:'smooth', block:'center'}); }
+  });
+});
@@ -0,0 +1,61 @@
+/* =========================
+   Avisos en vivo (SSE, ver tracker/live.py)
+   La página registra handlers con TrackerLive.on(); cada aviso trae
+   {type, id, parent, action, fields} y el handler pide solo el fragmento
+   afectado. Opciones en data-live-url / data-live-topics del <script>.
+   ========================= */
+window.TrackerLive = (function(){
+  const opts = document.currentScript ? document.currentScript.dataset : {};
+  const handlers = [];
+  let chain = Promise.resolve();
+  let notice = null;
+
+  function on(fn){ handlers.push(fn); }
+
+  function showReload(message){
+    if (notice) return;
+    notice = document.createElement('div');
+    notice.className = 'alert alert-info shadow position-fixed bottom-0 end-0 m-3 d-flex align-items-center gap-2';
+    notice.style.zIndex = 1080;
+    notice.innerHTML = '<span></span><button type="button" class="btn btn-sm btn-primary">Reload</button>';
+    notice.querySelector('span').textContent = message || 'This page has updates.';
+    notice.querySelector('button').addEventListener('click', () => window.location.reload());
+    document.body.appendChild(notice);
+  }
+
+  // HTML de la fila/tarjeta, o null si con los filtros de la página ya no va (204/404)
+  function fragment(kind, pk, params){
+    const url = new URL(`${opts.liveUrl}${kind}/${pk}/`, window.location.href);
+    if (params) params.forEach((value, key) => url.searchParams.set(key, value));
+    return fetch(url, { credentials: 'same-origin' }).then(r => {
+      if (r.status === 200) return r.text();
+      if (r.status === 204 || r.status === 404) return null;
+      throw new Error(`live fragment ${r.status}`);
+    });
+  }
+
+  function toElement(html){
+    const tpl = document.createElement('template');
+    tpl.innerHTML = html.trim();
+    return tpl.content.firstElementChild;
+  }
+
+  function dispatch(change){
+    // En serie: dos avisos seguidos de la misma fila no se pisan fuera de orden
+    handlers.forEach(fn => {
+      chain = chain.then(() => fn(change)).catch(() => showReload());
+    });
+  }
+
+  function connect(){
+    if (!opts.liveUrl || !opts.liveTopics || !window.EventSource) return;
+    const url = new URL(opts.liveUrl, window.location.href);
+    url.searchParams.set('topic', opts.liveTopics);
+    const source = new EventSource(url);
+    source.addEventListener('change', e => dispatch(JSON.parse(e.data)));
+    source.addEventListener('reload', () => showReload());
+  }
+
+  document.addEventListener('DOMContentLoaded', connect);
+  return { on, fragment, toElement, showReload };
+})();
@@ -0,0 +1,71 @@
+// Opciones de la plantilla (data-* del <script>); currentScript solo existe al cargar
+const THEME_LIST_OPTIONS = document.currentScript.dataset;
+
+document.addEventListener('DOMContentLoaded', function () {
+  // Toggle show_archived → actualizar querystring
+  const toggle = document.getElementById('toggleArchived');
+  if (toggle) {
+    toggle.addEventListener('change', () => {
+      const url = new URL(window.location.href);
+      url.searchParams.delete('page');
+      if (toggle.checked) url.searchParams.set('show_archived', '1');
+      else url.searchParams.delete('show_archived');
+      window.location = url.toString();
+    });
+  }
+
+  // Tooltips Bootstrap
+  if (window.bootstrap) {
+    const tips = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
+    tips.forEach(el => new bootstrap.Tooltip(el));
+  }
+
+  function plainText(data) {
+    const div = document.createElement('div');
+    div.innerHTML = data == null ? '' : data;
+    return (div.textContent || div.innerText || '').trim();
+  }
+
+  const HAS_ACTIONS = THEME_LIST_OPTIONS.hasActions === 'true';
+
+  if (window.jQuery && $.fn.DataTable) {
+    const columnDefs = [
+      { targets: 0, orderable: true },  // Name
+      { targets: 1, orderable: false, className: 'no-sort' }, // Category
+      { targets: 2, orderable: true, render: (d,t)=> (t==='sort'||t==='type')?plainText(d):d }, // Onset
+      { targets: 3, orderable: true, render: (d,t)=> (t==='sort'||t==='type')?plainText(d):d }, // Risk
+      { targets: 4, orderable: true, render: (d,t)=> (t==='sort'||t==='type')?plainText(d):d }  // Status
+    ];
+    if (HAS_ACTIONS) {
+      columnDefs.push({ targets: -1, orderable: false, searchable: false, className: 'no-sort' });
+    }
+
+    $('#themesTable').DataTable({
+      autoWidth: false,
+      ordering: true,
+      order: [],
+      pageLength: 10,
+      lengthMenu: [[10,25,50,-1],[10,25,50,'All']],   // opciones (con “All”)
+      columnDefs: columnDefs,
+      language: {
+        search: "Search:",
+        lengthMenu: "Show _MENU_ threats",             // ← texto como la imagen
+        info: "Showing _START_ to _END_ of _TOTAL_ <strong>threats</strong>",
+        infoEmpty: "Showing 0 to 0 of 0 <strong>threats</strong>",
+        emptyTable: "No threats available",
+        paginate: { first: "First", last: "Last", next: "Next", previous: "Previous" }
+      }
+    });
+  }
+
+  // Click en fila para navegar (sin interferir con botones/enlaces)
+  const tbody = document.querySelector('#themesTable tbody');
+  if (tbody) {
+    tbody.addEventListener('click', function (e) {
+      if (e.target.closest('a,button,.btn')) return;
+      const row = e.target.closest('tr.theme-item');
+      const href = row?.getAttribute('data-href');
+      if (href) window.location = href;
+    });
+  }
+});
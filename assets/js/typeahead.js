@@ -0,0 +1,142 @@
+/* =========================
+   Typeahead para <select data-typeahead="/ajax/...">
+   El select queda oculto (es lo que se envía); un input busca en el
+   endpoint JSON (?q=&limit=&offset=) y al elegir agrega/selecciona la
+   <option> y dispara "change". Opcional:
+     data-typeahead-param="theme_id" + data-typeahead-parent="#id_theme"
+   para filtrar por el valor de otro select.
+   ========================= */
+(function(){
+  const PAGE = 20;
+  const DEBOUNCE_MS = 200;
+
+  function enhance(select){
+    const url = select.dataset.typeahead;
+    const wrap = document.createElement('div');
+    wrap.className = 'position-relative';
+    const input = document.createElement('input');
+    input.type = 'search';
+    input.className = 'form-control';
+    input.autocomplete = 'off';
+    input.placeholder = 'Type to search…';
+    input.required = select.required;
+    const menu = document.createElement('div');
+    menu.className = 'list-group position-absolute w-100 shadow-sm d-none';
+    menu.style.zIndex = 1050;
+    menu.style.maxHeight = '18rem';
+    menu.style.overflowY = 'auto';
+
+    select.required = false;
+    select.classList.add('d-none');
+    select.parentNode.insertBefore(wrap, select);
+    wrap.appendChild(input);
+    wrap.appendChild(menu);
+    wrap.appendChild(select);
+
+    const current = select.options[select.selectedIndex];
+    input.value = current && current.value ? current.textContent.trim() : '';
+
+    let offset = 0, query = '', timer = null, active = -1, request = 0;
+
+    function params(){
+      const p = new URLSearchParams({ q: query, limit: PAGE, offset: offset });
+      const parent = select.dataset.typeaheadParent && document.querySelector(select.dataset.typeaheadParent);
+      if (parent && parent.value) p.set(select.dataset.typeaheadParam, parent.value);
+      return p;
+    }
+
+    function items(){ return Array.from(menu.querySelectorAll('[data-id]')); }
+
+    function highlight(i){
+      const list = items();
+      active = Math.max(-1, Math.min(i, list.length - 1));
+      list.forEach((el, idx) => el.classList.toggle('active', idx === active));
+      if (active >= 0) list[active].scrollIntoView({ block: 'nearest' });
+    }
+
+    function load(append){
+      const ticket = ++request;
+      return fetch(`${url}?${params()}`, { credentials: 'same-origin' })
+        .then(r => r.ok ? r.json() : { results: [], more: false })
+        .then(data => {
+          if (ticket !== request) return;   // llegó tarde: ya se escribió otra cosa
+          const more = menu.querySelector('.typeahead-more');
+          if (more) more.remove();
+          if (!append) { menu.innerHTML = ''; active = -1; }
+          data.results.forEach(row => {
+            const btn = document.createElement('button');
+            btn.type = 'button';
+            btn.className = 'list-group-item list-group-item-action';
+            btn.dataset.id = row.id;
+            btn.textContent = row.text;
+            menu.appendChild(btn);
+          });
+          if (data.more) {
+            const btn = document.createElement('button');
+            btn.type = 'button';
+            btn.className = 'list-group-item list-group-item-action text-muted small typeahead-more';
+            btn.textContent = 'More results…';
+            menu.appendChild(btn);
+          }
+          if (!menu.children.length) {
+            menu.innerHTML = '<div class="list-group-item text-muted small">No matches</div>';
+          }
+          menu.classList.remove('d-none');
+        });
+    }
+
+    function search(){
+      query = input.value.trim();
+      offset = 0;
+      load(false);
+    }
+
+    function choose(el){
+      const id = el.dataset.id;
+      let option = Array.from(select.options).find(o => o.value === id);
+      if (!option) {
+        option = new Option(el.textContent, id);
+        select.appendChild(option);
+      }
+      option.dataset.themeName = el.textContent;
+      select.value = id;
+      input.value = el.textContent;
+      menu.classList.add('d-none');
+      select.dispatchEvent(new Event('change', { bubbles: true }));
+    }
+
+    input.addEventListener('focus', () => { if (!menu.children.length || menu.classList.contains('d-none')) search(); });
+    input.addEventListener('input', () => {
+      if (!input.value.trim() && select.value) {
+        select.value = '';
+        select.dispatchEvent(new Event('change', { bubbles: true }));
+      }
+      clearTimeout(timer);
+      timer = setTimeout(search, DEBOUNCE_MS);
+    });
+    input.addEventListener('keydown', e => {
+      if (e.key === 'ArrowDown') { e.preventDefault(); highlight(active + 1); }
+      else if (e.key === 'ArrowUp') { e.preventDefault(); highlight(active - 1); }
+      else if (e.key === 'Enter' && active >= 0) { e.preventDefault(); choose(items()[active]); }
+      else if (e.key === 'Escape') { menu.classList.add('d-none'); }
+    });
+    // mousedown: elegir antes de que el blur cierre el menú
+    menu.addEventListener('mousedown', e => {
+      const el = e.target.closest('button');
+      if (!el) return;
+      e.preventDefault();
+      if (el.classList.contains('typeahead-more')) { offset += PAGE; load(true); }
+      else choose(el);
+    });
+    input.addEventListener('blur', () => {
+      menu.classList.add('d-none');
+      // texto sin elegir: vuelve a lo seleccionado
+      const opt = select.options[select.selectedIndex];
+      input.value = opt && opt.value ? opt.textContent.trim() : '';
+    });
+  }
+
+  document.addEventListener('DOMContentLoaded', () => {
+    document.querySelectorAll('select[data-typeahead]').forEach(enhance);
+  });
+})();
@@ -5,12 +5,83 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Modo ASGI (alternativa al gunicorn gthread del Procfile):
+
+    gunicorn config.asgi:application -k uvicorn_worker.UvicornWorker \
+        --bind 0.0.0.0:$PORT --workers 3 --timeout 120
+
+o, en un solo proceso para desarrollo:
+
+    uvicorn config.asgi:application --port 8000
+
+Bajo ASGI las lecturas públicas (dashboard, event_list, view_event,
+source_detail, ajax de themes/events) usan tracker/views_async.py
+(ASYNC_VIEWS=True por defecto aquí). Comparar con:
+
+    python manage.py loadtest --url http://127.0.0.1:8000 --pid <pid del server>
+
+Medido (1 vCPU, SQLite, 200 eventos, DEBUG=False, 1 worker, 50 clientes x 15 s):
+
+    ruta                gthread (4 hilos)          uvicorn (ASGI_MAX_REQUESTS=4)
+    /                   5.2 req/s   106 MB         4.8 req/s   140 MB
+    /events/           98.4 req/s   104 MB        76.4 req/s   138 MB
+    /events/<id>/      73.9 req/s   104 MB        71.5 req/s   124 MB
+    /static/...css    825.9 req/s                1854.9 req/s   76 MB
+
+Con páginas que solo gastan CPU ASGI no gana: cada request async paga los
+saltos a hilo de Django. Gana en estáticos, en /live/ (una corrutina por
+conexión en vez de un hilo) y cuando las vistas esperan red (BD o storage
+remotos). Sin tope (ASGI_MAX_REQUESTS alto) entran los 50 requests a la vez,
+cada uno con su hilo: el RSS llega a ~300 MB y el rendimiento no mejora.
 """
 
+import asyncio
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+os.environ.setdefault('ASYNC_VIEWS', 'True')
+os.environ['ASGI_MODE'] = 'True'   # settings saca WhiteNoise de MIDDLEWARE; /static/ lo atiende el handler
+
+
+class TrackerASGIHandler(ASGIHandler):
+    """
+    Las conexiones SSE de /live/ (tracker/live.py) quedan abiertas horas. Sin
+    ThreadSensitiveContext no reservan un hilo cada una mientras dura el
+    stream; lo poco de middleware sync que corre al conectar usa el hilo sync
+    compartido del proceso.
+
+    /static/ se sirve antes de entrar a Django (tracker/asgi_static.py).
+
+    El resto de requests entra a Django con un tope de ASGI_MAX_REQUESTS
+    simultáneos (default 4, como los hilos de gthread); los demás esperan en el
+    loop sin hilo ni memoria de render. /live/ y /static/ no ocupan cupo.
+    """
+
+    def __init__(self):
+        super().__init__()
+        from django.urls import reverse
+        from tracker.asgi_static import StaticFilesASGI
+        self.live_path = reverse("live_stream")
+        self.static = StaticFilesASGI()
+        self.slots = asyncio.Semaphore(int(os.environ.get("ASGI_MAX_REQUESTS", "4")))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            static_file = self.static.find(scope["path"])
+            if static_file is not None:
+                await self.static.serve(static_file, scope, send)
+                return
+        if scope["type"] == "http" and scope["path"] == self.live_path:
+            await self.handle(scope, receive, send)
+        else:
+            async with self.slots:
+                await super().__call__(scope, receive, send)
+
 
-application = get_asgi_application()
+# Igual que get_asgi_application(), con el handler de arriba
+django.setup(set_prefix=False)
+application = TrackerASGIHandler()
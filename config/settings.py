@@ -11,6 +11,7 @@ import os
 from pathlib import Path
 from django.conf import settings
 import sys
+import tempfile
 
 try:
     import dj_database_url
@@ -91,19 +92,35 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    'tracker.metrics.QueryMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tracker.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'tracker.audit.AuditMiddleware',
+    'tracker.changefeed.ChangeFeedMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Bajo ASGI (config/asgi.py pone ASGI_MODE=True) /static/ lo sirve el handler
+# (tracker/asgi_static.py): WhiteNoiseMiddleware es solo sync y haría que Django
+# adapte toda la cadena, vistas async incluidas, a un hilo por request.
+ASGI_MODE = os.getenv("ASGI_MODE", "False").lower() == "true"
+if ASGI_MODE:
+    MIDDLEWARE.remove("whitenoise.middleware.WhiteNoiseMiddleware")
+
 # =========================
 # URLs / WSGI
 # =========================
 ROOT_URLCONF = 'config.urls'
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
+
+# Vistas públicas de lectura async (tracker/views_async.py). config/asgi.py lo
+# activa por defecto; bajo WSGI conviene dejarlo apagado.
+ASYNC_VIEWS = os.getenv("ASYNC_VIEWS", "False").lower() == "true"
 
 # =========================
 # Templates
@@ -118,6 +135,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'tracker.live.context_processor',
             ],
         },
     },
@@ -146,6 +164,163 @@ else:
         }
     }
 
+# Réplicas de lectura (tracker/db_router.py): URLs separadas por coma.
+# Local: REPLICA_DATABASE_URLS=sqlite:///replica.sqlite3 (copia de db.sqlite3)
+REPLICA_DATABASE_URLS = csv_env("REPLICA_DATABASE_URLS", "")
+for _i, _url in enumerate(REPLICA_DATABASE_URLS):
+    DATABASES[f"replica{_i}"] = dj_database_url.parse(
+        _url,
+        conn_max_age=600,
+        ssl_require=_url.startswith("postgres"),
+    )
+    DATABASES[f"replica{_i}"]["TEST"] = {"MIRROR": "default"}
+
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "30"))
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "10"))
+# Pin tras escribir (leer lo propio); nunca menos que REPLICA_MAX_LAG_SECONDS
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "30"))
+REPLICA_PIN_COOKIE = "db_pin"
+# Vistas (nombres de URL) que pueden leer de réplica: las públicas de solo lectura
+REPLICA_READ_VIEWS = ("dashboard", "theme_list_all", "event_list", "view_event", "source_detail")
+
+if REPLICA_DATABASE_URLS:
+    DATABASE_ROUTERS = ["tracker.db_router.ReplicaRouter"]
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.contrib.sessions.middleware.SessionMiddleware'),
+        'tracker.db_router.ReplicaRoutingMiddleware',
+    )
+
+# Pool de conexiones (métricas en tracker/db.py:pool_stats).
+# Postgres: pool de psycopg por proceso (reemplaza conn_max_age); dimensionarlo
+# a los threads del worker (gunicorn --threads 4).
+# MSSQL: mssql-django no tiene pool propio. Con gthread cada hilo conserva su
+# conexión (CONN_MAX_AGE = DB_POOL_MAX_LIFETIME, validada con CONN_HEALTH_CHECKS):
+# a lo sumo --threads conexiones por worker, como el pool de Postgres. Bajo ASGI
+# cada request corre en un hilo nuevo y una conexión persistente quedaría
+# huérfana, así que ahí CONN_MAX_AGE=0 y reutiliza el pooling del driver
+# manager ODBC (pyodbc.pooling, activo por defecto; CPTimeout en odbcinst.ini).
+# DB_POOL=False apaga el pooling ODBC y deja el conn_max_age de DATABASE_URL.
+DB_POOL = os.getenv("DB_POOL", "True").lower() == "true"
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "4"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))         # espera máx. por una conexión
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+MSSQL_ODBC_POOLING = DB_POOL
+
+for _alias, _db in DATABASES.items():
+    _db["CONN_HEALTH_CHECKS"] = True
+    if not DB_POOL:
+        continue
+    if _db["ENGINE"] == "django.db.backends.postgresql":
+        from psycopg_pool import ConnectionPool
+
+        _db["CONN_MAX_AGE"] = 0
+        _db.setdefault("OPTIONS", {})["pool"] = {
+            "name": f"tracker-{_alias}",
+            "min_size": DB_POOL_MIN_SIZE,
+            "max_size": DB_POOL_MAX_SIZE,
+            "timeout": DB_POOL_TIMEOUT,
+            "max_idle": DB_POOL_MAX_IDLE,
+            "max_lifetime": DB_POOL_MAX_LIFETIME,
+            "check": ConnectionPool.check_connection,   # valida antes de entregar
+        }
+    elif "sql_server" in _db["ENGINE"] or "mssql" in _db["ENGINE"]:
+        _db["CONN_MAX_AGE"] = 0 if ASGI_MODE else int(DB_POOL_MAX_LIFETIME)
+        _db.setdefault("OPTIONS", {}).update({
+            "connection_timeout": int(DB_POOL_TIMEOUT),
+            "connection_retries": 3,
+        })
+
+# =========================
+# Cache (tracker/cache.py)
+# =========================
+# LRU en memoria por proceso delante de un cache compartido entre workers:
+# Redis si REDIS_URL está definido; si no, archivos en CACHE_DIR.
+REDIS_URL = os.getenv("REDIS_URL", "").strip()
+
+if REDIS_URL:
+    SHARED_CACHE = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+    }
+else:
+    SHARED_CACHE = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("CACHE_DIR", os.path.join(tempfile.gettempdir(), "tracker-cache")),
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    }
+
+CACHES = {
+    "default": {
+        "BACKEND": "tracker.cache.TwoTierCache",
+        "LOCATION": "shared",
+        "TIMEOUT": 300,
+        "OPTIONS": {
+            "LOCAL_MAX_ENTRIES": int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", "1000")),
+            "LOCAL_TIMEOUT": float(os.getenv("CACHE_LOCAL_TIMEOUT", "5")),
+        },
+    },
+    "shared": SHARED_CACHE,
+    # Fragmentos por fila de event_list / theme_list (tracker/templatetags/row_cache.py):
+    # miles de entradas chicas. En Redis se comparten; FileBasedCache revisa el
+    # directorio en cada escritura, así que sin Redis quedan en memoria del proceso.
+    "fragments": SHARED_CACHE if REDIS_URL else {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "tracker-fragments",
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("ROW_CACHE_MAX_ENTRIES", "50000"))},
+    },
+}
+
+# La llave de cada fila lleva su versión, así que el TTL solo acota el espacio.
+ROW_CACHE_TIMEOUT = int(os.getenv("ROW_CACHE_TIMEOUT", str(24 * 3600)))
+
+# =========================
+# Exportaciones (tracker/exports.py)
+# =========================
+# Eventos leídos por bloque con iterator(); la respuesta sale en streaming
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+
+# =========================
+# API de lectura (tracker/api.py)
+# =========================
+# ?limit= por página (cursor sobre índices: el costo no depende de la página)
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "100"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "1000"))
+
+# Feed de cambios (tracker/changefeed.py): las entradas más nuevas que esto no
+# se entregan todavía (un id menor podría estar sin confirmar en otro proceso)
+CHANGE_FEED_SETTLE_SECONDS = float(os.getenv("CHANGE_FEED_SETTLE_SECONDS", "2"))
+# compact_changefeed deja una sola entrada por objeto en lo anterior a esto
+CHANGE_FEED_COMPACT_AFTER_DAYS = int(os.getenv("CHANGE_FEED_COMPACT_AFTER_DAYS", "7"))
+
+# =========================
+# Typeahead de Threat/Event (ajax/themes/, ajax/events/)
+# =========================
+TYPEAHEAD_PAGE_SIZE = int(os.getenv("TYPEAHEAD_PAGE_SIZE", "20"))
+TYPEAHEAD_MAX_PAGE_SIZE = int(os.getenv("TYPEAHEAD_MAX_PAGE_SIZE", "100"))
+# Cache corto por (padre, texto, página); los signals lo invalidan antes por tag
+TYPEAHEAD_CACHE_SECONDS = int(os.getenv("TYPEAHEAD_CACHE_SECONDS", "30"))
+# Desde este largo también busca "contiene" (trigramas en Postgres)
+TYPEAHEAD_INFIX_MIN_CHARS = int(os.getenv("TYPEAHEAD_INFIX_MIN_CHARS", "3"))
+
+# =========================
+# Actualizaciones en vivo (tracker/live.py, SSE)
+# =========================
+# Requiere ASGI (cada conexión abierta es una tarea del event loop); bajo
+# WSGI ocuparía un hilo por pestaña, por eso sigue a ASYNC_VIEWS.
+LIVE_UPDATES = os.getenv("LIVE_UPDATES", str(ASYNC_VIEWS)).lower() == "true"
+# Un solo watcher por proceso lee el feed de cambios cada tanto
+LIVE_POLL_SECONDS = float(os.getenv("LIVE_POLL_SECONDS", "1"))
+LIVE_HEARTBEAT_SECONDS = float(os.getenv("LIVE_HEARTBEAT_SECONDS", "25"))
+LIVE_RETRY_MS = int(os.getenv("LIVE_RETRY_MS", "5000"))
+# Más cambios que esto en una lectura (imports, archivados masivos) -> "reload"
+LIVE_MAX_BATCH = int(os.getenv("LIVE_MAX_BATCH", "200"))
+# Mensajes pendientes por conexión antes de descartarlos y pedir "reload"
+LIVE_QUEUE_SIZE = int(os.getenv("LIVE_QUEUE_SIZE", "100"))
+# Últimos avisos que se reenvían al reconectar con Last-Event-ID
+LIVE_REPLAY_SIZE = int(os.getenv("LIVE_REPLAY_SIZE", "2000"))
+
 # =========================
 # Password validation
 # =========================
@@ -156,6 +331,25 @@ AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',},
 ]
 
+# =========================
+# Authentication
+# =========================
+# Login por email o username en una sola consulta indexada (ver tracker/backends.py)
+AUTHENTICATION_BACKENDS = [
+    "tracker.backends.EmailOrUsernameModelBackend",
+]
+
+# Costo de PBKDF2; los hashes más viejos se regeneran al costo actual en el login
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "0")) or None
+PASSWORD_HASHERS = [
+    "tracker.hashers.ConfigurablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
 # =========================
 # i18n / tz
 # =========================
@@ -171,8 +365,19 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]  # your app's /static
 STATIC_ROOT = BASE_DIR / "staticfiles"                 # required for collectstatic
-# WhiteNoise for serving static files
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# WhiteNoise for serving static files. Django 5.1+ ignora STATICFILES_STORAGE: va en STORAGES.
+# collectstatic agrega el hash del contenido al nombre y precomprime .gz y .br (si está
+# instalado Brotli); WhiteNoise sirve los nombres con hash como "immutable".
+# Los bundles de static/dist/ se generan con `python manage.py build_assets` (tracker/assets.py).
+# Con DEBUG o en `manage.py test` no se exige el manifest (no hace falta collectstatic).
+TESTING = sys.argv[1:2] == ["test"]
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage" if DEBUG or TESTING
+        else "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
 
 # Media
 MEDIA_URL = '/media/'
@@ -203,6 +408,38 @@ MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
 VALID_FILE_EXTENSIONS = ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx']
 FILE_UPLOAD_ALLOWED_EXTENSIONS = ['.pdf', '.doc', '.docx', '.xls', '.xlsx']
 
+# =========================
+# Access log (tracker/accesslog.py)
+# =========================
+# El login se escribe en línea; los logouts se encolan y un hilo por worker los escribe en lote
+ACCESS_LOG_BUFFERED = os.getenv("ACCESS_LOG_BUFFERED", "True").lower() == "true"
+ACCESS_LOG_FLUSH_SECONDS = float(os.getenv("ACCESS_LOG_FLUSH_SECONDS", "2"))
+ACCESS_LOG_MAX_PENDING = int(os.getenv("ACCESS_LOG_MAX_PENDING", "200"))
+
+# =========================
+# Métricas por vista (tracker/metrics.py)
+# =========================
+# Presupuesto por request; al superarlo se registra un warning con la consulta
+# más repetida. Overrides por url_name: QUERY_BUDGETS = {"dashboard": {"queries": 10}}
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "30"))
+QUERY_BUDGET_DB_MS = float(os.getenv("QUERY_BUDGET_DB_MS", "500"))
+QUERY_BUDGET_DUPLICATES = int(os.getenv("QUERY_BUDGET_DUPLICATES", "5"))
+QUERY_BUDGETS = {}
+# Tiempo de render por request (envuelve Template.render al arrancar)
+METRICS_RENDER_TIMING = os.getenv("METRICS_RENDER_TIMING", "True").lower() == "true"
+# /metrics: staff logueado o "Authorization: Bearer <METRICS_TOKEN>" (scraper)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+# =========================
+# Profiling (tracker/profiling.py)
+# =========================
+# Superuser: header "X-Profile: 1" o ?_profile=1. Además, muestreo aleatorio.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "tracker-profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "200"))
+PROFILE_QUERY_PARAM = "_profile"
+
 # =========================
 # Defaults
 # =========================
@@ -0,0 +1,24 @@
+function updateCharCount(input){const charCount=input.value.length;const maxLength=input.getAttribute('maxlength')||30;const counter=document.getElementById('name-char-count');if(!counter)return;counter.textContent=charCount;counter.classList.toggle('text-warning',charCount>maxLength*0.8&&charCount<maxLength);counter.classList.toggle('text-danger',charCount>=maxLength);if(charCount<=maxLength*0.8)counter.classList.add('text-muted');}
+function scrollToError(target,fallbackFocusable){if(!target)return;target.classList.add('shake');target.scrollIntoView({behavior:'smooth',block:'center',inline:'nearest'});setTimeout(()=>target.classList.remove('shake'),500);const focusEl=(target.matches('input,select,textarea,button,[tabindex]')?target:target.querySelector('input,select,textarea,button,[tabindex]')||fallbackFocusable||null);try{focusEl&&focusEl.focus({preventScroll:true});}catch(e){}}
+function validateName(){const input=document.getElementById('name');const v=(input.value||'').trim();if(!v||v.length<3){input.setCustomValidity('invalid');}
+else{input.setCustomValidity('');}
+return input.checkValidity();}
+function setupLOBLogic(){const allCb=document.querySelector('input[name="impacted_lines"][value="All"]');if(!allCb)return;const cbs=Array.from(document.querySelectorAll('input[name="impacted_lines"]'));const EXEMPT_VALUES=['Evaluation in progress'];const exempt=cbs.filter(cb=>EXEMPT_VALUES.includes(cb.value));const targets=cbs.filter(cb=>cb.value!=='All'&&!EXEMPT_VALUES.includes(cb.value));function applyAllState(checked){targets.forEach(cb=>{cb.checked=checked;cb.disabled=checked;});exempt.forEach(cb=>{if(checked){cb.checked=false;cb.disabled=true;}else{cb.disabled=false;}});}
+function syncAllState(){const allChecked=targets.length>0&&targets.every(cb=>cb.checked);allCb.checked=allChecked;targets.forEach(cb=>cb.disabled=allChecked);exempt.forEach(cb=>{if(allChecked){cb.checked=false;cb.disabled=true;}else{cb.disabled=false;}});}
+allCb.addEventListener('change',()=>applyAllState(allCb.checked));targets.forEach(cb=>cb.addEventListener('change',syncAllState));exempt.forEach(cb=>cb.addEventListener('change',()=>{if(allCb.checked){cb.checked=false;}}));if(allCb.checked)applyAllState(true);else syncAllState();}
+function enhanceTaxonomyScroll(){const sections=document.querySelectorAll('.taxonomy-section');sections.forEach(section=>{const box=section.querySelector('.taxonomy-container');const checks=box.querySelectorAll('input[type="checkbox"]');checks.forEach(chk=>{chk.addEventListener('change',function(){updateSelectedOptions(section);updateCounts(section);if(this.checked){setTimeout(()=>this.closest('.form-check').scrollIntoView({behavior:'smooth',block:'center'}),80);}});});updateCounts(section);updateSelectedOptions(section);});}
+function updateCounts(section){const box=section.querySelector('.taxonomy-container');const checks=box.querySelectorAll('input[type="checkbox"]');const checked=box.querySelectorAll('input[type="checkbox"]:checked');const countEl=section.querySelector('.taxonomy-count');if(countEl)countEl.textContent=`${checked.length}/${checks.length}`;section.querySelectorAll('.taxonomy-group').forEach(g=>{const cAll=g.querySelectorAll('input[type="checkbox"]');const cSel=g.querySelectorAll('input[type="checkbox"]:checked');const gc=g.querySelector('.option-count');if(gc)gc.textContent=`${cSel.length}/${cAll.length}`;});}
+function updateSelectedOptions(section){const box=section.querySelector('.taxonomy-container');const chips=section.querySelector('.selected-options');const checks=box.querySelectorAll('input[type="checkbox"]:checked');chips.innerHTML='';checks.forEach(chk=>{const label=chk.closest('.form-check').querySelector('label');const div=document.createElement('div');div.className='selected-item';div.textContent=label.textContent;chips.appendChild(div);});chips.style.display=checks.length>0?'block':'none';}
+function setupRiskTiles(){const tiles=document.querySelectorAll('.risk-item');const select=document.getElementById('risk_rating');const error=document.getElementById('risk-error');const tilesBox=document.getElementById('risk-tiles');function choose(val){tiles.forEach(t=>t.classList.remove('selected'));const tile=document.querySelector(`.risk-item[data-value="${val}"]`);if(tile){tile.classList.add('selected');}
+select.value=val;select.setCustomValidity('');error.style.display='none';tilesBox.classList.remove('risk-tiles-invalid');tilesBox.setAttribute('aria-invalid','false');}
+tiles.forEach(t=>{t.addEventListener('click',()=>choose(t.getAttribute('data-value')));t.addEventListener('keydown',ev=>{if(ev.key==='Enter'||ev.key===' '){ev.preventDefault();t.click();}});});if(select.value){const initial=document.querySelector(`.risk-item[data-value="${select.value}"]`);initial&&initial.classList.add('selected');}}
+function validateDateNotFuture(){const input=document.getElementById('date_identified');if(!input)return true;const today=new Date().toISOString().split('T')[0];input.setAttribute('max',today);if(input.value&&input.value>today){input.setCustomValidity('Date cannot be in the future');}else{input.setCustomValidity('');}
+return input.checkValidity();}
+function validateTaxonomy(){let ok=true;[{boxId:'taxonomy-lv1-container',errId:'lv1-error'},{boxId:'lv2-options',errId:'lv2-error'},{boxId:'lv3-options',errId:'lv3-error'}].forEach(({boxId,errId})=>{const box=document.getElementById(boxId);const err=document.getElementById(errId);const section=err.closest('.taxonomy-section');const anyChecked=!!box.querySelector('input[type="checkbox"]:checked');if(!anyChecked){ok=false;err.style.display='block';section.classList.add('is-invalid');section.setAttribute('aria-invalid','true');}else{err.style.display='none';section.classList.remove('is-invalid');section.removeAttribute('aria-invalid');}});return ok;}
+function validateRisk(){const select=document.getElementById('risk_rating');const error=document.getElementById('risk-error');const tilesBox=document.getElementById('risk-tiles');const valid=!!select.value;if(!valid){select.setCustomValidity('Please select a risk rating');error.style.display='block';tilesBox.classList.add('risk-tiles-invalid');tilesBox.setAttribute('aria-invalid','true');}else{select.setCustomValidity('');error.style.display='none';tilesBox.classList.remove('risk-tiles-invalid');tilesBox.setAttribute('aria-invalid','false');}
+return valid;}
+function firstInvalidTarget(){const nativeInvalid=document.querySelector('input:invalid, select:invalid, textarea:invalid');if(nativeInvalid)return nativeInvalid;if(!document.getElementById('risk_rating').value)return document.getElementById('risk-tiles');const badTax=document.querySelector('.taxonomy-section.is-invalid');if(badTax)return badTax;return null;}
+(function(){'use strict';const forms=document.querySelectorAll('.needs-validation');Array.prototype.slice.call(forms).forEach(function(form){form.addEventListener('submit',function(e){const nameOk=validateName();const dateOk=validateDateNotFuture();const taxOk=validateTaxonomy();const riskOk=validateRisk();if(!form.checkValidity()||!nameOk||!dateOk||!taxOk||!riskOk){e.preventDefault();e.stopPropagation();form.classList.add('was-validated');const target=firstInvalidTarget();if(target){const fallback=target.querySelector('input[type="checkbox"]');scrollToError(target,fallback);}
+return false;}},false);});const nameInput=document.getElementById('name');if(nameInput){nameInput.addEventListener('input',function(){updateCharCount(this);validateName();});updateCharCount(nameInput);}
+const dateInput=document.getElementById('date_identified');if(dateInput){const today=new Date().toISOString().split('T')[0];dateInput.setAttribute('max',today);dateInput.addEventListener('input',validateDateNotFuture);}
+setupLOBLogic();enhanceTaxonomyScroll();setupRiskTiles();setTimeout(()=>{document.querySelectorAll('input[type="checkbox"]:checked').forEach(opt=>{const section=opt.closest('.taxonomy-section');if(section){setTimeout(()=>{opt.closest('.form-check').scrollIntoView({behavior:'smooth',block:'center'});},250);}});},400);})();
@@ -0,0 +1,30 @@
+window.TrackerLive=(function(){const opts=document.currentScript?document.currentScript.dataset:{};const handlers=[];let chain=Promise.resolve();let notice=null;function on(fn){handlers.push(fn);}
+function showReload(message){if(notice)return;notice=document.createElement('div');notice.className='alert alert-info shadow position-fixed bottom-0 end-0 m-3 d-flex align-items-center gap-2';notice.style.zIndex=1080;notice.innerHTML='<span></span><button type="button" class="btn btn-sm btn-primary">Reload</button>';notice.querySelector('span').textContent=message||'This page has updates.';notice.querySelector('button').addEventListener('click',()=>window.location.reload());document.body.appendChild(notice);}
+function fragment(kind,pk,params){const url=new URL(`${opts.liveUrl}${kind}/${pk}/`,window.location.href);if(params)params.forEach((value,key)=>url.searchParams.set(key,value));return fetch(url,{credentials:'same-origin'}).then(r=>{if(r.status===200)return r.text();if(r.status===204||r.status===404)return null;throw new Error(`live fragment ${r.status}`);});}
+function toElement(html){const tpl=document.createElement('template');tpl.innerHTML=html.trim();return tpl.content.firstElementChild;}
+function dispatch(change){handlers.forEach(fn=>{chain=chain.then(()=>fn(change)).catch(()=>showReload());});}
+function connect(){if(!opts.liveUrl||!opts.liveTopics||!window.EventSource)return;const url=new URL(opts.liveUrl,window.location.href);url.searchParams.set('topic',opts.liveTopics);const source=new EventSource(url);source.addEventListener('change',e=>dispatch(JSON.parse(e.data)));source.addEventListener('reload',()=>showReload());}
+document.addEventListener('DOMContentLoaded',connect);return{on,fragment,toElement,showReload};})();;$(function(){const $table=$('#themesTable');const dt=$table.DataTable({dom:'lfrtip',autoWidth:false,columnDefs:[{targets:0,width:'42%',className:'col-name'},{targets:1,width:'22%',className:'col-category'},{targets:2,width:'18%',className:'col-date'},{targets:3,width:'18%',className:'col-risk'}],order:[[2,'desc']],lengthMenu:[[5,10,20,-1],[5,10,20,'All']],pageLength:5,language:{emptyTable:'No threats available',info:'Showing _START_ to _END_ of _TOTAL_ threats',infoEmpty:'Showing 0 to 0 of 0 threats',infoFiltered:'(filtered from _MAX_ total threats)',lengthMenu:'Show _MENU_ threats',search:'Search threats:',paginate:{first:'First',last:'Last',next:'Next',previous:'Previous'}}});function fixThreatsBars(){const $wrap=$('#themesTable_wrapper');const $len=$wrap.find('.dataTables_length');const $fil=$wrap.find('.dataTables_filter');if($len.length&&$fil.length&&!$len.parent().hasClass('dt-top-flex')&&!$fil.parent().hasClass('dt-top-flex')){const $topFlex=$('<div class="dt-top-flex"></div>');$topFlex.insertBefore($wrap.find('table').first());$topFlex.append($len).append($fil);}
+const $info=$wrap.find('.dataTables_info');const $pag=$wrap.find('.dataTables_paginate');if($info.length&&$pag.length&&!$info.parent().hasClass('dt-bottom-flex')&&!$pag.parent().hasClass('dt-bottom-flex')){const $bottomFlex=$('<div class="dt-bottom-flex"></div>');const $after=$wrap.find('.dataTables_scroll').length?$wrap.find('.dataTables_scroll'):$wrap.find('table').last();$bottomFlex.insertAfter($after);$bottomFlex.append($info).append($pag);}}
+dt.on('init.dt draw.dt',fixThreatsBars);fixThreatsBars();$table.on('click','tbody tr',function(e){if($(e.target).closest('a,button,.btn').length)return;const href=$(this).attr('data-href');if(href)window.location=href;});});document.addEventListener('DOMContentLoaded',function(){const eventSearch=document.getElementById('eventSearch');let eventItems=Array.from(document.querySelectorAll('.event-item'));const eventsAccordion=document.getElementById('eventsAccordion');const showSelect=document.getElementById('eventShowCount');const pager=document.getElementById('eventsPagination');const countText=document.getElementById('eventsCountText');let currentSort='name';let sortAscending=true;let currentPage=1;function getPageSize(){const v=showSelect.value;return v==='all'?Infinity:parseInt(v,10);}
+function visibleItems(){return eventItems.filter(el=>!el.classList.contains('filtered-out'));}
+function renderPagination(total,pageSize){if(!total){countText.textContent='No events';pager.innerHTML='';return;}
+if(!isFinite(pageSize)||total<=pageSize){countText.textContent=`Showing 1 to ${total} of ${total} events`;pager.innerHTML='';return;}
+const totalPages=Math.max(1,Math.ceil(total/pageSize));currentPage=Math.min(currentPage,totalPages);const makePage=(label,page,disabled=false,active=false)=>(`<li class="page-item ${disabled?'disabled':''} ${active?'active':''}">
+         <a class="page-link" href="#" data-page="${page}">${label}</a>
+       </li>`);let html='';html+=makePage('Previous',currentPage-1,currentPage===1);for(let p=1;p<=totalPages;p++){html+=makePage(p,p,false,p===currentPage);}
+html+=makePage('Next',currentPage+1,currentPage===totalPages);pager.innerHTML=html;const start=(currentPage-1)*pageSize+1;const end=Math.min(currentPage*pageSize,total);countText.textContent=`Showing ${start} to ${end} of ${total} events`;}
+function applyShowPage(){const pageSize=getPageSize();const vis=visibleItems();const total=vis.length;if(!isFinite(pageSize)){vis.forEach(el=>el.classList.remove('hidden'));renderPagination(total,pageSize);return;}
+const startIdx=(currentPage-1)*pageSize;const endIdx=startIdx+pageSize;vis.forEach((el,idx)=>{if(idx>=startIdx&&idx<endIdx)el.classList.remove('hidden');else el.classList.add('hidden');});renderPagination(total,pageSize);}
+function searchEvents(){const term=(eventSearch.value||'').toLowerCase().trim();eventItems.forEach(item=>{const text=item.textContent.toLowerCase();const name=item.getAttribute('data-name')||'';const match=!term||name.includes(term)||text.includes(term);item.classList.toggle('filtered-out',!match);item.classList.toggle('highlight',!!term&&match);});currentPage=1;applyShowPage();}
+function sortEvents(sortBy,ascending){const items=visibleItems().slice();items.sort((a,b)=>{let av,bv;if(sortBy==='name'){av=a.getAttribute('data-name')||'';bv=b.getAttribute('data-name')||'';}
+else if(sortBy==='date'){av=a.getAttribute('data-date')||'00000000';bv=b.getAttribute('data-date')||'00000000';}
+else if(sortBy==='risk'){const order={critical:0,high:1,medium:2,low:3};av=order[a.getAttribute('data-risk')]??9;bv=order[b.getAttribute('data-risk')]??9;}else{av=a.getAttribute('data-name')||'';bv=b.getAttribute('data-name')||'';}
+if(av<bv)return ascending?-1:1;if(av>bv)return ascending?1:-1;return 0;});items.forEach(it=>eventsAccordion.appendChild(it));currentPage=1;applyShowPage();}
+eventSearch.addEventListener('input',()=>{searchEvents();sortEvents(currentSort,sortAscending);});document.querySelectorAll('.sort-event').forEach(btn=>{btn.addEventListener('click',function(){const sortBy=this.getAttribute('data-sort');if(sortBy===currentSort)sortAscending=!sortAscending;else{currentSort=sortBy;sortAscending=true;}
+document.querySelectorAll('.sort-event').forEach(b=>b.classList.remove('active'));this.classList.add('active');sortEvents(currentSort,sortAscending);});});showSelect.addEventListener('change',()=>{currentPage=1;applyShowPage();});document.getElementById('eventsPagination').addEventListener('click',function(e){const a=e.target.closest('a.page-link');if(!a)return;e.preventDefault();const page=parseInt(a.dataset.page,10);if(!isNaN(page)){currentPage=Math.max(1,page);applyShowPage();}});searchEvents();sortEvents(currentSort,true);document.getElementById('eventsAccordion').classList.remove('init-limit');document.addEventListener('live:events',function(){const page=currentPage;eventItems=Array.from(document.querySelectorAll('.event-item'));searchEvents();sortEvents(currentSort,sortAscending);currentPage=page;applyShowPage();});});document.addEventListener('click',function(e){const card=e.target.closest('.source-card[data-source-url]');if(!card||e.target.closest('a, button, .badge, i'))return;const url=card.getAttribute('data-source-url');if(url)window.location.href=url;});if(window.TrackerLive){function patchTheme(change){const dt=$('#themesTable').DataTable();const current=dt.rows((idx,data,node)=>node.getAttribute('data-theme-id')===String(change.id));if(change.action==='delete'){current.remove().draw(false);return;}
+return TrackerLive.fragment('dashboard-theme',change.id).then(html=>{current.remove();if(html)dt.row.add(TrackerLive.toElement(html));dt.draw(false);});}
+function patchEvent(eventId,removed,onlyIfShown){const accordion=document.getElementById('eventsAccordion');const current=accordion.querySelector(`.event-item[data-event-id="${eventId}"]`);if(onlyIfShown&&!current)return;const load=removed?Promise.resolve(null):TrackerLive.fragment('dashboard-event',eventId);return load.then(html=>{const item=html?TrackerLive.toElement(html):null;if(item&&current){const open=current.querySelector('.accordion-collapse.show');if(open){item.querySelector('.accordion-collapse').classList.add('show');item.querySelector('.accordion-button').classList.remove('collapsed');}
+current.replaceWith(item);}else if(item){accordion.prepend(item);}else if(current){current.remove();}
+document.dispatchEvent(new CustomEvent('live:events'));});}
+TrackerLive.on(function(change){if(change.type==='theme')return patchTheme(change);if(change.type==='event')return patchEvent(change.id,change.action==='delete',false);if(change.type==='source'&&change.parent)return patchEvent(change.parent,false,true);});}
@@ -0,0 +1,18 @@
+window.TrackerLive=(function(){const opts=document.currentScript?document.currentScript.dataset:{};const handlers=[];let chain=Promise.resolve();let notice=null;function on(fn){handlers.push(fn);}
+function showReload(message){if(notice)return;notice=document.createElement('div');notice.className='alert alert-info shadow position-fixed bottom-0 end-0 m-3 d-flex align-items-center gap-2';notice.style.zIndex=1080;notice.innerHTML='<span></span><button type="button" class="btn btn-sm btn-primary">Reload</button>';notice.querySelector('span').textContent=message||'This page has updates.';notice.querySelector('button').addEventListener('click',()=>window.location.reload());document.body.appendChild(notice);}
+function fragment(kind,pk,params){const url=new URL(`${opts.liveUrl}${kind}/${pk}/`,window.location.href);if(params)params.forEach((value,key)=>url.searchParams.set(key,value));return fetch(url,{credentials:'same-origin'}).then(r=>{if(r.status===200)return r.text();if(r.status===204||r.status===404)return null;throw new Error(`live fragment ${r.status}`);});}
+function toElement(html){const tpl=document.createElement('template');tpl.innerHTML=html.trim();return tpl.content.firstElementChild;}
+function dispatch(change){handlers.forEach(fn=>{chain=chain.then(()=>fn(change)).catch(()=>showReload());});}
+function connect(){if(!opts.liveUrl||!opts.liveTopics||!window.EventSource)return;const url=new URL(opts.liveUrl,window.location.href);url.searchParams.set('topic',opts.liveTopics);const source=new EventSource(url);source.addEventListener('change',e=>dispatch(JSON.parse(e.data)));source.addEventListener('reload',()=>showReload());}
+document.addEventListener('DOMContentLoaded',connect);return{on,fragment,toElement,showReload};})();;const EVENT_DETAIL_OPTIONS=document.currentScript.dataset;const SHOW_SOURCE_ACTIONS=EVENT_DETAIL_OPTIONS.showActions==='true';document.addEventListener('click',function(e){const row=e.target.closest('#sourcesTable tbody tr[data-href]');if(!row||e.target.closest('a,button,.btn,form'))return;window.location=row.getAttribute('data-href');});document.addEventListener('DOMContentLoaded',function(){const sel=document.getElementById('sourceTypeSelect');const chk=document.getElementById('showArchived');function go(){const u=new URL(window.location.href);if(sel&&sel.value&&sel.value!=='ALL')u.searchParams.set('source_type',sel.value);else u.searchParams.delete('source_type');if(chk&&chk.checked)u.searchParams.set('show_archived','1');else u.searchParams.delete('show_archived');u.hash='sources';window.location=u.toString();}
+sel&&sel.addEventListener('change',go);chk&&chk.addEventListener('change',go);});if(window.jQuery&&$.fn.DataTable){$(function(){const columnDefs=[];if(SHOW_SOURCE_ACTIONS){columnDefs.push({targets:-1,orderable:false,searchable:false,className:'no-sort'});}
+$('#sourcesTable').DataTable({order:[[2,'desc']],pageLength:10,lengthMenu:[[10,20,50,-1],[10,20,50,'All']],columnDefs:columnDefs,language:{emptyTable:'No sources available',info:'Showing _START_ to _END_ of _TOTAL_ <strong>sources</strong>',infoEmpty:'Showing 0 to 0 of 0 <strong>sources</strong>',infoFiltered:'(filtered from _MAX_ total sources)',lengthMenu:'Show _MENU_ <strong>sources</strong>',search:'Search sources:',paginate:{first:'First',last:'Last',next:'Next',previous:'Previous'}}});$('#sourcesTable_wrapper').find('.dataTables_filter').addClass('ms-auto');});}
+if(window.TrackerLive){const SUMMARY_FIELDS=['theme','date_identified','risk_rating','status','is_active'];function memberIds(node){return(node.getAttribute('data-sources')||'').trim().split(/\s+/).filter(Boolean);}
+function pageFilters(){const params=new URLSearchParams(window.location.search);const out=new URLSearchParams();['show_archived','source_type'].forEach(k=>{if(params.get(k))out.set(k,params.get(k));});return out;}
+function updateCount(dt){const n=dt.rows().count();document.querySelectorAll('[data-bundle-count]').forEach(el=>{el.textContent=n;});document.querySelectorAll('[data-bundle-count-label]').forEach(el=>{el.textContent=`${n} ${n === 1 ? 'source' : 'sources'}`;});}
+function patchSummary(change){if(change.action==='delete'){TrackerLive.showReload('This event was deleted.');return;}
+if((change.fields||[]).some(f=>!SUMMARY_FIELDS.includes(f))){TrackerLive.showReload('This event was edited.');}
+return TrackerLive.fragment('event-summary',change.id).then(html=>{const current=document.getElementById('event-summary');if(html&&current)current.replaceWith(TrackerLive.toElement(html));});}
+function patchBundle(dt,sourceId){sourceId=String(sourceId);return TrackerLive.fragment('source-bundle',sourceId,pageFilters()).then(html=>{const row=html?TrackerLive.toElement(html):null;const ids=row?memberIds(row):[];const stale=dt.rows((idx,data,node)=>memberIds(node).some(id=>id===sourceId||ids.includes(id)));const orphans=[];stale.nodes().each(node=>memberIds(node).forEach(id=>{if(id!==sourceId&&!ids.includes(id))orphans.push(id);}));stale.remove();if(row)dt.row.add(row);dt.draw(false);updateCount(dt);if(orphans.length)return patchBundle(dt,orphans[0]);});}
+TrackerLive.on(function(change){if(change.type==='event')return patchSummary(change);if(change.type!=='source')return;if(!(window.jQuery&&$.fn.DataTable&&$('#sourcesTable').length)){TrackerLive.showReload('New sources were added.');return;}
+return patchBundle($('#sourcesTable').DataTable(),change.id);});}
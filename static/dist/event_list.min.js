@@ -0,0 +1,4 @@
+(function(){const chk=document.getElementById('toggleArchived');if(!chk)return;chk.addEventListener('change',function(){const url=new URL(window.location.href);if(this.checked)url.searchParams.set('show_archived','1');else url.searchParams.delete('show_archived');window.location=url.toString();});})();if(window.bootstrap){const tips=[].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));tips.forEach(el=>new bootstrap.Tooltip(el));}
+function plainText(data){const div=document.createElement('div');div.innerHTML=data==null?'':data;return(div.textContent||div.innerText||'').trim();}
+const SHOW_EVENT_ACTIONS=document.currentScript.dataset.showActions==='true';(function(){if(!(window.jQuery&&$.fn.DataTable))return;const columnDefs=[{targets:0,orderable:true},{targets:1,orderable:true,render:(d,t)=>(t==='sort'||t==='type')?plainText(d):d},{targets:2,orderable:true},{targets:3,orderable:true,render:(d,t)=>(t==='sort'||t==='type')?plainText(d):d},{targets:4,orderable:true,render:(d,t)=>(t==='sort'||t==='type')?plainText(d):d}];if(SHOW_EVENT_ACTIONS){columnDefs.push({targets:-1,orderable:false,searchable:false,className:'no-sort'});}
+const dt=$('#eventsTable').DataTable({dom:"<'dt-top d-flex justify-content-between align-items-center mb-2'lf>"+"t"+"<'dt-bottom d-flex justify-content-between align-items-center mt-2'ip>",autoWidth:false,order:[[2,'desc']],pageLength:10,lengthMenu:[[10,25,50,-1],[10,25,50,'All']],columnDefs:columnDefs,language:{search:"Search:",lengthMenu:"Show <strong>_MENU_</strong> events",info:"Showing _START_ to _END_ of _TOTAL_ <strong>events</strong>",infoEmpty:"Showing 0 to 0 of 0 <strong>events</strong>",emptyTable:"No events available",paginate:{first:"First",last:"Last",next:"Next",previous:"Previous"}}});$('#eventsTable_length select').addClass('form-select form-select-sm');$('#eventsTable_filter input').addClass('form-control form-control-sm').attr('placeholder','Search events...');})();document.addEventListener('DOMContentLoaded',function(){document.querySelectorAll('#eventsTable tbody tr[data-href]').forEach(function(row){row.style.cursor='pointer';row.addEventListener('click',function(e){if(e.target.closest('a,button,.btn'))return;window.location=row.getAttribute('data-href');});});});
@@ -0,0 +1,149 @@
+# tracker/accesslog.py
+"""
+Escrituras de UserAccessLog.
+
+El login se inserta en línea (un INSERT, poco frecuente): así la fila existe
+antes de que cualquier worker procese el logout de esa sesión. Los logouts
+solo se encolan; un hilo daemon por proceso los vacía cada
+ACCESS_LOG_FLUSH_SECONDS (o al llegar a ACCESS_LOG_MAX_PENDING) con un
+UPDATE indexado por session_key (cierra exactamente su fila). Si el worker
+muere con logouts pendientes, close_stale_sessions cierra esas filas.
+
+Con ACCESS_LOG_BUFFERED = False los logouts también se escriben en línea.
+"""
+import atexit
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import DateTimeField, DurationField, ExpressionWrapper, F, Value
+from django.utils import timezone
+
+from .models import UserAccessLog
+
+logger = logging.getLogger(__name__)
+
+
+def close_session_rows(session_keys_with_time):
+    """UPDATE por sesión: logout_time y duración calculada en la BD."""
+    for session_key, when in session_keys_with_time:
+        UserAccessLog.objects.filter(session_key=session_key, logout_time__isnull=True).update(
+            logout_time=when,
+            session_duration=ExpressionWrapper(Value(when) - F("login_time"), output_field=DurationField()),
+        )
+
+
+class AccessLogBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._logouts = []
+        self._thread = None
+
+    # ---------- API usada por signals ----------
+
+    def record_login(self, user_id, session_key, ip_address, user_agent):
+        UserAccessLog.objects.create(
+            user_id=user_id,
+            session_key=session_key,
+            ip_address=ip_address,
+            user_agent=user_agent,
+            login_time=timezone.now(),
+        )
+
+    def record_logout(self, session_key):
+        when = timezone.now()
+        if not self._enabled():
+            close_session_rows([(session_key, when)])
+            return
+        with self._lock:
+            self._logouts.append((session_key, when))
+        self._after_append()
+
+    def flush(self):
+        with self._lock:
+            logouts, self._logouts = self._logouts, []
+        if not logouts:
+            return
+        close_old_connections()
+        try:
+            with transaction.atomic():
+                close_session_rows(logouts)
+        except Exception:
+            logger.exception("Could not flush %s logout(s)", len(logouts))
+        finally:
+            close_old_connections()
+
+    # ---------- internos ----------
+
+    def _enabled(self):
+        return getattr(settings, "ACCESS_LOG_BUFFERED", True)
+
+    def _after_append(self):
+        self._ensure_thread()
+        if len(self._logouts) >= getattr(settings, "ACCESS_LOG_MAX_PENDING", 200):
+            self._wakeup.set()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="access-log-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        interval = getattr(settings, "ACCESS_LOG_FLUSH_SECONDS", 2.0)
+        while True:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+buffer = AccessLogBuffer()
+atexit.register(buffer.flush)
+
+
+def close_stale_sessions(now=None, dry_run=False):
+    """
+    Cierra filas abiertas cuya sesión ya expiró sin logout explícito.
+    logout_time = expire_date de la sesión si sigue en django_session;
+    si la sesión ya fue purgada (o la fila es anterior a session_key),
+    login_time + SESSION_COOKIE_AGE una vez transcurrido ese plazo.
+    Devuelve (cerradas_por_expiración, cerradas_por_edad).
+    """
+    from django.contrib.sessions.models import Session
+    from django.db.models import OuterRef, Subquery
+
+    now = now or timezone.now()
+    max_age = timedelta(seconds=settings.SESSION_COOKIE_AGE)
+    open_rows = UserAccessLog.objects.filter(logout_time__isnull=True)
+
+    expired_sessions = Session.objects.filter(expire_date__lte=now)
+    expire_date = Subquery(
+        Session.objects.filter(session_key=OuterRef("session_key")).values("expire_date")[:1]
+    )
+    by_expiry = open_rows.filter(session_key__in=expired_sessions.values("session_key"))
+
+    live_keys = Session.objects.values("session_key")
+    by_age = (
+        open_rows.filter(login_time__lte=now - max_age)
+        .exclude(session_key__in=live_keys)
+    )
+
+    if dry_run:
+        return by_expiry.count(), by_age.count()
+
+    with transaction.atomic():
+        n_expiry = by_expiry.update(
+            logout_time=expire_date,
+            session_duration=ExpressionWrapper(expire_date - F("login_time"), output_field=DurationField()),
+        )
+        n_age = by_age.update(
+            logout_time=ExpressionWrapper(F("login_time") + max_age, output_field=DateTimeField()),
+            session_duration=max_age,
+        )
+    return n_expiry, n_age
@@ -0,0 +1,441 @@
+# tracker/api.py
+"""
+API JSON de solo lectura: categories, themes, events y sources (y bundles
+de fuentes como expansión de events).
+
+    GET /api/events/?fields=id,name,risk_rating&expand=theme.category,bundles&limit=200
+    GET /api/events/?cursor=<next de la página anterior>
+    GET /api/sources/123/?expand=event
+
+- Paginación por cursor opaco (firmado) sobre llaves indexadas: pk, o
+  (updated_at, pk) con ?ordering=updated_at / -updated_at. Cada página es
+  un WHERE sobre el índice + LIMIT, sin OFFSET ni COUNT(*).
+- ?fields= elige los campos de la respuesta y se traduce a .only(): solo se
+  leen esas columnas.
+- ?expand= agrega relaciones: las de un solo objeto con select_related (en
+  la misma consulta) y las de muchos con un prefetch por página. Las
+  consultas por página no dependen del tamaño de la página (ver tests).
+- ETag del cuerpo + "Cache-Control: private, no-cache": con If-None-Match
+  el cliente recibe 304 sin volver a bajar la página.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch, Q
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_datetime
+
+from . import changefeed
+from .models import Category, Event, Source, Theme
+
+CURSOR_SALT = "tracker.api.cursor"
+
+
+class ApiError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+# =========================================================
+# Campos: nombre en la API -> (columnas para .only(), getter)
+# =========================================================
+
+def _attr(name, attname=None):
+    attname = attname or name
+    return (name,), lambda obj: getattr(obj, attname)
+
+
+def _download_url(obj):
+    return obj.get_download_url() if obj.file_upload else None
+
+
+class Resource:
+    def __init__(self, model, fields, summary, orderings=("id",), expansions=None, filters=None):
+        self.model = model
+        self.fields = fields              # {campo API: (columnas, getter)}
+        self.summary = summary            # campos cuando el recurso va anidado
+        self.orderings = orderings
+        self.expansions = expansions or {}  # {nombre: ("select"|"prefetch", recurso, relación)}
+        self.filters = filters or {}      # {parámetro: lookup}
+
+    def columns(self, names):
+        cols = {"id"}
+        for name in names:
+            cols.update(self.fields[name][0])
+        return cols
+
+    def serialize(self, obj, names):
+        return {name: self.fields[name][1](obj) for name in names}
+
+
+RESOURCES = {}
+
+RESOURCES["categories"] = Resource(
+    Category,
+    fields={"id": _attr("id"), "name": _attr("name")},
+    summary=("id", "name"),
+)
+
+RESOURCES["themes"] = Resource(
+    Theme,
+    fields={
+        "id": _attr("id"),
+        "name": _attr("name"),
+        "description": _attr("description"),
+        "category": _attr("category", "category_id"),
+        "risk_rating": _attr("risk_rating"),
+        "onset_timeline": _attr("onset_timeline"),
+        "is_active": _attr("is_active"),
+        "created_at": _attr("created_at"),
+        "updated_at": _attr("updated_at"),
+    },
+    summary=("id", "name", "category", "risk_rating", "is_active"),
+    orderings=("id", "updated_at"),
+    expansions={"category": ("select", "categories", "category")},
+    filters={"category": "category_id"},
+)
+
+RESOURCES["events"] = Resource(
+    Event,
+    fields={
+        "id": _attr("id"),
+        "name": _attr("name"),
+        "theme": _attr("theme", "theme_id"),
+        "date_identified": _attr("date_identified"),
+        "description": _attr("description"),
+        "impacted_lines": _attr("impacted_lines"),
+        "risk_taxonomy_lv1": _attr("risk_taxonomy_lv1"),
+        "risk_taxonomy_lv2": _attr("risk_taxonomy_lv2"),
+        "risk_taxonomy_lv3": _attr("risk_taxonomy_lv3"),
+        "status": _attr("status"),
+        "risk_rating": _attr("risk_rating"),
+        "control_in_place": _attr("control_in_place"),
+        "is_active": _attr("is_active"),
+        "created_at": _attr("created_at"),
+        "updated_at": _attr("updated_at"),
+    },
+    summary=("id", "name", "theme", "date_identified", "status", "risk_rating", "is_active"),
+    orderings=("id", "updated_at"),
+    expansions={
+        "theme": ("select", "themes", "theme"),
+        "sources": ("prefetch", "sources", "sources"),
+        "bundles": ("prefetch", "sources", "sources"),
+    },
+    filters={"theme": "theme_id"},
+)
+
+RESOURCES["sources"] = Resource(
+    Source,
+    fields={
+        "id": _attr("id"),
+        "name": _attr("name"),
+        "event": _attr("event", "event_id"),
+        "source_type": _attr("source_type"),
+        "source_date": _attr("source_date"),
+        "summary": _attr("summary"),
+        "potential_impact": _attr("potential_impact"),
+        "potential_impact_notes": _attr("potential_impact_notes"),
+        "link_or_file": _attr("link_or_file"),
+        "download_url": (("file_upload", "download_token"), _download_url),
+        "is_active": _attr("is_active"),
+        "created_at": _attr("created_at"),
+        "updated_at": _attr("updated_at"),
+    },
+    summary=("id", "name", "source_type", "source_date", "summary", "potential_impact",
+             "link_or_file", "download_url", "is_active"),
+    orderings=("id", "updated_at"),
+    expansions={"event": ("select", "events", "event")},
+    filters={"event": "event_id"},
+)
+
+
+# =========================================================
+# Parámetros
+# =========================================================
+
+def _csv_param(request, name):
+    return [part.strip() for part in request.GET.get(name, "").split(",") if part.strip()]
+
+
+def _fields(resource, request):
+    names = _csv_param(request, "fields")
+    if not names:
+        return list(resource.fields)
+    unknown = [n for n in names if n not in resource.fields]
+    if unknown:
+        raise ApiError(f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(resource.fields)}")
+    return list(dict.fromkeys(["id", *names]))
+
+
+def _expand_tree(resource, request):
+    """"theme.category,sources" -> {"theme": {"category": {}}, "sources": {}} (validado)."""
+    tree = {}
+    for path in _csv_param(request, "expand"):
+        node, current = tree, resource
+        for part in path.split("."):
+            spec = current.expansions.get(part)
+            if spec is None:
+                raise ApiError(f"Cannot expand '{path}'. Available: {', '.join(current.expansions) or 'none'}")
+            if spec[0] == "prefetch" and node is not tree:
+                raise ApiError(f"Cannot expand '{path}': only top-level collections can be expanded.")
+            node = node.setdefault(part, {})
+            current = RESOURCES[spec[1]]
+    return tree
+
+
+def _page_size(request):
+    default = getattr(settings, "API_PAGE_SIZE", 100)
+    maximum = getattr(settings, "API_MAX_PAGE_SIZE", 1000)
+    raw = request.GET.get("limit") or default
+    try:
+        size = int(raw)
+    except (TypeError, ValueError):
+        raise ApiError("limit must be an integer.")
+    return max(1, min(size, maximum))
+
+
+def _ordering(resource, request):
+    ordering = request.GET.get("ordering") or "id"
+    if ordering.lstrip("-") not in resource.orderings:
+        allowed = ", ".join(f"{o}, -{o}" for o in resource.orderings)
+        raise ApiError(f"Invalid ordering. Available: {allowed}")
+    return ordering
+
+
+# =========================================================
+# Consulta
+# =========================================================
+
+def _select_columns(resource, tree, prefix=""):
+    """Columnas para .only() de las relaciones select_related (recursivo)."""
+    columns, related = set(), []
+    for name, subtree in tree.items():
+        kind, target_name, relation = resource.expansions[name]
+        if kind != "select":
+            continue
+        target = RESOURCES[target_name]
+        path = f"{prefix}{relation}"
+        related.append(path)
+        # la FK también: .only() no puede diferir un campo que se recorre con select_related
+        columns.add(path)
+        columns.update(f"{path}__{col}" for col in target.columns(target.summary))
+        sub_columns, sub_related = _select_columns(target, subtree, prefix=f"{path}__")
+        columns |= sub_columns
+        related += sub_related
+    return columns, related
+
+
+def _prefetches(resource, tree, request):
+    prefetches = []
+    if resource.model is Event and ("sources" in tree or "bundles" in tree):
+        sources = RESOURCES["sources"]
+        qs = Source.objects.only(*sources.columns(sources.summary),
+                                 "event_id", "file_upload").order_by("id")
+        if request.GET.get("show_archived") != "1":
+            qs = qs.filter(is_active=True)
+        prefetches.append(Prefetch("sources", queryset=qs, to_attr="api_sources"))
+    return prefetches
+
+
+def _filtered(resource, request):
+    """Filtros de la lista: archivados (?show_archived=1 como en las páginas), padre y updated_since."""
+    qs = resource.model.objects.all()
+    if request.GET.get("show_archived") != "1" and resource.model is not Category:
+        qs = qs.filter(is_active=True)
+    for param, lookup in resource.filters.items():
+        value = request.GET.get(param)
+        if value:
+            if not value.isdigit():
+                raise ApiError(f"{param} must be an id.")
+            qs = qs.filter(**{lookup: int(value)})
+    since = request.GET.get("updated_since")
+    if since and "updated_at" in resource.orderings:
+        parsed = parse_datetime(since)
+        if parsed is None:
+            raise ApiError("updated_since must be an ISO 8601 datetime.")
+        qs = qs.filter(updated_at__gte=parsed)
+    return qs
+
+
+def _queryset(resource, request, qs, names, tree, ordering=None):
+
+    columns = resource.columns(names)
+    if ordering:
+        columns.add(ordering.lstrip("-"))
+    select_columns, related = _select_columns(resource, tree)
+    columns |= select_columns
+    if related:
+        qs = qs.select_related(*related)
+    prefetches = _prefetches(resource, tree, request)
+    if prefetches:
+        qs = qs.prefetch_related(*prefetches)
+    return qs.only(*columns)
+
+
+def _encode_cursor(ordering, obj):
+    key = ordering.lstrip("-")
+    value = getattr(obj, key)
+    return signing.dumps([ordering, value.isoformat() if key == "updated_at" else value, obj.pk],
+                         salt=CURSOR_SALT, compress=True)
+
+
+def _after_cursor(qs, ordering, cursor):
+    try:
+        cursor_ordering, value, pk = signing.loads(cursor, salt=CURSOR_SALT)
+    except (signing.BadSignature, ValueError, TypeError):
+        raise ApiError("Invalid cursor.")
+    if cursor_ordering != ordering:
+        raise ApiError("The cursor belongs to a different ordering.")
+    key = ordering.lstrip("-")
+    if key == "id":
+        return qs.filter(pk__lt=pk) if ordering.startswith("-") else qs.filter(pk__gt=pk)
+    value = parse_datetime(value)
+    op = "lt" if ordering.startswith("-") else "gt"
+    # (updated_at, id) estrictamente después de la última fila entregada
+    return qs.filter(Q(**{f"{key}__{op}": value}) | Q(**{key: value, f"pk__{op}": pk}))
+
+
+# =========================================================
+# Serialización
+# =========================================================
+
+def _serialize(resource, obj, names, tree):
+    data = resource.serialize(obj, names)
+    for name, subtree in tree.items():
+        kind, target_name, relation = resource.expansions[name]
+        target = RESOURCES[target_name]
+        if kind == "select":
+            related = getattr(obj, relation)
+            data[name] = None if related is None else _serialize(target, related, target.summary, subtree)
+        elif name == "sources":
+            data[name] = [target.serialize(src, target.summary) for src in obj.api_sources]
+        elif name == "bundles":
+            data[name] = _bundles(obj.api_sources)
+    return data
+
+
+def _bundles(sources):
+    from .views import _group_bundles
+    return [
+        {
+            "leader": bundle["leader"].pk,
+            "name": bundle["leader"].name,
+            "source_date": bundle["leader"].source_date,
+            "summary": bundle["leader"].summary,
+            "display_type": bundle["display_type"],
+            "links": bundle["links"],
+            "files": bundle["files"],
+            "any_active": bundle["any_active"],
+            "sources": [src.pk for src in bundle["items"]],
+        }
+        for bundle in _group_bundles(sources)
+    ]
+
+
+def _json_response(request, payload, status=200):
+    body = json.dumps(payload, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if status != 200:
+        return HttpResponse(body, status=status, content_type="application/json")
+    etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _resource(name):
+    resource = RESOURCES.get(name)
+    if resource is None:
+        raise ApiError(f"Unknown resource '{name}'. Available: {', '.join(RESOURCES)}", status=404)
+    return resource
+
+
+# =========================================================
+# Vistas
+# =========================================================
+
+def resource_list(request, resource):
+    try:
+        spec = _resource(resource)
+        names = _fields(spec, request)
+        tree = _expand_tree(spec, request)
+        size = _page_size(request)
+        ordering = _ordering(spec, request)
+        qs = _queryset(spec, request, _filtered(spec, request), names, tree, ordering)
+        cursor = request.GET.get("cursor")
+        if cursor:
+            qs = _after_cursor(qs, ordering, cursor)
+        direction = "-" if ordering.startswith("-") else ""
+        order_by = [ordering] if ordering.lstrip("-") == "id" else [ordering, f"{direction}id"]
+        rows = list(qs.order_by(*order_by)[:size + 1])
+    except ApiError as exc:
+        return _json_response(request, {"error": str(exc)}, status=exc.status)
+
+    next_url = None
+    if len(rows) > size:
+        rows = rows[:size]
+        params = request.GET.copy()
+        params["cursor"] = _encode_cursor(ordering, rows[-1])
+        next_url = request.build_absolute_uri(f"{request.path}?{params.urlencode()}")
+    return _json_response(request, {
+        "results": [_serialize(spec, obj, names, tree) for obj in rows],
+        "next": next_url,
+    })
+
+
+def resource_detail(request, resource, pk):
+    try:
+        spec = _resource(resource)
+        names = _fields(spec, request)
+        tree = _expand_tree(spec, request)
+        # el detalle incluye archivados, como las páginas
+        qs = _queryset(spec, request, spec.model.objects.filter(pk=pk), names, tree)
+        obj = qs.first()
+        if obj is None:
+            raise ApiError("Not found.", status=404)
+    except ApiError as exc:
+        return _json_response(request, {"error": str(exc)}, status=exc.status)
+    return _json_response(request, _serialize(spec, obj, names, tree))
+
+
+def changes(request):
+    """
+    Feed de cambios: entradas con secuencia > ?cursor (0 = desde el principio),
+    opcionalmente ?types=event,source. Cada entrada dice qué objeto cambió; el
+    estado actual se pide a /api/<recurso>/<id>/.
+    """
+    try:
+        raw = request.GET.get("cursor") or "0"
+        if not raw.isdigit():
+            raise ApiError("cursor must be a sequence number.")
+        after = int(raw)
+        size = _page_size(request)
+        types = _csv_param(request, "types")
+        known = {object_type for object_type, _ in changefeed.FEED_TYPES.values()}
+        unknown = [t for t in types if t not in known]
+        if unknown:
+            raise ApiError(f"Unknown types: {', '.join(unknown)}. Available: {', '.join(sorted(known))}")
+        rows = changefeed.read(after, size + 1, types=types)
+    except ApiError as exc:
+        return _json_response(request, {"error": str(exc)}, status=exc.status)
+
+    more = len(rows) > size
+    rows = rows[:size]
+    results = []
+    for seq, object_type, object_id, parent_id, action, fields, at in rows:
+        entry = {"seq": seq, "type": object_type, "id": object_id, "parent": parent_id, "action": action, "at": at}
+        if fields:
+            entry["fields"] = fields
+        results.append(entry)
+    return _json_response(request, {
+        "results": results,
+        "cursor": rows[-1][0] if rows else after,
+        "more": more,
+    })
@@ -11,4 +11,8 @@ class TrackerConfig(AppConfig):
     
     def ready(self):
         if not self.apps.ready:
-            from . import signals
\ No newline at end of file
+            from . import signals
+        from .db import configure_odbc_pooling
+        configure_odbc_pooling()
+        from . import metrics
+        metrics.install()
\ No newline at end of file
@@ -0,0 +1,139 @@
+# tracker/archive.py
+"""
+Archivado / restauración masiva de threats, eventos y fuentes.
+
+set_active() recibe ids de cualquiera de los tres modelos y, en una sola
+transacción:
+
+- Arma la cascada como condiciones (no como listas de objetos): un threat
+  arrastra sus eventos y las fuentes de esos eventos (todos sus bundles);
+  un evento, sus fuentes. Todo lo que archiva una misma llamada queda con
+  el mismo archive_batch; restaurar en cascada solo reactiva los hijos con
+  el archive_batch del padre, así lo que ya estaba archivado por su cuenta
+  (p. ej. un ítem quitado de un bundle) sigue archivado.
+- Por modelo: un SELECT ... FOR UPDATE de (pk, padre) de las filas que
+  realmente cambian y un UPDATE con la misma condición. Son 2 consultas por
+  nivel sin importar cuántas filas toque (restaurar suma una por nivel
+  padre, para leer los archive_batch).
+- ChangeLog, feed de cambios e invalidación de caché se hacen una vez por
+  modelo al final (los .update() no disparan post_save).
+
+Las fuentes sueltas se archivan tal cual vienen: la pantalla de edición de
+fuentes ya manda los ids de cada ítem del bundle que quiere archivar.
+"""
+import uuid
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import audit, changefeed
+from .cache import invalidate_tags
+from .models import Event, Source, Theme
+
+MODELS = {"theme": Theme, "event": Event, "source": Source}
+
+# modelo -> (tag del objeto, tag del padre, tag de la lista); ver cache.tags_for
+_TAGS = {
+    Theme: ("theme", None, "themes"),
+    Event: ("event", "theme", "events"),
+    Source: ("source", "event", "sources"),
+}
+
+
+def _conditions(theme_ids, event_ids, source_ids, cascade):
+    """Archivar: los ids dados y, con cascade, todos sus hijos activos."""
+    conditions = {}
+    if theme_ids:
+        conditions[Theme] = Q(pk__in=theme_ids)
+    event_q = Q(pk__in=event_ids) if event_ids else Q()
+    source_q = Q(pk__in=source_ids) if source_ids else Q()
+    if cascade:
+        if theme_ids:
+            event_q |= Q(theme_id__in=theme_ids)
+            source_q |= Q(event__theme_id__in=theme_ids)
+        if event_ids:
+            source_q |= Q(event_id__in=event_ids)
+    if event_q:
+        conditions[Event] = event_q
+    if source_q:
+        conditions[Source] = source_q
+    return conditions
+
+
+def _batches(model, ids):
+    """{archive_batch: [pk]} de los ids archivados en cascada."""
+    batches = {}
+    rows = model.objects.filter(pk__in=ids, is_active=False, archive_batch__isnull=False)
+    for batch, pk in rows.values_list("archive_batch", "pk"):
+        batches.setdefault(batch, []).append(pk)
+    return batches
+
+
+def _restore_conditions(theme_ids, event_ids, source_ids, cascade):
+    """Restaurar: los ids dados y, con cascade, los hijos que archivó la misma cascada."""
+    conditions = {}
+    if theme_ids:
+        conditions[Theme] = Q(pk__in=theme_ids)
+    event_q = Q(pk__in=event_ids) if event_ids else Q()
+    source_q = Q(pk__in=source_ids) if source_ids else Q()
+    if cascade:
+        for batch, pks in _batches(Theme, theme_ids).items():
+            event_q |= Q(theme_id__in=pks, archive_batch=batch)
+            source_q |= Q(event__theme_id__in=pks, archive_batch=batch)
+        for batch, pks in _batches(Event, event_ids).items():
+            source_q |= Q(event_id__in=pks, archive_batch=batch)
+    if event_q:
+        conditions[Event] = event_q
+    if source_q:
+        conditions[Source] = source_q
+    return conditions
+
+
+def set_active(active: bool, theme_ids=(), event_ids=(), source_ids=(), cascade=True, user=None):
+    """
+    Archiva (active=False) o restaura (True) los ids dados y, con cascade, sus
+    hijos. Devuelve {"theme": n, "event": n, "source": n} con las filas que
+    cambiaron de estado (las que ya estaban así no cuentan ni se tocan).
+    """
+    ids = set(theme_ids), set(event_ids), set(source_ids)
+    action = "restore" if active else "archive"
+    changed = {name: 0 for name in MODELS}
+    tags = set()
+    now = timezone.now()
+    batch = None if active else uuid.uuid4()
+
+    with transaction.atomic():
+        conditions = _restore_conditions(*ids, cascade) if active else _conditions(*ids, cascade)
+        for name, model in MODELS.items():
+            condition = conditions.get(model)
+            if condition is None:
+                continue
+            own_tag, parent_tag, list_tag = _TAGS[model]
+            _, parent_field = changefeed.FEED_TYPES[model]
+            qs = model.objects.filter(condition, is_active=not active)
+            rows = list(qs.select_for_update(of=("self",)).order_by().values_list("pk", parent_field))
+            if not rows:
+                continue
+            qs.update(is_active=active, archive_batch=batch, updated_at=now)
+
+            pks = [pk for pk, _ in rows]
+            audit.record_bulk_changes(model, pks, {"is_active": (not active, active)}, user=user)
+            changefeed.record_many(model, rows, action, ["is_active"])
+            tags.add(list_tag)
+            tags.update(f"{own_tag}:{pk}" for pk in pks)
+            if parent_tag:
+                tags.update(f"{parent_tag}:{parent_id}" for _, parent_id in rows)
+            changed[name] = len(rows)
+
+        if tags:
+            transaction.on_commit(lambda: invalidate_tags(*tags))
+    return changed
+
+
+def archive(**ids):
+    return set_active(False, **ids)
+
+
+def restore(**ids):
+    return set_active(True, **ids)
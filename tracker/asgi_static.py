@@ -0,0 +1,56 @@
+# tracker/asgi_static.py
+"""
+/static/ servido en la capa ASGI (config/asgi.py), fuera de la cadena de
+middleware de Django.
+
+WhiteNoiseMiddleware es solo sync: en la cadena obliga a Django a adaptar
+todas las vistas async a sync. Bajo ASGI settings la saca de MIDDLEWARE y
+TrackerASGIHandler atiende las rutas de STATIC_URL con esta clase, que
+reutiliza la configuración, el índice de archivos y las respuestas de
+WhiteNoise (hash "immutable", .gz/.br, ETag/304, Range) y solo traduce la
+respuesta a mensajes ASGI. El archivo se lee por bloques en un hilo.
+"""
+import asyncio
+
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+CHUNK_SIZE = 64 * 1024
+
+
+class StaticFilesASGI:
+    def __init__(self):
+        self.whitenoise = WhiteNoiseMiddleware()
+        self.prefix = self.whitenoise.static_prefix
+
+    def find(self, path):
+        if not path.startswith(self.prefix):
+            return None
+        if self.whitenoise.autorefresh:
+            return self.whitenoise.find_file(path)
+        return self.whitenoise.files.get(path)
+
+    async def serve(self, static_file, scope, send):
+        # StaticFile.get_response espera los headers al estilo WSGI (HTTP_IF_NONE_MATCH, ...)
+        meta = {
+            "HTTP_" + name.decode("latin1").upper().replace("-", "_"): value.decode("latin1")
+            for name, value in scope.get("headers", [])
+        }
+        response = static_file.get_response(scope["method"], meta)
+        await send({
+            "type": "http.response.start",
+            "status": int(response.status),
+            "headers": [(k.lower().encode("latin1"), v.encode("latin1")) for k, v in response.headers],
+        })
+        if response.file is None:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, response.file.read, CHUNK_SIZE)
+                more = len(chunk) == CHUNK_SIZE
+                await send({"type": "http.response.body", "body": chunk, "more_body": more})
+                if not more:
+                    break
+        finally:
+            response.file.close()
@@ -0,0 +1,115 @@
+# tracker/assets.py
+"""
+Bundles estáticos de las páginas (ver build_assets).
+
+El JS/CSS que antes iba inline en las plantillas vive en assets/ (fuera de
+STATICFILES_DIRS) y se construye minificado en static/dist/. collectstatic
+con CompressedManifestStaticFilesStorage le agrega el hash del contenido al
+nombre y precomprime .gz/.br; WhiteNoise sirve los nombres con hash con
+"Cache-Control: immutable", así el navegador los baja una sola vez.
+
+Los valores que dependen del request (rol, taxonomía) van como data-* en
+el propio <script> y el bundle los lee de document.currentScript.
+"""
+import gzip
+import os
+
+from django.conf import settings
+
+ASSETS_DIR = os.path.join(settings.BASE_DIR, "assets")
+OUTPUT_DIR = os.path.join(settings.BASE_DIR, "static", "dist")
+
+# salida (en static/dist/) -> fuentes (en assets/), en orden
+BUNDLES = {
+    "dashboard.min.js": ["js/live.js", "js/dashboard.js"],
+    "dashboard.min.css": ["css/dashboard.css"],
+    "event_list.min.js": ["js/event_list.js"],
+    "event_list.min.css": ["css/event_list.css"],
+    "theme_list.min.js": ["js/theme_list.js"],
+    "theme_list.min.css": ["css/theme_list.css"],
+    "event_edit.min.js": ["js/typeahead.js", "js/event_edit.js"],
+    "event_edit.min.css": ["css/event_edit.css"],
+    "add_event.min.js": ["js/add_event.js"],
+    "add_event.min.css": ["css/add_event.css"],
+    "event_detail.min.js": ["js/live.js", "js/event_detail.js"],
+    "typeahead.min.js": ["js/typeahead.js"],
+}
+
+# Fuentes que reemplazan bloques <style>/<script> inline de las plantillas:
+# la línea base del reporte. live.js, typeahead.js y event_detail.js nacieron
+# como archivos estáticos y no cuentan como "antes".
+INLINE_SOURCES = (
+    "css/dashboard.css", "js/dashboard.js",
+    "css/event_list.css", "js/event_list.js",
+    "css/theme_list.css", "js/theme_list.js",
+    "css/event_edit.css", "js/event_edit.js",
+    "css/add_event.css", "js/add_event.js",
+)
+
+
+def _minify(name, text):
+    if name.endswith(".js"):
+        import rjsmin
+        return rjsmin.jsmin(text, keep_bang_comments=False)
+    import rcssmin
+    return rcssmin.cssmin(text, keep_bang_comments=False)
+
+
+def read_sources(name) -> str:
+    parts = []
+    for rel in BUNDLES[name]:
+        with open(os.path.join(ASSETS_DIR, rel), encoding="utf-8") as fh:
+            parts.append(fh.read())
+    # ';' entre fuentes JS por si alguna termina sin cerrar la sentencia
+    return ("\n;\n" if name.endswith(".js") else "\n").join(parts)
+
+
+def build(name) -> str:
+    """Contenido minificado del bundle (no escribe)."""
+    return _minify(name, read_sources(name)).strip() + "\n"
+
+
+def output_path(name):
+    return os.path.join(OUTPUT_DIR, name)
+
+
+def write(name, content) -> bool:
+    """Escribe el bundle si cambió; devuelve True si lo escribió."""
+    path = output_path(name)
+    try:
+        with open(path, encoding="utf-8") as fh:
+            if fh.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="\n") as fh:
+        fh.write(content)
+    return True
+
+
+def inline_bytes(name) -> int:
+    """Bytes de las fuentes del bundle que antes iban inline (0 si ninguna)."""
+    total = 0
+    for rel in BUNDLES[name]:
+        if rel in INLINE_SOURCES:
+            with open(os.path.join(ASSETS_DIR, rel), encoding="utf-8") as fh:
+                total += len(fh.read().encode("utf-8"))
+    return total
+
+
+def sizes(name, built) -> dict:
+    """Bytes: inline (lo que viajaba en cada página) vs minificado y comprimido."""
+    raw = built.encode("utf-8")
+    result = {
+        "inline": inline_bytes(name),
+        "minified": len(raw),
+        "gzip": len(gzip.compress(raw, compresslevel=9)),
+        "brotli": None,
+    }
+    try:
+        import brotli
+        result["brotli"] = len(brotli.compress(raw))
+    except ImportError:
+        pass
+    return result
@@ -0,0 +1,123 @@
+# tracker/audit.py
+"""
+Auditoría estructurada (ChangeLog) de Theme, Event y Source.
+
+Los diffs salen de ChangeTrackingMixin (sin consultas extra). Dentro de un
+request se acumulan y AuditMiddleware los escribe con un solo bulk_create al
+final; fuera de un request (comandos, shell) se escriben al instante.
+"""
+import logging
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import transaction
+
+from .models import ChangeLog
+
+logger = logging.getLogger(__name__)
+
+# Lista de ChangeLog pendientes del request actual (None = sin request)
+_pending: ContextVar = ContextVar("tracker_audit_pending", default=None)
+
+AUDITED_TYPES = {"Theme": "theme", "Event": "event", "Source": "source"}
+
+
+def object_type_for(model) -> str | None:
+    return AUDITED_TYPES.get(model.__name__)
+
+
+def record(instance, action: str, changes: dict | None = None):
+    """Registra un cambio; se confirma solo si la transacción que lo contiene hace commit."""
+    entry = ChangeLog(
+        object_type=object_type_for(type(instance)),
+        object_id=instance.pk,
+        action=action,
+        changes={name: [old, new] for name, (old, new) in (changes or {}).items()},
+    )
+    transaction.on_commit(lambda: _enqueue(entry))
+
+
+def record_bulk_created(instances, user=None, using="default"):
+    """
+    Entradas "create" para filas insertadas con bulk_create (que no dispara
+    post_save). Se escriben en la transacción en curso, no al final del request.
+    """
+    entries = [
+        ChangeLog(object_type=object_type_for(type(obj)), object_id=obj.pk, action="create",
+                  changes={}, changed_by=user)
+        for obj in instances
+    ]
+    ChangeLog.objects.using(using).bulk_create(entries)
+    return len(entries)
+
+
+def record_bulk_changes(model, pks, changes: dict, user=None, using="default"):
+    """
+    Entradas "update" (mismo diff para todas) de filas cambiadas con
+    .update(), que tampoco dispara post_save. Se escriben en la transacción.
+    """
+    object_type = object_type_for(model)
+    diff = {name: [old, new] for name, (old, new) in changes.items()}
+    entries = [
+        ChangeLog(object_type=object_type, object_id=pk, action="update", changes=diff, changed_by=user)
+        for pk in pks
+    ]
+    ChangeLog.objects.using(using).bulk_create(entries, batch_size=1000)
+    return len(entries)
+
+
+def _enqueue(entry):
+    pending = _pending.get()
+    if pending is None:
+        _write([entry], user=None)
+    else:
+        pending.append(entry)
+
+
+def _write(entries, user):
+    if not entries:
+        return
+    for e in entries:
+        e.changed_by = user
+    try:
+        ChangeLog.objects.bulk_create(entries)
+    except Exception:
+        logger.exception("Could not write %s audit entries", len(entries))
+
+
+class AuditMiddleware:
+    """Acumula los ChangeLog del request y los inserta juntos al final (WSGI y ASGI)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        pending = []
+        token = _pending.set(pending)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pending.reset(token)
+        user = getattr(request, "user", None)
+        _write(pending, user if user is not None and user.is_authenticated else None)
+        return response
+
+    async def __acall__(self, request):
+        pending = []
+        token = _pending.set(pending)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pending.reset(token)
+        if pending:
+            user = await request.auser() if hasattr(request, "auser") else None
+            await sync_to_async(_write)(pending, user if user is not None and user.is_authenticated else None)
+        return response
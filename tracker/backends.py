@@ -2,31 +2,58 @@
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
 from django.db.models import Q
+from django.db.models.functions import Lower
+
 
 class EmailOrUsernameModelBackend(ModelBackend):
+    """
+    Login con email o username (case-insensitive) en UNA sola consulta:
+    WHERE lower(email) = %s OR lower(username) = %s, cubierta por los índices
+    funcionales de la migración 0023.
+
+    El rehash al costo configurado (PASSWORD_PBKDF2_ITERATIONS) lo hace
+    user.check_password(): si el hash guardado quedó desactualizado, lo
+    regenera y guarda solo el campo password.
+    """
+
+    # Con 3 filas alcanza para distinguir: email único, email duplicado o username.
+    MAX_CANDIDATES = 3
+
     def authenticate(self, request, username=None, password=None, **kwargs):
+        User = get_user_model()
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
         if not username or not password:
             return None
 
-        # Normaliza la entrada
-        username = (username or "").strip()
-
-        User = get_user_model()
-        # Intentamos por email (case-insensitive)
-        qs = User.objects.filter(Q(email__iexact=username))
-        count = qs.count()
-        if count == 1:
-            user = qs.first()
-        elif count > 1:
-            # Email duplicado → No autenticar por email
+        user = self.lookup_user(username)
+        if user is None:
+            # Igualamos el tiempo de respuesta con el de un usuario existente
+            User().set_password(password)
             return None
-        else:
-            # Probar por username (case-insensitive)
-            try:
-                user = User.objects.get(username__iexact=username)
-            except User.DoesNotExist:
-                return None
 
         if user.check_password(password) and self.user_can_authenticate(user):
             return user
         return None
+
+    def lookup_user(self, login):
+        """Resuelve email o username a un usuario; None si no existe o el email es ambiguo."""
+        login = (login or "").strip().lower()
+        if not login:
+            return None
+
+        User = get_user_model()
+        candidates = list(
+            User.objects
+            .alias(email_ci=Lower("email"), username_ci=Lower("username"))
+            .filter(Q(email_ci=login) | Q(username_ci=login))[: self.MAX_CANDIDATES]
+        )
+
+        by_email = [u for u in candidates if (u.email or "").lower() == login]
+        if len(by_email) == 1:
+            return by_email[0]
+        if len(by_email) > 1:
+            # Email duplicado → No autenticar por email
+            return None
+
+        return next((u for u in candidates if u.username.lower() == login), None)
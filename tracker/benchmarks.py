@@ -0,0 +1,344 @@
+# tracker/benchmarks.py
+"""
+Suite de benchmarks de las vistas y servicios del tracker (ver bench_tracker).
+
+Cada caso es una función sin argumentos que hace un request (o llamada) y
+devuelve la respuesta. measure() la corre N veces y reporta p50/p95 en ms,
+consultas SQL de una ejecución y pico de memoria Python (tracemalloc) de
+otra ejecución aparte, para que el trazado no ensucie los tiempos.
+
+Los resultados se comparan contra un baseline JSON (por escala y motor) con
+umbrales de regresión: más consultas, p95 más lento o más memoria.
+"""
+import json
+import os
+import random
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import RISK_TAXONOMY_LV1, RISK_TAXONOMY_LV2, RISK_TAXONOMY_LV3, Event, Source
+from .seeding import SEED_PASSWORD, TrackerSeeder, user_email
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "benchmarks_baseline.json")
+EVENT_SORTS = ("name", "-name", "date", "-date", "risk", "-risk")
+
+# Tamaños con --scale 1 (el resto, proporciones por defecto de TrackerSeeder)
+THEMES_PER_SCALE = 10
+EVENTS_PER_THEME = 20
+USERS_PER_SCALE = 1000
+LARGE_BUNDLE_PER_SCALE = 50   # fuentes hermanas en el bundle grande de view_event
+
+# Umbrales por defecto para compare()
+DEFAULT_THRESHOLDS = {
+    "max_extra_queries": 0,     # cualquier consulta de más es regresión
+    "max_slowdown": 1.5,        # p50 actual / p50 baseline
+    "max_p95_slowdown": 2.0,    # la cola es más ruidosa: umbral más holgado
+    "min_delta_ms": 2.0,        # piso de ruido para los tiempos
+    "max_memory_growth": 1.5,   # pico actual / pico baseline
+    "min_delta_kb": 64,         # piso de ruido para la memoria
+}
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+# =========================================================
+# Medición
+# =========================================================
+
+def _consume(response):
+    """Lee el cuerpo de respuestas streaming (descargas) para medir el costo completo."""
+    if getattr(response, "streaming", False):
+        for _ in response.streaming_content:
+            pass
+        response.close()
+    return response
+
+
+def measure(fn, iterations=20, before=None):
+    """
+    Corre fn `iterations` veces (más una de calentamiento) y devuelve
+    {"p50_ms", "p95_ms", "queries", "peak_kb"}. `before` se ejecuta antes de
+    cada corrida, fuera del tiempo medido (ej. vaciar la caché).
+    """
+    def run():
+        if before:
+            before()
+        return _consume(fn())
+
+    run()   # calentamiento: plantillas compiladas, conexiones abiertas
+    if before:
+        before()
+    with CaptureQueriesContext(connection) as ctx:
+        _consume(fn())
+    queries = len(ctx.captured_queries)
+
+    timings = []
+    for _ in range(iterations):
+        if before:
+            before()
+        started = time.perf_counter()
+        _consume(fn())
+        timings.append(time.perf_counter() - started)
+
+    if before:
+        before()
+    tracemalloc.start()
+    try:
+        _consume(fn())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "queries": queries,
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+# =========================================================
+# Datos
+# =========================================================
+
+def seed(scale=1, seed_value=42, media_files=True, stdout=None):
+    """
+    Siembra el dataset con TrackerSeeder (determinista) y agrega lo propio
+    de los casos: admin, un bundle grande y una fuente con archivo real.
+    Devuelve un dict con los objetos que usan los casos.
+    """
+    User = get_user_model()
+    result = TrackerSeeder(
+        seed=seed_value,
+        users=USERS_PER_SCALE * scale,
+        themes=THEMES_PER_SCALE * scale,
+        events_per_theme=EVENTS_PER_THEME,
+        progress=(lambda msg: stdout.write(f"  {msg}")) if stdout else None,
+    ).run()
+    admin = User.objects.create_superuser("bench-admin", "bench-admin@example.com", SEED_PASSWORD)
+
+    # Bundle grande: muchas hermanas con la misma llave (nombre, fecha, summary)
+    big_event = Event.objects.order_by("pk").first()
+    Source.objects.bulk_create([
+        Source(
+            event=big_event,
+            name="Large bundle",
+            source_type="LINK",
+            source_date=big_event.date_identified,
+            summary="Large bundle summary",
+            link_or_file=f"https://example.com/bundle/{k}",
+            created_by=admin,
+        )
+        for k in range(LARGE_BUNDLE_PER_SCALE * scale)
+    ], batch_size=1000)
+
+    file_source = Source(
+        event=big_event, name="Large bundle", source_type="FILE",
+        source_date=big_event.date_identified, summary="Large bundle summary", created_by=admin,
+    )
+    if media_files:
+        file_source.file_upload.save("bench.pdf", ContentFile(b"%PDF-1.4\n" + b"0" * 256 * 1024), save=False)
+    file_source.save()
+
+    return {
+        "admin": admin,
+        "seed": seed_value,
+        "users": len(result["user_ids"]),
+        "big_event": big_event,
+        "file_source": file_source,
+        "upload_event": Event.objects.order_by("pk").last(),
+    }
+
+
+# =========================================================
+# Servidor stub para RiskTaxonomyService
+# =========================================================
+
+class _TaxonomyHandler(BaseHTTPRequestHandler):
+    payload = b""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.payload)))
+        self.end_headers()
+        self.wfile.write(self.payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextmanager
+def taxonomy_stub_server():
+    """Sirve la taxonomía local como JSON en 127.0.0.1:<puerto libre>; devuelve la URL."""
+    handler = type("Handler", (_TaxonomyHandler,), {"payload": json.dumps({
+        "lv1": RISK_TAXONOMY_LV1, "lv2": RISK_TAXONOMY_LV2, "lv3": RISK_TAXONOMY_LV3,
+    }).encode()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, name="taxonomy-stub", daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/taxonomy"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+# =========================================================
+# Baseline
+# =========================================================
+
+def baseline_key(scale, vendor=None):
+    return f"{vendor or connection.vendor}:scale{scale}"
+
+
+def load_baseline(path=BASELINE_PATH) -> dict:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results, scale, path=BASELINE_PATH):
+    data = load_baseline(path)
+    data[baseline_key(scale)] = results
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def compare(results, baseline, thresholds=None) -> list:
+    """Lista de regresiones (texto) de results contra baseline; vacía si no hay."""
+    t = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    problems = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if cur["queries"] > base["queries"] + t["max_extra_queries"]:
+            problems.append(f"{name}: {cur['queries']} queries (baseline {base['queries']})")
+        for stat, limit in (("p50_ms", t["max_slowdown"]), ("p95_ms", t["max_p95_slowdown"])):
+            if cur[stat] > base[stat] * limit and cur[stat] - base[stat] > t["min_delta_ms"]:
+                problems.append(f"{name}: {stat[:3]} {cur[stat]:.1f}ms (baseline {base[stat]:.1f}ms)")
+        if (cur["peak_kb"] > base["peak_kb"] * t["max_memory_growth"]
+                and cur["peak_kb"] - base["peak_kb"] > t["min_delta_kb"]):
+            problems.append(f"{name}: peak {cur['peak_kb']:.0f}KB (baseline {base['peak_kb']:.0f}KB)")
+    return problems
+
+
+# =========================================================
+# Casos
+# =========================================================
+
+def build_cases(data, client, files_per_upload=10):
+    """{nombre: (fn, before)} sobre los datos de seed(); client ya autenticado como admin."""
+    from django.core.cache import cache
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.urls import reverse
+
+    from .backends import EmailOrUsernameModelBackend
+    from .services import RiskTaxonomyService
+
+    def get(url):
+        def fn():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise AssertionError(f"GET {url} -> {response.status_code}")
+            return response
+        return fn
+
+    cases = {
+        "dashboard": (get(reverse("dashboard")), None),
+        "dashboard_cold": (get(reverse("dashboard")), cache.clear),
+        "theme_list_all": (get(reverse("theme_list_all")), None),
+    }
+    for sort in EVENT_SORTS:
+        cases[f"event_list[{sort}]"] = (get(f"{reverse('event_list')}?sort={sort}"), None)
+
+    def touch_one_event():
+        # una fila nueva en la caché de fragmentos (row_cache); el resto sale de la caché
+        Event.objects.filter(pk=data["big_event"].pk).update(updated_at=timezone.now())
+
+    cases["event_list[one row changed]"] = (get(reverse("event_list")), touch_one_event)
+    cases["view_event_large_bundle"] = (get(reverse("view_event", kwargs={"event_id": data["big_event"].pk})), None)
+
+    def not_modified(url):
+        # GET condicional con el ETag de la respuesta anterior (ver tracker/conditional.py).
+        # Se toma en la primera corrida (los casos previos pueden cambiar los datos) y con
+        # dos GET: el primero puede fijar la cookie CSRF, que entra en el ETag.
+        etag = []
+
+        def fn():
+            if not etag:
+                client.get(url)
+                etag.append(client.get(url)["ETag"])
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag[0])
+            if response.status_code != 304:
+                raise AssertionError(f"GET {url} (If-None-Match) -> {response.status_code}")
+            return response
+        return fn
+
+    cases["event_list[304]"] = (not_modified(reverse("event_list")), None)
+    cases["view_event_large_bundle[304]"] = (
+        not_modified(reverse("view_event", kwargs={"event_id": data["big_event"].pk})), None,
+    )
+    cases["source_detail"] = (get(reverse("source_detail", kwargs={"pk": data["file_source"].pk})), None)
+    cases["secure_file_download"] = (
+        get(reverse("secure_file_download", args=[data["file_source"].download_token])), None,
+    )
+
+    upload_url = reverse("add_source", kwargs={"event_pk": data["upload_event"].pk})
+    counter = iter(range(10 ** 9))
+
+    def add_source():
+        n = next(counter)
+        payload = {
+            "event": data["upload_event"].pk,
+            "name": "Bench upload",
+            "source_date": data["upload_event"].date_identified.isoformat(),
+            "summary": f"Bench upload {n}",
+            "potential_impact": "MAINTAINING",
+            "file_upload": SimpleUploadedFile("main.pdf", b"%PDF-1.4\n" + b"0" * 4096),
+            "extra_files": [
+                SimpleUploadedFile(f"extra{i}.pdf", b"%PDF-1.4\n" + b"0" * 4096)
+                for i in range(files_per_upload)
+            ],
+        }
+        response = client.post(upload_url, payload)
+        if response.status_code != 302:
+            raise AssertionError(f"POST {upload_url} -> {response.status_code}")
+        return response
+
+    cases[f"add_source[{files_per_upload} files]"] = (add_source, None)
+
+    backend = EmailOrUsernameModelBackend()
+    rnd = random.Random(7)
+    cases["login_lookup_user"] = (
+        lambda: backend.lookup_user(user_email(data["seed"], rnd.randrange(data["users"])).title()), None,
+    )
+
+    service = RiskTaxonomyService()
+
+    def taxonomy():
+        if not service.get_taxonomy_data():
+            raise AssertionError("RiskTaxonomyService returned no data")
+
+    cases["taxonomy_service_cold"] = (taxonomy, service.refresh)
+    cases["taxonomy_service_warm"] = (taxonomy, None)
+    return cases
@@ -0,0 +1,266 @@
+# tracker/cache.py
+"""
+Cache de dos niveles + invalidación por tags.
+
+TwoTierCache es un backend de Django (CACHES["default"]): un LRU pequeño en
+memoria del proceso delante de un cache compartido entre workers (alias
+indicado en LOCATION: FileBasedCache o Redis). Las lecturas que aciertan en
+el LRU no salen del proceso; las escrituras van a ambos niveles.
+
+Los tags ("theme:42", "event:7", "events"...) guardan un token en el cache
+compartido; cada valor se guarda junto con los tokens vigentes al generarlo.
+invalidate_tags() reemplaza los tokens, así que las entradas viejas dejan de
+ser válidas sin tener que listarlas. En otros workers el cambio se ve al
+vencer su copia local del token (LOCAL_TIMEOUT, pocos segundos).
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+_MISSING = object()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "local_hits": 0,
+    "shared_hits": 0,
+    "misses": 0,
+    "sets": 0,
+    "deletes": 0,
+    "tag_invalidations": 0,
+}
+
+
+def _count(name, n=1):
+    with _stats_lock:
+        _stats[name] += n
+
+
+def cache_stats() -> dict:
+    """Contadores del proceso actual (para /metrics y diagnóstico)."""
+    with _stats_lock:
+        data = dict(_stats)
+    lookups = data["local_hits"] + data["shared_hits"] + data["misses"]
+    data["hit_ratio"] = ((data["local_hits"] + data["shared_hits"]) / lookups) if lookups else 0.0
+    return data
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._shared_alias = location or "shared"
+        self._max_entries = int(options.get("LOCAL_MAX_ENTRIES", 1000))
+        self._local_timeout = float(options.get("LOCAL_TIMEOUT", 5))
+        self._local = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self._shared_alias]
+
+    # ---------- nivel local ----------
+
+    def _local_get(self, key):
+        with self._lock:
+            item = self._local.get(key, _MISSING)
+            if item is _MISSING:
+                return _MISSING
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._local[key]
+                return _MISSING
+            self._local.move_to_end(key)
+            return value
+
+    def _local_set(self, key, value, timeout):
+        ttl = self._local_timeout
+        if timeout is not None and timeout is not DEFAULT_TIMEOUT:
+            ttl = min(ttl, timeout)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._local[key] = (time.monotonic() + ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self._max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, key):
+        with self._lock:
+            self._local.pop(key, None)
+
+    # ---------- API de BaseCache ----------
+
+    def get(self, key, default=None, version=None):
+        local_key = self.make_and_validate_key(key, version=version)
+        value = self._local_get(local_key)
+        if value is not _MISSING:
+            _count("local_hits")
+            return value
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            _count("misses")
+            return default
+        _count("shared_hits")
+        self._local_set(local_key, value, None)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, pending = {}, []
+        for key in keys:
+            value = self._local_get(self.make_and_validate_key(key, version=version))
+            if value is _MISSING:
+                pending.append(key)
+            else:
+                found[key] = value
+        _count("local_hits", len(found))
+        if pending:
+            from_shared = self.shared.get_many(pending, version=version)
+            _count("shared_hits", len(from_shared))
+            _count("misses", len(pending) - len(from_shared))
+            for key, value in from_shared.items():
+                self._local_set(self.make_and_validate_key(key, version=version), value, None)
+            found.update(from_shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.get_backend_timeout(timeout) if timeout is DEFAULT_TIMEOUT else timeout
+        self.shared.set(key, value, timeout=timeout, version=version)
+        self._local_set(self.make_and_validate_key(key, version=version), value, timeout)
+        _count("sets")
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.get_backend_timeout(timeout) if timeout is DEFAULT_TIMEOUT else timeout
+        failed = self.shared.set_many(data, timeout=timeout, version=version)   # un solo viaje
+        for key, value in data.items():
+            if key not in failed:
+                self._local_set(self.make_and_validate_key(key, version=version), value, timeout)
+        _count("sets", len(data) - len(failed))
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.get_backend_timeout(timeout) if timeout is DEFAULT_TIMEOUT else timeout
+        added = self.shared.add(key, value, timeout=timeout, version=version)
+        if added:
+            self._local_set(self.make_and_validate_key(key, version=version), value, timeout)
+            _count("sets")
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.get_backend_timeout(timeout) if timeout is DEFAULT_TIMEOUT else timeout
+        return self.shared.touch(key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._local_delete(self.make_and_validate_key(key, version=version))
+        _count("deletes")
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        if self._local_get(self.make_and_validate_key(key, version=version)) is not _MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local_delete(self.make_and_validate_key(key, version=version))
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+        self.shared.clear()
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+
+# =========================================================
+# Tags
+# =========================================================
+
+TAG_PREFIX = "tag:"
+
+
+def _tag_tokens(tags) -> dict:
+    tags = sorted(set(tags))
+    if not tags:
+        return {}
+    keys = [TAG_PREFIX + t for t in tags]
+    current = cache.get_many(keys)
+    tokens = {}
+    for tag, key in zip(tags, keys):
+        token = current.get(key)
+        if token is None:
+            # Tag desconocido (o desalojado): nuevo token => entradas previas inválidas
+            token = uuid.uuid4().hex
+            if not cache.add(key, token, timeout=None):
+                token = cache.get(key) or token
+        tokens[tag] = token
+    return tokens
+
+
+def get_or_set(key, producer, timeout=300, tags=()):
+    """
+    Devuelve el valor cacheado si sus tags siguen vigentes; si no, lo recalcula.
+    None no se cachea (producer falló o no hay datos).
+    """
+    tokens = _tag_tokens(tags)
+    entry = cache.get(key)
+    if entry is not None and entry[0] == tokens:
+        return entry[1]
+    value = producer()
+    if value is not None:
+        cache.set(key, (tokens, value), timeout)
+    return value
+
+
+def _off_loop(fn):
+    # thread_sensitive: un backend de BD (DatabaseCache) usa la conexión del
+    # hilo del request en vez de dejar una abierta en un hilo del pool
+    return sync_to_async(fn)
+
+
+async def aget_or_set(key, producer, timeout=300, tags=()):
+    """get_or_set para vistas async: producer es una corrutina (ORM async)."""
+    tokens = await _off_loop(_tag_tokens)(tags)
+    entry = await _off_loop(cache.get)(key)
+    if entry is not None and entry[0] == tokens:
+        return entry[1]
+    value = await producer()
+    if value is not None:
+        await _off_loop(cache.set)(key, (tokens, value), timeout)
+    return value
+
+
+def invalidate_tags(*tags):
+    tags = [t for t in tags if t]
+    if not tags:
+        return
+    tags = sorted(set(tags))
+    cache.set_many({TAG_PREFIX + t: uuid.uuid4().hex for t in tags}, timeout=None)
+    _count("tag_invalidations", len(tags))
+
+
+def tags_for(instance) -> list:
+    """
+    Tags afectados por un cambio en Theme/Event/Source/Category. Si el objeto
+    se movió de padre, también invalida el padre anterior (valor cargado).
+    """
+    name = type(instance).__name__
+    if name == "Theme":
+        return [f"theme:{instance.pk}", "themes"]
+    if name == "Event":
+        previous = instance.loaded_value("theme_id", instance.theme_id)
+        return [f"event:{instance.pk}", f"theme:{instance.theme_id}", f"theme:{previous}", "events"]
+    if name == "Source":
+        previous = instance.loaded_value("event_id", instance.event_id)
+        return [f"source:{instance.pk}", f"event:{instance.event_id}", f"event:{previous}", "sources"]
+    if name == "SourceFileVersion":
+        return [f"source:{instance.source_id}", "sources"]
+    if name == "Category":
+        return ["categories", "themes"]
+    return []
@@ -0,0 +1,210 @@
+# tracker/changefeed.py
+"""
+Feed de cambios (ChangeFeedEntry) para que las integraciones sincronicen
+solo lo que cambió desde su último cursor (ver api.changes).
+
+- Escritura: signals.py registra create/update/archive/restore/delete de
+  Theme, Event, Source y SourceFileVersion; los .update()/bulk_create
+  masivos llaman a record_many(). Las entradas se encolan al confirmar la
+  transacción; dentro de un request ChangeFeedMiddleware las inserta con un
+  solo bulk_create al final (como AuditMiddleware con ChangeLog), fuera de
+  un request se insertan al instante. El id (la secuencia) sigue el orden
+  de escritura; el margen de CHANGE_FEED_SETTLE_SECONDS cubre el desfase
+  entre el commit y el final del request.
+- Lectura: id > cursor, por la PK. Se omiten las entradas de los últimos
+  CHANGE_FEED_SETTLE_SECONDS para no saltar un id que otro proceso todavía
+  no confirmó.
+- Compactación: de las entradas más viejas que CHANGE_FEED_COMPACT_AFTER_DAYS
+  se borran las que tienen una posterior del mismo objeto. Releer desde 0
+  devuelve a lo sumo una entrada por objeto viejo (el consumidor hace upsert
+  y trata "delete" como tombstone).
+"""
+import logging
+from contextvars import ContextVar
+from datetime import timedelta
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, Min, OuterRef
+from django.utils import timezone
+
+from .models import ChangeFeedEntry, Event, Source, SourceFileVersion, Theme
+
+logger = logging.getLogger(__name__)
+
+# Entradas pendientes del request actual (None = sin request)
+_pending: ContextVar = ContextVar("tracker_changefeed_pending", default=None)
+
+# modelo -> (object_type, campo del padre)
+FEED_TYPES = {
+    Theme: ("theme", "category_id"),
+    Event: ("event", "theme_id"),
+    Source: ("source", "event_id"),
+    SourceFileVersion: ("sourcefileversion", "source_id"),
+}
+
+
+def action_for(created: bool, changes: dict) -> str:
+    if created:
+        return "create"
+    if "is_active" in changes:
+        return "restore" if changes["is_active"][1] else "archive"
+    return "update"
+
+
+def record(instance, action: str, fields=()):
+    """Una entrada para `instance`; se escribe solo si la transacción hace commit."""
+    object_type, parent_field = FEED_TYPES[type(instance)]
+    entry = ChangeFeedEntry(
+        object_type=object_type, object_id=instance.pk,
+        parent_id=getattr(instance, parent_field, None), action=action, fields=sorted(fields),
+    )
+    transaction.on_commit(lambda: _enqueue([entry]))
+
+
+def record_many(model, rows, action: str, fields=()):
+    """rows: [(pk, parent_id)] de cambios masivos que no pasan por las señales."""
+    object_type, _ = FEED_TYPES[model]
+    entries = [
+        ChangeFeedEntry(object_type=object_type, object_id=pk, parent_id=parent_id,
+                        action=action, fields=sorted(fields))
+        for pk, parent_id in rows
+    ]
+    if entries:
+        transaction.on_commit(lambda: _enqueue(entries))
+
+
+def _enqueue(entries):
+    pending = _pending.get()
+    if pending is None:
+        _write(entries)
+    else:
+        pending.extend(entries)
+
+
+def _write(entries):
+    if not entries:
+        return
+    now = timezone.now()
+    for entry in entries:
+        entry.recorded_at = now
+    try:
+        ChangeFeedEntry.objects.bulk_create(entries)
+    except Exception:
+        logger.exception("Could not write %s change feed entries", len(entries))
+
+
+class ChangeFeedMiddleware:
+    """Acumula las entradas del request y las inserta juntas al final (WSGI y ASGI)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        pending = []
+        token = _pending.set(pending)
+        try:
+            response = self.get_response(request)
+        finally:
+            _pending.reset(token)
+        _write(pending)
+        return response
+
+    async def __acall__(self, request):
+        pending = []
+        token = _pending.set(pending)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _pending.reset(token)
+        if pending:
+            await sync_to_async(_write)(pending)
+        return response
+
+
+# =========================================================
+# Lectura
+# =========================================================
+
+def settle_seconds():
+    return getattr(settings, "CHANGE_FEED_SETTLE_SECONDS", 2)
+
+
+def read(after: int, limit: int, types=None):
+    """Entradas con id > after (ya asentadas), en orden de secuencia."""
+    qs = ChangeFeedEntry.objects.filter(
+        pk__gt=after, recorded_at__lte=timezone.now() - timedelta(seconds=settle_seconds()),
+    )
+    if types:
+        qs = qs.filter(object_type__in=types)
+    return list(qs.order_by("pk").values_list(
+        "pk", "object_type", "object_id", "parent_id", "action", "fields", "recorded_at",
+    )[:limit])
+
+
+# =========================================================
+# Mantenimiento
+# =========================================================
+
+def compact(older_than_days=None, chunk_size=50000, progress=None):
+    """
+    Borra, por rangos de id, las entradas viejas reemplazadas por una más
+    nueva del mismo objeto (índice object_type, object_id, id). Devuelve el
+    número de filas borradas.
+    """
+    days = older_than_days if older_than_days is not None else getattr(settings, "CHANGE_FEED_COMPACT_AFTER_DAYS", 7)
+    cutoff = timezone.now() - timedelta(days=days)
+    bounds = ChangeFeedEntry.objects.filter(recorded_at__lt=cutoff).aggregate(lo=Min("pk"), hi=Max("pk"))
+    if bounds["hi"] is None:
+        return 0
+    newer = ChangeFeedEntry.objects.filter(
+        object_type=OuterRef("object_type"), object_id=OuterRef("object_id"), pk__gt=OuterRef("pk"),
+    )
+    deleted = 0
+    for start in range(bounds["lo"], bounds["hi"] + 1, chunk_size):
+        end = min(start + chunk_size, bounds["hi"] + 1)
+        with transaction.atomic():
+            n, _ = (ChangeFeedEntry.objects
+                    .filter(pk__gte=start, pk__lt=end)
+                    .filter(Exists(newer))
+                    .delete())
+        deleted += n
+        if progress:
+            progress(end - 1, bounds["hi"], deleted)
+    return deleted
+
+
+def backfill(chunk_size=5000, progress=None):
+    """
+    Una entrada "create" por cada objeto que todavía no tiene ninguna (datos
+    previos al feed, o cargados con seed_tracker). Devuelve cuántas agregó.
+    """
+    added = 0
+    for model, (object_type, parent_field) in FEED_TYPES.items():
+        has_entry = ChangeFeedEntry.objects.filter(object_type=object_type, object_id=OuterRef("pk"))
+        rows = (model.objects.filter(~Exists(has_entry)).order_by("pk")
+                .values_list("pk", parent_field).iterator(chunk_size=chunk_size))
+        batch = []
+        for pk, parent_id in rows:
+            batch.append(ChangeFeedEntry(object_type=object_type, object_id=pk, parent_id=parent_id,
+                                         action="create"))
+            if len(batch) >= chunk_size:
+                ChangeFeedEntry.objects.bulk_create(batch)
+                added += len(batch)
+                batch = []
+        if batch:
+            ChangeFeedEntry.objects.bulk_create(batch)
+            added += len(batch)
+        if progress:
+            progress(object_type, added)
+    return added
@@ -0,0 +1,187 @@
+# tracker/conditional.py
+"""
+GET condicional (ETag / Last-Modified) para las páginas de lectura.
+
+Cada página tiene una función de versión que, con UNA consulta sobre índices
+(updated_at, FKs), devuelve los MAX(updated_at) y conteos de las filas que
+muestra. Con eso y el rol del usuario se arma el ETag; si el navegador manda
+If-None-Match / If-Modified-Since y coincide, se responde 304 sin correr las
+consultas de la vista ni renderizar.
+
+Para que la versión sea confiable todo cambio visible debe tocar updated_at:
+save(update_fields=...) lo agrega solo (ChangeTrackingMixin.save) y los
+.update() masivos lo pasan explícito.
+
+Las respuestas completas salen con "Cache-Control: private, no-cache": el
+navegador guarda la página pero revalida siempre. Si hay mensajes flash
+pendientes se renderiza normal (el 304 los dejaría sin mostrar).
+"""
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib import messages
+from django.db import connections, router
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+
+from .models import Event, Source, Theme
+
+
+def user_role(user) -> str:
+    if not user.is_authenticated:
+        return "anon"
+    if user.is_superuser:
+        return "superuser"
+    return "staff" if user.is_staff else "user"
+
+
+def _as_datetime(value):
+    # SQL crudo: SQLite devuelve texto y MSSQL datetimes naive (en UTC con USE_TZ)
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if isinstance(value, datetime) and timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
+
+
+def table_stamps(*models) -> list:
+    """
+    [MAX(updated_at), COUNT(*)] de cada tabla en un solo SELECT de subselects
+    escalares: el MAX sale del índice de updated_at y el COUNT del de la PK.
+
+    El sello es de la tabla entera, no de las filas que muestra la página:
+    cualquier edición de un theme o evento (aunque no esté en la lista o el
+    filtro actual) invalida todas las páginas de lista que dependen de ella.
+    """
+    db = router.db_for_read(models[0])
+    connection = connections[db]
+    qn = connection.ops.quote_name
+    parts = []
+    for model in models:
+        table = qn(model._meta.db_table)
+        column = qn(model._meta.get_field("updated_at").column)
+        parts += [f"(SELECT MAX({column}) FROM {table})", f"(SELECT COUNT(*) FROM {table})"]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT " + ", ".join(parts))
+        row = cursor.fetchone()
+    return [_as_datetime(v) for v in row]
+
+
+# =========================================================
+# Versiones por página
+# =========================================================
+
+def theme_list_version(request):
+    return table_stamps(Theme)
+
+
+def event_list_version(request):
+    # la lista muestra el nombre del theme de cada evento
+    return table_stamps(Event, Theme)
+
+
+def theme_version(request, pk):
+    stamps = Theme.objects.filter(pk=pk).aggregate(
+        theme_at=Max("updated_at"), events_at=Max("events__updated_at"), n_events=Count("events"),
+    )
+    return list(stamps.values()) if stamps["theme_at"] is not None else None
+
+
+def event_version(request, event_id):
+    stamps = Event.objects.filter(pk=event_id).aggregate(
+        event_at=Max("updated_at"), theme_at=Max("theme__updated_at"),
+        sources_at=Max("sources__updated_at"), n_sources=Count("sources"),
+    )
+    return list(stamps.values()) if stamps["event_at"] is not None else None
+
+
+def source_version(request, pk):
+    # la página muestra el bundle (hermanas del mismo evento), el evento y el historial de archivos
+    stamps = Source.objects.filter(pk=pk).aggregate(
+        event_at=Max("event__updated_at"),
+        siblings_at=Max("event__sources__updated_at"), n_siblings=Count("event__sources", distinct=True),
+        history_at=Max("file_history__replaced_at"), n_history=Count("file_history", distinct=True),
+    )
+    return list(stamps.values()) if stamps["event_at"] is not None else None
+
+
+# =========================================================
+# Decorador
+# =========================================================
+
+def _has_pending_messages(request):
+    # len() carga los mensajes sin marcarlos como leídos
+    return bool(len(messages.get_messages(request)))
+
+
+def _validators(request, stamps):
+    dates = [v for v in stamps if isinstance(v, datetime)]
+    csrf = request.META.get("CSRF_COOKIE") or ""
+    key = repr((
+        [v.isoformat() if isinstance(v, datetime) else v for v in stamps],
+        user_role(request.user),
+        # el token CSRF de los formularios depende del secreto de la cookie
+        hashlib.sha256(csrf.encode()).hexdigest()[:8] if csrf else "",
+    ))
+    etag = '"%s"' % hashlib.sha256(key.encode()).hexdigest()[:32]
+    last_modified = max(dates).timestamp() if dates else None
+    return etag, last_modified
+
+
+def _finish(response, etag, last_modified):
+    if response.status_code == 200 and etag is not None:
+        response.headers.setdefault("ETag", etag)
+        if last_modified is not None:
+            response.headers.setdefault("Last-Modified", http_date(last_modified))
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ("Cookie",))
+    return response
+
+
+def _conditional(request, version_func, args, kwargs):
+    """(respuesta 304/412 o None, etag, last_modified)."""
+    if request.method not in ("GET", "HEAD") or _has_pending_messages(request):
+        return None, None, None
+    stamps = version_func(request, *args, **kwargs)
+    if stamps is None:   # no existe: la vista responde 404
+        return None, None, None
+    etag, last_modified = _validators(request, stamps)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ("Cookie",))
+    return response, etag, last_modified
+
+
+def conditional_page(version_func):
+    """
+    Envuelve una vista de lectura (sync o async) con ETag/Last-Modified.
+    version_func(request, *args, **kwargs) recibe los mismos argumentos que
+    la vista y devuelve la lista de sellos, o None si el objeto no existe.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                request.user = await request.auser()
+                response, etag, last_modified = await sync_to_async(_conditional)(
+                    request, version_func, args, kwargs,
+                )
+                if response is not None:
+                    return response
+                return _finish(await view(request, *args, **kwargs), etag, last_modified)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response, etag, last_modified = _conditional(request, version_func, args, kwargs)
+            if response is not None:
+                return response
+            return _finish(view(request, *args, **kwargs), etag, last_modified)
+        return wrapper
+    return decorator
@@ -0,0 +1,113 @@
+# tracker/db.py
+"""
+Utilidades de conexión: métricas de pool, health check e iteración por lotes.
+
+- pool_stats(): estado del pool por alias (psycopg_pool en Postgres con
+  OPTIONS["pool"]; en MSSQL conexiones persistentes por hilo o, bajo ASGI,
+  el pooling del driver ODBC).
+- iterate_rows()/iterate_chunks(): recorren tablas grandes con memoria
+  constante. Postgres usa cursor del lado del servidor (QuerySet.iterator);
+  los demás motores paginan por pk (keyset), sin OFFSET ni cursores abiertos.
+"""
+import time
+
+from django.conf import settings
+from django.db import connections
+
+POOL_STAT_KEYS = (
+    "pool_min", "pool_max", "pool_size", "pool_available", "requests_waiting",
+    "requests_num", "requests_queued", "requests_wait_ms", "requests_errors",
+    "connections_num", "connections_errors", "connections_lost",
+)
+
+
+def configure_odbc_pooling():
+    """
+    Fija pyodbc.pooling antes de la primera conexión. pyodbc ya lo trae
+    activo: este ajuste solo cambia algo con MSSQL_ODBC_POOLING=False.
+    """
+    if not any("sql_server" in db["ENGINE"] or "mssql" in db["ENGINE"] for db in settings.DATABASES.values()):
+        return
+    try:
+        import pyodbc
+    except ImportError:
+        return
+    pyodbc.pooling = getattr(settings, "MSSQL_ODBC_POOLING", True)
+
+
+def ping(alias="default") -> float:
+    """SELECT 1 contra el alias; devuelve la latencia en ms (propaga DatabaseError)."""
+    started = time.perf_counter()
+    with connections[alias].cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    return (time.perf_counter() - started) * 1000
+
+
+def pool_stats() -> dict:
+    stats = {}
+    for alias in connections:
+        conn = connections[alias]
+        entry = {"vendor": conn.vendor, "pooled": False, "connected": conn.connection is not None}
+        pool = getattr(conn, "pool", None)   # Django >= 5.1, Postgres con OPTIONS["pool"]
+        if pool is not None:
+            raw = pool.get_stats()
+            entry["pooled"] = True
+            entry.update({key: raw.get(key, 0) for key in POOL_STAT_KEYS})
+        elif "sql_server" in conn.settings_dict["ENGINE"] or "mssql" in conn.settings_dict["ENGINE"]:
+            entry["conn_max_age"] = conn.settings_dict["CONN_MAX_AGE"]
+            if entry["conn_max_age"]:
+                entry["pooled"] = True
+                entry["driver_pool"] = "persistent"
+            else:
+                entry["pooled"] = getattr(settings, "MSSQL_ODBC_POOLING", True)
+                entry["driver_pool"] = "odbc"
+        stats[alias] = entry
+    return stats
+
+
+# =========================================================
+# Iteración por lotes
+# =========================================================
+
+def iterate_chunks(queryset, chunk_size=2000):
+    """
+    Lista de objetos por lote, en orden de pk, paginando por keyset
+    (pk > último). Sirve para values()/values_list() si incluyen el pk
+    como 'pk'/'id' o primer elemento.
+    """
+    qs = queryset.order_by("pk")
+    last = None
+    while True:
+        page = qs if last is None else qs.filter(pk__gt=last)
+        batch = list(page[:chunk_size])
+        if not batch:
+            return
+        yield batch
+        if len(batch) < chunk_size:
+            return
+        last = _row_pk(batch[-1])
+
+
+def iterate_rows(queryset, chunk_size=2000, using=None):
+    """
+    Itera fila por fila con memoria constante. En Postgres usa un cursor del
+    lado del servidor (iterator(chunk_size)); en otros motores, iterate_chunks.
+    """
+    alias = using or queryset.db
+    conn = connections[alias]
+    if conn.vendor == "postgresql" and not conn.settings_dict.get("DISABLE_SERVER_SIDE_CURSORS"):
+        yield from queryset.order_by("pk").iterator(chunk_size=chunk_size)
+        return
+    for batch in iterate_chunks(queryset, chunk_size):
+        yield from batch
+
+
+def _row_pk(row):
+    if isinstance(row, dict):
+        return row.get("pk", row.get("id"))
+    if isinstance(row, tuple):
+        return row[0]
+    if isinstance(row, int):   # values_list("pk", flat=True)
+        return row
+    return row.pk
@@ -0,0 +1,264 @@
+# tracker/db_router.py
+"""
+Lecturas en réplicas (REPLICA_DATABASE_URLS) para requests de solo lectura.
+
+- ReplicaRoutingMiddleware decide por vista: solo las páginas públicas de
+  REPLICA_READ_VIEWS (nombres de URL), con método seguro (GET/HEAD/OPTIONS)
+  y sin cookie de "pin", leen de una réplica sana; todo lo demás usa
+  'default'. Sesiones, usuarios y permisos (PRIMARY_APPS) se leen siempre
+  del primario: quien acaba de iniciar sesión no aparece deslogueado.
+- ReplicaRouter manda siempre las escrituras a 'default' y marca el request;
+  la respuesta fija la cookie REPLICA_PIN_COOKIE por pin_seconds(), nunca
+  menos que REPLICA_MAX_LAG_SECONDS: una réplica con más lag ya no está sana,
+  así el usuario lee sus propias escrituras.
+- Una réplica se marca no sana si no responde o su lag supera
+  REPLICA_MAX_LAG_SECONDS (fuera de Postgres el lag es una heurística sobre
+  el ChangeLog, ver replica_lag_seconds); se re-evalúa cada
+  REPLICA_HEALTH_INTERVAL segundos por proceso, en un hilo aparte (el
+  request usa el último estado conocido).
+- El middleware es sync y async: bajo ASGI no obliga a adaptar las vistas.
+
+Prueba local con dos SQLite:
+    cp db.sqlite3 replica.sqlite3
+    REPLICA_DATABASE_URLS=sqlite:///replica.sqlite3 python manage.py runserver
+    python manage.py replica_status
+"""
+import logging
+import math
+import random
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Apps que se leen siempre del primario (sesión y autenticación)
+PRIMARY_APPS = {"sessions", "auth", "contenttypes"}
+
+DEFAULT_READ_VIEWS = ("dashboard", "theme_list_all", "event_list", "view_event", "source_detail")
+
+# Estado del request actual: {"alias": réplica elegida o None} (None = sin middleware).
+# Es un dict mutable porque el alias se decide en process_view, ya resuelta la URL.
+_read_alias: ContextVar = ContextVar("tracker_replica_alias", default=None)
+# Lista mutable del request: se agrega algo cuando hubo una escritura
+_wrote: ContextVar = ContextVar("tracker_replica_wrote", default=None)
+
+
+def replica_aliases() -> list:
+    return [alias for alias in settings.DATABASES if alias.startswith("replica")]
+
+
+def pin_seconds() -> int:
+    """Duración del pin tras escribir: al menos el lag máximo que se acepta."""
+    return max(getattr(settings, "REPLICA_STICKY_SECONDS", 30),
+               math.ceil(getattr(settings, "REPLICA_MAX_LAG_SECONDS", 30)))
+
+
+# =========================================================
+# Salud / lag
+# =========================================================
+
+class ReplicaHealth:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._refreshing = False
+        self._state = {}   # alias -> {"healthy": bool, "lag": float | None, "error": str}
+
+    def healthy_aliases(self) -> list:
+        self._maybe_refresh()
+        return [alias for alias, st in self._state.items() if st["healthy"]]
+
+    def status(self, refresh=False) -> dict:
+        if refresh:
+            self.refresh()
+        else:
+            self._maybe_refresh()
+        return dict(self._state)
+
+    def _maybe_refresh(self):
+        """Lanza el chequeo en segundo plano si venció; no bloquea al request."""
+        interval = getattr(settings, "REPLICA_HEALTH_INTERVAL", 10)
+        if time.monotonic() - self._checked_at < interval:
+            return
+        with self._lock:
+            if self._refreshing or time.monotonic() - self._checked_at < interval:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_in_background, name="replica-health", daemon=True).start()
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception:
+            logger.exception("Replica health check failed")
+            self._checked_at = time.monotonic()
+        finally:
+            self._refreshing = False
+            connections.close_all()   # las conexiones de este hilo no las cierra ningún request
+
+    def refresh(self):
+        max_lag = getattr(settings, "REPLICA_MAX_LAG_SECONDS", 30)
+        state = {}
+        for alias in replica_aliases():
+            try:
+                lag = replica_lag_seconds(alias)
+            except DatabaseError as exc:
+                logger.warning("Replica %s unavailable: %s", alias, exc)
+                state[alias] = {"healthy": False, "lag": None, "error": str(exc)}
+                continue
+            healthy = lag is not None and lag <= max_lag
+            if not healthy:
+                logger.warning("Replica %s lagging %.1fs (max %ss)", alias, lag or -1, max_lag)
+            state[alias] = {"healthy": healthy, "lag": lag, "error": ""}
+        self._state = state
+        self._checked_at = time.monotonic()
+
+
+def _as_aware(value):
+    if isinstance(value, str):   # SQLite devuelve texto
+        value = datetime.fromisoformat(value)
+    if value is not None and value.tzinfo is None:
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return value
+
+
+def _changelog_time(alias, sql, params=()):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(sql, params)
+        return _as_aware(cursor.fetchone()[0])
+
+
+def replica_lag_seconds(alias) -> float:
+    """
+    Segundos de atraso de la réplica. Postgres: pg_last_xact_replay_timestamp()
+    (0 si no está en recovery).
+
+    Otros motores (heurística sobre el ChangeLog): se toma el último
+    changed_at que tiene la réplica y se busca en el primario el primer
+    ChangeLog posterior; el lag es el tiempo transcurrido desde ese cambio que
+    la réplica todavía no aplicó (0 si no le falta ninguno). No depende de
+    cuándo fue la última escritura del primario, pero solo ve escrituras que
+    dejan ChangeLog (themes, eventos y fuentes).
+    """
+    conn = connections[alias]
+    if conn.vendor == "postgresql":
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "SELECT CASE WHEN pg_is_in_recovery() "
+                "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+                "ELSE 0 END"
+            )
+            return float(cursor.fetchone()[0])
+    replica_latest = _changelog_time(alias, "SELECT MAX(changed_at) FROM tracker_changelog")
+    if replica_latest is None:
+        first_missing = _changelog_time("default", "SELECT MIN(changed_at) FROM tracker_changelog")
+    else:
+        first_missing = _changelog_time(
+            "default", "SELECT MIN(changed_at) FROM tracker_changelog WHERE changed_at > %s",
+            [connections["default"].ops.adapt_datetimefield_value(replica_latest)],
+        )
+    if first_missing is None:
+        return 0.0
+    return max((datetime.now(dt_timezone.utc) - first_missing).total_seconds(), 0.0)
+
+
+health = ReplicaHealth()
+
+
+# =========================================================
+# Router
+# =========================================================
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _read_alias.get()
+        alias = state and state["alias"]
+        if (alias is None or model._meta.app_label in PRIMARY_APPS
+                or connections["default"].in_atomic_block):
+            return "default"
+        return alias
+
+    def db_for_write(self, model, **hints):
+        wrote = _wrote.get()
+        if wrote is not None:
+            wrote.append(model._meta.label)
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mismos datos en primario y réplicas
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
+
+
+# =========================================================
+# Middleware
+# =========================================================
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        wrote = []
+        alias_token = _read_alias.set({"alias": None})
+        wrote_token = _wrote.set(wrote)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(alias_token)
+            _wrote.reset(wrote_token)
+        return self._pin(request, response, wrote)
+
+    async def __acall__(self, request):
+        wrote = []
+        alias_token = _read_alias.set({"alias": None})
+        wrote_token = _wrote.set(wrote)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(alias_token)
+            _wrote.reset(wrote_token)
+        return self._pin(request, response, wrote)
+
+    def _pin(self, request, response, wrote):
+        if wrote or request.method not in SAFE_METHODS:
+            response.set_cookie(
+                getattr(settings, "REPLICA_PIN_COOKIE", "db_pin"), "1",
+                max_age=pin_seconds(),
+                httponly=True,
+                samesite="Lax",
+                secure=getattr(settings, "SESSION_COOKIE_SECURE", False),
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _read_alias.get()
+        if state is None or request.method not in SAFE_METHODS:
+            return None
+        if request.COOKIES.get(getattr(settings, "REPLICA_PIN_COOKIE", "db_pin")):
+            return None
+        match = request.resolver_match
+        if match is None or match.url_name not in getattr(settings, "REPLICA_READ_VIEWS", DEFAULT_READ_VIEWS):
+            return None
+        healthy = health.healthy_aliases()
+        if healthy:
+            state["alias"] = random.choice(healthy)
+        return None
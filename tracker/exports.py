@@ -0,0 +1,336 @@
+# tracker/exports.py
+"""
+Exportación del registro de eventos a CSV, XLSX y JSONL en streaming.
+
+Los eventos se recorren con iterator(chunk_size) (con sus fuentes activas
+precargadas por bloque) y cada formato entrega bytes a medida que se
+generan, así la memoria no crece con el tamaño del extracto. Se usa desde
+la vista export_events (StreamingHttpResponse) y el comando export_events.
+Bajo ASGI la vista usa astream(): Django consumiría un generador sync entero
+(sync_to_async(list)) antes de enviar el primer byte.
+
+El XLSX se escribe a mano sobre zipfile: las celdas van como inlineStr (sin
+tabla de strings compartidos) y la hoja se comprime mientras se escribe.
+"""
+import csv
+import io
+import json
+import re
+import zipfile
+from datetime import date, datetime
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from .models import Source
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "jsonl": ("application/x-ndjson; charset=utf-8", "jsonl"),
+}
+
+COLUMNS = [
+    "id", "name", "threat", "category", "date_identified", "risk_rating", "status",
+    "active", "control_in_place", "impacted_lines", "risk_taxonomy_lv1",
+    "risk_taxonomy_lv2", "risk_taxonomy_lv3", "description", "sources", "bundles",
+    "bundle_summaries", "updated_at",
+]
+
+FLUSH_BYTES = 64 * 1024   # tamaño aproximado de cada bloque entregado
+
+
+def chunk_size():
+    return getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+
+
+def filename(fmt):
+    return f"events-{timezone.localdate():%Y%m%d}.{FORMATS[fmt][1]}"
+
+
+# =========================================================
+# Filas
+# =========================================================
+
+def export_queryset(events):
+    """El queryset filtrado de event_list + lo que necesita la exportación."""
+    return events.select_related("theme__category").prefetch_related(
+        Prefetch(
+            "sources",
+            queryset=Source.objects.filter(is_active=True)
+                                   .only("id", "event_id", "name", "source_date", "summary")
+                                   .order_by("source_date", "id"),
+            to_attr="export_sources",
+        )
+    )
+
+
+def _bundle_summaries(sources):
+    # Misma agrupación que views._bundle_key: nombre, fecha y summary normalizado
+    seen = {}
+    for src in sources:
+        key = ((src.name or "").strip(), src.source_date, (src.summary or "").strip().lower())
+        if key not in seen:
+            seen[key] = f"{key[0]} ({src.source_date:%Y-%m-%d}): {(src.summary or '').strip()}"
+    return list(seen.values())
+
+
+def iter_rows(events, size=None):
+    """dict por evento (listas como listas), en el orden del queryset."""
+    for event in export_queryset(events).iterator(chunk_size=size or chunk_size()):
+        # Se suelta la lista al terminar: source.event apunta de vuelta al evento
+        # y ese ciclo dejaría los bloques vivos hasta que pase el GC
+        sources = event.export_sources
+        del event.export_sources
+        summaries = _bundle_summaries(sources)
+        yield {
+            "id": event.pk,
+            "name": event.name,
+            "threat": event.theme.name,
+            "category": event.theme.category.name if event.theme.category_id else "",
+            "date_identified": event.date_identified,
+            "risk_rating": event.get_risk_rating_display(),
+            "status": event.get_status_display(),
+            "active": event.is_active,
+            "control_in_place": event.control_in_place,
+            "impacted_lines": list(event.impacted_lines or []),
+            "risk_taxonomy_lv1": list(event.risk_taxonomy_lv1 or []),
+            "risk_taxonomy_lv2": list(event.risk_taxonomy_lv2 or []),
+            "risk_taxonomy_lv3": list(event.risk_taxonomy_lv3 or []),
+            "description": event.description,
+            "sources": len(sources),
+            "bundles": len(summaries),
+            "bundle_summaries": summaries,
+            "updated_at": event.updated_at,
+        }
+
+
+def _flat(value):
+    """Valor de celda para CSV/XLSX: listas unidas con '; '."""
+    if isinstance(value, (list, tuple)):
+        return "; ".join(str(v) for v in value)
+    if isinstance(value, datetime):
+        return timezone.localtime(value).replace(tzinfo=None) if timezone.is_aware(value) else value
+    return value
+
+
+# =========================================================
+# Formatos (generadores de bytes)
+# =========================================================
+
+def _batched(rows, render, header=b"", footer=b""):
+    """Acumula lo que devuelve render(row) y lo entrega en bloques de ~FLUSH_BYTES."""
+    buf, size = [header] if header else [], len(header)
+    for row in rows:
+        data = render(row)
+        buf.append(data)
+        size += len(data)
+        if size >= FLUSH_BYTES:
+            yield b"".join(buf)
+            buf, size = [], 0
+    if footer:
+        buf.append(footer)
+    if buf:
+        yield b"".join(buf)
+
+
+def stream_csv(rows):
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    def render(values):
+        writer.writerow(values)
+        data = out.getvalue()
+        out.seek(0)
+        out.truncate()
+        return data.encode("utf-8")
+
+    # BOM: Excel abre el CSV como UTF-8
+    header = "\ufeff".encode("utf-8") + render(COLUMNS)
+    yield from _batched(rows, lambda row: render([_flat(row[c]) for c in COLUMNS]), header=header)
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def stream_jsonl(rows):
+    yield from _batched(
+        rows, lambda row: (json.dumps(row, default=_json_default, ensure_ascii=False) + "\n").encode("utf-8"),
+    )
+
+
+# ---------- XLSX ----------
+
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Events" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+# Estilos: 0 = normal, 1 = fecha (yyyy-mm-dd), 2 = fecha y hora, 3 = encabezado en negrita
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<numFmts count="2"><numFmt numFmtId="164" formatCode="yyyy-mm-dd"/>'
+    '<numFmt numFmtId="165" formatCode="yyyy-mm-dd hh:mm"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+_SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" '
+    'activePane="bottomLeft" state="frozen"/></sheetView></sheetViews>'
+    '<sheetData>'
+)
+_SHEET_TAIL = '</sheetData></worksheet>'
+
+
+def _cell(value, style=0):
+    value = _flat(value)
+    if value is None or value == "":
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        return f"<c><v>{value}</v></c>"
+    if isinstance(value, datetime):
+        serial = (value - _EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c s="2"><v>{serial:.6f}</v></c>'
+    if isinstance(value, date):
+        return f'<c s="1"><v>{(value - _EXCEL_EPOCH.date()).days}</v></c>'
+    text = escape(_XML_ILLEGAL.sub("", str(value))[:32767])   # límite de Excel por celda
+    style_attr = f' s="{style}"' if style else ""
+    return f'<c t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+class _Sink:
+    """File-like sin seek: zipfile escribe aquí y el generador lo va vaciando."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_xlsx(rows):
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in (
+            ("[Content_Types].xml", _CONTENT_TYPES),
+            ("_rels/.rels", _ROOT_RELS),
+            ("xl/workbook.xml", _WORKBOOK),
+            ("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS),
+            ("xl/styles.xml", _STYLES),
+        ):
+            zf.writestr(name, content)
+        yield sink.drain()
+
+        # force_zip64: el tamaño de la hoja no se conoce de antemano
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            header = "<row>" + "".join(_cell(c, style=3) for c in COLUMNS) + "</row>"
+            for block in _batched(
+                rows,
+                lambda row: ("<row>" + "".join(_cell(row[c]) for c in COLUMNS) + "</row>").encode("utf-8"),
+                header=(_SHEET_HEAD + header).encode("utf-8"),
+                footer=_SHEET_TAIL.encode("utf-8"),
+            ):
+                sheet.write(block)
+                data = sink.drain()
+                if data:
+                    yield data
+    yield sink.drain()
+
+
+WRITERS = {"csv": stream_csv, "xlsx": stream_xlsx, "jsonl": stream_jsonl}
+
+
+def stream(events, fmt, size=None, progress=None):
+    """Bytes del extracto en `fmt`; progress(n_filas) cada chunk_size filas si se pasa."""
+    rows = iter_rows(events, size)
+    if progress:
+        rows = _counting(rows, size or chunk_size(), progress)
+    return WRITERS[fmt](rows)
+
+
+async def astream(events, fmt, size=None):
+    """stream() para ASGI: pide cada bloque al generador sync de a uno, en el hilo del request."""
+    chunks = stream(events, fmt, size)
+    # thread_sensitive: el cursor de iterator() vive en la conexión de ese hilo
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (chunk := await next_chunk(chunks, None)) is not None:
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close, thread_sensitive=True)()
+
+
+def _counting(rows, every, progress):
+    n = 0
+    for n, row in enumerate(rows, 1):
+        if n % every == 0:
+            progress(n)
+        yield row
+    progress(n)
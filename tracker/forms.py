@@ -2,6 +2,7 @@ from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
 from django.utils import timezone
+from django.urls import reverse_lazy
 from django.utils.safestring import mark_safe
 from datetime import date, datetime, time
 from django.core.exceptions import ValidationError
@@ -20,6 +21,8 @@ from .models import (
     Event, 
     Source,
     LINE_OF_BUSINESS_CHOICES,
+    lob_lines,
+    lob_mask,
     RISK_TAXONOMY_LV1,
     RISK_TAXONOMY_LV2,
     RISK_TAXONOMY_LV3,
@@ -46,6 +49,39 @@ RISK_RATING_CHOICES = [
     ('CRITICAL', 'Critical'),
 ]
 
+class LazyModelSelect(forms.Select):
+    """
+    Select de FK que renderiza solo la opción elegida (y la vacía); el resto
+    lo busca assets/js/typeahead.js contra el endpoint JSON. Así la página no
+    recorre todo el queryset ni dispara un __str__ con FK por opción.
+    """
+
+    def optgroups(self, name, value, attrs=None):
+        all_choices = self.choices
+        self.choices = all_choices.field.selected_choices(value)
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = all_choices
+
+
+class LazyModelChoiceField(forms.ModelChoiceField):
+    """ModelChoiceField para LazyModelSelect: valida con un get() y no lista opciones."""
+    widget = LazyModelSelect
+
+    def selected_choices(self, values):
+        choices = [] if self.empty_label is None else [("", self.empty_label)]
+        pks = [v for v in values if v not in (None, "")]
+        if pks:
+            try:
+                objs = list(self.queryset.filter(pk__in=pks))
+            except (ValueError, TypeError, ValidationError):
+                objs = []       # valor basura en el POST: lo reporta clean()
+            iterator = self.iterator(self)
+            choices.extend(iterator.choice(obj) for obj in objs)
+        return choices
+
+
 class CategoryForm(forms.ModelForm):
     class Meta:
         model = Category
@@ -85,10 +121,73 @@ class ThemeForm(forms.ModelForm):
 
     
     
+# ---------------------------------------------------------------------------
+# Reglas compartidas con la importación masiva (tracker/imports.py)
+# ---------------------------------------------------------------------------
+
+EVENT_NAME_MIN_LENGTH = 3
+EVENT_NAME_MAX_LENGTH = 30
+
+
+def taxonomy_errors(lv1, lv2, lv3) -> dict:
+    """{campo: mensaje} de la jerarquía de taxonomía (vacío si es válida)."""
+    if not lv1:
+        return {'risk_taxonomy_lv1': "Select at least one Level 1 option"}
+
+    errors = {}
+    valid_lv2 = []
+    for lv1_item in lv1:
+        if lv1_item in RISK_TAXONOMY_LV2:
+            valid_lv2.extend([choice[0] for choice in RISK_TAXONOMY_LV2[lv1_item]])
+    invalid_lv2 = [item for item in lv2 if item not in valid_lv2]
+    if invalid_lv2:
+        errors['risk_taxonomy_lv2'] = (f"Invalid Level 2 options: {', '.join(invalid_lv2)}. "
+                                       f"Valid options for selected Level 1: {', '.join(valid_lv2)}")
+
+    # Validate Level 3 if Level 2 is valid
+    if not invalid_lv2 and lv2:
+        valid_lv3 = []
+        for lv2_item in lv2:
+            if lv2_item in RISK_TAXONOMY_LV3:
+                valid_lv3.extend([choice[0] for choice in RISK_TAXONOMY_LV3[lv2_item]])
+        invalid_lv3 = [item for item in lv3 if item not in valid_lv3]
+        if invalid_lv3:
+            errors['risk_taxonomy_lv3'] = (f"Invalid Level 3 options: {', '.join(invalid_lv3)}. "
+                                           f"Valid options for selected Level 2: {', '.join(valid_lv3)}")
+    return errors
+
+
+def normalize_impacted_lines(values) -> list:
+    """Expande "All" y deja las líneas en el orden de LINE_OF_BUSINESS_CHOICES."""
+    impacted_lines = list(dict.fromkeys(values or []))
+    if 'All' in impacted_lines:
+        selected = [value for value, _ in LINE_OF_BUSINESS_CHOICES
+                    if value not in {'All', 'Evaluation in progress'}]
+    else:
+        # quitar "All" si vino mezclado
+        selected = [v for v in impacted_lines if v != 'All']
+    # mantener el orden declarativo de LINE_OF_BUSINESS_CHOICES (ida y vuelta por el bitmask)
+    return lob_lines(lob_mask(selected))
+
+
+def validate_source_link(val):
+    """URL http/https o mailto: (vacío permitido). Lanza ValidationError."""
+    if not val:
+        return val
+    if val.lower().startswith("mailto:"):
+        if "@" not in val[7:]:
+            raise forms.ValidationError("Enter a valid mailto: address.")
+        return val
+    u = urlparse(val)
+    if u.scheme not in ("http", "https") or not u.netloc:
+        raise forms.ValidationError("Enter a valid URL (http/https) or a mailto: address.")
+    return val
+
+
 class EventForm(forms.ModelForm):
     name = forms.CharField(
-        min_length=3,
-    max_length=30,
+        min_length=EVENT_NAME_MIN_LENGTH,
+    max_length=EVENT_NAME_MAX_LENGTH,
     widget=forms.TextInput(attrs={
         'placeholder': 'Enter event name (3–30 characters)',
         'class': 'form-control title-input'
@@ -101,9 +200,11 @@ class EventForm(forms.ModelForm):
     }
     )
     
-    theme = forms.ModelChoiceField(
-        queryset=Theme.objects.all(),
-        widget=forms.Select(attrs={'class': 'form-control'}),
+    theme = LazyModelChoiceField(
+        # Theme.__str__ lee category
+        queryset=Theme.objects.select_related('category'),
+        # búsqueda JSON paginada (assets/js/typeahead.js, views.get_themes)
+        widget=LazyModelSelect(attrs={'class': 'form-control', 'data-typeahead': reverse_lazy('get_themes')}),
         required=True
     )
     
@@ -234,6 +335,12 @@ class EventForm(forms.ModelForm):
             lv2_initial = self.initial.get('risk_taxonomy_lv2', [])
             self.fields['risk_taxonomy_lv3'].choices = self._valid_lv3_from(lv2_initial)
 
+    @property
+    def theme_choices(self):
+        """Opciones del <select> de Threat que event_edit.html arma a mano: solo la elegida."""
+        value = self['theme'].value()
+        return self.fields['theme'].selected_choices([getattr(value, 'pk', value)])
+
     def clean(self):
         cleaned_data = super().clean()
         lv1 = cleaned_data.get('risk_taxonomy_lv1', [])
@@ -244,62 +351,14 @@ class EventForm(forms.ModelForm):
         self.validate_taxonomy_hierarchy(lv1, lv2, lv3)
         
         # Handle "All" selection for impacted lines
-        impacted_lines = list(dict.fromkeys(cleaned_data.get('impacted_lines', [])))
-    
-        if 'All' in impacted_lines:
-            selected = [value for value, _ in LINE_OF_BUSINESS_CHOICES
-                if value not in {'All', 'Evaluation in progress'}]
-        else:
-            # quitar "All" si vino mezclado
-            selected = [v for v in impacted_lines if v != 'All']
-
-        # mantener el orden declarativo de LINE_OF_BUSINESS_CHOICES
-        ordered_selected = [value for value, _ in LINE_OF_BUSINESS_CHOICES if value in selected]
-        cleaned_data['impacted_lines'] = ordered_selected
-        # --------------------------------------------------------------------
+        cleaned_data['impacted_lines'] = normalize_impacted_lines(cleaned_data.get('impacted_lines', []))
 
         return cleaned_data
     
     def validate_taxonomy_hierarchy(self, lv1, lv2, lv3):
         """Validate the taxonomy hierarchy with proper error messages"""
-        if not lv1:
-            self.add_error('risk_taxonomy_lv1', "Select at least one Level 1 option")
-            return
-        
-        # Validate Level 2
-        valid_lv2 = []
-        invalid_lv2 = []
-        
-        for lv1_item in lv1:
-            if lv1_item in RISK_TAXONOMY_LV2:
-                valid_lv2.extend([choice[0] for choice in RISK_TAXONOMY_LV2[lv1_item]])
-        
-        for item in lv2:
-            if item not in valid_lv2:
-                invalid_lv2.append(item)
-        
-        if invalid_lv2:
-            self.add_error('risk_taxonomy_lv2', 
-                           f"Invalid Level 2 options: {', '.join(invalid_lv2)}. "
-                           f"Valid options for selected Level 1: {', '.join(valid_lv2)}")
-        
-        # Validate Level 3 if Level 2 is valid
-        if not invalid_lv2 and lv2:
-            valid_lv3 = []
-            invalid_lv3 = []
-            
-            for lv2_item in lv2:
-                if lv2_item in RISK_TAXONOMY_LV3:
-                    valid_lv3.extend([choice[0] for choice in RISK_TAXONOMY_LV3[lv2_item]])
-            
-            for item in lv3:
-                if item not in valid_lv3:
-                    invalid_lv3.append(item)
-            
-            if invalid_lv3:
-                self.add_error('risk_taxonomy_lv3', 
-                               f"Invalid Level 3 options: {', '.join(invalid_lv3)}. "
-                               f"Valid options for selected Level 2: {', '.join(valid_lv3)}")
+        for field, message in taxonomy_errors(lv1, lv2, lv3).items():
+            self.add_error(field, message)
 
     def get_valid_lv2_choices(self):
         lv1_selections = self.initial.get('risk_taxonomy_lv1', [])
@@ -375,15 +434,19 @@ class SourceForm(forms.ModelForm):
             "potential_impact_notes",
         ]
         widgets = {
-            "event": forms.Select(attrs={"class": "form-select"}),
+            # búsqueda JSON paginada (assets/js/typeahead.js, views.get_events)
+            "event": LazyModelSelect(attrs={"class": "form-select", "data-typeahead": reverse_lazy("get_events")}),
             "name": forms.TextInput(attrs={"class": "form-control", "maxlength": 30}),
             "link_or_file": forms.URLInput(attrs={"class": "form-control", "id": "id_link_or_file"}),
             "summary": forms.Textarea(attrs={"class": "form-control", "rows": 6}),
             "potential_impact_notes": forms.Textarea(attrs={"class": "form-control", "rows": 6}),
         }
+        field_classes = {"event": LazyModelChoiceField}
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # Event.__str__ lee theme y Theme.__str__ lee category
+        self.fields["event"].queryset = self.fields["event"].queryset.select_related("theme__category")
         inst = getattr(self, "instance", None)
         if inst and getattr(inst, "pk", None) and getattr(inst, "source_date", None):
             sd = inst.source_date
@@ -397,19 +460,7 @@ class SourceForm(forms.ModelForm):
             self.initial["source_date"] = sd.strftime("%Y-%m-%d")
 
     def clean_link_or_file(self):
-        val = (self.cleaned_data.get("link_or_file") or "").strip()
-        if not val:
-            return val  # vacío permitido
-
-        if val.lower().startswith("mailto:"):
-            if "@" not in val[7:]:
-                raise forms.ValidationError("Enter a valid mailto: address.")
-            return val
-
-        u = urlparse(val)
-        if u.scheme not in ("http", "https") or not u.netloc:
-            raise forms.ValidationError("Enter a valid URL (http/https) or a mailto: address.")
-        return val
+        return validate_source_link((self.cleaned_data.get("link_or_file") or "").strip())
 
     def clean_source_date(self):
         d = self.cleaned_data.get("source_date")
@@ -496,17 +547,7 @@ class RegisterForm(UserCreationForm):
         return email
 
 class EmailOrUsernameAuthenticationForm(AuthenticationForm):
-    """Permite loguear con email o username usando solo ModelBackend."""
-    def clean(self):
-        cd = super().clean()
-        username = cd.get("username")
-        if username and "@" in username:
-            U = get_user_model()
-            try:
-                user = U.objects.get(email__iexact=username)
-                # traducir email -> username real (lo que espera el backend por defecto)
-                self.cleaned_data["username"] = user.username
-            except U.DoesNotExist:
-                # dejar el valor; fallará como credenciales inválidas normales
-                pass
-        return cd
\ No newline at end of file
+    """
+    Permite loguear con email o username. La resolución la hace
+    EmailOrUsernameModelBackend dentro de authenticate() (una sola consulta).
+    """
@@ -0,0 +1,15 @@
+# tracker/hashers.py
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 con iteraciones tomadas de settings.PASSWORD_PBKDF2_ITERATIONS.
+    Conserva el algoritmo 'pbkdf2_sha256', así que los hashes existentes siguen
+    validando y se regeneran al nuevo costo en el siguiente login.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, "PASSWORD_PBKDF2_ITERATIONS", None) or PBKDF2PasswordHasher.iterations
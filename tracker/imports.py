@@ -0,0 +1,691 @@
+# tracker/imports.py
+"""
+Importación masiva de threats, eventos y fuentes (ver import_tracker).
+
+Lee CSV, XLSX o JSONL con las mismas columnas que exporta tracker/exports.py
+(más columnas opcionales para crear threats y fuentes) y procesa las filas
+por lotes:
+
+- Validación con las reglas de EventForm/SourceForm (forms.taxonomy_errors,
+  normalize_impacted_lines, validate_source_link), fila por fila, acumulando
+  los errores con su número de fila en vez de cortar en el primero.
+- Categorías y threats se resuelven contra mapas en memoria cargados una vez;
+  eventos y fuentes existentes se buscan con UNA consulta por lote.
+- Cada lote se inserta con bulk_create dentro de su propia transacción.
+  Como bulk_create no dispara post_save, la auditoría (ChangeLog), el
+  historial de riesgo y la invalidación de caché se hacen por lote.
+- Un evento que ya existe (mismo threat, nombre y fecha) no se modifica: solo
+  se le agregan las fuentes nuevas. Re-importar el mismo archivo no duplica.
+- Las fuentes de una fila (source_links separados por ';' o espacios) forman
+  un bundle: mismo nombre, fecha y summary, como las crea Add Source.
+- dry_run valida y cuenta todo pero no escribe.
+"""
+import csv
+import io
+import json
+import re
+import time
+import zipfile
+from collections import Counter
+from datetime import date, datetime, timedelta
+from xml.etree import ElementTree
+
+from django import forms as django_forms
+from django.db import connections, reset_queries, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from . import audit, changefeed, risk_history
+from .cache import invalidate_tags
+from .forms import (
+    EVENT_NAME_MAX_LENGTH, EVENT_NAME_MIN_LENGTH,
+    normalize_impacted_lines, taxonomy_errors, validate_source_link,
+)
+from .models import (
+    CATEGORY_CHOICES, LINE_OF_BUSINESS_CHOICES, ONSET_TIMELINE_CHOICES, RISK_CHOICES,
+    RISK_TAXONOMY_LV1, RISK_TAXONOMY_LV2, RISK_TAXONOMY_LV3,
+    Category, Event, Source, Theme, lob_mask,
+)
+
+FORMATS = ("csv", "xlsx", "jsonl")
+
+# Encabezados alternativos -> nombre interno
+ALIASES = {
+    "theme": "threat",
+    "event": "name",
+    "event_name": "name",
+    "source_link": "source_links",
+    "link_or_file": "source_links",
+}
+
+_EXCEL_EPOCH = date(1899, 12, 30)
+_LINK_SPLIT = re.compile(r"[;\s]+")
+
+
+def _choice_map(choices):
+    mapping = {}
+    for value, label in choices:
+        mapping[str(label).lower()] = value
+        mapping[str(value).lower()] = value
+    return mapping
+
+
+def _taxonomy_map():
+    values = [value for value, _ in RISK_TAXONOMY_LV1]
+    for level in (RISK_TAXONOMY_LV2, RISK_TAXONOMY_LV3):
+        for options in level.values():
+            values += [value for value, _ in options]
+    return {value.lower(): value for value in values}
+
+
+RISK_RATINGS = _choice_map(Event.RISK_RATING_CHOICES)
+STATUSES = _choice_map(Event.STATUS_CHOICES)
+THEME_RISKS = _choice_map(RISK_CHOICES)
+ONSETS = _choice_map(ONSET_TIMELINE_CHOICES)
+CATEGORIES = _choice_map(CATEGORY_CHOICES)
+IMPACTS = _choice_map(Source.POTENTIAL_IMPACT_CHOICES)
+LINES = _choice_map(LINE_OF_BUSINESS_CHOICES)
+TAXONOMY = _taxonomy_map()
+LV1_VALUES = {value for value, _ in RISK_TAXONOMY_LV1}
+
+
+# =========================================================
+# Lectores: (número de fila, dict) en orden
+# =========================================================
+
+def read_csv(fh):
+    # utf-8-sig: el CSV de exports.py (y el de Excel) empieza con BOM
+    text = io.TextIOWrapper(fh, encoding="utf-8-sig", newline="")
+    for n, row in enumerate(csv.DictReader(text), 2):   # la fila 1 es el encabezado
+        yield n, row
+
+
+def read_jsonl(fh):
+    for n, line in enumerate(io.TextIOWrapper(fh, encoding="utf-8-sig"), 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            row = {"__error__": f"Invalid JSON: {exc}"}
+        if not isinstance(row, dict):
+            row = {"__error__": "Each line must be a JSON object."}
+        yield n, row
+
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+
+
+def _column_index(ref):
+    letters = "".join(ch for ch in ref if ch.isalpha())
+    index = 0
+    for ch in letters.upper():
+        index = index * 26 + ord(ch) - 64
+    return index - 1
+
+
+def _first_sheet(zf):
+    """Ruta de la primera hoja según workbook.xml (sheet1.xml si no se puede leer)."""
+    try:
+        workbook = ElementTree.fromstring(zf.read("xl/workbook.xml"))
+        rid = workbook.find(f"{_NS}sheets/{_NS}sheet").get(f"{_REL_NS}id")
+        rels = ElementTree.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
+        for rel in rels:
+            if rel.get("Id") == rid:
+                target = rel.get("Target").lstrip("/")
+                return target if target.startswith("xl/") else f"xl/{target}"
+    except (KeyError, AttributeError, ElementTree.ParseError):
+        pass
+    return "xl/worksheets/sheet1.xml"
+
+
+def _shared_strings(zf):
+    try:
+        data = zf.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    strings = []
+    for _, elem in ElementTree.iterparse(data):
+        if elem.tag == f"{_NS}si":
+            strings.append("".join(t.text or "" for t in elem.iter(f"{_NS}t")))
+            elem.clear()
+    return strings
+
+
+def _cell_value(cell, strings):
+    kind = cell.get("t")
+    if kind == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(f"{_NS}t"))
+    v = cell.find(f"{_NS}v")
+    if v is None or v.text is None:
+        return ""
+    if kind == "s":
+        return strings[int(v.text)]
+    if kind == "b":
+        return v.text == "1"
+    if kind in ("str", "e", "d"):
+        return v.text
+    number = float(v.text)
+    return int(number) if number.is_integer() else number
+
+
+def read_xlsx(fh):
+    """
+    Primera hoja, en streaming (iterparse): cada <row> se descarta después de
+    leerla. Las celdas sin atributo r (como las de exports.py) van en orden.
+    """
+    with zipfile.ZipFile(fh) as zf:
+        strings = _shared_strings(zf)
+        header = None
+        sheet_data = None
+        n = 0
+        for event, elem in ElementTree.iterparse(zf.open(_first_sheet(zf)), events=("start", "end")):
+            if event == "start":
+                if elem.tag == f"{_NS}sheetData":
+                    sheet_data = elem
+                continue
+            if elem.tag != f"{_NS}row":
+                continue
+            values = {}
+            position = 0
+            for cell in elem.iter(f"{_NS}c"):
+                ref = cell.get("r")
+                position = _column_index(ref) if ref else position
+                values[position] = _cell_value(cell, strings)
+                position += 1
+            n = int(elem.get("r") or 0) or n + 1
+            if sheet_data is not None:
+                sheet_data.clear()
+            if header is None:
+                header = {i: str(v).strip() for i, v in values.items() if str(v).strip()}
+                continue
+            if any(v not in ("", None) for v in values.values()):
+                yield n, {name: values.get(i, "") for i, name in header.items()}
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl, "xlsx": read_xlsx}
+
+
+def read_rows(fh, fmt):
+    """(número de fila, dict con encabezados normalizados) de un archivo binario."""
+    for n, row in READERS[fmt](fh):
+        yield n, {ALIASES.get(key, key): value
+                  for key, value in ((str(k).strip().lower(), v) for k, v in row.items() if k)}
+
+
+# =========================================================
+# Conversión de celdas
+# =========================================================
+
+class RowError(Exception):
+    def __init__(self, field, message):
+        super().__init__(message)
+        self.field = field
+        self.message = message
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _list(value):
+    if isinstance(value, (list, tuple)):
+        return [_text(v) for v in value if _text(v)]
+    return [part.strip() for part in _text(value).split(";") if part.strip()]
+
+
+def _bool(value, default):
+    if isinstance(value, bool):
+        return value
+    text = _text(value).lower()
+    if not text:
+        return default
+    if text in ("1", "true", "yes", "y", "x", "si", "sí"):
+        return True
+    if text in ("0", "false", "no", "n"):
+        return False
+    raise ValueError(f"Expected true/false, got '{value}'.")
+
+
+def _date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return _EXCEL_EPOCH + timedelta(days=int(value))   # número de serie de Excel
+    text = _text(value)
+    if not text:
+        return None
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        raise ValueError(f"Enter a valid date (YYYY-MM-DD), got '{text}'.")
+
+
+def _required(row, field):
+    value = _text(row.get(field))
+    if not value:
+        raise RowError(field, "This field is required.")
+    return value
+
+
+def _pick(row, field, mapping, required=True):
+    text = _text(row.get(field))
+    if not text:
+        if required:
+            raise RowError(field, "This field is required.")
+        return None
+    value = mapping.get(text.lower())
+    if value is None:
+        raise RowError(field, f"Select a valid choice. '{text}' is not one of the available choices.")
+    return value
+
+
+def _past_date(row, field):
+    try:
+        value = _date(row.get(field))
+    except ValueError as exc:
+        raise RowError(field, str(exc))
+    if value is None:
+        raise RowError(field, "This field is required.")
+    if value > timezone.localdate():
+        raise RowError(field, "Date must be today or in the past.")
+    return value
+
+
+# =========================================================
+# Importador
+# =========================================================
+
+class ImportResult:
+    def __init__(self):
+        self.counts = Counter()
+        self.errors = []          # [(fila, campo, mensaje)]
+        self.aborted = False
+        self.seconds = 0.0
+
+    def add_error(self, line, field, message):
+        self.errors.append((line, field, message))
+
+
+class TrackerImporter:
+    def __init__(self, batch_size=1000, dry_run=False, user=None, using="default",
+                 max_errors=None, progress=None):
+        self.batch_size = max(1, batch_size)
+        self.dry_run = dry_run
+        self.user = user
+        self.using = using
+        self.max_errors = max_errors
+        self.progress = progress or (lambda result: None)
+        self.result = ImportResult()
+
+        # Mapas en memoria. Valores: pk (ya en la BD) o la instancia creada en esta corrida
+        self._categories = {}
+        self._themes = {}
+        self._events = {}                 # (ref de theme, nombre en minúsculas, fecha) -> ref
+        self._source_keys = set()         # (ref de evento, nombre, fecha, summary, link)
+        self._bundle_keys = set()         # (ref de evento, nombre, fecha, summary normalizado)
+        self._sources_loaded = set()      # pks de eventos cuyas fuentes ya se leyeron
+        self._events_queried = set()      # (theme_pk, nombre, fecha) ya buscados en la BD
+
+    # ---------- entrada ----------
+
+    def run(self, rows):
+        """rows: iterable de (número de fila, dict). Devuelve ImportResult."""
+        started = time.monotonic()
+        self._load_lookups()
+        batch = []
+        for line, row in rows:
+            batch.append((line, row))
+            if len(batch) >= self.batch_size:
+                self._process(batch)
+                batch = []
+                if self._too_many_errors():
+                    self.result.aborted = True
+                    break
+        if batch and not self.result.aborted:
+            self._process(batch)
+        self.result.seconds = time.monotonic() - started
+        return self.result
+
+    def _too_many_errors(self):
+        return self.max_errors is not None and len(self.result.errors) > self.max_errors
+
+    def _load_lookups(self):
+        categories = Category.objects.using(self.using)
+        for pk, name in categories.values_list("pk", "name"):
+            self._categories.setdefault(name.lower(), pk)
+        # el primer threat (menor pk) gana si hay nombres repetidos
+        for pk, name in Theme.objects.using(self.using).order_by("pk").values_list("pk", "name"):
+            self._themes.setdefault(name.strip().lower(), pk)
+
+    # ---------- lote ----------
+
+    def _process(self, batch):
+        self._prefetch_existing(batch)
+        plan = {"categories": [], "themes": [], "events": [], "sources": [],
+                "event_keys": [], "new_keys": [], "touched_themes": set(), "touched_events": set()}
+        for line, row in batch:
+            self.result.counts["rows"] += 1
+            try:
+                self._plan_row(row, plan)
+            except RowError as exc:
+                self.result.add_error(line, exc.field, exc.message)
+        if not self.dry_run:
+            self._write(plan)
+            self._forget_instances(plan)
+        self.result.counts["batches"] += 1
+        reset_queries()   # con DEBUG=True el log de SQL de los bulk_create crece sin límite
+        self.progress(self.result)
+
+    def _prefetch_existing(self, batch):
+        """Eventos (y sus fuentes) de threats existentes, con una consulta cada uno."""
+        keys = set()
+        for _, row in batch:
+            theme = self._themes.get(_text(row.get("threat")).lower())
+            if not isinstance(theme, int):
+                continue
+            try:
+                day = _date(row.get("date_identified"))
+            except ValueError:
+                continue
+            if day:
+                keys.add((theme, _text(row.get("name")).lower(), day))
+        wanted = {key for key in keys if key not in self._events and key not in self._events_queried}
+        if wanted:
+            self._events_queried |= wanted
+            existing = (Event.objects.using(self.using)
+                        .annotate(lname=Lower("name"))
+                        .filter(theme_id__in={k[0] for k in wanted}, lname__in={k[1] for k in wanted},
+                                date_identified__in={k[2] for k in wanted})
+                        .order_by("pk")
+                        .values_list("pk", "theme_id", "lname", "date_identified"))
+            for pk, theme_id, lname, day in existing:
+                self._events.setdefault((theme_id, lname, day), pk)
+
+        # también los eventos que una consulta anterior trajo de rebote
+        event_pks = {pk for pk in (self._events.get(k) for k in keys)
+                     if isinstance(pk, int) and pk not in self._sources_loaded}
+        if not event_pks:
+            return
+        self._sources_loaded |= event_pks
+        sources = (Source.objects.using(self.using).filter(event_id__in=event_pks)
+                   .values_list("event_id", "name", "source_date", "summary", "link_or_file"))
+        for event_id, name, day, summary, link in sources:
+            self._source_keys.add((event_id, (name or "").strip(), day, (summary or "").strip(), link or ""))
+            self._bundle_keys.add((event_id, (name or "").strip(), day, (summary or "").strip().lower()))
+
+    # ---------- validación ----------
+
+    def _plan_row(self, row, plan):
+        if "__error__" in row:
+            raise RowError("__all__", row["__error__"])
+        theme = self._theme_for(row, plan)
+        name = _required(row, "name")
+        day = _past_date(row, "date_identified")
+        key = (theme if isinstance(theme, int) else id(theme), name.lower(), day)
+        sources = self._sources_for(row)
+
+        event = self._events.get(key)
+        if event is None:
+            event = self._new_event(row, theme, name, day)
+            if plan["pending_theme"] is not None:
+                self._register_theme(plan["pending_theme"], plan)
+            self._events[key] = event
+            plan["events"].append(event)
+            plan["event_keys"].append(key)
+            if isinstance(theme, int):
+                plan["touched_themes"].add(theme)
+            self.result.counts["events_created"] += 1
+        else:
+            self.result.counts["events_matched"] += 1
+
+        event_ref = event if isinstance(event, int) else id(event)
+        for source in sources:
+            source_key = (event_ref, source.name, source.source_date, source.summary, source.link_or_file)
+            if source_key in self._source_keys:
+                self.result.counts["sources_skipped"] += 1
+                continue
+            self._source_keys.add(source_key)
+            bundle_key = (event_ref, source.name, source.source_date, source.summary.lower())
+            if bundle_key not in self._bundle_keys:
+                self._bundle_keys.add(bundle_key)
+                self.result.counts["bundles_created"] += 1
+            if not isinstance(event, int):
+                plan["new_keys"].append((source_key, bundle_key))
+            if isinstance(event, int):
+                source.event_id = event
+                plan["touched_events"].add(event)
+            else:
+                source.event = event
+            plan["sources"].append(source)
+            self.result.counts["sources_created"] += 1
+
+    def _theme_for(self, row, plan):
+        """pk o instancia del threat; si hay que crearlo queda en plan["pending_theme"]."""
+        plan["pending_theme"] = None
+        name = _required(row, "threat")
+        theme = self._themes.get(name.lower())
+        if theme is not None:
+            return theme
+        if len(name) > Theme._meta.get_field("name").max_length:
+            raise RowError("threat", "Ensure this value has at most 200 characters.")
+        category_name = _text(row.get("category"))
+        if not category_name:
+            raise RowError("category", f"Threat '{name}' does not exist; category is required to create it.")
+        category = self._categories.get(category_name.lower())
+        if category is None:
+            value = CATEGORIES.get(category_name.lower())
+            if value is None:
+                raise RowError("category", f"Select a valid choice. '{category_name}' is not one of the available choices.")
+            category = Category(name=value)
+        theme = Theme(
+            name=name,
+            category_id=category if isinstance(category, int) else None,
+            risk_rating=_pick(row, "threat_risk_rating", THEME_RISKS),
+            onset_timeline=_pick(row, "threat_onset_timeline", ONSETS),
+            description=_text(row.get("threat_description")) or None,
+            created_by=self.user,
+        )
+        if isinstance(category, Category):
+            theme.category = category
+        plan["pending_theme"] = theme
+        return theme
+
+    def _register_theme(self, theme, plan):
+        key = theme.name.lower()
+        if key in self._themes:
+            return
+        category = theme.category if theme.category_id is None else None
+        if category is not None and category.name.lower() not in self._categories:
+            self._categories[category.name.lower()] = category
+            plan["categories"].append(category)
+            self.result.counts["categories_created"] += 1
+        self._themes[key] = theme
+        plan["themes"].append(theme)
+        self.result.counts["themes_created"] += 1
+
+    def _new_event(self, row, theme, name, day):
+        """Mismas reglas que EventForm (el primer error de la fila se reporta)."""
+        if not EVENT_NAME_MIN_LENGTH <= len(name) <= EVENT_NAME_MAX_LENGTH:
+            raise RowError("name", f"Name must be between {EVENT_NAME_MIN_LENGTH} and "
+                                   f"{EVENT_NAME_MAX_LENGTH} characters.")
+        risk_rating = _pick(row, "risk_rating", RISK_RATINGS)
+        status = _pick(row, "status", STATUSES)
+
+        lines = []
+        for item in _list(row.get("impacted_lines")):
+            value = LINES.get(item.lower())
+            if value is None:
+                raise RowError("impacted_lines", f"Select a valid choice. '{item}' is not one of the available choices.")
+            lines.append(value)
+        if not lines:
+            raise RowError("impacted_lines", "This field is required.")
+        lines = normalize_impacted_lines(lines)
+
+        levels = []
+        for field in ("risk_taxonomy_lv1", "risk_taxonomy_lv2", "risk_taxonomy_lv3"):
+            values = [TAXONOMY.get(item.lower(), item) for item in _list(row.get(field))]
+            if not values:
+                raise RowError(field, "This field is required.")
+            levels.append(values)
+        invalid_lv1 = [item for item in levels[0] if item not in LV1_VALUES]
+        if invalid_lv1:
+            raise RowError("risk_taxonomy_lv1", f"Invalid Level 1 options: {', '.join(invalid_lv1)}")
+        errors = taxonomy_errors(*levels)
+        if errors:
+            field, message = next(iter(errors.items()))
+            raise RowError(field, message)
+
+        description = _required(row, "description")
+        try:
+            is_active = _bool(row.get("active"), True)
+            control = _bool(row.get("control_in_place"), False)
+        except ValueError as exc:
+            raise RowError("active/control_in_place", str(exc))
+
+        event = Event(
+            name=name, date_identified=day, description=description,
+            impacted_lines=lines, risk_taxonomy_lv1=levels[0], risk_taxonomy_lv2=levels[1],
+            risk_taxonomy_lv3=levels[2], status=status, risk_rating=risk_rating,
+            control_in_place=control, is_active=is_active, created_by=self.user,
+        )
+        # bulk_create no pasa por Event.save()
+        event.impacted_lines_mask = lob_mask(lines)
+        if isinstance(theme, int):
+            event.theme_id = theme
+        else:
+            event.theme = theme
+        return event
+
+    def _sources_for(self, row):
+        """Fuentes de la fila: una por link, todas en el mismo bundle."""
+        name = _text(row.get("source_name"))
+        if not name:
+            return []
+        if len(name) > Source._meta.get_field("name").max_length:
+            raise RowError("source_name", "Ensure this value has at most 200 characters.")
+        day = _past_date(row, "source_date")
+        summary = _required(row, "source_summary")
+        impact = _pick(row, "source_potential_impact", IMPACTS, required=False)
+        notes = _text(row.get("source_potential_impact_notes")) or None
+
+        raw_links = row.get("source_links")
+        links = raw_links if isinstance(raw_links, list) else _LINK_SPLIT.split(_text(raw_links))
+        links = [link for link in (_text(v) for v in links) if link]
+        for link in links:
+            if len(link) > Source._meta.get_field("link_or_file").max_length:
+                raise RowError("source_links", "Ensure each link has at most 500 characters.")
+            try:
+                validate_source_link(link)
+            except django_forms.ValidationError as exc:
+                raise RowError("source_links", f"{link}: {exc.messages[0]}")
+        return [
+            Source(
+                name=name, source_date=day, summary=summary, link_or_file=link,
+                source_type="LINK" if link else "",
+                potential_impact=impact, potential_impact_notes=notes, created_by=self.user,
+            )
+            for link in (links or [""])
+        ]
+
+    # ---------- escritura ----------
+
+    def _write(self, plan):
+        if not (plan["themes"] or plan["events"] or plan["sources"]):
+            return
+        db = self.using
+        with transaction.atomic(using=db):
+            self._bulk_create(Category, plan["categories"], ("name",))
+            # se re-asigna el objeto (no el *_id) para conservar la instancia en caché
+            for theme in plan["themes"]:
+                if theme.category_id is None:
+                    theme.category = theme.category
+            self._bulk_create(Theme, plan["themes"], ("name",))
+            for event in plan["events"]:
+                if event.theme_id is None:
+                    event.theme = event.theme
+            self._bulk_create(Event, plan["events"], ("theme_id", "name", "date_identified"))
+            self._attach_events(plan["sources"])
+            self._bulk_create(Source, plan["sources"], ("download_token",))
+
+            created = plan["themes"] + plan["events"] + plan["sources"]
+            audit.record_bulk_created(created, user=self.user, using=db)
+            risk_history.record_bulk_created(created, using=db)
+            changefeed.record_many(Theme, [(t.pk, t.category_id) for t in plan["themes"]], "create")
+            changefeed.record_many(Event, [(e.pk, e.theme_id) for e in plan["events"]], "create")
+            changefeed.record_many(Source, [(src.pk, src.event_id) for src in plan["sources"]], "create")
+
+            tags = {"themes", "events", "sources"}
+            if plan["categories"]:
+                tags.add("categories")
+            # por objeto, solo los que ya existían antes de la importación
+            tags |= {f"theme:{pk}" for pk in plan["touched_themes"]}
+            tags |= {f"event:{pk}" for pk in plan["touched_events"]}
+            transaction.on_commit(lambda: invalidate_tags(*tags), using=db)
+
+    def _forget_instances(self, plan):
+        """
+        Ya escritas, los mapas pasan a guardar pks en lugar de instancias (y
+        las llaves por id() se rehacen con el pk): la memoria no crece con
+        las filas ya importadas.
+        """
+        for category in plan["categories"]:
+            self._categories[category.name.lower()] = category.pk
+        for theme in plan["themes"]:
+            self._themes[theme.name.lower()] = theme.pk
+        event_pks = {}
+        for key, event in zip(plan["event_keys"], plan["events"]):
+            del self._events[key]
+            self._events[(event.theme_id, key[1], key[2])] = event.pk
+            self._sources_loaded.add(event.pk)   # sus fuentes son las de esta corrida
+            event_pks[id(event)] = event.pk
+        for source_key, bundle_key in plan["new_keys"]:
+            pk = event_pks[source_key[0]]
+            self._source_keys.discard(source_key)
+            self._source_keys.add((pk, *source_key[1:]))
+            if bundle_key in self._bundle_keys:
+                self._bundle_keys.discard(bundle_key)
+                self._bundle_keys.add((pk, *bundle_key[1:]))
+
+    def _attach_events(self, sources):
+        """
+        Cada Source con su Event en memoria: el historial de riesgo toma de ahí
+        el theme_id. Los eventos que ya existían se leen con una consulta.
+        """
+        missing = {source.event_id for source in sources if not Source.event.is_cached(source)}
+        existing = {}
+        if missing:
+            existing = Event.objects.using(self.using).only("id", "theme_id").in_bulk(missing)
+        for source in sources:
+            if Source.event.is_cached(source):
+                source.event = source.event
+            else:
+                source.event = existing[source.event_id]
+
+    def _bulk_create(self, model, objs, natural_key):
+        if not objs:
+            return
+        manager = model.objects.using(self.using)
+        manager.bulk_create(objs)
+        if connections[self.using].features.can_return_rows_from_bulk_insert:
+            return
+        # Backends sin RETURNING (MSSQL): se recuperan los pks por la llave natural
+        values = {field: {getattr(obj, field) for obj in objs} for field in natural_key}
+        found = {}
+        rows = (manager.filter(**{f"{field}__in": v for field, v in values.items()})
+                .order_by("pk").values_list("pk", *natural_key))
+        for pk, *key in rows:
+            found[tuple(key)] = pk   # el último (mayor pk) es el recién insertado
+        for obj in objs:
+            obj.pk = found[tuple(getattr(obj, field) for field in natural_key)]
+            obj._state.adding = False
+            obj._state.db = self.using
+
@@ -0,0 +1,250 @@
+# tracker/live.py
+"""
+Avisos en vivo (Server-Sent Events) para el dashboard y la página del evento.
+
+- Un Hub por proceso (por event loop): una sola tarea lee ChangeFeedEntry
+  cada LIVE_POLL_SECONDS mientras haya alguien conectado, y reparte cada
+  aviso ya serializado a las colas de los suscriptores de sus tópicos. Las
+  conexiones ociosas no consultan nada; solo esperan en su cola.
+- Tópicos: "dashboard", "theme:<id>", "event:<id>", "source:<id>". Un cambio
+  de fuente llega a "event:<event_id>"; uno de evento, a "theme:<theme_id>".
+- Los avisos son pistas, no datos: la página pide el fragmento afectado a
+  views_live.fragment y reemplaza solo esa fila/tarjeta.
+- Si una conexión se atrasa (cola llena), llega un import masivo (más de
+  LIVE_MAX_BATCH cambios en una lectura) o reconecta con un Last-Event-ID
+  que ya no está en el buffer, recibe "reload" y la página lo ofrece.
+
+Las entradas del feed más nuevas que CHANGE_FEED_SETTLE_SECONDS se vuelven a
+leer en cada vuelta (sin reenviarlas), así un id confirmado tarde no se pierde.
+"""
+import asyncio
+import contextvars
+import json
+import logging
+import re
+from collections import defaultdict, deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from . import changefeed
+from .models import ChangeFeedEntry
+
+logger = logging.getLogger(__name__)
+
+TOPIC_RE = re.compile(r"^(dashboard|(theme|event|source):\d+)$")
+MAX_TOPICS = 10
+
+# object_type -> tópicos del objeto (id) y de su padre (parent_id)
+_TOPICS = {
+    "theme": ("theme", None),
+    "event": ("event", "theme"),
+    "source": ("source", "event"),
+    "sourcefileversion": (None, "source"),
+}
+_ON_DASHBOARD = {"theme", "event", "source"}
+
+
+def enabled():
+    return getattr(settings, "LIVE_UPDATES", False)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def context_processor(request):
+    return {"live_updates": enabled()}
+
+
+def parse_topics(values):
+    """Tópicos válidos de ?topic= (repetible o separado por comas)."""
+    topics = set()
+    for value in values:
+        topics.update(t.strip() for t in value.split(",") if TOPIC_RE.match(t.strip()))
+    return sorted(topics)[:MAX_TOPICS]
+
+
+def topics_for(object_type, object_id, parent_id):
+    own, parent = _TOPICS.get(object_type, (None, None))
+    topics = set()
+    if own:
+        topics.add(f"{own}:{object_id}")
+    if parent and parent_id is not None:
+        topics.add(f"{parent}:{parent_id}")
+    if object_type in _ON_DASHBOARD:
+        topics.add("dashboard")
+    return topics
+
+
+def sse(event, data=None, seq=None):
+    lines = []
+    if seq is not None:
+        lines.append(f"id: {seq}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data if data is not None else {}, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+RELOAD = sse("reload")
+PING = b": ping\n\n"
+
+
+class Subscriber:
+    __slots__ = ("topics", "queue")
+
+    def __init__(self, topics):
+        self.topics = topics
+        self.queue = asyncio.Queue(maxsize=_setting("LIVE_QUEUE_SIZE", 100))
+
+    def send(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # atrasado: lo pendiente ya no sirve, que recargue
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RELOAD)
+
+
+class Hub:
+    def __init__(self, loop):
+        self.loop = loop
+        self.by_topic = defaultdict(set)
+        self.count = 0
+        self.task = None
+        self.start_lock = asyncio.Lock()
+        self.low_water = None     # todo lo <= ya se repartió y está asentado
+        self.sent = set()         # ids > low_water ya repartidos
+        self.floor = 0            # Last-Event-ID menor que esto -> reload
+        self.recent = deque(maxlen=_setting("LIVE_REPLAY_SIZE", 2000))
+
+    # ---------- suscripción ----------
+
+    async def subscribe(self, topics, last_event_id=None):
+        await self._ensure_watcher()
+        sub = Subscriber(topics)
+        for topic in topics:
+            self.by_topic[topic].add(sub)
+        self.count += 1
+        if last_event_id is not None:
+            self._replay(sub, last_event_id)
+        return sub
+
+    def unsubscribe(self, sub):
+        for topic in sub.topics:
+            subs = self.by_topic.get(topic)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self.by_topic[topic]
+        self.count -= 1
+
+    def _replay(self, sub, last_event_id):
+        floor = self.recent[0][0] - 1 if len(self.recent) == self.recent.maxlen else self.floor
+        if last_event_id < floor:
+            sub.send(RELOAD)
+            return
+        wanted = set(sub.topics)
+        for seq, topics, message in self.recent:
+            if seq > last_event_id and topics & wanted:
+                sub.send(message)
+
+    # ---------- watcher ----------
+
+    async def _ensure_watcher(self):
+        if self.task is not None and not self.task.done():
+            return
+        async with self.start_lock:
+            if self.task is not None and not self.task.done():
+                return
+            # Arranca (o rearranca tras quedar sin suscriptores) desde el final del feed
+            top = (await ChangeFeedEntry.objects.aaggregate(m=Max("pk")))["m"] or 0
+            self.low_water, self.floor = top, top
+            self.sent.clear()
+            self.recent.clear()
+            # Contexto vacío: la tarea sobrevive al request que la arrancó (y a su
+            # executor de asgiref); sus consultas van al hilo sync compartido
+            self.task = self.loop.create_task(self._watch(), context=contextvars.Context())
+
+    async def _watch(self):
+        interval = _setting("LIVE_POLL_SECONDS", 1)
+        while True:
+            await asyncio.sleep(interval)
+            if not self.count:
+                break
+            try:
+                await self._poll()
+            except Exception:
+                logger.exception("Live updates watcher failed")
+
+    async def _poll(self):
+        max_batch = _setting("LIVE_MAX_BATCH", 200)
+        settled = timezone.now() - timedelta(seconds=changefeed.settle_seconds())
+        qs = (ChangeFeedEntry.objects.filter(pk__gt=self.low_water).order_by("pk")
+              .values_list("pk", "object_type", "object_id", "parent_id", "action", "fields", "recorded_at"))
+        rows = [row async for row in qs[:max_batch + 1]]
+        if len(rows) > max_batch:
+            # ráfaga (import, archivado masivo): más barato recargar que parchear
+            top = (await ChangeFeedEntry.objects.aaggregate(m=Max("pk")))["m"]
+            self.low_water, self.floor = top, top
+            self.sent.clear()
+            self.recent.clear()
+            self._broadcast(RELOAD)
+            return
+
+        for seq, object_type, object_id, parent_id, action, fields, _ in rows:
+            if seq in self.sent:
+                continue
+            self.sent.add(seq)
+            data = {"type": object_type, "id": object_id, "parent": parent_id, "action": action}
+            if fields:
+                data["fields"] = fields
+            self._publish(seq, topics_for(object_type, object_id, parent_id), sse("change", data, seq))
+
+        for seq, *_, recorded_at in rows:
+            if recorded_at > settled:
+                break
+            self.low_water = seq
+        self.sent = {seq for seq in self.sent if seq > self.low_water}
+
+    def _publish(self, seq, topics, message):
+        self.recent.append((seq, topics, message))
+        targets = set()
+        for topic in topics:
+            targets |= self.by_topic.get(topic, set())
+        for sub in targets:
+            sub.send(message)
+
+    def _broadcast(self, message):
+        for sub in set().union(*self.by_topic.values()):
+            sub.send(message)
+
+
+_hub = None
+
+
+def get_hub():
+    """Hub del event loop actual (uno por proceso bajo uvicorn)."""
+    global _hub
+    loop = asyncio.get_running_loop()
+    if _hub is None or _hub.loop is not loop:
+        _hub = Hub(loop)
+    return _hub
+
+
+async def stream(hub, sub):
+    """Cuerpo de la respuesta text/event-stream de una conexión."""
+    heartbeat = _setting("LIVE_HEARTBEAT_SECONDS", 25)
+    try:
+        yield f"retry: {_setting('LIVE_RETRY_MS', 5000)}\n\n".encode()
+        while True:
+            try:
+                message = await asyncio.wait_for(sub.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                message = PING
+            yield message
+    finally:
+        hub.unsubscribe(sub)
@@ -0,0 +1,84 @@
+# tracker/management/commands/bench_login.py
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tracker.backends import EmailOrUsernameModelBackend
+from tracker.benchmarks import percentile as _pct
+from tracker.seeding import SEED_PASSWORD, TrackerSeeder, user_email, user_name
+
+BENCH_SEED = 42
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark del login por email/username sobre una BD de prueba temporal: "
+        "latencia de la búsqueda del usuario, consultas por login y logins/s con hash incluido."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20000, help="Usuarios a sembrar (default 20000).")
+        parser.add_argument("--lookups", type=int, default=2000, help="Búsquedas por escenario (default 2000).")
+        parser.add_argument(
+            "--logins", type=int, default=5,
+            help="authenticate() completos (incluye PBKDF2, son lentos a propósito). Default 5.",
+        )
+        parser.add_argument("--keepdb", action="store_true", help="Reutiliza la BD de prueba si existe.")
+
+    def handle(self, *args, **opts):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=opts["keepdb"])
+        try:
+            self._seed(opts["users"])
+            self._run(opts)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=opts["keepdb"])
+
+    # ---------- helpers ----------
+
+    def _seed(self, n):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"==> Sembrando {n} usuarios"))
+        # Reutiliza los usuarios ya sembrados con la misma semilla (--keepdb)
+        TrackerSeeder(seed=BENCH_SEED, users=n, themes=0, access_logs_per_user=0).run()
+
+    def _run(self, opts):
+        backend = EmailOrUsernameModelBackend()
+        n = opts["users"]
+        rnd = random.Random(42)
+        scenarios = {
+            "email": lambda: user_email(BENCH_SEED, rnd.randrange(n)).title(),
+            "username": lambda: user_name(BENCH_SEED, rnd.randrange(n)).upper(),
+            "miss": lambda: f"nobody{rnd.randrange(n)}@example.com",
+        }
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"==> Búsquedas ({connection.vendor})"))
+        for name, make_login in scenarios.items():
+            with CaptureQueriesContext(connection) as ctx:
+                backend.lookup_user(make_login())
+            timings = []
+            for _ in range(opts["lookups"]):
+                login = make_login()
+                t0 = time.perf_counter()
+                backend.lookup_user(login)
+                timings.append(time.perf_counter() - t0)
+            self.stdout.write(
+                f"  {name:<9} p50={_pct(timings, 50) * 1000:.3f}ms p95={_pct(timings, 95) * 1000:.3f}ms "
+                f"queries/login={len(ctx.captured_queries)} lookups/s={len(timings) / sum(timings):,.0f}"
+            )
+
+        if opts["logins"]:
+            self.stdout.write(self.style.MIGRATE_HEADING("==> authenticate() completo (con hash)"))
+            timings = []
+            for _ in range(opts["logins"]):
+                login = scenarios["email"]()
+                t0 = time.perf_counter()
+                user = backend.authenticate(None, username=login, password=SEED_PASSWORD)
+                timings.append(time.perf_counter() - t0)
+                if user is None:
+                    self.stdout.write(self.style.ERROR(f"  login fallido para {login}"))
+            self.stdout.write(
+                f"  mean={statistics.mean(timings) * 1000:.1f}ms logins/s={len(timings) / sum(timings):.2f}"
+            )
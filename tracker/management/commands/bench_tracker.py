@@ -0,0 +1,121 @@
+# tracker/management/commands/bench_tracker.py
+import json
+import logging
+import shutil
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from tracker import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de las vistas y servicios del tracker sobre una BD de prueba temporal: "
+        "p50/p95, consultas y pico de memoria por caso, comparado contra un baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=1,
+                            help="Factor de escala del dataset (1 = ~200 eventos, ~2000 fuentes; ver TrackerSeeder).")
+        parser.add_argument("--iterations", type=int, default=20, help="Corridas medidas por caso.")
+        parser.add_argument("--files", type=int, default=10, help="Archivos extra por add_source.")
+        parser.add_argument("--only", action="append", default=[],
+                            help="Solo casos cuyo nombre empiece así (repetible).")
+        parser.add_argument("--baseline", default=benchmarks.BASELINE_PATH, help="Archivo JSON de baseline.")
+        parser.add_argument("--save-baseline", action="store_true",
+                            help="Guarda los resultados como baseline para esta escala y motor.")
+        parser.add_argument("--no-compare", action="store_true", help="No compara contra el baseline.")
+        parser.add_argument("--json", dest="json_path", help="Escribe los resultados en este archivo.")
+        parser.add_argument("--max-extra-queries", type=int,
+                            default=benchmarks.DEFAULT_THRESHOLDS["max_extra_queries"])
+        parser.add_argument("--max-slowdown", type=float,
+                            default=benchmarks.DEFAULT_THRESHOLDS["max_slowdown"])
+        parser.add_argument("--max-p95-slowdown", type=float,
+                            default=benchmarks.DEFAULT_THRESHOLDS["max_p95_slowdown"])
+        parser.add_argument("--max-memory-growth", type=float,
+                            default=benchmarks.DEFAULT_THRESHOLDS["max_memory_growth"])
+        parser.add_argument("--keepdb", action="store_true", help="Reutiliza la BD de prueba si existe.")
+
+    def handle(self, *args, **opts):
+        if opts["scale"] < 1:
+            raise CommandError("--scale debe ser >= 1")
+        media_root = tempfile.mkdtemp(prefix="tracker-bench-media-")
+        # Los avisos de presupuesto de consultas ensucian la tabla; las consultas ya se reportan
+        metrics_logger = logging.getLogger("tracker.metrics")
+        previous_level = metrics_logger.level
+        metrics_logger.setLevel(logging.ERROR)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=opts["keepdb"])
+        try:
+            with benchmarks.taxonomy_stub_server() as taxonomy_url, override_settings(
+                MEDIA_ROOT=media_root,
+                RISK_TAXONOMY_API_URL=taxonomy_url,
+                # Caché aislada del dev (archivo/Redis): los casos "cold" la vacían
+                CACHES={
+                    "default": {
+                        "BACKEND": "tracker.cache.TwoTierCache",
+                        "LOCATION": "shared",
+                        "TIMEOUT": 300,
+                    },
+                    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                               "LOCATION": "tracker-bench"},
+                },
+                PROFILE_SAMPLE_RATE=0,
+            ):
+                results = self._run(opts)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=opts["keepdb"])
+            shutil.rmtree(media_root, ignore_errors=True)
+            metrics_logger.setLevel(previous_level)
+
+        if opts["json_path"]:
+            with open(opts["json_path"], "w", encoding="utf-8") as fh:
+                json.dump(results, fh, indent=2, sort_keys=True)
+        if opts["save_baseline"]:
+            benchmarks.save_baseline(results, opts["scale"], opts["baseline"])
+            self.stdout.write(self.style.SUCCESS(f"Baseline guardado en {opts['baseline']}"))
+        elif not opts["no_compare"]:
+            self._compare(results, opts)
+
+    # ---------- helpers ----------
+
+    def _run(self, opts):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"==> Sembrando escala {opts['scale']} ({connection.vendor})"))
+        data = benchmarks.seed(opts["scale"], stdout=self.stdout)
+
+        client = Client(HTTP_HOST="localhost")
+        client.force_login(data["admin"])
+        cases = benchmarks.build_cases(data, client, files_per_upload=opts["files"])
+        if opts["only"]:
+            cases = {k: v for k, v in cases.items() if any(k.startswith(p) for p in opts["only"])}
+            if not cases:
+                raise CommandError("Ningún caso coincide con --only")
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f"==> {len(cases)} casos x {opts['iterations']} corridas"))
+        self.stdout.write(f"  {'case':<30} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'peak KB':>9}")
+        results = {}
+        for name, (fn, before) in cases.items():
+            r = results[name] = benchmarks.measure(fn, opts["iterations"], before=before)
+            self.stdout.write(
+                f"  {name:<30} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['queries']:>8} {r['peak_kb']:>9.0f}"
+            )
+        return results
+
+    def _compare(self, results, opts):
+        key = benchmarks.baseline_key(opts["scale"])
+        baseline = benchmarks.load_baseline(opts["baseline"]).get(key)
+        if not baseline:
+            self.stdout.write(self.style.WARNING(f"Sin baseline para {key}; usa --save-baseline."))
+            return
+        problems = benchmarks.compare(results, baseline, {
+            "max_extra_queries": opts["max_extra_queries"],
+            "max_slowdown": opts["max_slowdown"],
+            "max_p95_slowdown": opts["max_p95_slowdown"],
+            "max_memory_growth": opts["max_memory_growth"],
+        })
+        if problems:
+            raise CommandError("Regresiones contra el baseline:\n  " + "\n  ".join(problems))
+        self.stdout.write(self.style.SUCCESS(f"Sin regresiones contra el baseline {key}."))
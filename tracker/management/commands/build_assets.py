@@ -0,0 +1,64 @@
+# tracker/management/commands/build_assets.py
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker import assets
+
+
+class Command(BaseCommand):
+    help = (
+        "Construye los bundles JS/CSS minificados de assets/ en static/dist/ "
+        "(luego collectstatic les agrega hash y precomprime gzip/brotli) y reporta el tamaño."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true",
+                            help="No escribe: falla si algún bundle en static/dist/ está desactualizado.")
+        parser.add_argument("--report", action="store_true",
+                            help="Tabla de bytes: inline antes vs minificado/gzip/brotli después.")
+
+    def handle(self, *args, **opts):
+        stale, rows = [], []
+        for name in assets.BUNDLES:
+            built = assets.build(name)
+            if opts["check"]:
+                try:
+                    with open(assets.output_path(name), encoding="utf-8") as fh:
+                        current = fh.read()
+                except FileNotFoundError:
+                    current = None
+                if current != built:
+                    stale.append(name)
+            elif assets.write(name, built):
+                self.stdout.write(f"  escrito static/dist/{name}")
+            rows.append((name, assets.sizes(name, built)))
+
+        if opts["report"]:
+            self._report(rows)
+        if stale:
+            raise CommandError("Bundles desactualizados (corre build_assets): " + ", ".join(stale))
+        self.stdout.write(self.style.SUCCESS(f"{len(rows)} bundles al día."))
+
+    def _report(self, rows):
+        self.stdout.write(self.style.MIGRATE_HEADING("==> Bytes por bundle"))
+        self.stdout.write(f"  {'bundle':<22} {'inline':>8} {'min':>8} {'gzip':>8} {'brotli':>8}")
+        totals = {"inline": 0, "minified": 0, "gzip": 0, "brotli": 0}
+        for name, s in rows:
+            br = "-" if s["brotli"] is None else s["brotli"]
+            inline = s["inline"] or "-"
+            self.stdout.write(f"  {name:<22} {inline:>8} {s['minified']:>8} {s['gzip']:>8} {br:>8}")
+            for key in totals:
+                totals[key] += s[key] or 0
+        br = "-" if rows and rows[0][1]["brotli"] is None else totals["brotli"]
+        self.stdout.write(
+            f"  {'total':<22} {totals['inline']:>8} {totals['minified']:>8} {totals['gzip']:>8} {br:>8}"
+        )
+        # Después: solo los bundles que reemplazan código inline (incluyen además
+        # live.js/typeahead.js, que antes no existían)
+        replaced = [s for _, s in rows if s["inline"]]
+        best = sum(s["brotli"] or s["gzip"] for s in replaced)
+        self.stdout.write(
+            f"  Antes: {totals['inline']:,} B inline sin comprimir, repartidos en las vistas y bajados en cada carga. "
+            f"Después: {best:,} B comprimidos en los {len(replaced)} bundles que los reemplazan, "
+            f"una sola vez por versión (immutable); "
+            f"{100 - 100 * best / max(totals['inline'], 1):.0f}% menos en la primera visita."
+        )
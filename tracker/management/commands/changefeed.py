@@ -0,0 +1,41 @@
+# tracker/management/commands/changefeed.py
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker import changefeed
+from tracker.models import ChangeFeedEntry
+
+
+class Command(BaseCommand):
+    help = (
+        "Mantenimiento del feed de cambios (/api/changes/). "
+        "compact: deja una sola entrada por objeto en lo más viejo que --days (programar a diario). "
+        "backfill: agrega un 'create' por cada objeto sin entradas (datos previos al feed o de seed_tracker)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=("compact", "backfill"))
+        parser.add_argument("--days", type=int, default=None,
+                            help="compact: antigüedad mínima (default CHANGE_FEED_COMPACT_AFTER_DAYS).")
+        parser.add_argument("--chunk-size", type=int, default=None,
+                            help="Filas por rango/lote (compact 50000, backfill 5000).")
+
+    def handle(self, *args, **opts):
+        if opts["chunk_size"] is not None and opts["chunk_size"] < 1:
+            raise CommandError("--chunk-size debe ser >= 1")
+        before = ChangeFeedEntry.objects.count()
+
+        if opts["action"] == "compact":
+            deleted = changefeed.compact(
+                older_than_days=opts["days"],
+                chunk_size=opts["chunk_size"] or 50000,
+                progress=lambda seq, last, n: self.stdout.write(f"  hasta #{seq:,} de #{last:,}: {n:,} borradas"),
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"Compactado: {deleted:,} entradas borradas ({before:,} -> {before - deleted:,})."
+            ))
+        else:
+            added = changefeed.backfill(
+                chunk_size=opts["chunk_size"] or 5000,
+                progress=lambda object_type, n: self.stdout.write(f"  {object_type}: {n:,} en total"),
+            )
+            self.stdout.write(self.style.SUCCESS(f"Backfill: {added:,} entradas agregadas."))
@@ -0,0 +1,26 @@
+# tracker/management/commands/close_stale_sessions.py
+from django.core.management.base import BaseCommand
+
+from tracker.accesslog import buffer, close_stale_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        "Cierra en UserAccessLog las sesiones que expiraron sin logout explícito "
+        "(pensado para correr periódicamente, p. ej. junto a clearsessions)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo cuenta las filas que se cerrarían.",
+        )
+
+    def handle(self, *args, **opts):
+        buffer.flush()
+        by_expiry, by_age = close_stale_sessions(dry_run=opts["dry_run"])
+        verb = "Se cerrarían" if opts["dry_run"] else "Cerradas"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb}: {by_expiry} por sesión expirada, {by_age} por antigüedad (sesión ya purgada)."
+        ))
@@ -0,0 +1,22 @@
+# tracker/management/commands/db_status.py
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from tracker.db import ping, pool_stats
+
+
+class Command(BaseCommand):
+    help = "Health check (SELECT 1) y métricas del pool de conexiones por alias de base de datos."
+
+    def handle(self, *args, **opts):
+        for alias in connections:
+            try:
+                latency = ping(alias)
+            except DatabaseError as exc:
+                self.stdout.write(self.style.ERROR(f"{alias}: sin conexión ({exc})"))
+                continue
+            self.stdout.write(self.style.SUCCESS(f"{alias}: OK ({latency:.1f} ms)"))
+
+        for alias, entry in pool_stats().items():
+            details = ", ".join(f"{k}={v}" for k, v in entry.items())
+            self.stdout.write(f"  {alias}: {details}")
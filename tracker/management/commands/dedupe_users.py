@@ -1,16 +1,21 @@
 # tracker/management/commands/dedupe_users.py
-from django.core.management.base import BaseCommand
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from django.db import transaction, connection, IntegrityError
+from django.db.models import BinaryField, Case, Count, F, Max, Min, Value, When
+from django.db.models.functions import Cast, Lower, Trim
+from django.db.models.lookups import Exact
 from django.utils import timezone
-from django.db.utils import OperationalError, ProgrammingError
 
 
 class Command(BaseCommand):
     help = (
         "Deduplica usuarios por email (case-insensitive): normaliza emails, "
         "conserva 1 por email (prioriza superuser, luego más reciente), "
-        "reasigna FKs/M2M y crea índice único para prevenir futuros duplicados."
+        "reasigna FKs/M2M y crea índice único para prevenir futuros duplicados. "
+        "Trabaja por rangos de id y por lotes de emails, cada lote en su propia "
+        "transacción; si se corta, volver a correrlo sigue donde quedó."
     )
 
     def add_arguments(self, parser):
@@ -25,164 +30,244 @@ class Command(BaseCommand):
             default="superuser-first",
             help="Criterio de conservación: superuser primero (default) o simplemente el más reciente.",
         )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=10000,
+            help="Rango de ids por UPDATE al normalizar emails (default 10000).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Emails duplicados por lote/transacción al deduplicar (default 500).",
+        )
 
     def handle(self, *args, **opts):
         commit = opts["commit"]
-        keep_policy = opts["keep_policy"]
+        if opts["chunk_size"] < 1 or opts["batch_size"] < 1:
+            raise CommandError("--chunk-size y --batch-size deben ser >= 1")
+        self.keep_policy = opts["keep_policy"]
         vendor = connection.vendor
         User = get_user_model()
 
-        # 1) Normalizar emails
-        self.stdout.write(self.style.MIGRATE_HEADING("==> Normalizando emails (trim + lower; vacíos → NULL)"))
-        changed = 0
-        for u in User.objects.all().only("id", "email").iterator():
-            orig = u.email
-            if orig is None:
-                continue
-            e = (orig or "").strip()
-            if not e:
-                if commit:
-                    User.objects.filter(pk=u.pk).update(email=None)
-                changed += 1
-            else:
-                low = e.lower()
-                if low != orig:
-                    if commit:
-                        User.objects.filter(pk=u.pk).update(email=low)
-                    changed += 1
-        self.stdout.write(f"Emails normalizados/ajustados: {changed}")
-
-        # 2) Buscar duplicados por email (no NULL)
-        self.stdout.write(self.style.MIGRATE_HEADING("==> Buscando duplicados por email (case-insensitive)"))
-        users = list(
-            User.objects.exclude(email__isnull=True).only("id", "email", "is_superuser", "date_joined")
-        )
-        by_email = {}
-        for u in users:
-            by_email.setdefault((u.email or "").lower(), []).append(u)
+        # 1) Normalizar emails: un UPDATE por rango de ids, solo filas que cambian
+        self.stdout.write(self.style.MIGRATE_HEADING("==> Normalizando emails (trim + lower; vacíos → '')"))
+        changed = self._normalize(User, opts["chunk_size"], commit, vendor)
+        self.stdout.write(f"Emails normalizados/ajustados: {changed:,}")
 
-        dup_groups = {k: v for k, v in by_email.items() if len(v) > 1}
-        if not dup_groups:
+        # 2) Duplicados por GROUP BY, recorridos por lotes (keyset sobre el email)
+        self.stdout.write(self.style.MIGRATE_HEADING("==> Buscando duplicados por email (case-insensitive)"))
+        total = self._duplicate_groups(User).count()
+        if not total:
             self.stdout.write(self.style.SUCCESS("No hay duplicados."))
             self._ensure_unique_index(vendor)
             return
+        self.stdout.write(self.style.WARNING(f"Encontrados {total:,} email(es) con duplicados."))
 
-        self.stdout.write(self.style.WARNING(f"Encontrados {len(dup_groups)} email(es) con duplicados."))
-        for email, lst in dup_groups.items():
-            keeper = self._choose_keeper(lst, keep_policy)
-            losers = [u.id for u in lst if u.id != keeper.id]
-            self.stdout.write(f"  Email '{email}': conservando id={keeper.id}, eliminando {losers}")
+        relations = self._user_relations(User) if commit else None
+        done = deleted = failed = 0
+        for groups in self._group_batches(User, opts["batch_size"]):
+            plan = {email: self._choose_keeper(rows) for email, rows in groups.items()}
+            if not commit or opts["verbosity"] >= 2:
+                for email, (keeper, losers) in plan.items():
+                    self.stdout.write(f"  Email '{email}': conservando id={keeper}, eliminando {losers}")
+            if commit:
+                n, errors = self._merge_batch(User, relations, plan)
+                deleted += n
+                failed += errors
+            done += len(plan)
+            if commit:
+                self.stdout.write(f"  {done:,}/{total:,} emails, {deleted:,} usuarios eliminados")
 
         # Si es dry-run y hay duplicados, no intentes crear índice (evita el error de UNIQUE)
         if not commit:
             self.stdout.write(self.style.WARNING("Dry-run: no se aplicaron cambios ni se crea índice."))
             return
 
-        # 3) Deduplicar + reasignar + DELETE crudo (sin parámetros)
-        with transaction.atomic():
-            for email, lst in dup_groups.items():
-                keeper = self._choose_keeper(lst, keep_policy)
-                losers = [u for u in lst if u.id != keeper.id]
-                if not losers:
-                    continue
-                # Reasignar FKs (saltando modelos sin tabla)
-                self._reassign_foreign_keys(keeper, losers)
-                # Unir M2M (grupos y permisos)
-                self._merge_user_m2m(keeper, losers)
-                # BORRADO crudo con IDs literales (evita collector del ORM y bug en SQLite)
-                try:
-                    self._raw_delete_users([u.id for u in losers])
-                except IntegrityError as e:
-                    self.stdout.write(
-                        self.style.ERROR(
-                            f"No se pudo eliminar duplicados para '{email}' por restricción de integridad: {e}"
-                        )
-                    )
-                    continue
-
+        if failed:
+            self.stdout.write(self.style.ERROR(
+                f"{failed:,} email(s) quedaron sin deduplicar (ver errores arriba); no se crea el índice."
+            ))
+            return
         self.stdout.write(self.style.SUCCESS("Duplicados eliminados y relaciones reasignadas."))
 
         # 4) Índice único anti-duplicados
         self._ensure_unique_index(vendor)
 
-    # ---------- helpers ----------
+    # ---------- normalización ----------
 
-    def _choose_keeper(self, users_same_email, keep_policy):
-        def sort_key(u):
-            dj = u.date_joined or timezone.now()
-            return (dj, u.id)
+    @staticmethod
+    def _same(vendor, lhs, rhs):
+        """
+        lhs = rhs byte a byte. SQL Server compara con la collation de la
+        columna (sin distinguir mayúsculas e ignorando espacios finales), así
+        que ahí se comparan como varbinary.
+        """
+        if vendor == "microsoft":
+            return Exact(Cast(lhs, BinaryField()), Cast(rhs, BinaryField()))
+        return Exact(lhs, rhs)
 
-        if keep_policy == "superuser-first":
-            sus = [u for u in users_same_email if u.is_superuser]
-            if sus:
-                return sorted(sus, key=sort_key, reverse=True)[0]
-        return sorted(users_same_email, key=sort_key, reverse=True)[0]
+    def _normalize(self, User, chunk_size, commit, vendor):
+        field = User._meta.get_field("email")
+        empty = None if field.null else ""
+        normalized = Lower(Trim("email"))
+        bounds = User.objects.aggregate(lo=Min("pk"), hi=Max("pk"))
+        if bounds["hi"] is None:
+            return 0
+        changed = 0
+        for start in range(bounds["lo"], bounds["hi"] + 1, chunk_size):
+            end = min(start + chunk_size, bounds["hi"] + 1)
+            qs = (User.objects
+                  .filter(pk__gte=start, pk__lt=end, email__isnull=False)
+                  .filter(~self._same(vendor, F("email"), normalized)))
+            if empty == "":
+                qs = qs.filter(~self._same(vendor, F("email"), Value("")))
+            if commit:
+                n = qs.update(email=Case(
+                    When(Exact(Trim("email"), ""), then=Value(empty)), default=normalized, output_field=field,
+                ))
+            else:
+                n = qs.count()
+            changed += n
+            if n:
+                self.stdout.write(f"  ids {start:,}–{end - 1:,} de {bounds['hi']:,}: {n:,}")
+        return changed
+
+    # ---------- duplicados ----------
 
-    def _reassign_foreign_keys(self, keeper, losers):
+    def _duplicate_groups(self, User):
+        """Un registro por email repetido (GROUP BY lower(trim(email)) HAVING COUNT > 1)."""
+        return (User.objects
+                .filter(email__isnull=False)
+                .annotate(key=Lower(Trim("email")))
+                .exclude(key="")
+                .values("key")
+                .annotate(n=Count("pk"))
+                .filter(n__gt=1)
+                .order_by("key"))
+
+    def _group_batches(self, User, batch_size):
         """
-        Reasigna FKs a User -> keeper, pero SALTA modelos cuya tabla NO exista
-        (útil si hay migraciones pendientes o tablas eliminadas) y tolera errores
-        operacionales/programáticos. También borra O2O que apunten al 'loser'.
+        {email: [(id, is_superuser, date_joined), ...]} por lote. Avanza por
+        email (> el último visto), así lo ya fusionado no se vuelve a leer.
         """
-        from django.apps import apps
+        last = None
+        while True:
+            page = self._duplicate_groups(User)
+            if last is not None:
+                page = page.filter(key__gt=last)
+            keys = [row["key"] for row in page[:batch_size]]
+            if not keys:
+                return
+            members = (User.objects
+                       .annotate(key=Lower(Trim("email")))
+                       .filter(key__in=keys)
+                       .values_list("key", "pk", "is_superuser", "date_joined"))
+            groups = {key: [] for key in keys}
+            for key, *row in members:
+                groups[key].append(row)
+            yield groups
+            if len(keys) < batch_size:
+                return
+            last = keys[-1]
 
-        User = type(keeper)
-        loser_ids = [u.id for u in losers]
+    def _choose_keeper(self, rows):
+        """rows: [(id, is_superuser, date_joined)] -> (keeper_id, [loser_ids])."""
+        def sort_key(row):
+            pk, _, joined = row
+            return (joined or timezone.now(), pk)
 
-        # Tablas existentes en esta BD
-        try:
-            existing_tables = set(connection.introspection.table_names())
-        except Exception:
-            existing_tables = set()
+        candidates = rows
+        if self.keep_policy == "superuser-first":
+            candidates = [row for row in rows if row[1]] or rows
+        keeper = max(candidates, key=sort_key)[0]
+        return keeper, sorted(row[0] for row in rows if row[0] != keeper)
 
-        for model in apps.get_models():
-            if not model._meta.managed:
-                continue
-            if model._meta.db_table not in existing_tables:
-                continue
+    # ---------- fusión ----------
 
-            for field in model._meta.get_fields():
-                if not getattr(field, "is_relation", False):
+    def _user_relations(self, User):
+        """
+        Campos que apuntan a User en tablas que existen: FKs comunes (se
+        reasignan), O2O (se borran los del perdedor, como antes) y tablas
+        intermedias de M2M (se copian al keeper sin duplicar y se borran).
+        """
+        existing_tables = set(connection.introspection.table_names())
+        fks, one_to_one, through = [], [], []
+        for model in apps.get_models(include_auto_created=True):
+            if not model._meta.managed or model._meta.db_table not in existing_tables:
+                continue
+            for field in model._meta.concrete_fields:
+                if not field.is_relation or field.remote_field.model is not User:
                     continue
+                if model._meta.auto_created:
+                    other = next(f for f in model._meta.concrete_fields if f.is_relation and f is not field)
+                    through.append((model, field, other))
+                elif field.one_to_one:
+                    one_to_one.append((model, field))
+                else:
+                    fks.append((model, field))
+        return fks, one_to_one, through
 
-                # FK a User -> update al keeper
-                if getattr(field, "many_to_one", False) and getattr(field, "remote_field", None) and field.remote_field.model == User:
-                    flt = {f"{field.name}__in": loser_ids}
-                    upd = {f"{field.name}": keeper.id}
-                    try:
-                        model.objects.filter(**flt).update(**upd)
-                    except (OperationalError, ProgrammingError):
-                        continue
-
-                # OneToOne a User -> borrar registros que apunten al loser
-                if getattr(field, "one_to_one", False) and getattr(field, "remote_field", None) and field.remote_field.model == User:
-                    flt = {f"{field.name}__in": loser_ids}
-                    try:
-                        model.objects.filter(**flt).delete()
-                    except (OperationalError, ProgrammingError):
-                        continue
-
-    def _merge_user_m2m(self, keeper, losers):
-        """Une grupos y permisos de los usuarios perdedores en el keeper."""
-        try:
-            for u in losers:
-                for g in u.groups.all():
-                    keeper.groups.add(g)
-        except Exception:
-            pass
+    def _merge_batch(self, User, relations, plan):
+        """Fusiona un lote en una transacción; si falla, reintenta email por email."""
         try:
-            for u in losers:
-                for p in u.user_permissions.all():
-                    keeper.user_permissions.add(p)
-        except Exception:
+            with transaction.atomic():
+                return self._merge(User, relations, plan), 0
+        except IntegrityError:
             pass
+        deleted = errors = 0
+        for email, group in plan.items():
+            try:
+                with transaction.atomic():
+                    deleted += self._merge(User, relations, {email: group})
+            except IntegrityError as e:
+                errors += 1
+                self.stdout.write(
+                    self.style.ERROR(
+                        f"No se pudo eliminar duplicados para '{email}' por restricción de integridad: {e}"
+                    )
+                )
+        return deleted, errors
+
+    def _merge(self, User, relations, plan):
+        fks, one_to_one, through = relations
+        keeper_of = {loser: keeper for keeper, losers in plan.values() for loser in losers}
+        losers = list(keeper_of)
+        if not losers:
+            return 0
+
+        # FKs: un UPDATE por campo para todo el lote (CASE perdedor -> keeper)
+        for model, field in fks:
+            new_owner = Case(
+                *(When(**{f"{field.attname}__in": ids}, then=Value(keeper)) for keeper, ids in plan.values() if ids),
+                default=F(field.attname),
+                output_field=field.target_field,
+            )
+            model._base_manager.filter(**{f"{field.attname}__in": losers}).update(**{field.attname: new_owner})
+
+        # O2O a User -> borrar registros que apunten al loser
+        for model, field in one_to_one:
+            model._base_manager.filter(**{f"{field.attname}__in": losers}).delete()
+
+        # M2M (grupos, permisos, ...): copiar al keeper ignorando lo que ya tiene
+        for model, field, other in through:
+            rows = model._base_manager.filter(**{f"{field.attname}__in": losers}).values_list(field.attname, other.attname)
+            model._base_manager.bulk_create(
+                [model(**{field.attname: keeper_of[user_id], other.attname: other_id}) for user_id, other_id in rows],
+                ignore_conflicts=True,
+            )
+            model._base_manager.filter(**{f"{field.attname}__in": losers}).delete()
+
+        self._raw_delete_users(User, losers)
+        return len(losers)
 
-    def _raw_delete_users(self, ids):
+    def _raw_delete_users(self, User, ids):
         """Borra usuarios por id con SQL crudo SIN parámetros (IDs literales)."""
         if not ids:
             return
         ids_sql = ",".join(str(int(i)) for i in ids)  # IDs vienen de la BD -> int seguro
-        sql = f"DELETE FROM auth_user WHERE id IN ({ids_sql})"
+        sql = f"DELETE FROM {connection.ops.quote_name(User._meta.db_table)} WHERE id IN ({ids_sql})"
         with connection.cursor() as c:
             c.execute(sql)
 
@@ -0,0 +1,58 @@
+# tracker/management/commands/export_events.py
+import os
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+
+from tracker import exports
+from tracker.models import LOB_BITS
+from tracker.views import filter_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta eventos (con threat, categoría, taxonomía, líneas impactadas y bundles) "
+        "a CSV, XLSX o JSONL en streaming, con los mismos filtros que event_list."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Archivo de salida, o '-' para stdout.")
+        parser.add_argument("--format", choices=sorted(exports.FORMATS),
+                            help="Por defecto, según la extensión del archivo.")
+        parser.add_argument("--chunk-size", type=int, default=None,
+                            help="Eventos por bloque de iterator() (default EXPORT_CHUNK_SIZE).")
+        parser.add_argument("--q", default="", help="Texto a buscar (como ?q).")
+        parser.add_argument("--lob", action="append", default=[], choices=sorted(LOB_BITS),
+                            help="Línea de negocio (repetible, como ?lob).")
+        parser.add_argument("--lob-match", choices=("any", "all"), default="any")
+        parser.add_argument("--sort", default="-risk")
+        parser.add_argument("--show-archived", action="store_true", help="Incluye eventos archivados.")
+
+    def handle(self, *args, **opts):
+        output = opts["output"]
+        fmt = opts["format"] or os.path.splitext(output)[1].lstrip(".").lower()
+        if fmt not in exports.FORMATS:
+            raise CommandError("Indica --format (csv, xlsx o jsonl) o usa una de esas extensiones.")
+
+        params = QueryDict(mutable=True)
+        params.update({"q": opts["q"], "lob_match": opts["lob_match"], "sort": opts["sort"]})
+        params.setlist("lob", opts["lob"])
+        if opts["show_archived"]:
+            params["show_archived"] = "1"
+        events, _ = filter_events(params)
+
+        to_stdout = output == "-"
+        progress = None if to_stdout else (lambda n: self.stderr.write(f"  {n:,} eventos", ending="\r"))
+        fh = sys.stdout.buffer if to_stdout else open(output, "wb")
+        written = 0
+        try:
+            for chunk in exports.stream(events, fmt, size=opts["chunk_size"], progress=progress):
+                fh.write(chunk)
+                written += len(chunk)
+        finally:
+            if not to_stdout:
+                fh.close()
+        if not to_stdout:
+            self.stderr.write("")
+            self.stdout.write(self.style.SUCCESS(f"{output}: {written:,} bytes ({fmt})."))
@@ -0,0 +1,97 @@
+# tracker/management/commands/import_tracker.py
+import csv
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from tracker import imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa threats, eventos y fuentes desde CSV, XLSX o JSONL (columnas de export_events "
+        "más threat_*/source_*). Valida por lotes con las reglas de EventForm/SourceForm, "
+        "inserta con bulk_create en una transacción por lote y reporta los errores por fila."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Archivo a importar.")
+        parser.add_argument("--format", choices=imports.FORMATS,
+                            help="Por defecto, según la extensión del archivo.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Filas por lote/transacción.")
+        parser.add_argument("--dry-run", action="store_true", help="Valida y cuenta sin escribir.")
+        parser.add_argument("--user", help="Username que queda como created_by (y en la auditoría).")
+        parser.add_argument("--errors", help="Escribe los errores (fila, campo, mensaje) en este CSV.")
+        parser.add_argument("--max-errors", type=int, default=None,
+                            help="Se detiene al terminar el lote en que se supere este número de errores.")
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **opts):
+        path = opts["path"]
+        fmt = opts["format"] or os.path.splitext(path)[1].lstrip(".").lower()
+        if fmt not in imports.FORMATS:
+            raise CommandError("Indica --format (csv, xlsx o jsonl) o usa una de esas extensiones.")
+        if opts["batch_size"] < 1:
+            raise CommandError("--batch-size debe ser >= 1")
+        if not os.path.exists(path):
+            raise CommandError(f"No existe {path}")
+
+        alias = opts["database"]
+        user = None
+        if opts["user"]:
+            User = get_user_model()
+            user = User.objects.using(alias).filter(username=opts["user"]).first()
+            if user is None:
+                raise CommandError(f"No existe el usuario {opts['user']}")
+
+        mode = "dry-run" if opts["dry_run"] else "escritura"
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"==> import_tracker {path} ({fmt}, lotes de {opts['batch_size']:,}, {mode}, "
+            f"{connections[alias].vendor})"
+        ))
+        importer = imports.TrackerImporter(
+            batch_size=opts["batch_size"],
+            dry_run=opts["dry_run"],
+            user=user,
+            using=alias,
+            max_errors=opts["max_errors"],
+            progress=self._progress,
+        )
+        with open(path, "rb") as fh:
+            result = importer.run(imports.read_rows(fh, fmt))
+
+        counts = result.counts
+        self.stdout.write(self.style.MIGRATE_HEADING("==> Resultado"))
+        for label in ("rows", "categories_created", "themes_created", "events_created", "events_matched",
+                      "sources_created", "bundles_created", "sources_skipped"):
+            self.stdout.write(f"  {label:<22} {counts[label]:>12,}")
+        self.stdout.write(f"  {'errors':<22} {len(result.errors):>12,}")
+
+        for line, field, message in result.errors[:20]:
+            self.stdout.write(self.style.ERROR(f"  fila {line}: {field}: {message}"))
+        if len(result.errors) > 20:
+            self.stdout.write(f"  ... y {len(result.errors) - 20:,} más")
+        if opts["errors"]:
+            with open(opts["errors"], "w", newline="", encoding="utf-8") as fh:
+                writer = csv.writer(fh)
+                writer.writerow(["row", "field", "message"])
+                writer.writerows(result.errors)
+            self.stdout.write(f"  errores en {opts['errors']}")
+
+        summary = f"{counts['rows']:,} filas en {result.seconds:.1f}s ({counts['rows'] / max(result.seconds, 1e-9):,.0f} filas/s)"
+        if result.aborted:
+            raise CommandError(f"Detenido por --max-errors después de {summary}.")
+        if opts["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"Dry-run: no se escribió nada. {summary}."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Importado: {summary}."))
+
+    def _progress(self, result):
+        counts = result.counts
+        self.stdout.write(
+            f"  lote {counts['batches']:,}: {counts['rows']:,} filas · "
+            f"{counts['events_created']:,} eventos nuevos · {counts['sources_created']:,} fuentes · "
+            f"{len(result.errors):,} errores"
+        )
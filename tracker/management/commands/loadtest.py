@@ -0,0 +1,122 @@
+# tracker/management/commands/loadtest.py
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.benchmarks import percentile as _pct
+
+DEFAULT_PATHS = ["/", "/events/"]
+
+
+def _rss_kb(pid):
+    """RSS de un proceso y sus hijos directos (workers de gunicorn) en KB; Linux (/proc)."""
+    def read(p):
+        try:
+            with open(f"/proc/{p}/status") as fh:
+                for line in fh:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return 0
+
+    total = read(pid)
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as fh:
+            total += sum(read(c) for c in fh.read().split())
+    except OSError:
+        pass
+    return total
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga contra un servidor en marcha (WSGI o ASGI): N clientes concurrentes "
+        "con keep-alive durante X segundos. Reporta req/s, p50/p95 y la memoria del servidor "
+        "(--pid), para comparar gunicorn gthread vs uvicorn con la misma cantidad de workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Base del servidor.")
+        parser.add_argument("--path", action="append", dest="paths",
+                            help=f"Ruta a pedir (repetible). Default: {' '.join(DEFAULT_PATHS)}")
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--duration", type=float, default=15.0, help="Segundos por corrida.")
+        parser.add_argument("--cookie", default="", help='Cookie para rutas con login, ej. "sessionid=..."')
+        parser.add_argument("--pid", type=int, action="append", default=[],
+                            help="PID del servidor (repetible) para muestrear RSS.")
+
+    def handle(self, *args, **opts):
+        base = urlsplit(opts["url"])
+        if base.scheme not in ("http", "https") or not base.hostname:
+            raise CommandError("--url debe ser http(s)://host[:port]")
+        paths = opts["paths"] or DEFAULT_PATHS
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"==> {opts['concurrency']} clientes x {opts['duration']:.0f}s contra {opts['url']}"
+        ))
+        for path in paths:
+            self._run(base, path, opts)
+
+    def _run(self, base, path, opts):
+        deadline = time.perf_counter() + opts["duration"]
+        latencies, errors = [], [0]
+        rss_peak = [0]
+        lock = threading.Lock()
+        headers = {"Host": base.netloc, "Connection": "keep-alive"}
+        if opts["cookie"]:
+            headers["Cookie"] = opts["cookie"]
+        conn_cls = http.client.HTTPSConnection if base.scheme == "https" else http.client.HTTPConnection
+
+        def client():
+            conn = conn_cls(base.hostname, base.port, timeout=30)
+            local = []
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                try:
+                    conn.request("GET", path, headers=headers)
+                    resp = conn.getresponse()
+                    resp.read()
+                    if resp.status >= 400:
+                        with lock:
+                            errors[0] += 1
+                        continue
+                except (OSError, http.client.HTTPException):
+                    with lock:
+                        errors[0] += 1
+                    conn.close()
+                    conn = conn_cls(base.hostname, base.port, timeout=30)
+                    continue
+                local.append(time.perf_counter() - t0)
+            conn.close()
+            with lock:
+                latencies.extend(local)
+
+        def sample_memory():
+            while time.perf_counter() < deadline:
+                rss_peak[0] = max(rss_peak[0], sum(_rss_kb(pid) for pid in opts["pid"]))
+                time.sleep(0.5)
+
+        threads = [threading.Thread(target=client, daemon=True) for _ in range(opts["concurrency"])]
+        if opts["pid"]:
+            threads.append(threading.Thread(target=sample_memory, daemon=True))
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        ms = [v * 1000 for v in latencies]
+        line = (
+            f"  {path:<30} {len(ms) / elapsed:8.1f} req/s  "
+            f"p50 {(statistics.median(ms) if ms else 0):7.1f} ms  p95 {_pct(ms, 95):7.1f} ms  "
+            f"errores {errors[0]}"
+        )
+        if opts["pid"]:
+            line += f"  RSS pico {rss_peak[0] / 1024:.0f} MB"
+        self.stdout.write(line)
@@ -0,0 +1,22 @@
+# tracker/management/commands/replica_status.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tracker.db_router import health, replica_aliases
+
+
+class Command(BaseCommand):
+    help = "Muestra lag y salud de cada réplica de lectura (REPLICA_DATABASE_URLS)."
+
+    def handle(self, *args, **opts):
+        if not replica_aliases():
+            self.stdout.write("Sin réplicas configuradas (REPLICA_DATABASE_URLS vacío).")
+            return
+        max_lag = settings.REPLICA_MAX_LAG_SECONDS
+        for alias, st in sorted(health.status(refresh=True).items()):
+            if st["lag"] is None:
+                self.stdout.write(self.style.ERROR(f"{alias}: no disponible ({st['error']})"))
+            elif st["healthy"]:
+                self.stdout.write(self.style.SUCCESS(f"{alias}: OK, lag {st['lag']:.1f}s"))
+            else:
+                self.stdout.write(self.style.WARNING(f"{alias}: atrasada, lag {st['lag']:.1f}s (máx {max_lag:.0f}s)"))
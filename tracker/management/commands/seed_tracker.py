@@ -0,0 +1,54 @@
+# tracker/management/commands/seed_tracker.py
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from tracker.seeding import DEFAULTS, SCALED, SEED_PASSWORD, TrackerSeeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos de volumen deterministas (mismo --seed => mismos datos): temas, eventos con "
+        "taxonomía válida, fuentes en bundles, versiones de archivo, accesos y descargas. "
+        "Usa COPY en Postgres, executemany con PRAGMAs de carga en SQLite y bulk_create en los demás."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, default=1,
+                            help="Multiplica los tamaños por defecto (1 ≈ 1.000 eventos; 100 ≈ 2M filas).")
+        parser.add_argument("--seed", type=int, default=42, help="Semilla del generador (default 42).")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Filas por lote/transacción.")
+        parser.add_argument("--with-files", action="store_true",
+                            help="Escribe archivos falsos pequeños en el storage (pool de --file-pool).")
+        parser.add_argument("--database", default="default")
+        for key, value in DEFAULTS.items():
+            parser.add_argument(
+                f"--{key.replace('_', '-')}", dest=key, type=type(value), default=None,
+                help=f"Override de {key} (default {value}{' x scale' if key in SCALED else ''}).",
+            )
+
+    def handle(self, *args, **opts):
+        if opts["scale"] < 1 or opts["batch_size"] < 1:
+            raise CommandError("--scale y --batch-size deben ser >= 1")
+        alias = opts["database"]
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"==> seed_tracker seed={opts['seed']} scale={opts['scale']} ({connections[alias].vendor})"
+        ))
+        seeder = TrackerSeeder(
+            seed=opts["seed"],
+            scale=opts["scale"],
+            batch_size=opts["batch_size"],
+            with_files=opts["with_files"],
+            using=alias,
+            progress=lambda msg: self.stdout.write(f"  {msg}"),
+            **{key: opts[key] for key in DEFAULTS},
+        )
+        result = seeder.run()
+
+        total = sum(result["counts"].values())
+        self.stdout.write(self.style.MIGRATE_HEADING("==> Filas insertadas"))
+        for label, n in sorted(result["counts"].items()):
+            self.stdout.write(f"  {label:<28} {n:>12,}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{total:,} filas en {result['seconds']:.1f}s ({total / max(result['seconds'], 1e-9):,.0f} filas/s). "
+            f"Método: {seeder.method}; contraseña de los usuarios: {SEED_PASSWORD}"
+        ))
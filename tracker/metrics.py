@@ -0,0 +1,325 @@
+# tracker/metrics.py
+"""
+Métricas por vista (url_name): cantidad de consultas, tiempo de BD, consultas
+duplicadas (huella del SQL sin literales) y tiempo de render de plantillas.
+
+- QueryMetricsMiddleware mide cada request y registra en el log
+  (logger "tracker.metrics") los que superan el presupuesto:
+  QUERY_BUDGET / QUERY_BUDGET_DB_MS / QUERY_BUDGET_DUPLICATES, con
+  overrides por vista en QUERY_BUDGETS = {"dashboard": {"queries": 10}}.
+- metrics_view expone los agregados en formato Prometheus (solo staff o
+  "Authorization: Bearer METRICS_TOKEN"). Los valores son por proceso.
+
+Las consultas se capturan con un execute_wrapper instalado en cada conexión
+(signal connection_created) y un ContextVar por request, así también cuentan
+las del ORM async (que corre en otros hilos) y las del render. install() se
+llama una vez desde TrackerConfig.ready(); el tiempo de render envuelve
+Template.render y se puede apagar con METRICS_RENDER_TIMING = False.
+"""
+import hmac
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template import base as template_base
+
+logger = logging.getLogger(__name__)
+
+# Estado del request actual (None = fuera de un request medido)
+_current: ContextVar = ContextVar("tracker_request_metrics", default=None)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_NUMBER = re.compile(r"\b\d+(\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST = re.compile(r"\bIN \((?:[^()]|%s|\?)*\)", re.IGNORECASE)
+
+
+def fingerprint(sql: str) -> str:
+    """SQL sin literales ni listas IN(...): iguala las consultas de un N+1."""
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return " ".join(sql.split())
+
+
+class RequestMetrics:
+    __slots__ = ("queries", "db_time", "fingerprints", "render_time", "render_depth", "sql")
+
+    def __init__(self, keep_sql=False):
+        self.queries = 0
+        self.db_time = 0.0
+        self.fingerprints = Counter()
+        self.render_time = 0.0
+        self.render_depth = 0
+        self.sql = [] if keep_sql else None   # (sql, segundos) para el profiler
+
+    @property
+    def duplicates(self) -> int:
+        return sum(n - 1 for n in self.fingerprints.values() if n > 1)
+
+    def top_duplicate(self):
+        fp, n = (self.fingerprints.most_common(1) or [("", 0)])[0]
+        return (fp, n) if n > 1 else ("", 0)
+
+
+def _record_query(execute, sql, params, many, context):
+    state = _current.get()
+    if state is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        state.queries += 1
+        state.db_time += elapsed
+        state.fingerprints[fingerprint(sql)] += 1
+        if state.sql is not None:
+            state.sql.append((sql, elapsed))
+
+
+def _install_wrapper(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+_original_render = template_base.Template.render
+
+
+def _timed_render(self, context):
+    state = _current.get()
+    if state is None:
+        return _original_render(self, context)
+    # Solo la plantilla más externa: include/extends anidados no se suman dos veces
+    state.render_depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        state.render_depth -= 1
+        if state.render_depth == 0:
+            state.render_time += time.perf_counter() - started
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install():
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        connection_created.connect(_install_wrapper, dispatch_uid="tracker.metrics")
+        for conn in connections.all(initialized_only=True):
+            _install_wrapper(conn)
+        if getattr(settings, "METRICS_RENDER_TIMING", True):
+            template_base.Template.render = _timed_render
+        _installed = True
+
+
+def start_request(keep_sql=False):
+    """Empieza a medir en el contexto actual; devuelve (estado, token para stop_request)."""
+    install()
+    state = RequestMetrics(keep_sql=keep_sql)
+    return state, _current.set(state)
+
+
+def stop_request(token):
+    _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+# =========================================================
+# Agregados (por proceso)
+# =========================================================
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+class Registry:
+    HISTOGRAMS = {
+        "request_duration_seconds": ("Duración total del request", DURATION_BUCKETS),
+        "db_queries": ("Consultas SQL por request", QUERY_BUCKETS),
+        "db_time_seconds": ("Tiempo en la BD por request", DURATION_BUCKETS),
+        "template_render_seconds": ("Tiempo de render de plantillas por request", DURATION_BUCKETS),
+    }
+    COUNTERS = {
+        "duplicate_queries_total": "Consultas repetidas (misma huella) dentro de un request",
+        "query_budget_exceeded_total": "Requests que superaron el presupuesto de consultas",
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hist = {name: {} for name in self.HISTOGRAMS}
+        self._counters = {name: defaultdict(int) for name in self.COUNTERS}
+
+    def observe(self, view, duration, state, over_budget):
+        values = {
+            "request_duration_seconds": duration,
+            "db_queries": state.queries,
+            "db_time_seconds": state.db_time,
+            "template_render_seconds": state.render_time,
+        }
+        with self._lock:
+            for name, value in values.items():
+                hist = self._hist[name].get(view)
+                if hist is None:
+                    hist = self._hist[name][view] = Histogram(self.HISTOGRAMS[name][1])
+                hist.observe(value)
+            self._counters["duplicate_queries_total"][view] += state.duplicates
+            if over_budget:
+                self._counters["query_budget_exceeded_total"][view] += 1
+
+    def render(self) -> list:
+        lines = []
+        with self._lock:
+            for name, (help_text, buckets) in self.HISTOGRAMS.items():
+                metric = f"tracker_{name}"
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for view, hist in sorted(self._hist[name].items()):
+                    for bound, count in zip(buckets, hist.counts):
+                        lines.append(f'{metric}_bucket{{view="{view}",le="{bound}"}} {count}')
+                    lines.append(f'{metric}_bucket{{view="{view}",le="+Inf"}} {hist.total}')
+                    lines.append(f'{metric}_sum{{view="{view}"}} {hist.sum:.6f}')
+                    lines.append(f'{metric}_count{{view="{view}"}} {hist.total}')
+            for name, help_text in self.COUNTERS.items():
+                metric = f"tracker_{name}"
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                for view, value in sorted(self._counters[name].items()):
+                    lines.append(f'{metric}{{view="{view}"}} {value}')
+        return lines
+
+
+registry = Registry()
+
+
+def budget_for(view):
+    budget = {
+        "queries": getattr(settings, "QUERY_BUDGET", 30),
+        "db_ms": getattr(settings, "QUERY_BUDGET_DB_MS", 500),
+        "duplicates": getattr(settings, "QUERY_BUDGET_DUPLICATES", 5),
+    }
+    budget.update(getattr(settings, "QUERY_BUDGETS", {}).get(view, {}))
+    return budget
+
+
+def view_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or match._func_path
+
+
+class QueryMetricsMiddleware:
+    """Mide consultas, BD y render del request (WSGI y ASGI: las vistas async no se adaptan a sync)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state, token = start_request()
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_request(token)
+        self._observe(request, state, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        state, token = start_request()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_request(token)
+        self._observe(request, state, time.perf_counter() - started)
+        return response
+
+    def _observe(self, request, state, duration):
+        view = view_name(request)
+        budget = budget_for(view)
+        over = (
+            state.queries > budget["queries"]
+            or state.db_time * 1000 > budget["db_ms"]
+            or state.duplicates > budget["duplicates"]
+        )
+        registry.observe(view, duration, state, over)
+        if over:
+            fp, n = state.top_duplicate()
+            logger.warning(
+                "Query budget exceeded on %s (%s %s): %s queries, %.1f ms DB, %s duplicates, "
+                "render %.1f ms, total %.1f ms%s",
+                view, request.method, request.path, state.queries, state.db_time * 1000,
+                state.duplicates, state.render_time * 1000, duration * 1000,
+                f"; top duplicate x{n}: {fp[:300]}" if n else "",
+            )
+
+
+# =========================================================
+# Endpoint /metrics
+# =========================================================
+
+def _gauges() -> list:
+    from .cache import cache_stats
+    from .db import POOL_STAT_KEYS, pool_stats
+
+    lines = ["# TYPE tracker_cache_events_total counter"]
+    stats = cache_stats()
+    for key in ("local_hits", "shared_hits", "misses", "sets", "deletes", "tag_invalidations"):
+        lines.append(f'tracker_cache_events_total{{event="{key}"}} {stats[key]}')
+    lines.append("# TYPE tracker_db_pool gauge")
+    for alias, entry in pool_stats().items():
+        lines.append(f'tracker_db_pool{{alias="{alias}",stat="connected"}} {int(entry["connected"])}')
+        for key in POOL_STAT_KEYS:
+            if key in entry:
+                lines.append(f'tracker_db_pool{{alias="{alias}",stat="{key}"}} {entry[key]}')
+    return lines
+
+
+def metrics_view(request):
+    token = getattr(settings, "METRICS_TOKEN", "")
+    bearer = request.headers.get("Authorization", "")
+    user = request.user
+    allowed = (
+        (token and hmac.compare_digest(bearer.encode(), f"Bearer {token}".encode()))
+        or (user.is_authenticated and user.is_staff)
+    )
+    if not allowed:
+        return HttpResponseForbidden("Staff only")
+    body = "\n".join(registry.render() + _gauges()) + "\n"
+    return HttpResponse(body, content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,54 @@
+# Agrega Event.impacted_lines_mask y lo rellena por lotes desde impacted_lines.
+from django.db import migrations, models
+
+# Copia congelada de tracker.models.LOB_BITS (las migraciones no deben depender del código vivo)
+LOB_BITS = {
+    'APAC': 1 << 0,
+    'EMEA': 1 << 1,
+    'FIG': 1 << 2,
+    'Issuer': 1 << 3,
+    'LATAM': 1 << 4,
+    'Merchant': 1 << 5,
+    'Evaluation in progress': 1 << 6,
+}
+
+BATCH_SIZE = 2000
+
+
+def backfill_masks(apps, schema_editor):
+    Event = apps.get_model('tracker', 'Event')
+    db = schema_editor.connection.alias
+
+    last_pk = 0
+    while True:
+        batch = list(
+            Event.objects.using(db)
+            .filter(pk__gt=last_pk)
+            .order_by('pk')
+            .only('pk', 'impacted_lines')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        for ev in batch:
+            mask = 0
+            for value in (ev.impacted_lines or []):
+                mask |= LOB_BITS.get(value, 0)
+            ev.impacted_lines_mask = mask
+        Event.objects.using(db).bulk_update(batch, ['impacted_lines_mask'], batch_size=500)
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0021_source_download_token_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='impacted_lines_mask',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_masks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Índices funcionales lower(email) / lower(username) sobre auth_user para
+# EmailOrUsernameModelBackend (una sola consulta indexada por login).
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+INDEXES = [
+    models.Index(Lower('email'), name='ix_auth_user_email_lower'),
+    models.Index(Lower('username'), name='ix_auth_user_username_lower'),
+]
+
+
+def _supported(schema_editor):
+    return schema_editor.connection.features.supports_expression_indexes
+
+
+def add_indexes(apps, schema_editor):
+    if not _supported(schema_editor):
+        return
+    User = apps.get_model('auth', 'User')
+    for index in INDEXES:
+        schema_editor.add_index(User, index)
+
+
+def remove_indexes(apps, schema_editor):
+    if not _supported(schema_editor):
+        return
+    User = apps.get_model('auth', 'User')
+    for index in INDEXES:
+        schema_editor.remove_index(User, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('tracker', '0022_event_impacted_lines_mask'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_indexes, remove_indexes),
+    ]
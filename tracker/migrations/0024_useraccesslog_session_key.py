@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0023_auth_user_lower_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useraccesslog',
+            name='session_key',
+            field=models.CharField(blank=True, max_length=40, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='useraccesslog',
+            index=models.Index(condition=models.Q(('logout_time__isnull', True)), fields=['login_time'], name='ix_accesslog_open'),
+        ),
+        migrations.AddConstraint(
+            model_name='useraccesslog',
+            constraint=models.UniqueConstraint(condition=models.Q(('session_key__isnull', False)), fields=('session_key',), name='ux_accesslog_session_key'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-18 22:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def seed_current_values(apps, schema_editor):
+    """Punto de partida del historial: el valor vigente de cada fila a su updated_at."""
+    RiskHistory = apps.get_model('tracker', 'RiskHistory')
+    db = schema_editor.connection.alias
+    specs = [
+        ('Event', 'event', ('risk_rating', 'status'), 'theme_id'),
+        ('Theme', 'theme', ('risk_rating',), 'id'),
+        ('Source', 'source', ('potential_impact',), 'event__theme_id'),
+    ]
+    for model_name, object_type, fields, theme_path in specs:
+        Model = apps.get_model('tracker', model_name)
+        rows = (Model.objects.using(db)
+                .values_list('id', theme_path, 'updated_at', *fields)
+                .order_by('id')
+                .iterator(chunk_size=BATCH_SIZE))
+        batch = []
+        for obj_id, theme_id, updated_at, *values in rows:
+            for field, value in zip(fields, values):
+                if value in (None, ''):
+                    continue
+                batch.append(RiskHistory(
+                    object_type=object_type, object_id=obj_id, theme_id=theme_id,
+                    field=field, value=value, recorded_at=updated_at,
+                ))
+            if len(batch) >= BATCH_SIZE:
+                RiskHistory.objects.using(db).bulk_create(batch)
+                batch = []
+        if batch:
+            RiskHistory.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0025_changelog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiskHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('theme_id', models.BigIntegerField(blank=True, null=True)),
+                ('field', models.CharField(max_length=20)),
+                ('value', models.CharField(blank=True, max_length=50, null=True)),
+                ('previous', models.CharField(blank=True, max_length=50, null=True)),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['recorded_at', 'id'],
+                'indexes': [models.Index(fields=['object_type', 'object_id', 'field', 'recorded_at'], name='ix_riskhist_object'), models.Index(fields=['field', 'recorded_at', 'theme_id'], name='ix_riskhist_field_time')],
+            },
+        ),
+        migrations.RunPython(seed_current_values, migrations.RunPython.noop),
+    ]
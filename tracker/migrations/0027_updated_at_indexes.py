@@ -0,0 +1,27 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0026_riskhistory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['updated_at'], name='tracker_eve_updated_7c4ad5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='source',
+            index=models.Index(fields=['updated_at'], name='tracker_sou_updated_65cb9f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='theme',
+            index=models.Index(fields=['updated_at'], name='tracker_the_updated_e914aa_idx'),
+        ),
+    ]
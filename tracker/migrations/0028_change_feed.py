@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 23:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0027_updated_at_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeFeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(max_length=20)),
+                ('object_id', models.BigIntegerField()),
+                ('parent_id', models.BigIntegerField(blank=True, null=True)),
+                ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('archive', 'Archive'), ('restore', 'Restore'), ('delete', 'Delete')], max_length=10)),
+                ('fields', models.JSONField(blank=True, default=list)),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['object_type', 'object_id', 'id'], name='ix_feed_object'), models.Index(fields=['recorded_at'], name='tracker_cha_recorde_2acdea_idx')],
+            },
+        ),
+    ]
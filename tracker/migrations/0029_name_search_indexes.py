@@ -0,0 +1,71 @@
+# Índices para el typeahead de Threat/Event (views.get_themes / get_events):
+# - lower(name) en todas las bases con índices de expresión; en Postgres con
+#   text_pattern_ops para que LIKE 'abc%' (prefijo) lo use con cualquier collation.
+# - Postgres: GIN de trigramas sobre lower(name) para LIKE '%abc%' (infijo).
+#   Si el rol no puede crear la extensión pg_trgm, se omite (queda el prefijo).
+import logging
+
+from django.db import DatabaseError, migrations, models, transaction
+from django.db.models.functions import Lower
+
+logger = logging.getLogger(__name__)
+
+TABLES = [("Theme", "theme"), ("Event", "event")]
+
+
+def _indexes(vendor, prefix):
+    if vendor != "postgresql":
+        return [models.Index(Lower("name"), name=f"ix_{prefix}_name_lower")]
+    from django.contrib.postgres.indexes import GinIndex, OpClass
+    return [
+        models.Index(OpClass(Lower("name"), name="text_pattern_ops"), name=f"ix_{prefix}_name_lower"),
+        GinIndex(OpClass(Lower("name"), name="gin_trgm_ops"), name=f"ix_{prefix}_name_trgm"),
+    ]
+
+
+def _trigram_available(schema_editor):
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        return True
+    except DatabaseError:
+        logger.warning("pg_trgm not available; skipping trigram name indexes")
+        return False
+
+
+def add_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if not connection.features.supports_expression_indexes:
+        return
+    trigram = connection.vendor == "postgresql" and _trigram_available(schema_editor)
+    for model_name, prefix in TABLES:
+        model = apps.get_model("tracker", model_name)
+        for index in _indexes(connection.vendor, prefix):
+            if index.name.endswith("_trgm") and not trigram:
+                continue
+            schema_editor.add_index(model, index)
+
+
+def remove_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if not connection.features.supports_expression_indexes:
+        return
+    for model_name, prefix in TABLES:
+        model = apps.get_model("tracker", model_name)
+        for index in _indexes(connection.vendor, prefix):
+            if index.name.endswith("_trgm"):
+                # puede no existir (sin pg_trgm)
+                schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(index.name)}")
+            else:
+                schema_editor.remove_index(model, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tracker", "0028_change_feed"),
+    ]
+
+    operations = [
+        migrations.RunPython(add_indexes, remove_indexes),
+    ]
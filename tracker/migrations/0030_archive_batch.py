@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-19 00:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0029_name_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='archive_batch',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='source',
+            name='archive_batch',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='theme',
+            name='archive_batch',
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+    ]
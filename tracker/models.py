@@ -1,5 +1,7 @@
 from django.db import models
+from django.db.models import Count, F
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 from django.forms import ValidationError
 from django.urls import reverse
 from django.utils import timezone 
@@ -268,6 +270,33 @@ LINE_OF_BUSINESS_CHOICES = [
     
 ]
 
+# Registro de bits por línea de negocio (Event.impacted_lines_mask).
+# Solo se AGREGAN entradas al final: cambiar un bit existente invalida los datos guardados.
+# 'All' no tiene bit propio; EventForm.clean lo expande a las líneas concretas.
+LOB_BITS = {
+    'APAC': 1 << 0,
+    'EMEA': 1 << 1,
+    'FIG': 1 << 2,
+    'Issuer': 1 << 3,
+    'LATAM': 1 << 4,
+    'Merchant': 1 << 5,
+    'Evaluation in progress': 1 << 6,
+}
+
+
+def lob_mask(lines) -> int:
+    """Convierte una lista de líneas de negocio en su bitmask (ignora valores desconocidos)."""
+    mask = 0
+    for value in (lines or []):
+        mask |= LOB_BITS.get(value, 0)
+    return mask
+
+
+def lob_lines(mask: int) -> list:
+    """Inverso de lob_mask, respetando el orden declarativo de LINE_OF_BUSINESS_CHOICES."""
+    mask = mask or 0
+    return [value for value, _ in LINE_OF_BUSINESS_CHOICES if mask & LOB_BITS.get(value, 0)]
+
 
 SOURCE_TYPE_CHOICES = [
     ('Article', 'Article'),
@@ -283,6 +312,66 @@ POTENTIAL_IMPACT_CHOICES = [
     ('DECREASING', '<i class="fas fa-arrow-down text-success"></i> Risk is Decreasing'),
 ]
 
+class ChangeTrackingMixin:
+    """
+    Guarda los valores tal como se cargaron de la BD (from_db) para calcular
+    diffs en save sin volver a consultar la fila. Las instancias nuevas o con
+    campos diferidos solo comparan lo que efectivamente se cargó.
+    """
+    TRACKING_IGNORED_FIELDS = ('created_at', 'updated_at')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def loaded_value(self, attname, default=None):
+        return getattr(self, '_loaded_values', {}).get(attname, default)
+
+    def tracked_changes(self) -> dict:
+        """{campo: (antes, después)} respecto de la última carga/guardado."""
+        loaded = getattr(self, '_loaded_values', None)
+        if not loaded:
+            return {}
+        changes = {}
+        for field in self._meta.concrete_fields:
+            if field.name in self.TRACKING_IGNORED_FIELDS or field.attname not in loaded:
+                continue
+            old = _comparable(field, loaded[field.attname])
+            new = _comparable(field, getattr(self, field.attname))
+            if old != new:
+                changes[field.name] = (old, new)
+        return changes
+
+    def save(self, *args, **kwargs):
+        # auto_now solo escribe updated_at si está en update_fields; sin él un
+        # save(update_fields=['is_active']) no cambiaría la versión (ETag) de las páginas
+        update_fields = kwargs.get('update_fields')
+        if update_fields and 'updated_at' not in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'updated_at'}
+        super().save(*args, **kwargs)
+
+    def reset_tracking(self):
+        deferred = self.get_deferred_fields()
+        self._loaded_values = {
+            f.attname: _comparable(f, getattr(self, f.attname))
+            for f in self._meta.concrete_fields
+            if f.attname not in deferred
+        }
+
+
+def _comparable(field, value):
+    # FieldFile se compara por nombre (en la BD es un string)
+    if hasattr(value, 'storage'):
+        return value.name or None
+    try:
+        # p. ej. EventForm entrega datetime para un DateField
+        return field.to_python(value)
+    except ValidationError:
+        return value
+
+
 class Category(models.Model):
     name = models.CharField(max_length=50, choices=CATEGORY_CHOICES, unique=True)
     
@@ -296,8 +385,10 @@ class Category(models.Model):
     def __str__(self):
         return self.name
 
-class Theme(models.Model):
+class Theme(ChangeTrackingMixin, models.Model):
     is_active = models.BooleanField(default=True, db_index=True)
+    # archivado en cascada: mismo valor en el padre y en los hijos que arrastró (ver archive.py)
+    archive_batch = models.UUIDField(null=True, blank=True, editable=False)
     category = models.ForeignKey(
         Category, 
         on_delete=models.CASCADE, 
@@ -322,6 +413,7 @@ class Theme(models.Model):
         indexes = [
             models.Index(fields=['-created_at']),
             models.Index(fields=['risk_rating']),
+            models.Index(fields=['updated_at']),   # versión de las páginas (tracker/conditional.py)
         ]
     
     def get_risk_color(self):
@@ -333,10 +425,10 @@ class Theme(models.Model):
             raise ValidationError("The name cannot be empty.")
         
         if self.pk:
-            original = Theme.objects.get(pk=self.pk)
+            # Restaura vacíos desde lo cargado de la BD (sin re-consultar la fila)
             for field in self._meta.fields:
-                if getattr(self, field.name) == "":
-                    setattr(self, field.name, getattr(original, field.name))
+                if getattr(self, field.attname) == "":
+                    setattr(self, field.attname, self.loaded_value(field.attname, ""))
 
     def get_absolute_url(self):
         return reverse('view_theme', kwargs={'pk': self.pk})
@@ -344,8 +436,39 @@ class Theme(models.Model):
     def __str__(self):
         return f"{self.name} ({self.category})"
 
-class Event(models.Model):
+class EventQuerySet(models.QuerySet):
+    """Filtros por línea de negocio sobre impacted_lines_mask (sin parsear el JSON)."""
+
+    def impacting_any(self, lines):
+        mask = lob_mask(lines)
+        if not mask:
+            return self.none()
+        return self.alias(_lob_hit=F('impacted_lines_mask').bitand(mask)).filter(_lob_hit__gt=0)
+
+    def impacting_all(self, lines):
+        mask = lob_mask(lines)
+        if not mask:
+            return self.none()
+        return self.alias(_lob_hit=F('impacted_lines_mask').bitand(mask)).filter(_lob_hit=mask)
+
+    def lob_counts(self) -> dict:
+        """
+        Cantidad de eventos por línea de negocio. Agrupa por mask en la BD
+        (a lo sumo 2^len(LOB_BITS) filas) y expande los bits en Python.
+        """
+        counts = dict.fromkeys(LOB_BITS, 0)
+        rows = self.order_by().values_list('impacted_lines_mask').annotate(n=Count('pk'))
+        for mask, n in rows:
+            for value, bit in LOB_BITS.items():
+                if mask & bit:
+                    counts[value] += n
+        return counts
+
+
+class Event(ChangeTrackingMixin, models.Model):
     is_active = models.BooleanField(default=True, db_index=True)
+    # archivado en cascada: mismo valor en el padre y en los hijos que arrastró (ver archive.py)
+    archive_batch = models.UUIDField(null=True, blank=True, editable=False)
     
     # Definición de constantes para choices
     ESCALATING = 'ESCALATING'
@@ -388,6 +511,8 @@ class Event(models.Model):
     
   
     impacted_lines = models.JSONField(default=list)
+    # Copia compacta de impacted_lines (ver LOB_BITS); se recalcula en save()
+    impacted_lines_mask = models.PositiveIntegerField(default=0, editable=False)
     risk_taxonomy_lv1 = models.JSONField(default=list)
     risk_taxonomy_lv2 = models.JSONField(default=list)
     risk_taxonomy_lv3 = models.JSONField(default=list)
@@ -413,7 +538,17 @@ class Event(models.Model):
             models.Index(fields=['-date_identified']),
             models.Index(fields=['status']),
             models.Index(fields=['risk_rating']),
+            models.Index(fields=['updated_at']),   # versión de las páginas (tracker/conditional.py)
         ]
+
+    objects = EventQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        self.impacted_lines_mask = lob_mask(self.impacted_lines)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'impacted_lines' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'impacted_lines_mask'}
+        super().save(*args, **kwargs)
     
     def get_risk_color(self):
         return self.RISK_COLORS.get(self.risk_rating, 'secondary')
@@ -450,8 +585,10 @@ class RiskTaxonomyLv3(models.Model):
 def generate_download_token():
     return uuid.uuid4().hex
 
-class Source(models.Model):
+class Source(ChangeTrackingMixin, models.Model):
     is_active = models.BooleanField(default=True, db_index=True)
+    # archivado en cascada: mismo valor en el padre y en los hijos que arrastró (ver archive.py)
+    archive_batch = models.UUIDField(null=True, blank=True, editable=False)
 
     SOURCE_TYPE_CHOICES = [
         ('LINK', 'Link'),
@@ -496,6 +633,7 @@ class Source(models.Model):
         indexes = [
             models.Index(fields=['-source_date']),
             models.Index(fields=['source_type']),
+            models.Index(fields=['updated_at']),   # versión de las páginas (tracker/conditional.py)
         ]
 
     def __str__(self):
@@ -569,6 +707,8 @@ class UserAccessLog(models.Model):
     user_agent = models.TextField(blank=True, null=True)
     logout_time = models.DateTimeField(blank=True, null=True)
     session_duration = models.DurationField(blank=True, null=True)
+    # Sesión que originó el login: el logout cierra exactamente esta fila
+    session_key = models.CharField(max_length=40, blank=True, null=True)
 
     class Meta:
         verbose_name = "User Access Log"
@@ -577,6 +717,19 @@ class UserAccessLog(models.Model):
         indexes = [
             models.Index(fields=['-login_time']),
             models.Index(fields=['user']),
+            # Solo sesiones abiertas: lo que recorre close_stale_sessions
+            models.Index(
+                fields=['login_time'],
+                name='ix_accesslog_open',
+                condition=models.Q(logout_time__isnull=True),
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['session_key'],
+                name='ux_accesslog_session_key',
+                condition=models.Q(session_key__isnull=False),
+            ),
         ]
 
     def save(self, *args, **kwargs):
@@ -588,6 +741,98 @@ class UserAccessLog(models.Model):
         return f"{self.user.username} - {self.login_time}"
     
 
+class ChangeLog(models.Model):
+    """Auditoría estructurada de Theme/Event/Source (ver tracker/audit.py)."""
+    ACTION_CHOICES = (
+        ("create", "Create"),
+        ("update", "Update"),
+        ("delete", "Delete"),
+    )
+
+    object_type = models.CharField(max_length=20)   # 'theme' | 'event' | 'source'
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)  # {campo: [antes, después]}
+    changed_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-changed_at', '-id']
+        indexes = [
+            models.Index(fields=['object_type', 'object_id', '-changed_at'], name='ix_changelog_object'),
+            models.Index(fields=['-changed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.object_type}:{self.object_id} {self.action} @ {self.changed_at:%Y-%m-%d %H:%M:%S}"
+
+
+class RiskHistory(models.Model):
+    """
+    Historial append-only de Event.risk_rating/status, Theme.risk_rating y
+    Source.potential_impact (ver tracker/risk_history.py). theme_id se
+    desnormaliza para agregar por threat sin joins; no es FK para que el
+    historial sobreviva a los borrados.
+    """
+    object_type = models.CharField(max_length=10)   # 'event' | 'theme' | 'source'
+    object_id = models.BigIntegerField()
+    theme_id = models.BigIntegerField(null=True, blank=True)
+    field = models.CharField(max_length=20)
+    value = models.CharField(max_length=50, null=True, blank=True)
+    previous = models.CharField(max_length=50, null=True, blank=True)
+    recorded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['recorded_at', 'id']
+        indexes = [
+            models.Index(fields=['object_type', 'object_id', 'field', 'recorded_at'], name='ix_riskhist_object'),
+            models.Index(fields=['field', 'recorded_at', 'theme_id'], name='ix_riskhist_field_time'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("RiskHistory is append-only")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("RiskHistory is append-only")
+
+    def __str__(self):
+        return f"{self.object_type}:{self.object_id} {self.field} {self.previous} -> {self.value}"
+
+
+class ChangeFeedEntry(models.Model):
+    """
+    Feed de cambios para sincronización incremental (ver tracker/changefeed.py).
+    El id es la secuencia: los consumidores piden "lo posterior a N".
+    """
+    ACTION_CHOICES = (
+        ("create", "Create"),
+        ("update", "Update"),
+        ("archive", "Archive"),
+        ("restore", "Restore"),
+        ("delete", "Delete"),
+    )
+
+    object_type = models.CharField(max_length=20)   # 'theme' | 'event' | 'source' | 'sourcefileversion'
+    object_id = models.BigIntegerField()
+    parent_id = models.BigIntegerField(null=True, blank=True)   # theme del event, event del source, ...
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    fields = models.JSONField(default=list, blank=True)         # campos cambiados (update)
+    recorded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # compactación: última entrada de cada objeto
+            models.Index(fields=['object_type', 'object_id', 'id'], name='ix_feed_object'),
+            models.Index(fields=['recorded_at']),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.object_type}:{self.object_id} {self.action}"
+
+
 class TempUpload(models.Model):
     KIND_CHOICES = (("MAIN", "Main"), ("EXTRA", "Extra"))
 
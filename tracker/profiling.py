@@ -0,0 +1,295 @@
+# tracker/profiling.py
+"""
+Profiling bajo demanda: muestreo de stacks alrededor de la vista y el render.
+
+Se activa por request si:
+  - un superuser envía el header "X-Profile: 1" o ?_profile=1, o
+  - al azar con probabilidad PROFILE_SAMPLE_RATE (0 = apagado).
+
+Un hilo muestrea sys._current_frames() del hilo del request cada
+PROFILE_INTERVAL_MS y acumula stacks en formato "folded" (flamegraph.pl,
+speedscope). Junto con el SQL del request (tiempos de tracker/metrics.py) se
+guarda como JSON en PROFILE_DIR, un anillo de PROFILE_MAX_FILES archivos.
+El nombre del archivo lleva fecha, vista y duración para listar sin abrirlos.
+
+El middleware es sync y async. Se muestrea el hilo que corre la vista: el
+del event loop para las vistas async bajo ASGI (el trabajo que mandan a
+sync_to_async queda como espera en el loop; su SQL sí se registra) y, para
+las vistas sync, el hilo donde corre process_view, que bajo ASGI es el mismo
+hilo por request en el que Django ejecuta la vista. Una vista async bajo
+WSGI corre en un loop propio y no se muestrea ("sampled": false).
+El id del perfil (header X-Profile-Id) solo se devuelve a usuarios staff.
+"""
+import json
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.urls import Resolver404, resolve
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+PROFILE_NAME = re.compile(r"^(?P<ts>\d{13})-(?P<view>[A-Za-z0-9_.:-]+)-(?P<ms>\d+)ms\.json$")
+MAX_STACK_DEPTH = 120
+
+
+def profile_dir() -> str:
+    return getattr(settings, "PROFILE_DIR", "") or os.path.join(tempfile.gettempdir(), "tracker-profiles")
+
+
+def _short_path(filename):
+    for prefix in (str(settings.BASE_DIR), sys.prefix, sys.base_prefix):
+        if prefix and filename.startswith(prefix):
+            filename = filename[len(prefix):].lstrip(os.sep)
+            break
+    return filename.replace("site-packages" + os.sep, "")
+
+
+class StackSampler:
+    """Muestrea el stack de un hilo a intervalo fijo (profiler estadístico)."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        labels = {}
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or self._stop.is_set():   # el hilo ya está en stop()
+                continue
+            stack = []
+            while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                code = frame.f_code
+                label = labels.get(code)
+                if label is None:
+                    label = labels[code] = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+                stack.append(label)
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+
+# =========================================================
+# Almacenamiento (anillo en disco)
+# =========================================================
+
+def save_profile(data) -> str:
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    view = re.sub(r"[^A-Za-z0-9_.:-]", "_", data["view"])[:80] or "unresolved"
+    name = f"{int(time.time() * 1000)}-{view}-{int(data['duration_ms'])}ms.json"
+    tmp = os.path.join(directory, f".{name}.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh)
+    os.replace(tmp, os.path.join(directory, name))
+    _prune(directory)
+    return name
+
+
+def _prune(directory):
+    limit = getattr(settings, "PROFILE_MAX_FILES", 200)
+    names = sorted(n for n in os.listdir(directory) if PROFILE_NAME.match(n))
+    for name in names[:-limit] if len(names) > limit else []:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass
+
+
+def list_profiles() -> list:
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in os.listdir(directory):
+        match = PROFILE_NAME.match(name)
+        if not match:
+            continue
+        profiles.append({
+            "name": name,
+            "view": match["view"],
+            "duration_ms": int(match["ms"]),
+            "created_at": datetime.fromtimestamp(int(match["ts"]) / 1000, tz=dt_timezone.utc),
+        })
+    profiles.sort(key=lambda p: p["created_at"], reverse=True)
+    return profiles
+
+
+def profile_path(name):
+    """Ruta de un perfil existente; None si el nombre no es válido (sin path traversal)."""
+    if not PROFILE_NAME.match(name or ""):
+        return None
+    path = os.path.join(profile_dir(), name)
+    return path if os.path.isfile(path) else None
+
+
+def folded_text(data) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in data.get("stacks", {}).items())
+
+
+# =========================================================
+# Middleware
+# =========================================================
+
+def _requested(request, user):
+    if user is None or not user.is_authenticated or not user.is_superuser:
+        return False
+    param = getattr(settings, "PROFILE_QUERY_PARAM", "_profile")
+    return request.headers.get("X-Profile") == "1" or request.GET.get(param) == "1"
+
+
+def _trigger(request, user):
+    if _requested(request, user):
+        return "request"
+    if random.random() < getattr(settings, "PROFILE_SAMPLE_RATE", 0.0):
+        return "sample"
+    return None
+
+
+def _is_async_view(request):
+    try:
+        match = resolve(request.path_info, getattr(request, "urlconf", None))
+    except Resolver404:
+        return False
+    return iscoroutinefunction(match.func)
+
+
+class _RequestProfile:
+    """Estado de un request perfilado entre el inicio y save()."""
+
+    def __init__(self, request, trigger, sampled):
+        # Reutiliza la medición de QueryMetricsMiddleware si está activa
+        self.state, self.token = metrics.current(), None
+        if self.state is None:
+            self.state, self.token = metrics.start_request(keep_sql=True)
+        elif self.state.sql is None:
+            self.state.sql = []
+        self.first_query = len(self.state.sql)
+        self.trigger = trigger
+        self.sampled = sampled
+        self.sampler = StackSampler(threading.get_ident(), getattr(settings, "PROFILE_INTERVAL_MS", 5) / 1000)
+        self.started_at = datetime.now(dt_timezone.utc)
+        self.before = (self.state.render_time, self.state.queries, self.state.db_time)
+        self.started = time.perf_counter()
+        if sampled:
+            self.sampler.start()
+
+    def stop(self):
+        if self.sampled:
+            self.sampler.stop()
+        self.duration = time.perf_counter() - self.started
+        if self.token is not None:
+            metrics.stop_request(self.token)
+
+    def data(self, request, response, user):
+        state, sampler = self.state, self.sampler
+        render_before, queries_before, db_before = self.before
+        return {
+            "view": metrics.view_name(request),
+            "path": request.get_full_path(),
+            "method": request.method,
+            "status": response.status_code,
+            "user": user.get_username() if user is not None and user.is_authenticated else "",
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration * 1000, 2),
+            "sampled": self.sampled,
+            "interval_ms": sampler.interval * 1000,
+            "samples": sampler.samples,
+            "queries": state.queries - queries_before,
+            "db_ms": round((state.db_time - db_before) * 1000, 2),
+            "render_ms": round((state.render_time - render_before) * 1000, 2),
+            "sql": [{"sql": q, "ms": round(t * 1000, 3)} for q, t in state.sql[self.first_query:]],
+            "stacks": dict(sampler.stacks.most_common()),
+        }
+
+
+def _save(profile, request, response, user):
+    try:
+        name = save_profile(profile.data(request, response, user))
+    except OSError:
+        logger.exception("Could not store request profile")
+        return
+    if user is not None and user.is_authenticated and user.is_staff:
+        response["X-Profile-Id"] = name
+
+
+def _needs_render(response):
+    # TemplateResponse: el render entra en el perfil
+    return hasattr(response, "render") and not getattr(response, "is_rendered", True)
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        user = getattr(request, "user", None)
+        trigger = _trigger(request, user)
+        if trigger is None:
+            return self.get_response(request)
+        # Bajo WSGI una vista async corre en un loop en otro hilo: no se puede muestrear
+        profile = request._profile = _RequestProfile(request, trigger, sampled=not _is_async_view(request))
+        try:
+            response = self.get_response(request)
+            if _needs_render(response):
+                response.render()
+        finally:
+            profile.stop()
+        _save(profile, request, response, user)
+        return response
+
+    async def __acall__(self, request):
+        user = await request.auser() if hasattr(request, "auser") else None
+        trigger = _trigger(request, user)
+        if trigger is None:
+            return await self.get_response(request)
+        # Arranca muestreando este hilo (el del event loop, donde corre una vista
+        # async); process_view lo cambia al hilo de la vista si es sync
+        profile = request._profile = _RequestProfile(request, trigger, sampled=True)
+        try:
+            response = await self.get_response(request)
+            if _needs_render(response):
+                await sync_to_async(response.render)()
+        finally:
+            profile.stop()
+        await sync_to_async(_save)(profile, request, response, user)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        profile = getattr(request, "_profile", None)
+        if profile is not None and not iscoroutinefunction(view_func):
+            profile.sampler.thread_id = threading.get_ident()
+        return None
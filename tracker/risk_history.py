@@ -0,0 +1,155 @@
+# tracker/risk_history.py
+"""
+Historial append-only de riesgo (RiskHistory) y consultas de tendencia.
+
+Escritura: signals.py llama a record_changes() con el diff de
+ChangeTrackingMixin, así que registrar un cambio no consulta la fila previa.
+
+Lectura: cada función resuelve con 1–2 consultas sobre índices
+(object_type, object_id, field, recorded_at) y (field, recorded_at, theme_id),
+agregando en la BD; el volumen de historial no se trae a Python.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+from .models import Event, RiskHistory, Source, Theme
+
+TRACKED_FIELDS = {
+    Event: ("event", ("risk_rating", "status")),
+    Theme: ("theme", ("risk_rating",)),
+    Source: ("source", ("potential_impact",)),
+}
+
+# Orden de severidad para distinguir escaladas de bajas (Theme usa minúsculas)
+RISK_RANK = {"low": 1, "medium": 2, "high": 3, "critical": 4}
+
+PERIODS = {"day": TruncDay, "week": TruncWeek, "month": TruncMonth}
+
+
+def _theme_id_for(instance):
+    if isinstance(instance, Theme):
+        return instance.pk
+    if isinstance(instance, Event):
+        return instance.theme_id
+    # Source: evita consultar el Event si ya está cacheado en la instancia
+    if Source.event.is_cached(instance):
+        return instance.event.theme_id
+    return Event.objects.filter(pk=instance.event_id).values_list("theme_id", flat=True).first()
+
+
+def record_changes(instance, created: bool, changes: dict):
+    """Agrega filas para los campos de riesgo que cambiaron (o todos, si es alta)."""
+    spec = TRACKED_FIELDS.get(type(instance))
+    if spec is None:
+        return
+    object_type, fields = spec
+
+    values = []
+    for field in fields:
+        if created:
+            new = getattr(instance, field)
+            if new in (None, ""):
+                continue
+            values.append((field, None, new))
+        elif field in changes:
+            old, new = changes[field]
+            values.append((field, old, new))
+    if not values:
+        return
+
+    theme_id = _theme_id_for(instance)
+    rows = [
+        RiskHistory(
+            object_type=object_type, object_id=instance.pk, theme_id=theme_id,
+            field=field, previous=old, value=new,
+        )
+        for field, old, new in values
+    ]
+    transaction.on_commit(lambda: RiskHistory.objects.bulk_create(rows))
+
+
+def record_bulk_created(instances, using="default"):
+    """
+    Valores iniciales de riesgo de filas insertadas con bulk_create (sin
+    post_save). Las Sources deben traer su Event asignado para no consultarlo.
+    """
+    rows = []
+    for instance in instances:
+        object_type, fields = TRACKED_FIELDS[type(instance)]
+        theme_id = _theme_id_for(instance)
+        for field in fields:
+            value = getattr(instance, field)
+            if value in (None, ""):
+                continue
+            rows.append(RiskHistory(
+                object_type=object_type, object_id=instance.pk, theme_id=theme_id,
+                field=field, previous=None, value=value,
+            ))
+    RiskHistory.objects.using(using).bulk_create(rows)
+    return len(rows)
+
+
+def risk_trajectory(object_type: str, object_id: int, start=None, end=None, field="risk_rating"):
+    """
+    Serie [{at, value, previous}] de un objeto en [start, end]. Si hay start,
+    el primer punto es el valor vigente en ese momento (at=start).
+    """
+    base = RiskHistory.objects.filter(object_type=object_type, object_id=object_id, field=field)
+    points = []
+    if start is not None:
+        before = (base.filter(recorded_at__lt=start)
+                  .order_by("-recorded_at", "-id")
+                  .values("value")[:1])
+        before = list(before)
+        if before:
+            points.append({"at": start, "value": before[0]["value"], "previous": None})
+        base = base.filter(recorded_at__gte=start)
+    if end is not None:
+        base = base.filter(recorded_at__lte=end)
+    for at, value, previous in base.order_by("recorded_at", "id").values_list("recorded_at", "value", "previous"):
+        points.append({"at": at, "value": value, "previous": previous})
+    return points
+
+
+def theme_escalation_trends(start, end, period="month", theme_ids=None):
+    """
+    Tendencias por threat y período:
+      - sources: conteo de potential_impact ESCALATING/MAINTAINING/DECREASING
+      - risk_up / risk_down: cambios de risk_rating de sus events (y del propio threat)
+    Devuelve {theme_id: [{period, ESCALATING, MAINTAINING, DECREASING, risk_up, risk_down}, ...]}.
+    """
+    trunc = PERIODS.get(period, TruncMonth)
+    base = RiskHistory.objects.filter(recorded_at__gte=start, recorded_at__lte=end)
+    if theme_ids is not None:
+        base = base.filter(theme_id__in=list(theme_ids))
+
+    buckets = defaultdict(lambda: {"ESCALATING": 0, "MAINTAINING": 0, "DECREASING": 0, "risk_up": 0, "risk_down": 0})
+
+    impacts = (base.filter(field="potential_impact")
+               .annotate(period=trunc("recorded_at"))
+               .values_list("theme_id", "period", "value")
+               .annotate(n=Count("id"))
+               .order_by())
+    for theme_id, when, value, n in impacts:
+        if value in ("ESCALATING", "MAINTAINING", "DECREASING"):
+            buckets[(theme_id, when)][value] += n
+
+    ratings = (base.filter(field="risk_rating", previous__isnull=False)
+               .annotate(period=trunc("recorded_at"))
+               .values_list("theme_id", "period", "previous", "value")
+               .annotate(n=Count("id"))
+               .order_by())
+    for theme_id, when, previous, value, n in ratings:
+        delta = RISK_RANK.get((value or "").lower(), 0) - RISK_RANK.get((previous or "").lower(), 0)
+        if delta > 0:
+            buckets[(theme_id, when)]["risk_up"] += n
+        elif delta < 0:
+            buckets[(theme_id, when)]["risk_down"] += n
+
+    trends = defaultdict(list)
+    for (theme_id, when), counts in sorted(buckets.items(), key=lambda kv: (kv[0][0] or 0, kv[0][1])):
+        trends[theme_id].append({"period": when, **counts})
+    return dict(trends)
@@ -0,0 +1,446 @@
+# tracker/seeding.py
+"""
+Generador determinista de datos de volumen (ver seed_tracker).
+
+Genera Categories, Themes, Events (taxonomía válida según RISK_TAXONOMY_LV2/
+LV3), Sources agrupadas en bundles (mismo nombre/fecha/summary, como las
+crea Add Source), SourceFileVersions, UserAccessLogs y DownloadLogs.
+
+- Mismo --seed => mismos datos (nombres, fechas, tokens).
+- Inserta por lotes dentro de una transacción por lote: COPY en Postgres
+  (psycopg 3) y bulk_create en los demás; en SQLite ajusta PRAGMAs durante
+  la carga. No pasa por save() ni señales (ni auditoría ni invalidación por
+  fila): al final invalida los tags de caché una sola vez.
+- Las fechas se respetan tal cual (auto_now/auto_now_add se desactivan
+  mientras dura la carga).
+"""
+import random
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import (
+    CATEGORY_CHOICES, LOB_BITS, ONSET_TIMELINE_CHOICES, RISK_CHOICES,
+    RISK_TAXONOMY_LV1, RISK_TAXONOMY_LV2, RISK_TAXONOMY_LV3,
+    Category, DownloadLog, Event, Source, SourceFileVersion, Theme, UserAccessLog, lob_mask,
+)
+
+SEED_PASSWORD = "seed-Pa55word!"
+
+# Tamaños con scale=1 (~1.000 eventos, ~9.000 fuentes, ~20.000 filas en total).
+# scale multiplica solo SCALED; el resto son proporciones por fila padre.
+SCALED = ("users", "themes")
+DEFAULTS = {
+    "users": 200,
+    "themes": 50,
+    "events_per_theme": 20,
+    "max_bundles": 6,            # bundles por evento: 1..max
+    "max_bundle_size": 4,        # fuentes por bundle: 1..max
+    "version_ratio": 0.2,        # fracción de fuentes con archivo que tienen versiones
+    "access_logs_per_user": 20,
+    "downloads_per_event": 5,
+    "file_pool": 50,             # archivos distintos a los que apuntan las fuentes
+}
+
+FILE_EXTS = (".pdf", ".docx", ".eml", ".msg", ".doc")
+USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/126.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/605.1.15 Version/17.5 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:128.0) Gecko/20100101 Firefox/128.0",
+)
+WORDS = (
+    "supply", "chain", "disruption", "regulatory", "change", "cyber", "attack", "liquidity",
+    "pressure", "fraud", "pattern", "vendor", "outage", "sanctions", "inflation", "climate",
+    "exposure", "market", "volatility", "data", "privacy", "merchant", "issuer", "settlement",
+)
+SQLITE_PRAGMAS = {
+    "synchronous": "OFF",
+    "journal_mode": "MEMORY",
+    "temp_store": "MEMORY",
+    "cache_size": "-262144",     # 256 MB de páginas en memoria
+}
+
+
+def user_name(seed, i):
+    return f"seed{seed}-user{i:07d}"
+
+
+def user_email(seed, i):
+    return f"seed{seed}.user{i}@example.com"
+
+
+def taxonomy_combo(rnd):
+    """lv1/lv2/lv3 coherentes (mismas reglas que EventForm.clean)."""
+    lv1 = rnd.sample([c[0] for c in RISK_TAXONOMY_LV1], rnd.randint(1, 2))
+    lv2 = []
+    for value in lv1:
+        options = [c[0] for c in RISK_TAXONOMY_LV2.get(value, [])]
+        if options:
+            lv2 += rnd.sample(options, rnd.randint(1, min(2, len(options))))
+    lv3 = []
+    for value in lv2:
+        options = [c[0] for c in RISK_TAXONOMY_LV3.get(value, [])]
+        if options:
+            lv3 += rnd.sample(options, rnd.randint(1, min(2, len(options))))
+    return lv1, lv2, lv3
+
+
+@contextmanager
+def historical_timestamps(*models):
+    """Desactiva auto_now/auto_now_add para poder cargar fechas pasadas."""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class TrackerSeeder:
+    def __init__(self, seed=42, scale=1, batch_size=5000, with_files=False, using="default",
+                 progress=None, **sizes):
+        self.seed = seed
+        self.rnd = random.Random(seed)
+        self.batch_size = batch_size
+        self.with_files = with_files
+        self.using = using
+        self.connection = connections[using]
+        self.progress = progress or (lambda msg: None)
+        self.sizes = {k: v * scale if k in SCALED else v for k, v in DEFAULTS.items()}
+        self.sizes.update({k: v for k, v in sizes.items() if v is not None})
+        self.counts = Counter()
+        self.now = timezone.now()
+        self.method = "bulk_create"
+
+    # ---------- API ----------
+
+    def run(self) -> dict:
+        started = time.perf_counter()
+        with self._tuned_connection(), historical_timestamps(Theme, Event, Source, SourceFileVersion, DownloadLog):
+            self.method = self._insert_method()
+            user_ids = self._users()
+            categories = self._categories()
+            files = self._file_pool()
+            themes = self._themes(categories, user_ids)
+            self._events_and_sources(themes, user_ids, files)
+            self._access_logs(user_ids)
+
+        from .cache import invalidate_tags
+        invalidate_tags("categories", "themes", "events", "sources")
+        elapsed = time.perf_counter() - started
+        return {"counts": dict(self.counts), "seconds": elapsed, "user_ids": user_ids,
+                "theme_ids": [t.pk for t in themes]}
+
+    # ---------- escritura ----------
+
+    def _insert_method(self):
+        vendor = self.connection.vendor
+        if vendor == "postgresql":
+            from django.db.backends.postgresql.psycopg_any import is_psycopg3
+            return "copy" if is_psycopg3 else "bulk_create"   # psycopg2 no tiene cursor.copy()
+        if vendor == "sqlite":
+            return "executemany"
+        return "bulk_create"
+
+    @contextmanager
+    def _tuned_connection(self):
+        if self.connection.vendor != "sqlite":
+            yield
+            return
+        with self.connection.cursor() as cursor:
+            previous = {}
+            for name, value in SQLITE_PRAGMAS.items():
+                cursor.execute(f"PRAGMA {name}")
+                previous[name] = cursor.fetchone()[0]
+                cursor.execute(f"PRAGMA {name}={value}")
+        try:
+            yield
+        finally:
+            with self.connection.cursor() as cursor:
+                for name, value in previous.items():
+                    cursor.execute(f"PRAGMA {name}={value}")
+
+    def _insert(self, model, objs, need_pks=False):
+        """
+        Inserta objs. copy/executemany arman las filas directo desde los campos
+        (sin el compilador de bulk_create, que es lo más caro por fila); si
+        need_pks, los ids se reservan antes para que los hijos puedan usarlos.
+        """
+        if not objs:
+            return objs
+        if self.method == "bulk_create":
+            model.objects.using(self.using).bulk_create(objs, batch_size=self.batch_size)
+        else:
+            if need_pks:
+                self._reserve_ids(model, objs)
+            fields = [f for f in model._meta.concrete_fields if not (f.primary_key and objs[0].pk is None)]
+            rows = ([f.get_db_prep_save(getattr(obj, f.attname), self.connection) for f in fields] for obj in objs)
+            qn = self.connection.ops.quote_name
+            table, columns = qn(model._meta.db_table), ", ".join(qn(f.column) for f in fields)
+            with self.connection.cursor() as cursor:
+                if self.method == "copy":
+                    with cursor.cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+                        for row in rows:
+                            copy.write_row(row)
+                else:
+                    placeholders = ", ".join(["%s"] * len(fields))
+                    cursor.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", rows)
+        self.counts[model._meta.label] += len(objs)
+        return objs
+
+    def _reserve_ids(self, model, objs):
+        table, pk = model._meta.db_table, model._meta.pk.column
+        with self.connection.cursor() as cursor:
+            if self.method == "copy":
+                cursor.execute(
+                    "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+                    [table, pk, len(objs)],
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+            else:
+                # SQLite: un solo escritor a la vez, y estamos dentro de la transacción del lote
+                qn = self.connection.ops.quote_name
+                cursor.execute(f"SELECT COALESCE(MAX({qn(pk)}), 0) FROM {qn(table)}")
+                first = cursor.fetchone()[0] + 1
+                ids = range(first, first + len(objs))
+        for obj, pk_value in zip(objs, ids):
+            obj.pk = pk_value
+
+    @contextmanager
+    def _batch(self):
+        with transaction.atomic(using=self.using):
+            if self.connection.vendor == "postgresql":
+                with self.connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL synchronous_commit TO OFF")
+            yield
+
+    # ---------- generadores ----------
+
+    def _uuid(self):
+        return uuid.UUID(int=self.rnd.getrandbits(128), version=4)
+
+    def _text(self, n):
+        return " ".join(self.rnd.choice(WORDS) for _ in range(n))
+
+    def _past(self, max_days):
+        return self.now - timedelta(days=self.rnd.randrange(max_days), seconds=self.rnd.randrange(86400))
+
+    def _users(self):
+        User = get_user_model()
+        n = self.sizes["users"]
+        prefix = f"seed{self.seed}-user"
+        existing = dict(User.objects.using(self.using).filter(username__startswith=prefix)
+                        .values_list("username", "pk"))
+        missing = [i for i in range(n) if user_name(self.seed, i) not in existing]
+        if missing:
+            encoded = make_password(SEED_PASSWORD)   # un solo hash para todos
+            for start in range(0, len(missing), self.batch_size):
+                with self._batch():
+                    created = self._insert(User, [
+                        User(username=user_name(self.seed, i), email=user_email(self.seed, i),
+                             password=encoded, date_joined=self._past(900))
+                        for i in missing[start:start + self.batch_size]
+                    ], need_pks=True)
+                existing.update((u.username, u.pk) for u in created)
+            self.progress(f"users: {len(missing)}")
+        return [existing[user_name(self.seed, i)] for i in range(n)]
+
+    def _categories(self):
+        by_name = {c.name: c for c in Category.objects.using(self.using).all()}
+        missing = [Category(name=value) for value, _ in CATEGORY_CHOICES if value not in by_name]
+        if missing:
+            Category.objects.using(self.using).bulk_create(missing)
+            by_name = {c.name: c for c in Category.objects.using(self.using).all()}
+        return [by_name[value] for value, _ in CATEGORY_CHOICES]
+
+    def _file_pool(self):
+        names = [
+            f"sources/seed/{self.seed}/doc-{i:04d}{FILE_EXTS[i % len(FILE_EXTS)]}"
+            for i in range(max(1, self.sizes["file_pool"]))
+        ]
+        if self.with_files:
+            written = 0
+            for name in names:
+                if not default_storage.exists(name):
+                    default_storage.save(name, ContentFile(b"%PDF-1.4\n% seed_tracker\n" + name.encode()))
+                    written += 1
+            self.progress(f"files: {written} written to storage")
+        return names
+
+    def _themes(self, categories, user_ids):
+        rnd = self.rnd
+        themes = []
+        for i in range(self.sizes["themes"]):
+            created = self._past(1200)
+            themes.append(Theme(
+                category=rnd.choice(categories),
+                name=f"{self._text(3).title()} #{self.seed}-{i}"[:200],
+                description=self._text(25),
+                risk_rating=rnd.choice(RISK_CHOICES)[0],
+                onset_timeline=rnd.choice(ONSET_TIMELINE_CHOICES)[0],
+                is_active=rnd.random() > 0.1,
+                created_by_id=rnd.choice(user_ids) if user_ids else None,
+                created_at=created,
+                updated_at=min(created + timedelta(days=rnd.randrange(60)), self.now),
+            ))
+        for start in range(0, len(themes), self.batch_size):
+            with self._batch():
+                self._insert(Theme, themes[start:start + self.batch_size], need_pks=True)
+        self.progress(f"themes: {len(themes)}")
+        return themes
+
+    def _events_and_sources(self, themes, user_ids, files):
+        per_theme = self.sizes["events_per_theme"]
+        themes_per_batch = max(1, self.batch_size // max(1, per_theme))
+        lobs = list(LOB_BITS)
+        started = time.perf_counter()
+        for start in range(0, len(themes), themes_per_batch):
+            with self._batch():
+                events = []
+                for theme in themes[start:start + themes_per_batch]:
+                    for j in range(per_theme):
+                        events.append(self._event(theme, j, lobs, user_ids))
+                self._insert(Event, events, need_pks=True)
+                sources = []
+                for event in events:
+                    sources += self._bundles(event, user_ids, files)
+                for chunk in range(0, len(sources), self.batch_size):
+                    self._insert(Source, sources[chunk:chunk + self.batch_size], need_pks=True)
+                self._insert(SourceFileVersion, self._versions(sources, user_ids, files))
+                self._insert(DownloadLog, self._downloads(events, sources, user_ids))
+            done = min(len(themes), start + themes_per_batch)
+            self.progress(
+                f"events: {self.counts['tracker.Event']}, sources: {self.counts['tracker.Source']} "
+                f"({done}/{len(themes)} themes, {time.perf_counter() - started:.1f}s)"
+            )
+
+    def _event(self, theme, j, lobs, user_ids):
+        rnd = self.rnd
+        lv1, lv2, lv3 = taxonomy_combo(rnd)
+        lines = rnd.sample(lobs, rnd.randint(1, 3))
+        identified = (theme.created_at + timedelta(days=rnd.randrange(120))).date()
+        identified = min(identified, self.now.date())
+        created = timezone.make_aware(datetime.combine(identified, dt_time(9)) + timedelta(minutes=rnd.randrange(600)))
+        created = min(created, self.now)
+        return Event(
+            theme=theme,
+            name=f"{self._text(4).capitalize()} {theme.pk}-{j}"[:200],
+            date_identified=identified,
+            description=self._text(40),
+            impacted_lines=lines,
+            impacted_lines_mask=lob_mask(lines),
+            risk_taxonomy_lv1=lv1,
+            risk_taxonomy_lv2=lv2,
+            risk_taxonomy_lv3=lv3,
+            status=rnd.choice(Event.STATUS_CHOICES)[0],
+            risk_rating=rnd.choice(Event.RISK_RATING_CHOICES)[0],
+            control_in_place=rnd.random() < 0.3,
+            is_active=theme.is_active and rnd.random() > 0.05,
+            created_by_id=rnd.choice(user_ids) if user_ids else None,
+            created_at=created,
+            updated_at=min(created + timedelta(days=rnd.randrange(30)), self.now),
+        )
+
+    def _bundles(self, event, user_ids, files):
+        """Bundles como los de Add Source: hermanas con mismo nombre, fecha y summary."""
+        rnd = self.rnd
+        sources = []
+        for b in range(rnd.randint(1, self.sizes["max_bundles"])):
+            source_date = min(event.date_identified + timedelta(days=rnd.randrange(90)), self.now.date())
+            name = f"{self._text(2).title()} {b}"[:30]
+            summary = f"{self._text(20)} ({event.pk}/{b})"
+            impact = rnd.choice(Source.POTENTIAL_IMPACT_CHOICES)[0]
+            created = min(event.created_at + timedelta(days=rnd.randrange(90)), self.now)
+            is_active = event.is_active and rnd.random() > 0.05
+            for k in range(rnd.randint(1, self.sizes["max_bundle_size"])):
+                is_file = rnd.random() < 0.5
+                sources.append(Source(
+                    event=event,
+                    name=name,
+                    source_type="FILE" if is_file else "LINK",
+                    source_date=source_date,
+                    summary=summary,
+                    potential_impact=impact,
+                    potential_impact_notes=self._text(8) if k == 0 else None,
+                    link_or_file="" if is_file else f"https://example.com/{event.pk}/{b}/{k}",
+                    file_upload=rnd.choice(files) if is_file else None,
+                    download_token=self._uuid(),
+                    is_active=is_active,
+                    created_by_id=rnd.choice(user_ids) if user_ids else None,
+                    created_at=created,
+                    updated_at=created,
+                ))
+        return sources
+
+    def _versions(self, sources, user_ids, files):
+        rnd = self.rnd
+        versions = []
+        for src in sources:
+            if src.source_type != "FILE" or rnd.random() >= self.sizes["version_ratio"]:
+                continue
+            for _ in range(rnd.randint(1, 3)):
+                versions.append(SourceFileVersion(
+                    source=src,
+                    file=rnd.choice(files),
+                    replaced_at=min(src.created_at + timedelta(days=rnd.randrange(1, 60)), self.now),
+                    replaced_by_id=rnd.choice(user_ids) if user_ids else None,
+                    note="Replaced by seed_tracker",
+                    download_token=self._uuid(),
+                ))
+        return versions
+
+    def _downloads(self, events, sources, user_ids):
+        rnd = self.rnd
+        with_file = [s for s in sources if s.source_type == "FILE"]
+        if not with_file:
+            return []
+        logs = []
+        for _ in range(self.sizes["downloads_per_event"] * len(events)):
+            src = rnd.choice(with_file)
+            logs.append(DownloadLog(
+                when=min(src.created_at + timedelta(days=rnd.randrange(180), seconds=rnd.randrange(86400)), self.now),
+                user_id=rnd.choice(user_ids) if user_ids else None,
+                ip=f"10.{rnd.randrange(256)}.{rnd.randrange(256)}.{rnd.randrange(1, 255)}",
+                user_agent=rnd.choice(USER_AGENTS),
+                object_key=f"source:{src.pk}",
+                token=src.download_token,
+            ))
+        return logs
+
+    def _access_logs(self, user_ids):
+        rnd = self.rnd
+        per_user = self.sizes["access_logs_per_user"]
+        users_per_batch = max(1, self.batch_size // max(1, per_user))
+        for start in range(0, len(user_ids), users_per_batch):
+            logs = []
+            for user_id in user_ids[start:start + users_per_batch]:
+                for _ in range(per_user):
+                    login = self._past(365)
+                    duration = min(timedelta(minutes=rnd.randrange(1, 240)), self.now - login)
+                    closed = rnd.random() > 0.03
+                    logs.append(UserAccessLog(
+                        user_id=user_id,
+                        login_time=login,
+                        ip_address=f"192.168.{rnd.randrange(256)}.{rnd.randrange(1, 255)}",
+                        user_agent=rnd.choice(USER_AGENTS),
+                        logout_time=login + duration if closed else None,
+                        session_duration=duration if closed else None,
+                    ))
+            with self._batch():
+                self._insert(UserAccessLog, logs)
+        if per_user and user_ids:
+            self.progress(f"access logs: {self.counts['tracker.UserAccessLog']}")
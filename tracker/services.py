@@ -1,7 +1,7 @@
 # tracker/services.py
 import requests
 from django.conf import settings
-from django.core.cache import cache
+from .cache import get_or_set, invalidate_tags
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,11 +14,17 @@ class RiskTaxonomyService:
         self.cache_timeout = getattr(settings, 'RISK_TAXONOMY_CACHE_TIMEOUT', 3600)  # 1 hora
 
     def get_taxonomy_data(self):
-        """Obtiene datos de taxonomía desde la API o caché"""
-        cached_data = cache.get('risk_taxonomy_data')
-        if cached_data:
-            return cached_data
+        """Obtiene datos de taxonomía desde la API o caché (compartido entre workers)"""
+        return get_or_set(
+            'risk_taxonomy_data', self._fetch_taxonomy_data,
+            timeout=self.cache_timeout, tags=('taxonomy',),
+        )
 
+    def refresh(self):
+        """Descarta la taxonomía cacheada; la próxima lectura vuelve a la API."""
+        invalidate_tags('taxonomy')
+
+    def _fetch_taxonomy_data(self):
         try:
             headers = {
                 'Authorization': f'Bearer {self.api_token}',
@@ -32,12 +38,7 @@ class RiskTaxonomyService:
             )
             response.raise_for_status()
             
-            taxonomy_data = response.json()
-            
-            # Cachear los datos
-            cache.set('risk_taxonomy_data', taxonomy_data, self.cache_timeout)
-            
-            return taxonomy_data
+            return response.json()
             
         except requests.exceptions.RequestException as e:
             logger.error(f"Error fetching taxonomy data: {e}")
@@ -1,49 +1,86 @@
 import logging
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import post_delete, post_save
 from django.contrib.auth.signals import user_logged_in
 from django.dispatch import receiver
+from django.db import transaction
 from django.utils import timezone
-from .models import Theme, UserAccessLog
+from .models import Category, Event, Source, SourceFileVersion, Theme
+from . import audit, changefeed, risk_history
+from .cache import invalidate_tags, tags_for
+from .accesslog import buffer as access_log_buffer
 from ipware import get_client_ip
 
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
     client_ip, is_routable = get_client_ip(request)
-    UserAccessLog.objects.create(
-        user=user,
+    access_log_buffer.record_login(
+        user_id=user.pk,
+        session_key=getattr(request, "session", None) and request.session.session_key,
         ip_address=client_ip,
-        user_agent=request.META.get('HTTP_USER_AGENT', '')
+        user_agent=request.META.get('HTTP_USER_AGENT', ''),
     )
 
 from django.contrib.auth.signals import user_logged_out
 
 @receiver(user_logged_out)
 def log_user_logout(sender, request, user, **kwargs):
-    if user:  # Asegurarse que el usuario está autenticado
-        last_login = UserAccessLog.objects.filter(user=user).last()
-        if last_login:
-            last_login.logout_time = timezone.now()
-            last_login.save()
+    # Se dispara antes de session.flush(): la session_key aún es la del login
+    session_key = getattr(request, "session", None) and request.session.session_key
+    if user and session_key:
+        access_log_buffer.record_logout(session_key)
 
 logger = logging.getLogger(__name__)
-@receiver(pre_save, sender=Theme)
-def log_theme_changes(sender, instance, **kwargs):
-    """
-    Save changes to Theme models before saving
-    """
-    if instance.pk:  
-        try:
-            old = Theme.objects.get(pk=instance.pk)
-            changes = {}
-            
-            for field in instance._meta.fields:
-                old_val = getattr(old, field.name)
-                new_val = getattr(instance, field.name)
-                if old_val != new_val:
-                    changes[field.name] = (old_val, new_val)
-            
-            if changes:
-                logger.info(f"Changes detected in Theme ID {instance.pk}: {changes}")
-                
-        except Theme.DoesNotExist:
-            logger.warning(f"Attempt to update non-existent theme (ID: {instance.pk})")
\ No newline at end of file
+
+
+@receiver(post_save, sender=Theme)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Source)
+def track_saved_changes(sender, instance, created, raw=False, **kwargs):
+    """Diff contra lo cargado de la BD (ChangeTrackingMixin): no re-consulta la fila."""
+    if raw:
+        return
+    changes = {} if created else instance.tracked_changes()
+    if created:
+        audit.record(instance, "create")
+    elif changes:
+        audit.record(instance, "update", changes)
+    if created or changes:
+        changefeed.record(instance, changefeed.action_for(created, changes), changes)
+    risk_history.record_changes(instance, created, changes)
+    invalidate_cached(instance)
+    instance.reset_tracking()
+
+
+@receiver(post_delete, sender=Theme)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Source)
+def audit_tracked_delete(sender, instance, **kwargs):
+    audit.record(instance, "delete")
+    changefeed.record(instance, "delete")
+    invalidate_cached(instance)
+
+
+@receiver(post_save, sender=SourceFileVersion)
+def feed_file_version_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        changefeed.record(instance, "create" if created else "update")
+
+
+@receiver(post_delete, sender=SourceFileVersion)
+def feed_file_version_deleted(sender, instance, **kwargs):
+    changefeed.record(instance, "delete")
+
+
+def invalidate_cached(instance):
+    """Invalida los tags del objeto (y de su padre anterior) al confirmar la transacción."""
+    tags = tags_for(instance)
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=SourceFileVersion)
+@receiver(post_delete, sender=SourceFileVersion)
+def invalidate_related_cache(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_cached(instance)
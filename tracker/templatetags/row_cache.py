@@ -0,0 +1,116 @@
+# tracker/templatetags/row_cache.py
+"""
+Caché de fragmentos por fila ("muñeca rusa") para las tablas de listas.
+
+    {% load row_cache %}
+    {% cached_rows events "tracker/_event_row.html" "event" is_admin "theme__updated_at" as rows %}
+
+Cada fila se guarda con la llave (pk, updated_at[, dependencias], rol) y la
+tabla completa con una llave derivada del conjunto ordenado de versiones de
+sus filas. Si nada cambió se devuelve la tabla entera de una lectura; si
+cambió un evento se re-renderiza solo esa fila y el resto sale de la caché.
+
+Con un QuerySet primero se leen solo (pk, updated_at, ...) y las filas
+completas se cargan únicamente para los pk que faltan en la caché. Con una
+lista ya materializada se usa tal cual.
+
+Las filas no llevan nada propio del request: los botones POST apuntan con
+form="..." a un único formulario con el token CSRF fuera de la tabla.
+"""
+import hashlib
+
+from django import template
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import QuerySet
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+PK_CHUNK = 500   # hasta aquí las filas que faltan se cargan con pk__in
+
+
+def _timeout():
+    return getattr(settings, "ROW_CACHE_TIMEOUT", 86400)
+
+
+def _fragments():
+    # Alias propio (ver CACHES en settings): miles de fragmentos desalojarían
+    # del LRU de "default" lo que sí conviene tener en memoria
+    alias = "fragments" if "fragments" in settings.CACHES else "default"
+    return caches[alias]
+
+
+def _stamp(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+def _attr(obj, path):
+    for part in path.split("__"):
+        obj = getattr(obj, part, None)
+    return obj
+
+
+def _versions(objects, depends):
+    """[(pk, versión)] en el orden de la lista y {pk: obj} si ya hay objetos."""
+    fields = ("updated_at", *depends)
+    if isinstance(objects, QuerySet):
+        return [
+            (row[0], "|".join(_stamp(v) for v in row[1:]))
+            for row in objects.values_list("pk", *fields)
+        ], {}
+    objects = list(objects)
+    versions = [(obj.pk, "|".join(_stamp(_attr(obj, f)) for f in fields)) for obj in objects]
+    return versions, {obj.pk: obj for obj in objects}
+
+
+def _load(queryset, pks):
+    if len(pks) > PK_CHUNK:   # caché fría: una sola pasada por el queryset
+        return {obj.pk: obj for obj in queryset}
+    found = {}
+    for i in range(0, len(pks), PK_CHUNK):
+        found.update((obj.pk, obj) for obj in queryset.filter(pk__in=pks[i:i + PK_CHUNK]))
+    return found
+
+
+@register.simple_tag
+def cached_rows(objects, template_name, var, show_actions, *depends):
+    """
+    HTML de todas las filas (vacío si no hay). `var` es el nombre del objeto
+    en la plantilla de fila, `show_actions` el rol y `depends` campos
+    relacionados (ej. "theme__updated_at") que también invalidan la fila.
+    """
+    role = "admin" if show_actions else "public"
+    prefix = f"rows:{var}:{role}"
+    versions, by_pk = _versions(objects, depends)
+    if not versions:
+        return ""
+
+    digest = hashlib.sha1(repr((template_name, versions)).encode()).hexdigest()
+    table_key = f"{prefix}:table:{digest}"
+    fragments = _fragments()
+    html = fragments.get(table_key)
+    if html is not None:
+        return mark_safe(html)
+
+    row_keys = {pk: f"{prefix}:{pk}:{hashlib.sha1(version.encode()).hexdigest()[:16]}"
+                for pk, version in versions}
+    cached = fragments.get_many(list(row_keys.values()))
+    missing = [pk for pk, _ in versions if row_keys[pk] not in cached]
+    if missing:
+        if isinstance(objects, QuerySet):
+            by_pk = _load(objects, missing)
+        row_template = get_template(template_name)
+        fresh = {}
+        for pk in missing:
+            obj = by_pk.get(pk)
+            if obj is None:   # borrado entre las dos consultas
+                continue
+            fresh[row_keys[pk]] = row_template.render({var: obj, "is_admin": show_actions})
+        fragments.set_many(fresh, timeout=_timeout())
+        cached.update(fresh)
+
+    html = "".join(cached.get(row_keys[pk], "") for pk, _ in versions)
+    fragments.set(table_key, html, timeout=_timeout())
+    return mark_safe(html)
@@ -1,3 +1,1033 @@
-from django.test import TestCase
+from datetime import date
 
-# Create your tests here.
+from django.db import connection
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .models import Category, Event, Source, Theme
+
+# Los dos niveles de TwoTierCache en memoria y vacíos por clase (sin tocar CACHE_DIR)
+TEST_CACHES = {
+    "default": {"BACKEND": "tracker.cache.TwoTierCache", "LOCATION": "shared",
+                "OPTIONS": {"LOCAL_MAX_ENTRIES": 100, "LOCAL_TIMEOUT": 60}},
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-shared"},
+    "fragments": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tests-fragments"},
+}
+
+
+class ReadApiTests(TestCase):
+    """API de lectura (tracker/api.py): consultas por página constantes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Economic")
+        theme = Theme.objects.create(category=category, name="Liquidity", risk_rating="high",
+                                     onset_timeline="1-2 years")
+        events = Event.objects.bulk_create([
+            Event(theme=theme, name=f"Event {i}", date_identified=date(2024, 1, 1), description="d",
+                  impacted_lines=["APAC"], risk_taxonomy_lv1=["Financial Risk"], status="UNDER MONITORING")
+            for i in range(30)
+        ])
+        Source.objects.bulk_create([
+            Source(event=event, name="Bundle", source_date=date(2024, 1, 2), summary="s",
+                   link_or_file=f"https://example.com/{event.pk}/{n}")
+            for event in events for n in range(3)
+        ])
+
+    def _page_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_queries_do_not_depend_on_page_size(self):
+        url = "/api/events/?expand=theme.category,sources,bundles&fields=name,theme&limit={}"
+        small, page = self._page_queries(url.format(2))
+        large, _ = self._page_queries(url.format(30))
+        # evento + theme + categoría en un JOIN, fuentes en un prefetch
+        self.assertEqual(small, 2)
+        self.assertEqual(large, small)
+        self.assertEqual(len(page["results"][0]["sources"]), 3)
+        self.assertEqual(len(page["results"][0]["bundles"]), 1)
+
+        next_queries, _ = self._page_queries(page["next"])
+        self.assertEqual(next_queries, small)
+
+    def test_cursor_walks_every_row_once(self):
+        seen, url = [], "/api/events/?ordering=-updated_at&fields=id&limit=7"
+        while url:
+            data = self.client.get(url).json()
+            seen += [row["id"] for row in data["results"]]
+            url = data["next"]
+        self.assertEqual(sorted(seen), sorted(Event.objects.values_list("pk", flat=True)))
+
+    def test_etag_answers_304(self):
+        response = self.client.get("/api/themes/?expand=category")
+        again = self.client.get("/api/themes/?expand=category", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+
+class RelationPickerTests(TestCase):
+    """EventForm/SourceForm: el <select> de la FK solo trae la opción elegida."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Economic")
+        cls.themes = Theme.objects.bulk_create([
+            Theme(category=category, name=f"Theme {i}", risk_rating="high", onset_timeline="1-2 years")
+            for i in range(20)
+        ])
+        cls.events = Event.objects.bulk_create([
+            Event(theme=theme, name=f"Event {i}", date_identified=date(2024, 1, 1), description="d",
+                  impacted_lines=["APAC"], status="UNDER MONITORING")
+            for i, theme in enumerate(cls.themes)
+        ])
+
+    def _render(self, bound_field):
+        with CaptureQueriesContext(connection) as queries:
+            html = str(bound_field)
+        return len(queries), html
+
+    def test_source_form_renders_only_selected_event(self):
+        from .forms import SourceForm
+
+        queries, html = self._render(SourceForm(initial={"event": self.events[3]})["event"])
+        self.assertEqual(queries, 1)
+        self.assertEqual(html.count("<option"), 2)  # vacía + elegida
+        self.assertIn(f'value="{self.events[3].pk}" selected', html)
+
+    def test_event_form_theme_choices(self):
+        from .forms import EventForm
+
+        form = EventForm(instance=self.events[5])
+        with CaptureQueriesContext(connection) as queries:
+            choices = form.theme_choices
+        self.assertEqual(len(queries), 1)
+        self.assertEqual([str(value) for value, _ in choices], ["", str(self.themes[5].pk)])
+
+    def test_bound_form_validates_and_ignores_garbage(self):
+        from .forms import SourceForm
+
+        form = SourceForm(data={"event": "nope"})
+        self.assertFalse(form.is_valid())
+        self.assertIn("event", form.errors)
+        _, html = self._render(form["event"])
+        self.assertEqual(html.count("<option"), 1)
+
+
+class BulkArchiveTests(TestCase):
+    """tracker/archive.py: cascada con UPDATEs por conjunto, feed y auditoría una vez."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Economic")
+        cls.themes = Theme.objects.bulk_create([
+            Theme(category=category, name=f"Theme {i}", risk_rating="high", onset_timeline="1-2 years")
+            for i in range(2)
+        ])
+        cls.events = Event.objects.bulk_create([
+            Event(theme=theme, name=f"Event {i}", date_identified=date(2024, 1, 1), description="d",
+                  impacted_lines=["APAC"], status="UNDER MONITORING")
+            for theme in cls.themes for i in range(5)
+        ])
+        Source.objects.bulk_create([
+            Source(event=event, name="Bundle", source_date=date(2024, 1, 2), summary="s",
+                   link_or_file=f"https://example.com/{event.pk}/{n}")
+            for event in cls.events for n in range(4)
+        ])
+
+    def test_theme_archive_cascades_with_constant_queries(self):
+        from . import archive
+        from .models import ChangeFeedEntry, ChangeLog
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                changed = archive.archive(theme_ids=[self.themes[0].pk])
+        self.assertEqual(changed, {"theme": 1, "event": 5, "source": 20})
+        # por modelo: SELECT + UPDATE + ChangeLog; más savepoint/commit
+        self.assertLessEqual(len(queries), 11)
+        self.assertFalse(Event.objects.filter(theme=self.themes[0], is_active=True).exists())
+        self.assertEqual(Source.objects.filter(is_active=False).count(), 20)
+        self.assertEqual(Source.objects.filter(is_active=True).count(), 20)
+        self.assertEqual(ChangeFeedEntry.objects.filter(action="archive").count(), 26)
+        self.assertEqual(ChangeLog.objects.filter(changes__is_active=[True, False]).count(), 26)
+
+        # idempotente: lo ya archivado no se vuelve a tocar
+        self.assertEqual(archive.archive(theme_ids=[self.themes[0].pk]), {"theme": 0, "event": 0, "source": 0})
+
+    def test_restore_without_cascade(self):
+        from . import archive
+
+        archive.archive(event_ids=[self.events[0].pk])
+        changed = archive.set_active(True, event_ids=[self.events[0].pk], cascade=False)
+        self.assertEqual(changed, {"theme": 0, "event": 1, "source": 0})
+        self.assertEqual(Source.objects.filter(event=self.events[0], is_active=False).count(), 4)
+
+    def test_restore_keeps_children_archived_on_their_own(self):
+        from . import archive
+
+        event = self.events[0]
+        removed = Source.objects.filter(event=event).order_by("pk").first()
+        archive.archive(source_ids=[removed.pk])          # ítem quitado del bundle
+        archive.archive(theme_ids=[event.theme_id])
+        archive.archive(theme_ids=[event.theme_id])       # no re-marca lo ya archivado
+        self.assertEqual(archive.restore(theme_ids=[event.theme_id]), {"theme": 1, "event": 5, "source": 19})
+        self.assertFalse(Source.objects.get(pk=removed.pk).is_active)
+
+        # evento archivado por su cuenta antes que el threat: queda archivado con sus fuentes
+        archive.archive(event_ids=[event.pk])
+        archive.archive(theme_ids=[event.theme_id])
+        self.assertEqual(archive.restore(theme_ids=[event.theme_id]), {"theme": 1, "event": 4, "source": 16})
+        self.assertFalse(Event.objects.get(pk=event.pk).is_active)
+        self.assertEqual(archive.restore(event_ids=[event.pk]), {"theme": 0, "event": 1, "source": 3})
+        self.assertFalse(Source.objects.get(pk=removed.pk).is_active)
+
+    def test_bulk_endpoint(self):
+        from django.contrib.auth.models import User
+
+        self.client.force_login(User.objects.create_superuser("admin", "a@example.com", "pw"))
+        response = self.client.post("/bulk/archive/", {"event": f"{self.events[0].pk},{self.events[1].pk}"},
+                                    HTTP_ACCEPT="application/json")
+        self.assertEqual(response.json(), {"action": "archive", "changed": {"theme": 0, "event": 2, "source": 8}})
+        self.assertEqual(self.client.post("/bulk/restore/", {"event": "x"}).status_code, 400)
+
+
+class RiskHistoryViewTests(TestCase):
+    """JSON de historial de riesgo: parámetros inválidos dan 400, no 500."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Economic")
+        cls.theme = Theme.objects.create(category=category, name="Liquidity", risk_rating="high",
+                                         onset_timeline="1-2 years")
+        cls.event = Event.objects.create(theme=cls.theme, name="Event", date_identified=date(2024, 1, 1),
+                                         description="d", impacted_lines=["APAC"], status="UNDER MONITORING")
+
+    def test_impossible_date_is_bad_request(self):
+        for url in (f"/events/{self.event.pk}/risk-history/?start=2024-02-30",
+                    f"/themes/{self.theme.pk}/risk-trends/?end=2024-13-01"):
+            self.assertEqual(self.client.get(url).status_code, 400, url)
+
+    def test_period_must_be_known(self):
+        url = f"/themes/{self.theme.pk}/risk-trends/?start=2024-01-01&end=2024-03-31"
+        self.assertEqual(self.client.get(url + "&period=fortnight").status_code, 400)
+        response = self.client.get(url + "&period=week")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["period"], "week")
+
+
+class LobMaskTests(TestCase):
+    """Event.impacted_lines_mask: filtros any/all, conteos y backfill (0022)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from .forms import normalize_impacted_lines
+
+        category = Category.objects.create(name="Economic")
+        cls.theme = Theme.objects.create(category=category, name="Liquidity", risk_rating="high",
+                                         onset_timeline="1-2 years")
+        cls.events = {}
+        for name, lines in (("apac", ["APAC"]), ("apac_emea", ["EMEA", "APAC"]), ("latam", ["LATAM"]),
+                            ("all", normalize_impacted_lines(["All"])), ("none", [])):
+            cls.events[name] = Event.objects.create(
+                theme=cls.theme, name=name, date_identified=date(2024, 1, 1), description="d",
+                impacted_lines=lines, status="UNDER MONITORING",
+            )
+
+    def _names(self, qs):
+        return sorted(qs.values_list("name", flat=True))
+
+    def test_all_expands_to_every_line(self):
+        from .forms import normalize_impacted_lines
+        from .models import LOB_BITS
+
+        lines = normalize_impacted_lines(["APAC", "All"])
+        self.assertEqual(lines, ["APAC", "EMEA", "FIG", "Issuer", "LATAM", "Merchant"])
+        self.assertEqual(self.events["all"].impacted_lines_mask,
+                         sum(bit for value, bit in LOB_BITS.items() if value != "Evaluation in progress"))
+
+    def test_any_vs_all(self):
+        self.assertEqual(self._names(Event.objects.impacting_any(["APAC", "LATAM"])),
+                         ["all", "apac", "apac_emea", "latam"])
+        self.assertEqual(self._names(Event.objects.impacting_all(["APAC", "EMEA"])), ["all", "apac_emea"])
+        self.assertEqual(self._names(Event.objects.impacting_all(["APAC", "LATAM"])), ["all"])
+        # sin líneas conocidas no hay coincidencias (ni siquiera el evento sin líneas)
+        self.assertFalse(Event.objects.impacting_any(["Nope"]).exists())
+        self.assertFalse(Event.objects.impacting_all([]).exists())
+
+    def test_counts(self):
+        counts = Event.objects.lob_counts()
+        self.assertEqual(counts["APAC"], 3)
+        self.assertEqual(counts["EMEA"], 2)
+        self.assertEqual(counts["LATAM"], 2)
+        self.assertEqual(counts["Evaluation in progress"], 0)
+        with self.assertNumQueries(1):
+            Event.objects.filter(name__startswith="apac").lob_counts()
+
+    def test_mask_recomputed_on_save(self):
+        event = self.events["latam"]
+        event.impacted_lines = ["Merchant"]
+        event.save()
+        self.assertEqual(self._names(Event.objects.impacting_any(["Merchant"])), ["all", "latam"])
+        self.assertFalse(Event.objects.filter(pk=event.pk).impacting_any(["LATAM"]).exists())
+
+    def test_backfill_migration(self):
+        import importlib
+        from unittest import mock
+
+        from django.apps import apps
+
+        from .models import lob_mask
+
+        migration = importlib.import_module("tracker.migrations.0022_event_impacted_lines_mask")
+        Event.objects.update(impacted_lines_mask=0)     # como antes de 0022
+        with mock.patch.object(migration, "BATCH_SIZE", 2):   # varios lotes
+            migration.backfill_masks(apps, connection.schema_editor())
+        for event in Event.objects.all():
+            self.assertEqual(event.impacted_lines_mask, lob_mask(event.impacted_lines), event.name)
+
+
+class EmailOrUsernameBackendTests(TestCase):
+    """tracker/backends.py: login por email o username, sin distinguir mayúsculas, en una consulta."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+
+        cls.ana = User.objects.create_user("Ana", "Ana.Perez@Example.com", "pw")
+        cls.bob = User.objects.create_user("bob", "shared@example.com", "pw")
+        cls.carl = User.objects.create_user("carl", "SHARED@example.com", "pw")
+        # username que coincide con el email de otro: gana el email
+        cls.dora = User.objects.create_user("dora@example.com", "dora.real@example.com", "pw")
+        cls.eve = User.objects.create_user("eve", "dora@example.com", "pw")
+
+    def setUp(self):
+        from .backends import EmailOrUsernameModelBackend
+
+        self.backend = EmailOrUsernameModelBackend()
+
+    def test_email_is_case_insensitive(self):
+        self.assertEqual(self.backend.lookup_user("  ana.perez@EXAMPLE.com "), self.ana)
+        self.assertEqual(self.backend.authenticate(None, username="ANA.PEREZ@example.com", password="pw"), self.ana)
+        self.assertIsNone(self.backend.authenticate(None, username="ana.perez@example.com", password="nope"))
+
+    def test_username_is_case_insensitive(self):
+        self.assertEqual(self.backend.lookup_user("aNA"), self.ana)
+        self.assertEqual(self.backend.authenticate(None, username="BOB", password="pw"), self.bob)
+
+    def test_ambiguous_email_does_not_authenticate(self):
+        self.assertIsNone(self.backend.lookup_user("shared@example.com"))
+        self.assertIsNone(self.backend.authenticate(None, username="Shared@Example.com", password="pw"))
+        # cada uno sigue entrando con su username
+        self.assertEqual(self.backend.lookup_user("carl"), self.carl)
+
+    def test_email_wins_over_username(self):
+        self.assertEqual(self.backend.lookup_user("DORA@example.com"), self.eve)
+
+    def test_candidates_are_capped(self):
+        from django.contrib.auth.models import User
+
+        User.objects.bulk_create([User(username=f"dup{i}", email="shared@example.com") for i in range(5)])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertIsNone(self.backend.lookup_user("shared@example.com"))
+        self.assertIn(f"LIMIT {self.backend.MAX_CANDIDATES}", queries[0]["sql"])
+
+    def test_one_query_per_lookup(self):
+        for login in ("ana.perez@example.com", "bob", "shared@example.com", "missing", "dora@example.com"):
+            with self.assertNumQueries(1):
+                self.backend.lookup_user(login)
+        with self.assertNumQueries(0):
+            self.assertIsNone(self.backend.lookup_user("   "))
+
+
+class AccessLogTests(TransactionTestCase):
+    """
+    tracker/accesslog.py: login en línea, logout encolado que cierra su fila.
+    TransactionTestCase: flush() corre close_old_connections como en el hilo real.
+    """
+
+    def setUp(self):
+        from unittest import mock
+
+        from django.contrib.auth.models import User
+
+        from . import accesslog
+
+        self.user = User.objects.create_user("ana", "ana@example.com", "pw")
+        self.buffer = accesslog.buffer
+        patcher = mock.patch.object(self.buffer, "_ensure_thread")   # el flush lo dispara el test
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.buffer.flush)
+
+    def _login(self):
+        client = Client()
+        client.force_login(self.user)
+        return client, client.session.session_key
+
+    def test_login_row_is_written_inline(self):
+        from .models import UserAccessLog
+
+        _, session_key = self._login()
+        row = UserAccessLog.objects.get(session_key=session_key)
+        self.assertEqual(row.user, self.user)
+        self.assertIsNone(row.logout_time)
+
+    def test_flushed_logout_closes_its_own_row(self):
+        from .models import UserAccessLog
+
+        first, first_key = self._login()
+        _, second_key = self._login()
+        with self.settings(ACCESS_LOG_BUFFERED=True):
+            first.logout()
+            # encolado: todavía no tocó la BD
+            self.assertFalse(UserAccessLog.objects.filter(logout_time__isnull=False).exists())
+            self.buffer.flush()
+
+        closed = UserAccessLog.objects.get(session_key=first_key)
+        self.assertIsNotNone(closed.logout_time)
+        self.assertEqual(closed.session_duration, closed.logout_time - closed.login_time)
+        self.assertIsNone(UserAccessLog.objects.get(session_key=second_key).logout_time)
+
+    def test_unbuffered_logout_is_written_inline(self):
+        from .models import UserAccessLog
+
+        client, session_key = self._login()
+        with self.settings(ACCESS_LOG_BUFFERED=False):
+            client.logout()
+        self.assertIsNotNone(UserAccessLog.objects.get(session_key=session_key).logout_time)
+
+    def test_session_key_is_unique_when_present(self):
+        from django.db import IntegrityError
+
+        from .models import UserAccessLog
+
+        UserAccessLog.objects.create(user=self.user, session_key=None)
+        UserAccessLog.objects.create(user=self.user, session_key=None)
+        UserAccessLog.objects.create(user=self.user, session_key="k1")
+        with self.assertRaises(IntegrityError):
+            UserAccessLog.objects.create(user=self.user, session_key="k1")
+
+    def test_close_stale_sessions(self):
+        from datetime import timedelta
+
+        from django.conf import settings
+        from django.contrib.sessions.models import Session
+        from django.utils import timezone
+
+        from .accesslog import close_stale_sessions
+        from .models import UserAccessLog
+
+        now = timezone.now()
+        max_age = timedelta(seconds=settings.SESSION_COOKIE_AGE)
+        expired_at = now - timedelta(hours=1)
+        Session.objects.create(session_key="expired", session_data="", expire_date=expired_at)
+        Session.objects.create(session_key="live", session_data="", expire_date=now + timedelta(hours=1))
+        login = now - max_age - timedelta(days=1)
+        UserAccessLog.objects.create(user=self.user, session_key="expired", login_time=now - timedelta(hours=3))
+        UserAccessLog.objects.create(user=self.user, session_key="live", login_time=login)
+        UserAccessLog.objects.create(user=self.user, session_key="purged", login_time=login)
+        UserAccessLog.objects.create(user=self.user, session_key="recent", login_time=now - timedelta(hours=1))
+
+        self.assertEqual(close_stale_sessions(now=now, dry_run=True), (1, 1))
+        self.assertEqual(close_stale_sessions(now=now), (1, 1))
+        self.assertEqual(UserAccessLog.objects.get(session_key="expired").logout_time, expired_at)
+        self.assertEqual(UserAccessLog.objects.get(session_key="purged").session_duration, max_age)
+        self.assertEqual(
+            set(UserAccessLog.objects.filter(logout_time__isnull=True).values_list("session_key", flat=True)),
+            {"live", "recent"},
+        )
+        self.assertEqual(close_stale_sessions(now=now), (0, 0))
+
+
+class ChangeTrackingTests(TestCase):
+    """ChangeTrackingMixin + ChangeLog: diff sin re-consultar y un INSERT de auditoría por request."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Economic")
+        cls.theme = Theme.objects.create(category=category, name="Liquidity", risk_rating="high",
+                                         onset_timeline="1-2 years")
+        Event.objects.bulk_create([
+            Event(theme=cls.theme, name=f"Event {i}", date_identified=date(2024, 1, 1), description="d",
+                  impacted_lines=["APAC"], impacted_lines_mask=1, status="UNDER MONITORING",
+                  risk_rating="medium")
+            for i in range(3)
+        ])
+
+    def _updates(self, event):
+        from .models import ChangeLog
+
+        return list(ChangeLog.objects.filter(object_type="event", object_id=event.pk, action="update")
+                    .order_by("id").values_list("changes", flat=True))
+
+    def test_only_changed_fields_are_logged(self):
+        event = Event.objects.order_by("pk").first()
+        event.name = "Renamed"
+        event.risk_rating = "high"
+        event.description = "d"            # mismo valor: no es un cambio
+        self.assertEqual(set(event.tracked_changes()), {"name", "risk_rating"})
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                event.save()
+        self.assertFalse([q for q in queries if q["sql"].startswith("SELECT")])   # sin re-leer la fila
+        self.assertEqual(self._updates(event), [{"name": ["Event 0", "Renamed"], "risk_rating": ["medium", "high"]}])
+
+    def test_tracking_is_reset_after_save(self):
+        event = Event.objects.order_by("pk").first()
+        with self.captureOnCommitCallbacks(execute=True):
+            event.status = "ESCALATING"
+            event.save()
+        self.assertEqual(event.tracked_changes(), {})
+        with self.captureOnCommitCallbacks(execute=True):
+            event.save()                   # sin cambios: no audita
+            event.status = "DECREASING"
+            event.save()
+        self.assertEqual(self._updates(event), [
+            {"status": ["UNDER MONITORING", "ESCALATING"]},
+            {"status": ["ESCALATING", "DECREASING"]},
+        ])
+
+    def test_middleware_writes_one_bulk_insert_per_request(self):
+        from django.contrib.auth.models import User
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+
+        from .audit import AuditMiddleware
+        from .models import ChangeLog
+
+        user = User.objects.create_user("ana", "ana@example.com", "pw")
+
+        def view(request):
+            with self.captureOnCommitCallbacks(execute=True):
+                for event in Event.objects.all():
+                    event.name = event.name + "!"
+                    event.save()
+            # nada escrito todavía: se acumula hasta el final del request
+            self.assertFalse(ChangeLog.objects.filter(action="update").exists())
+            return HttpResponse()
+
+        request = RequestFactory().post("/")
+        request.user = user
+        with CaptureQueriesContext(connection) as queries:
+            AuditMiddleware(view)(request)
+        inserts = [q for q in queries if q["sql"].startswith('INSERT INTO "tracker_changelog"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(ChangeLog.objects.filter(action="update", changed_by=user).count(), 3)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TwoTierCacheTests(TestCase):
+    """tracker/cache.py: LRU local delante del compartido, invalidación por tags."""
+
+    def setUp(self):
+        from django.core.cache import caches
+
+        caches["default"].clear()
+        self.calls = 0
+
+    def _produce(self):
+        self.calls += 1
+        return f"value {self.calls}"
+
+    def _get(self):
+        from .cache import get_or_set
+
+        return get_or_set("tests:list", self._produce, tags=("events",))
+
+    def _delta(self, before):
+        from .cache import cache_stats
+
+        after = cache_stats()
+        return {key: after[key] - before[key]
+                for key in ("local_hits", "shared_hits", "misses", "tag_invalidations")}
+
+    def test_tiers_and_counters(self):
+        from django.core.cache import caches
+
+        from .cache import cache_stats
+
+        before = cache_stats()
+        self.assertEqual(self._get(), "value 1")     # tag y valor: misses
+        self.assertEqual(self._get(), "value 1")     # tag y valor: en el LRU local
+        caches["default"].clear_local()              # otro worker: solo el compartido
+        self.assertEqual(self._get(), "value 1")
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self._delta(before),
+                         {"local_hits": 2, "shared_hits": 2, "misses": 2, "tag_invalidations": 0})
+
+    def test_invalidate_tags_recomputes_on_both_tiers(self):
+        from django.core.cache import caches
+
+        from .cache import TAG_PREFIX, cache_stats, invalidate_tags
+
+        self._get()
+        before = cache_stats()
+        invalidate_tags("events", "events", "")
+        self.assertEqual(self._get(), "value 2")     # este proceso: token nuevo en el LRU
+        caches["default"].clear_local()
+        self.assertEqual(self._get(), "value 2")     # el compartido guardó el valor nuevo
+        self.assertEqual(self._delta(before)["tag_invalidations"], 1)
+
+        # invalidación hecha por otro worker: solo cambia el token en el compartido
+        caches["shared"].set(TAG_PREFIX + "events", "other-worker", None)
+        self.assertEqual(self._get(), "value 2")     # copia local del token aún vigente
+        caches["default"].clear_local()              # vence LOCAL_TIMEOUT
+        self.assertEqual(self._get(), "value 3")
+        self.assertEqual(self.calls, 3)
+
+    def test_unrelated_tag_keeps_value(self):
+        from .cache import invalidate_tags
+
+        self._get()
+        invalidate_tags("theme:1")
+        self.assertEqual(self._get(), "value 1")
+        self.assertEqual(self.calls, 1)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ConditionalPageTests(TestCase):
+    """tracker/conditional.py: 304 con la sola consulta de versión; el ETag cambia con filas y rol."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Economic")
+        cls.theme = Theme.objects.create(category=category, name="Liquidity", risk_rating="high",
+                                         onset_timeline="1-2 years")
+        cls.event = Event.objects.create(theme=cls.theme, name="Event", date_identified=date(2024, 1, 1),
+                                         description="d", impacted_lines=["APAC"], status="UNDER MONITORING")
+        cls.source = Source.objects.create(event=cls.event, name="Bundle", source_date=date(2024, 1, 2),
+                                           summary="s", link_or_file="https://example.com/1")
+
+    def _urls(self):
+        return ["/events/", "/themes/all/", f"/events/view/{self.event.pk}/", f"/source/{self.source.pk}/"]
+
+    def test_not_modified_with_one_query(self):
+        for url in self._urls():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertIn("no-cache", response["Cache-Control"])
+            with self.assertNumQueries(1):
+                again = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(again.status_code, 304, url)
+
+    def test_etag_changes_after_row_update(self):
+        etags = {url: self.client.get(url)["ETag"] for url in self._urls()}
+        Source.objects.filter(pk=self.source.pk).update(summary="changed", updated_at=timezone.now())
+        self.event.name = "Renamed"
+        self.event.save()
+        self.theme.risk_rating = "low"     # la lista de threats solo depende de Theme
+        self.theme.save()
+        for url, etag in etags.items():
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotEqual(response["ETag"], etag, url)
+
+    def test_etag_depends_on_role(self):
+        from django.contrib.auth.models import User
+
+        url = f"/events/view/{self.event.pk}/"
+        anon = self.client.get(url)["ETag"]
+        self.client.force_login(User.objects.create_user("ana", "ana@example.com", "pw"))
+        user = self.client.get(url)
+        self.client.force_login(User.objects.create_superuser("root", "root@example.com", "pw"))
+        admin = self.client.get(url, HTTP_IF_NONE_MATCH=user["ETag"])
+        self.assertEqual(admin.status_code, 200)
+        self.assertEqual(len({anon, user["ETag"], admin["ETag"]}), 3)
+        self.assertIn("Cookie", admin["Vary"])
+
+
+@override_settings(CACHES=TEST_CACHES)
+class RowCacheTests(TestCase):
+    """templatetags/row_cache.py: un evento cambiado re-renderiza solo su fila."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Economic")
+        cls.themes = Theme.objects.bulk_create([
+            Theme(category=category, name=f"Theme {i}", risk_rating="high", onset_timeline="1-2 years")
+            for i in range(2)
+        ])
+        Event.objects.bulk_create([
+            Event(theme=cls.themes[i % 2], name=f"Event {i}", date_identified=date(2024, 1, 1),
+                  description="d", impacted_lines=["APAC"], status="UNDER MONITORING")
+            for i in range(200)
+        ])
+
+    def setUp(self):
+        from django.core.cache import caches
+
+        caches["fragments"].clear()
+
+    def _rendered_rows(self):
+        """Filas re-renderizadas (lo que cached_rows guarda con set_many) en un GET /events/."""
+        from unittest import mock
+
+        from django.core.cache import caches
+
+        fragments = caches["fragments"]
+        with mock.patch.object(fragments, "set_many", wraps=fragments.set_many) as set_many:
+            response = self.client.get("/events/")
+        self.assertEqual(response.status_code, 200)
+        return sum(len(call.args[0]) for call in set_many.call_args_list)
+
+    def test_one_changed_event_renders_one_row(self):
+        self.assertEqual(self._rendered_rows(), 200)   # caché fría
+        self.assertEqual(self._rendered_rows(), 0)     # tabla entera de una lectura
+
+        event = Event.objects.get(name="Event 7")
+        event.status = "ESCALATING"
+        event.save()
+        self.assertEqual(self._rendered_rows(), 1)
+        self.assertEqual(self._rendered_rows(), 0)
+
+    def test_theme_change_renders_its_event_rows(self):
+        self._rendered_rows()
+        theme = self.themes[0]
+        theme.refresh_from_db()
+        theme.name = "Renamed"
+        theme.save()
+        self.assertEqual(self._rendered_rows(), 100)
+
+    def test_missing_rows_are_loaded_by_pk(self):
+        self._rendered_rows()
+        Event.objects.filter(name="Event 3").update(status="DECREASING", updated_at=timezone.now())
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._rendered_rows(), 1)
+        loads = [q["sql"] for q in queries if '"tracker_event"."description"' in q["sql"]]
+        self.assertEqual(len(loads), 1)
+        self.assertIn(" IN (", loads[0])
+
+
+class ChangeFeedTests(TestCase):
+    """tracker/changefeed.py: margen de asentamiento, compactación y backfill."""
+
+    def _entry(self, object_id, action="update", age=0, object_type="event"):
+        from datetime import timedelta
+
+        from .models import ChangeFeedEntry
+
+        return ChangeFeedEntry.objects.create(object_type=object_type, object_id=object_id, action=action,
+                                              recorded_at=timezone.now() - timedelta(seconds=age))
+
+    def test_read_skips_unsettled_entries(self):
+        from . import changefeed
+
+        settled = self._entry(1, age=60)
+        theme = self._entry(2, age=60, object_type="theme")
+        fresh = self._entry(3)
+        with self.settings(CHANGE_FEED_SETTLE_SECONDS=5):
+            self.assertEqual([row[0] for row in changefeed.read(0, 10)], [settled.pk, theme.pk])
+            self.assertEqual([row[0] for row in changefeed.read(settled.pk, 10)], [theme.pk])
+            self.assertEqual([row[0] for row in changefeed.read(0, 10, types=["theme"])], [theme.pk])
+            self.assertEqual(len(changefeed.read(0, 1)), 1)
+        with self.settings(CHANGE_FEED_SETTLE_SECONDS=0):
+            self.assertEqual(changefeed.read(theme.pk, 10)[0][0], fresh.pk)
+
+    def test_compact_keeps_newest_entry_per_object(self):
+        from . import changefeed
+        from .models import ChangeFeedEntry
+
+        day = 86400
+        self._entry(1, "create", age=30 * day)
+        self._entry(1, "update", age=20 * day)
+        kept_1 = self._entry(1, "archive", age=10 * day)
+        kept_2 = self._entry(2, "create", age=30 * day)
+        self._entry(3, "create", age=30 * day)
+        kept_3 = self._entry(3, "update")                    # reciente: reemplaza la vieja
+        kept_theme = self._entry(1, "create", age=30 * day, object_type="theme")
+        recent = [self._entry(4, "create"), self._entry(4, "update")]   # dentro del plazo: intactas
+
+        self.assertEqual(changefeed.compact(older_than_days=7, chunk_size=2), 3)
+        self.assertEqual(set(ChangeFeedEntry.objects.values_list("pk", flat=True)),
+                         {kept_1.pk, kept_2.pk, kept_3.pk, kept_theme.pk, *(e.pk for e in recent)})
+        self.assertEqual(changefeed.compact(older_than_days=7), 0)
+
+    def test_backfill_adds_one_create_per_object(self):
+        from . import changefeed
+        from .models import ChangeFeedEntry
+
+        category = Category.objects.create(name="Economic")
+        theme = Theme.objects.create(category=category, name="Liquidity", risk_rating="high",
+                                     onset_timeline="1-2 years")
+        events = Event.objects.bulk_create([
+            Event(theme=theme, name=f"Event {i}", date_identified=date(2024, 1, 1), description="d",
+                  impacted_lines=["APAC"], status="UNDER MONITORING")
+            for i in range(3)
+        ])
+        Source.objects.bulk_create([
+            Source(event=event, name="Bundle", source_date=date(2024, 1, 2), summary="s",
+                   link_or_file=f"https://example.com/{event.pk}")
+            for event in events
+        ])
+        self._entry(events[0].pk, "create")    # ya tiene entrada: no se duplica
+
+        self.assertEqual(changefeed.backfill(chunk_size=2), 1 + 2 + 3)
+        self.assertEqual(ChangeFeedEntry.objects.filter(object_type="event").count(), 3)
+        self.assertEqual(
+            set(ChangeFeedEntry.objects.filter(object_type="source").values_list("parent_id", flat=True)),
+            {event.pk for event in events},
+        )
+        self.assertEqual(changefeed.backfill(), 0)
+
+
+@override_settings(LIVE_UPDATES=True, LIVE_POLL_SECONDS=3600, CHANGE_FEED_SETTLE_SECONDS=0)
+class LiveUpdatesTests(TestCase):
+    """tracker/live.py y views_live: reparto por tópico, replay y fragmentos (async)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name="Economic")
+        cls.theme = Theme.objects.create(category=category, name="Liquidity", risk_rating="high",
+                                         onset_timeline="1-2 years")
+        cls.event = Event.objects.create(theme=cls.theme, name="Event", date_identified=date(2024, 1, 1),
+                                         description="d", impacted_lines=["APAC"], status="UNDER MONITORING")
+        cls.link = Source.objects.create(event=cls.event, name="Link", source_date=date(2024, 1, 2),
+                                         summary="s", link_or_file="https://example.com/1")
+
+    async def _hub(self):
+        import asyncio
+
+        from . import live
+
+        hub = live.Hub(asyncio.get_running_loop())
+        self.addCleanup(lambda: hub.task and hub.task.cancel())   # el watcher duerme LIVE_POLL_SECONDS
+        return hub
+
+    async def _change(self, object_type, object_id, parent_id):
+        from .models import ChangeFeedEntry
+
+        return await ChangeFeedEntry.objects.acreate(object_type=object_type, object_id=object_id,
+                                                     parent_id=parent_id, action="update")
+
+    def _drain(self, sub):
+        messages = []
+        while not sub.queue.empty():
+            messages.append(sub.queue.get_nowait())
+        return messages
+
+    async def test_fan_out_by_topic(self):
+        hub = await self._hub()
+        event_sub = await hub.subscribe([f"event:{self.event.pk}"])
+        theme_sub = await hub.subscribe([f"theme:{self.theme.pk}"])
+        dashboard_sub = await hub.subscribe(["dashboard"])
+        other_sub = await hub.subscribe(["event:999999"])
+
+        entry = await self._change("source", self.link.pk, self.event.pk)
+        await hub._poll()
+        message = self._drain(event_sub)
+        self.assertEqual(len(message), 1)
+        self.assertTrue(message[0].startswith(f"id: {entry.pk}\nevent: change\n".encode()))
+        self.assertEqual(self._drain(dashboard_sub), message)
+        self.assertEqual(self._drain(theme_sub), [])          # una fuente no llega al theme
+        self.assertEqual(self._drain(other_sub), [])
+
+        await self._change("event", self.event.pk, self.theme.pk)
+        await hub._poll()
+        await hub._poll()                                      # asentado: no se reenvía
+        self.assertEqual(len(self._drain(theme_sub)), 1)
+        self.assertEqual(len(self._drain(event_sub)), 1)
+
+        hub.unsubscribe(other_sub)
+        self.assertNotIn("event:999999", hub.by_topic)
+
+    async def test_replay_with_last_event_id(self):
+        from . import live
+
+        hub = await self._hub()
+        topic = [f"event:{self.event.pk}"]
+        await hub.subscribe(["dashboard"])                     # arranca el watcher: floor = fin del feed
+        first = await self._change("source", self.link.pk, self.event.pk)
+        second = await self._change("source", self.link.pk, self.event.pk)
+        await hub._poll()
+
+        resumed = await hub.subscribe(topic, last_event_id=first.pk)
+        replayed = self._drain(resumed)
+        self.assertEqual(len(replayed), 1)
+        self.assertTrue(replayed[0].startswith(f"id: {second.pk}\n".encode()))
+
+        unrelated = await hub.subscribe(["theme:999999"], last_event_id=first.pk - 1)
+        self.assertEqual(self._drain(unrelated), [])
+
+        too_old = await hub.subscribe(topic, last_event_id=hub.floor - 1)
+        self.assertEqual(self._drain(too_old), [live.RELOAD])
+
+    async def test_queue_overflow_asks_for_reload(self):
+        from . import live
+
+        with self.settings(LIVE_QUEUE_SIZE=2):
+            sub = live.Subscriber(["dashboard"])
+        for seq in range(3):
+            sub.send(live.sse("change", seq=seq))
+        self.assertEqual(self._drain(sub), [live.RELOAD])
+
+    async def test_big_batch_broadcasts_reload(self):
+        from . import live
+
+        hub = await self._hub()
+        sub = await hub.subscribe([f"theme:{self.theme.pk}"])
+        with self.settings(LIVE_MAX_BATCH=2):
+            for _ in range(3):
+                await self._change("theme", 999999, None)
+            await hub._poll()
+        self.assertEqual(self._drain(sub), [live.RELOAD])
+
+    async def test_fragment_is_204_when_filtered_out(self):
+        url = f"/live/source-bundle/{self.link.pk}/"
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'data-href="/source/{self.link.pk}/"'.encode(), response.content)
+        self.assertEqual((await self.async_client.get(url + "?source_type=FILE")).status_code, 204)
+
+        await Source.objects.filter(pk=self.link.pk).aupdate(is_active=False)
+        self.assertEqual((await self.async_client.get(url)).status_code, 204)
+        self.assertEqual((await self.async_client.get(url + "?show_archived=1")).status_code, 200)
+        self.assertEqual((await self.async_client.get("/live/nope/1/")).status_code, 400)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class TypeaheadTests(TestCase):
+    """get_themes / get_events: búsqueda, paginación con `more` e invalidación de la caché."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+
+        cls.user = User.objects.create_user("ana", "ana@example.com", "pw")
+        category = Category.objects.create(name="Economic")
+        other = Category.objects.create(name="Geopolitical")
+        cls.themes = Theme.objects.bulk_create([
+            Theme(category=category if i < 4 else other, name=name, risk_rating="high", onset_timeline="1-2 years")
+            for i, name in enumerate(["Liquidity", "Credit spread", "Rates", "FX liquidity", "Sanctions"])
+        ])
+        cls.category = category
+        Event.objects.bulk_create([
+            Event(theme=cls.themes[i % 2], name=f"Event {i:02d}", date_identified=date(2024, 1, 1),
+                  description="d", impacted_lines=["APAC"], status="UNDER MONITORING")
+            for i in range(25)
+        ])
+
+    def setUp(self):
+        from django.core.cache import caches
+
+        caches["default"].clear()
+        self.client.force_login(self.user)
+
+    def _texts(self, url):
+        return [row["text"] for row in self.client.get(url).json()["results"]]
+
+    def test_requires_login(self):
+        self.assertEqual(Client().get("/ajax/themes/").status_code, 302)
+
+    def test_search_prefix_then_infix(self):
+        # menos de 3 caracteres: solo prefijo
+        self.assertEqual(self._texts("/ajax/themes/?q=li"), ["Liquidity (Economic)"])
+        # desde 3: también infijo, los que empiezan con q primero
+        self.assertEqual(self._texts("/ajax/themes/?q=%20LIQ%20"),
+                         ["Liquidity (Economic)", "FX liquidity (Economic)"])
+        self.assertEqual(self._texts(f"/ajax/themes/?q=liq&category_id={self.category.pk}"),
+                         ["Liquidity", "FX liquidity"])
+
+    def test_limit_offset_and_more(self):
+        theme = self.themes[0]
+        url = f"/ajax/events/?theme_id={theme.pk}&limit=5"
+        first = self.client.get(url).json()
+        self.assertEqual(len(first["results"]), 5)
+        self.assertTrue(first["more"])
+        last = self.client.get(url + "&offset=10").json()
+        self.assertEqual([row["text"] for row in last["results"]], ["Event 20", "Event 22", "Event 24"])
+        self.assertFalse(last["more"])
+        # limit acotado a TYPEAHEAD_MAX_PAGE_SIZE; basura -> valores por defecto
+        self.assertEqual(len(self.client.get("/ajax/events/?limit=abc&offset=-3").json()["results"]), 20)
+
+    def test_cached_until_theme_or_event_changes(self):
+        theme, event = self.themes[0], Event.objects.get(name="Event 00")
+        scoped = f"/ajax/events/?theme_id={theme.pk}&q=event%2000"
+        self.assertEqual(self._texts(scoped), ["Event 00"])
+        self.assertEqual(self._texts("/ajax/events/?q=event%2000"), ["Event 00 (Liquidity)"])
+        with self.assertNumQueries(2):       # sesión + usuario: la página sale de la caché
+            self._texts(scoped)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            event.name = "Event 00 renamed"
+            event.save()
+        self.assertEqual(self._texts(scoped), ["Event 00 renamed"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            theme.name = "Funding"
+            theme.save()
+        self.assertEqual(self._texts("/ajax/events/?q=event%2000"), ["Event 00 renamed (Funding)"])
+        self.assertEqual(self._texts("/ajax/themes/?q=fund"), ["Funding (Economic)"])
+
+
+class DedupeUsersTests(TestCase):
+    """dedupe_users: fusiona variantes de un email en el superuser, reasignando FKs y M2M."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import Group, User
+
+        from .models import UserAccessLog
+
+        cls.groups = [Group.objects.create(name=f"group {i}") for i in range(3)]
+        cls.root = User.objects.create_superuser("root", " Shared@Example.com", "pw")
+        cls.dupes = [User.objects.create_user(name, email, "pw")
+                     for name, email in (("ana", "shared@EXAMPLE.com"), ("bob", "SHARED@example.com  "))]
+        cls.other = User.objects.create_user("carl", "Carl@Example.com", "pw")
+        cls.root.groups.add(cls.groups[0])
+        cls.dupes[0].groups.add(cls.groups[0], cls.groups[1])
+        cls.dupes[1].groups.add(cls.groups[2])
+
+        category = Category.objects.create(name="Economic")
+        cls.theme = Theme.objects.create(category=category, name="Liquidity", risk_rating="high",
+                                         onset_timeline="1-2 years", created_by=cls.dupes[1])
+        UserAccessLog.objects.create(user=cls.dupes[0], session_key="ana-session")
+
+    def _run(self, *args):
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command("dedupe_users", *args, stdout=out)
+        return out.getvalue()
+
+    def test_dry_run_changes_nothing(self):
+        from django.contrib.auth.models import User
+
+        before = list(User.objects.order_by("pk").values_list("pk", "email"))
+        output = self._run()
+        self.assertIn(f"conservando id={self.root.pk}", output)
+        self.assertIn("Dry-run", output)
+        self.assertEqual(list(User.objects.order_by("pk").values_list("pk", "email")), before)
+
+    def test_merges_into_superuser(self):
+        from django.contrib.auth.models import User
+
+        from .models import UserAccessLog
+
+        self._run("--commit", "--batch-size", "1")
+        self.assertEqual(set(User.objects.values_list("username", flat=True)), {"root", "carl"})
+        root = User.objects.get(pk=self.root.pk)
+        self.assertEqual(root.email, "shared@example.com")
+        self.assertTrue(root.is_superuser)
+        self.assertEqual(set(root.groups.all()), set(self.groups))
+        self.assertEqual(User.objects.get(pk=self.other.pk).email, "carl@example.com")
+
+        # FKs reasignadas (SET_NULL y CASCADE no se disparan: nada se pierde)
+        self.assertEqual(Theme.objects.get(pk=self.theme.pk).created_by_id, self.root.pk)
+        self.assertEqual(UserAccessLog.objects.get(session_key="ana-session").user_id, self.root.pk)
+
+    def test_rerun_is_a_no_op(self):
+        from django.contrib.auth.models import User
+
+        self._run("--commit")
+        snapshot = list(User.objects.order_by("pk").values_list("pk", "email"))
+        with CaptureQueriesContext(connection) as queries:
+            output = self._run("--commit")
+        self.assertIn("No hay duplicados", output)
+        self.assertIn("Emails normalizados/ajustados: 0", output)
+        # el UPDATE de normalización corre pero no toca filas; nada se borra ni se inserta
+        self.assertFalse([q for q in queries if q["sql"].startswith(("DELETE", "INSERT"))])
+        self.assertEqual(list(User.objects.order_by("pk").values_list("pk", "email")), snapshot)
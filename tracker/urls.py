@@ -1,15 +1,21 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 
-from tracker import views_downloads
+from tracker import api, metrics, views_downloads, views_live
+
+# Modo ASGI (uvicorn): lecturas públicas con las variantes async
+read_views = views
+if getattr(settings, "ASYNC_VIEWS", False):
+    from tracker import views_async as read_views
 
 
 urlpatterns = [
    
     # Home / dashboard
     
-    path("", views.dashboard, name="dashboard"),
+    path("", read_views.dashboard, name="dashboard"),
     
     # Threat
     path("themes/all/", views.theme_list_all, name="theme_list_all"),
@@ -26,10 +32,11 @@ urlpatterns = [
     path("themes/redirect/add-event/", views.add_event_redirect, name="add_event_redirect"),
     path('themes/toggle/<int:pk>/', views.toggle_theme_active, name='toggle_theme_active'),
 
-    path("events/", views.event_list, name="event_list"),
+    path("events/", read_views.event_list, name="event_list"),
+    path("events/export.<str:fmt>", views.export_events, name="export_events"),
 
     path("events/<int:pk>/", views.event_detail, name="event_detail"),           
-    path("events/view/<int:event_id>/", views.view_event, name="view_event"),    
+    path("events/view/<int:event_id>/", read_views.view_event, name="view_event"),    
 
     path("events/<int:pk>/edit/", views.edit_event, name="edit_event"),
     
@@ -39,18 +46,39 @@ urlpatterns = [
     path('events/toggle/<int:pk>/', views.toggle_event_active, name='toggle_event_active'),
 
     path("sources/redirect/add/", views.add_source_redirect, name="add_source_redirect"),
-    path("source/<int:pk>/", views.source_detail, name="source_detail"),
+    path("source/<int:pk>/", read_views.source_detail, name="source_detail"),
     path("source/<int:pk>/edit/", views.SourceUpdateView.as_view(), name="edit_source"),
     path("source/<int:pk>/delete/", views.SourceDeleteView.as_view(), name="delete_source"),
     path("source/<int:pk>/toggle/", views.toggle_source_active, name="toggle_source_active"),
     path("f/<uuid:token>/", views_downloads.secure_file_download, name="secure_file_download"),
+
+    # Archivado / restauración en bloque (con cascada)
+    path("bulk/archive/", views.bulk_set_active, {"active": False}, name="bulk_archive"),
+    path("bulk/restore/", views.bulk_set_active, {"active": True}, name="bulk_restore"),
     
 
     # AJAX helpers
-    path("ajax/themes/", views.get_themes, name="get_themes"),
-    path("ajax/events/", views.get_events, name="get_events"),
+    path("ajax/themes/", read_views.get_themes, name="get_themes"),
+    path("ajax/events/", read_views.get_events, name="get_events"),
+
+    # Historial de riesgo (JSON)
+    path("events/<int:event_id>/risk-history/", views.event_risk_history, name="event_risk_history"),
+    path("themes/<int:pk>/risk-trends/", views.theme_risk_trends, name="theme_risk_trends"),
+
+    # API JSON de lectura (tracker/api.py)
+    path("api/changes/", api.changes, name="api_changes"),
+    path("api/<str:resource>/", api.resource_list, name="api_list"),
+    path("api/<str:resource>/<int:pk>/", api.resource_detail, name="api_detail"),
+
+    # Actualizaciones en vivo (SSE + fragmentos, tracker/live.py)
+    path("live/", views_live.stream, name="live_stream"),
+    path("live/<str:kind>/<int:pk>/", views_live.fragment, name="live_fragment"),
 
     # Admin / logs
     path("access-logs/", views.access_logs, name="access_logs"),
+    path("history/<str:object_type>/<int:pk>/", views.object_history, name="object_history"),
+    path("metrics", metrics.metrics_view, name="metrics"),
+    path("profiles/", views.profile_list, name="profile_list"),
+    path("profiles/<str:name>/", views.profile_download, name="profile_download"),
 ]
 
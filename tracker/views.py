@@ -1,26 +1,35 @@
 # tracker/views.py
 from django.db import transaction
-from django.db.models import Q, Case, When, IntegerField
+from django.db.models import Q, Case, When, IntegerField, Count, Prefetch
+from django.db.models.functions import Lower
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth import login, logout
 from django.urls import reverse, reverse_lazy
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.core.paginator import Paginator
 from django.views.generic import UpdateView, DeleteView, DetailView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.conf import settings
-from django.http import JsonResponse, HttpResponseRedirect, Http404
+from django.core.handlers.asgi import ASGIRequest
+from django.utils import timezone
+from django.http import JsonResponse, HttpResponseRedirect, Http404, HttpResponse, FileResponse, StreamingHttpResponse
 from collections import OrderedDict
 
 from .models import (
-    Category, Theme, Event, Source, UserAccessLog, SourceFileVersion,
-    LINE_OF_BUSINESS_CHOICES,
+    Category, Theme, Event, Source, UserAccessLog, SourceFileVersion, ChangeLog,
+    LINE_OF_BUSINESS_CHOICES, LOB_BITS,
     RISK_TAXONOMY_LV1, RISK_TAXONOMY_LV2, RISK_TAXONOMY_LV3,
     STATUS_CHOICES,
 )
 from .forms import ThemeForm, EventForm, SourceForm, RegisterForm
+from .risk_history import PERIODS, risk_trajectory, theme_escalation_trends
+from .cache import get_or_set as cache_get_or_set
+from .profiling import folded_text, list_profiles, profile_path
+from . import archive, conditional, exports
 
+import hashlib
 import json
 import os
 from urllib.parse import urlparse
@@ -269,16 +278,55 @@ def _client_ip(request):
 # Dashboard (público)
 # =========================================================
 
+DASHBOARD_CACHE_TIMEOUT = 300
+DASHBOARD_MAX_ROWS = 200
+DASHBOARD_SOURCES_PER_EVENT = 3
+
+
+def _dashboard_themes_qs():
+    return (Theme.objects.filter(is_active=True)
+            .select_related('category')
+            .order_by('-created_at'))
+
+
+def _dashboard_events_qs():
+    return (Event.objects.filter(is_active=True)
+            .select_related('theme')
+            .annotate(source_count=Count('sources'))
+            .prefetch_related(Prefetch(
+                'sources',
+                queryset=Source.objects.order_by('-source_date', 'pk')[:DASHBOARD_SOURCES_PER_EVENT],
+                to_attr='top_sources',
+            ))
+            .order_by('-date_identified'))
+
+
+def _dashboard_lists():
+    """
+    (nombre, queryset, tags) de las listas del dashboard. Se cachean
+    materializadas (con relaciones ya cargadas); los signals invalidan por tag.
+    Compartido con views_async.dashboard; views_live arma una sola fila con
+    los mismos querysets.
+    """
+    return [
+        ('categories', Category.objects.all(), ('categories',)),
+        ('themes', _dashboard_themes_qs()[:DASHBOARD_MAX_ROWS], ('themes',)),
+        ('events', _dashboard_events_qs()[:DASHBOARD_MAX_ROWS], ('events', 'themes', 'sources')),
+    ]
+
+
 def dashboard(request):
-    categories = Category.objects.all()
-    MAX_ROWS = 200
-    themes = Theme.objects.filter(is_active=True).all().order_by('-created_at')[:MAX_ROWS]
-    events = Event.objects.filter(is_active=True).all().order_by('-date_identified')[:MAX_ROWS]
-    return render(request, 'tracker/dashboard.html', {
-        'categories': categories,
-        'themes': themes,
-        'events': events
-    })
+    ctx = {}
+    for name, qs, tags in _dashboard_lists():
+        ctx[name] = cache_get_or_set(
+            f'dashboard:{name}', lambda qs=qs: list(qs),
+            timeout=DASHBOARD_CACHE_TIMEOUT, tags=tags,
+        )
+    ctx['lob_counts'] = cache_get_or_set(
+        'dashboard:lob_counts', lambda: Event.objects.filter(is_active=True).lob_counts(),
+        timeout=DASHBOARD_CACHE_TIMEOUT, tags=('events',),
+    )
+    return render(request, 'tracker/dashboard.html', ctx)
 
 
 # =========================================================
@@ -286,6 +334,7 @@ def dashboard(request):
 # =========================================================
 
 # Listas y detail: PÚBLICO
+@conditional.conditional_page(conditional.theme_list_version)
 def theme_list_all(request):
     show_archived = request.GET.get('show_archived') == '1'
     q = (request.GET.get('q') or '').strip()
@@ -328,9 +377,17 @@ def theme_list(request, category_id):
 
 
 def view_theme(request, pk):
-    theme = get_object_or_404(Theme, pk=pk)
-    request.session['last_viewed_theme'] = theme.pk
-    events = theme.events.all()
+    response = _theme_detail(request, pk)
+    # también en 304: add_event_redirect preselecciona el último theme visto
+    if response.status_code in (200, 304) and request.session.get('last_viewed_theme') != pk:
+        request.session['last_viewed_theme'] = pk
+    return response
+
+
+@conditional.conditional_page(conditional.theme_version)
+def _theme_detail(request, pk):
+    theme = get_object_or_404(Theme.objects.select_related('category'), pk=pk)
+    events = list(theme.events.all())   # la plantilla cuenta con |length
     return render(request, 'tracker/theme_detail.html', {
         'theme': theme,
         'events': events
@@ -342,6 +399,11 @@ class ThemeDetailView(DetailView):
     template_name = 'tracker/theme_detail.html'
     context_object_name = 'theme'
 
+    def get_context_data(self, **kwargs):
+        ctx = super().get_context_data(**kwargs)
+        ctx['events'] = list(self.object.events.all())
+        return ctx
+
 
 # Crear/editar: LOGIN requerido (ya no admin-only)
 class ThemeUpdateView(AdminRequiredMixin, UpdateView):
@@ -407,26 +469,77 @@ def toggle_theme_active(request, pk):
         return redirect('theme_list_all')
 
     theme = get_object_or_404(Theme, pk=pk)
-    theme.is_active = not theme.is_active
-    theme.save(update_fields=['is_active'])
-    messages.success(request, "Threat restored." if theme.is_active else "Threat archived.")
+    # en cascada: sus eventos y las fuentes de esos eventos
+    changed = archive.set_active(not theme.is_active, theme_ids=[theme.pk], user=request.user)
+    verb = "archived" if theme.is_active else "restored"
+    messages.success(request, f"Threat {verb}{_cascade_note(changed, 'theme')}.")
     return redirect(request.META.get('HTTP_REFERER') or 'theme_list_all')
 
 
+def _cascade_note(changed, own):
+    """' (3 events, 12 sources)' con lo que arrastró la cascada; '' si nada."""
+    parts = [f"{n} {name}{'s' if n != 1 else ''}" for name, n in changed.items() if n and name != own]
+    return f" ({', '.join(parts)})" if parts else ""
+
+
+# =========================================================
+# Archivado / restauración en bloque (tracker/archive.py)
+# =========================================================
+
+def _posted_ids(request, name):
+    """ids de ?name=1&name=2 o name=1,2 (se ignora lo que no es número)."""
+    values = []
+    for raw in request.POST.getlist(name):
+        values.extend(v.strip() for v in raw.split(","))
+    return {int(v) for v in values if v.isdigit()}
+
+
+@admin_required
+def bulk_set_active(request, active):
+    """
+    Archiva/restaura en bloque (POST theme=, event=, source=; cascade=0 para
+    no arrastrar hijos). Con Accept: application/json devuelve los conteos.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "POST required"}, status=405)
+    ids = {f"{kind}_ids": _posted_ids(request, kind) for kind in archive.MODELS}
+    if not any(ids.values()):
+        return JsonResponse({"error": "no ids"}, status=400)
+    changed = archive.set_active(active, cascade=request.POST.get("cascade") != "0", user=request.user, **ids)
+
+    if "application/json" in request.headers.get("Accept", ""):
+        return JsonResponse({"action": "restore" if active else "archive", "changed": changed})
+    total = sum(changed.values())
+    messages.success(request, f"{total} item{'s' if total != 1 else ''} {'restored' if active else 'archived'}"
+                              f"{_cascade_note(changed, None)}.")
+    next_url = request.POST.get("next")
+    if not (next_url and url_has_allowed_host_and_scheme(next_url, {request.get_host()})):
+        next_url = request.META.get("HTTP_REFERER") or reverse("dashboard")
+    return redirect(next_url)
+
+
 # =========================================================
 # Events
 # =========================================================
 
-# List & Detail: PÚBLICO
-def event_list(request):
-    sort = request.GET.get("sort") or "-risk"
-    show_archived = request.GET.get('show_archived') == '1'
+def _filtered_events(request):
+    """
+    Queryset de Event según los filtros de event_list (?q, ?lob, ?lob_match,
+    ?sort, ?show_archived) + los valores normalizados para la plantilla.
+    """
+    return filter_events(request.GET)
+
+
+def filter_events(params):
+    """_filtered_events sobre un QueryDict (lo usa también el comando export_events)."""
+    sort = params.get("sort") or "-risk"
+    show_archived = params.get('show_archived') == '1'
 
     events = Event.objects.select_related('theme').all()
     if not show_archived:
         events = events.filter(is_active=True)
 
-    q = request.GET.get('q')
+    q = params.get('q')
     if q:
         events = events.filter(
             Q(name__icontains=q) |
@@ -434,6 +547,12 @@ def event_list(request):
             Q(theme__name__icontains=q)
         )
 
+    # Filtro por líneas de negocio: ?lob=APAC&lob=EMEA[&lob_match=all]
+    lob = [v for v in params.getlist('lob') if v in LOB_BITS]
+    lob_match = 'all' if params.get('lob_match') == 'all' else 'any'
+    if lob:
+        events = events.impacting_all(lob) if lob_match == 'all' else events.impacting_any(lob)
+
     risk_order = Case(
         When(risk_rating="CRITICAL", then=1),
         When(risk_rating="HIGH", then=2),
@@ -458,12 +577,36 @@ def event_list(request):
     else:
         events = events.annotate(rk=risk_order).order_by("rk", "name", "-id")
 
+    return events, {
+        'search_query': q or '',
+        'sort': sort,
+        'show_archived': show_archived,
+        'lob_selected': lob,
+        'lob_match': lob_match,
+    }
+
+
+@admin_required
+def export_events(request, fmt):
+    """Extracto completo (mismos filtros que event_list) en CSV, XLSX o JSONL, en streaming."""
+    if fmt not in exports.FORMATS:
+        raise Http404("Unknown export format.")
+    events, _ = _filtered_events(request)
+    chunks = exports.astream(events, fmt) if isinstance(request, ASGIRequest) else exports.stream(events, fmt)
+    response = StreamingHttpResponse(chunks, content_type=exports.FORMATS[fmt][0])
+    response["Content-Disposition"] = f'attachment; filename="{exports.filename(fmt)}"'
+    response["X-Accel-Buffering"] = "no"   # que el proxy no junte todo antes de enviarlo
+    return response
+
+
+# List & Detail: PÚBLICO
+@conditional.conditional_page(conditional.event_list_version)
+def event_list(request):
+    events, filters = _filtered_events(request)
     return render(request, 'tracker/event_list.html', {
         'events': events,
         'is_paginated': False,
-        'search_query': q or '',
-               'sort': sort,
-        'show_archived': show_archived,
+        **filters,
         'is_admin': is_admin(request.user),
     })
 
@@ -485,15 +628,22 @@ def _make_bundles(qs):
       leader (Source), items (list[Source]), links (int), files (int),
       any_active (bool), display_type ('LINK'|'FILE'|'MIXED')
     """
-    buckets = OrderedDict()
+    return _group_bundles(_bundle_sources(qs))
+
+
+def _bundle_sources(qs):
     # Traemos solo lo necesario para performance
-    qs = qs.select_related("event").only(
+    return qs.select_related("event").only(
         "id", "event_id", "name", "source_date", "summary",
         "is_active", "file_upload", "link_or_file", "source_type",
         "potential_impact", "potential_impact_notes",
     )
 
-    for s in qs:
+
+def _group_bundles(sources):
+    """Agrupa Sources ya materializados (sync o async) en bundles."""
+    buckets = OrderedDict()
+    for s in sources:
         key = _bundle_key(s)
         if key not in buckets:
             buckets[key] = {
@@ -529,45 +679,30 @@ def _make_bundles(qs):
 
 
 
-def view_event(request, event_id):
-    event = get_object_or_404(Event, pk=event_id)
+BUNDLE_TYPE_CHOICES = [
+    ("ALL", "All Types"),
+    ("MIXED", "Mixed"),
+    ("FILE", "Files"),
+    ("LINK", "Links"),
+]
+
 
-    # filtros de UI
+def _event_sources_qs(request, event):
+    """(queryset de sources del evento según ?show_archived, show_archived, source_type)."""
     show_archived = request.GET.get("show_archived") == "1"
     selected_source_type = (request.GET.get("source_type") or "").strip().upper() or "ALL"
-
-    # base queryset de sources del evento
     qs = Source.objects.filter(event=event)
     if not show_archived:
         qs = qs.filter(is_active=True)
+    return _bundle_sources(qs), show_archived, selected_source_type
 
-    # construimos bundles a partir del queryset filtrado
-    bundles = _make_bundles(qs)
 
+def _event_detail_context(event, bundles, show_archived, selected_source_type):
+    """Contexto de event_detail.html a partir de bundles ya construidos (sin consultas)."""
     # filtro por tipo a nivel bundle (LINK/FILE/MIXED)
     if selected_source_type != "ALL":
         bundles = [b for b in bundles if b["display_type"] == selected_source_type]
 
-    # choices para el select
-    bundle_type_choices = [
-        ("ALL", "All Types"),
-        ("MIXED", "Mixed"),
-        ("FILE", "Files"),
-        ("LINK", "Links"),
-    ]
-
-    def get_risk_labels(event, level):
-        lv1_map = dict(RISK_TAXONOMY_LV1)
-        lv2_map = {val: label for items in RISK_TAXONOMY_LV2.values() for val, label in items}
-        lv3_map = {val: label for items in RISK_TAXONOMY_LV3.values() for val, label in items}
-        if level == 1:
-            return [lv1_map.get(v, v) for v in (event.risk_taxonomy_lv1 or [])]
-        elif level == 2:
-            return [lv2_map.get(v, v) for v in (event.risk_taxonomy_lv2 or [])]
-        elif level == 3:
-            return [lv3_map.get(v, v) for v in (event.risk_taxonomy_lv3 or [])]
-        return []
-
     # ==== Enlazamos métodos get_download_url (tokens firmados) para usar en templates ====
     for b in bundles:
         leader = b["leader"]
@@ -575,20 +710,27 @@ def view_event(request, event_id):
         for item in b["items"]:
             item.get_download_url = lambda s=item: _download_url_for_source(s)
 
-    context = {
+    lv1_labels, lv2_labels, lv3_labels = _taxonomy_label_lists(event)
+    return {
         "event": event,
         "source_bundles": bundles,
-        "bundle_type_choices": bundle_type_choices,
+        "bundle_type_choices": BUNDLE_TYPE_CHOICES,
         "selected_source_type": selected_source_type,
         "show_archived": show_archived,
         "bundle_count": len(bundles),
-        # lo demás que ya pasabas a la plantilla:
         "impact_lobs_display": event.impacted_lines if hasattr(event, "impacted_lines") else [],
-        "risk_lv1_labels": get_risk_labels(event, level=1),
-        "risk_lv2_labels": get_risk_labels(event, level=2),
-        "risk_lv3_labels": get_risk_labels(event, level=3),
-        "is_admin": request.user.is_authenticated and (request.user.is_staff or request.user.is_superuser),
+        "risk_lv1_labels": lv1_labels,
+        "risk_lv2_labels": lv2_labels,
+        "risk_lv3_labels": lv3_labels,
     }
+
+
+@conditional.conditional_page(conditional.event_version)
+def view_event(request, event_id):
+    event = get_object_or_404(Event.objects.select_related("theme"), pk=event_id)
+    qs, show_archived, selected_source_type = _event_sources_qs(request, event)
+    context = _event_detail_context(event, _group_bundles(qs), show_archived, selected_source_type)
+    context["is_admin"] = is_admin(request.user)
     return render(request, "tracker/event_detail.html", context)
 
 class EventDetailView(DetailView):
@@ -755,14 +897,14 @@ def add_event_redirect(request):
 def toggle_event_active(request, pk):
     event = get_object_or_404(Event, pk=pk)
 
-    # toggle
+    # toggle (en cascada: las fuentes del evento)
+    changed = archive.set_active(not event.is_active, event_ids=[event.pk], user=request.user)
     event.is_active = not event.is_active
-    event.save(update_fields=["is_active"])
 
     if event.is_active:
-        messages.success(request, "Event restored.")
+        messages.success(request, f"Event restored{_cascade_note(changed, 'event')}.")
     else:
-        messages.success(request, "Event archived.")
+        messages.success(request, f"Event archived{_cascade_note(changed, 'event')}.")
 
     # 1) prioridad: next explícito (interno)
     next_url = request.POST.get("next") or request.GET.get("next")
@@ -782,17 +924,25 @@ def toggle_event_active(request, pk):
 # Sources
 # =========================================================
 
-# Detail: PÚBLICO
-def source_detail(request, pk):
-    src = get_object_or_404(Source, pk=pk)
-
-    bundle_items = Source.objects.filter(
-        event=src.event,
+def _source_bundle_qs(src):
+    return Source.objects.filter(
+        event_id=src.event_id,
         name=src.name,
         summary=src.summary,
         source_date=src.source_date
     ).order_by("-is_active", "id")
 
+
+def _source_versions_qs(src):
+    return src.file_history.select_related("replaced_by")
+
+
+def _source_detail_context(src, bundle_items, versions):
+    """
+    Contexto de source_detail.html con bundle y versiones ya materializados.
+    Las llamadas al storage (file.url) ocurren aquí: la versión async lo
+    ejecuta fuera del event loop.
+    """
     # Enlazar método get_download_url (token) para src y cada item del bundle
     src.get_download_url = lambda s=src: _download_url_for_source(s)
     for s in bundle_items:
@@ -830,22 +980,27 @@ def source_detail(request, pk):
             })
 
     # Enlazar get_download_url para versiones históricas
-    versions = list(src.file_history.all())
     for v in versions:
         v.get_download_url = lambda x=v: _download_url_for_version(x)
 
-    return render(
-        request,
-        "tracker/source_detail.html",
-        {
-            "object": src,
-            "bundle_items": bundle_items,
-            "bundle_links": bundle_links,
-            "bundle_files": bundle_files,
-            "preview_pdf_url": next((f["url"] for f in bundle_files if f["is_pdf"]), None),
-            "file_history": versions,
-        },
-    )
+    return {
+        "object": src,
+        "bundle_items": bundle_items,
+        "bundle_links": bundle_links,
+        "bundle_files": bundle_files,
+        "preview_pdf_url": next((f["url"] for f in bundle_files if f["is_pdf"]), None),
+        "file_history": versions,
+    }
+
+
+# Detail: PÚBLICO
+@conditional.conditional_page(conditional.source_version)
+def source_detail(request, pk):
+    src = get_object_or_404(Source.objects.select_related("event"), pk=pk)
+    bundle_items = list(_source_bundle_qs(src))
+    versions = list(_source_versions_qs(src))
+    return render(request, "tracker/source_detail.html",
+                  _source_detail_context(src, bundle_items, versions))
 
 
 class SourceDetailView(DetailView):
@@ -1108,10 +1263,12 @@ class SourceUpdateView(AdminRequiredMixin, UpdateView):
         archived = 0
         to_remove_ids = [int(x) for x in req.POST.getlist("remove_item_ids") if x.isdigit()]
         if to_remove_ids:
-            archived = Source.objects.filter(
+            to_archive = Source.objects.filter(
                 id__in=to_remove_ids,
+                is_active=True,
                 **_bundle_strict_filter(leader)
-            ).update(is_active=False)
+            )
+            archived = archive.archive(source_ids=to_archive.values_list("pk", flat=True), user=req.user)["source"]
 
         created_links = 0
         for l in extra_links:
@@ -1242,13 +1399,15 @@ def edit_source(request, pk):
 
             remove_item_ids = request.POST.getlist("remove_item_ids")
             if remove_item_ids:
-                Source.objects.filter(
+                to_archive = Source.objects.filter(
                     id__in=remove_item_ids,
+                    is_active=True,
                     event=leader.event,
                     name=leader.name,
                     summary=leader.summary,
                     source_date=leader.source_date
-                ).update(is_active=False)
+                )
+                archive.archive(source_ids=to_archive.values_list("pk", flat=True), user=request.user)
 
             if skipped:
                 messages.warning(
@@ -1301,8 +1460,8 @@ def toggle_source_active(request, pk):
         return redirect('source_detail', pk=pk)
 
     source = get_object_or_404(Source, pk=pk)
+    archive.set_active(not source.is_active, source_ids=[source.pk], user=request.user)
     source.is_active = not source.is_active
-    source.save(update_fields=['is_active'])
     messages.success(request, "Source restored." if source.is_active else "Source archived.")
     return redirect('source_detail', pk=source.pk)
 
@@ -1398,19 +1557,151 @@ def secure_file_download(request, token: str):
 # =========================================================
 # AJAX helpers (para formularios de creación/edición)
 # =========================================================
+# Typeahead JSON de los selects de Threat/Event (assets/js/typeahead.js):
+#   ?q=texto&limit=20&offset=0[&category_id= | &theme_id=]
+#   -> {"results": [{"id", "text"}], "more": bool}
+# Con menos de TYPEAHEAD_INFIX_MIN_CHARS se busca por prefijo (índice sobre
+# lower(name)); desde ahí también por infijo, con los de prefijo primero.
+
+TYPEAHEAD_PAGE_SIZE = getattr(settings, "TYPEAHEAD_PAGE_SIZE", 20)
+TYPEAHEAD_MAX_PAGE_SIZE = getattr(settings, "TYPEAHEAD_MAX_PAGE_SIZE", 100)
+TYPEAHEAD_CACHE_SECONDS = getattr(settings, "TYPEAHEAD_CACHE_SECONDS", 30)
+TYPEAHEAD_INFIX_MIN_CHARS = getattr(settings, "TYPEAHEAD_INFIX_MIN_CHARS", 3)
+
+
+def _bounded_int(value, default, low, high):
+    try:
+        return max(low, min(high, int(value)))
+    except (TypeError, ValueError):
+        return default
+
+
+def _typeahead_params(request, parent_param):
+    """(q normalizado, id del padre o '', limit, offset)."""
+    q = " ".join((request.GET.get("q") or "").split()).lower()[:100]
+    parent = (request.GET.get(parent_param) or "").strip()
+    limit = _bounded_int(request.GET.get("limit"), TYPEAHEAD_PAGE_SIZE, 1, TYPEAHEAD_MAX_PAGE_SIZE)
+    offset = _bounded_int(request.GET.get("offset"), 0, 0, 10000)
+    return q, parent if parent.isdigit() else "", limit, offset
+
+
+def _typeahead_key(kind, parent, q, limit, offset):
+    digest = hashlib.sha256(q.encode()).hexdigest()[:16]
+    return f"typeahead:{kind}:{parent or '*'}:{digest}:{limit}:{offset}"
+
+
+def _typeahead_search(qs, q):
+    qs = qs.alias(name_ci=Lower("name"))
+    if not q:
+        return qs.order_by("name_ci", "pk")
+    if len(q) < TYPEAHEAD_INFIX_MIN_CHARS:
+        return qs.filter(name_ci__startswith=q).order_by("name_ci", "pk")
+    return (qs.filter(name_ci__contains=q)
+            .alias(rank=Case(When(name_ci__startswith=q, then=0), default=1, output_field=IntegerField()))
+            .order_by("rank", "name_ci", "pk"))
+
+
+def _theme_options_qs(category_id, q=""):
+    qs = Theme.objects.all()
+    if category_id:
+        qs = qs.filter(category_id=category_id)
+    return _typeahead_search(qs, q).values_list("pk", "name", "category__name")
+
+
+def _event_options_qs(theme_id, q=""):
+    qs = Event.objects.all()
+    if theme_id:
+        qs = qs.filter(theme_id=theme_id)
+    return _typeahead_search(qs, q).values_list("pk", "name", "theme__name")
+
+
+def _typeahead_page(rows, limit, scoped):
+    """rows: limit+1 tuplas (pk, nombre, nombre del padre). Con padre fijo basta el nombre."""
+    return {
+        "results": [
+            {"id": pk, "text": name if scoped else f"{name} ({parent_name})"}
+            for pk, name, parent_name in rows[:limit]
+        ],
+        "more": len(rows) > limit,
+    }
+
 
 @login_required
 def get_themes(request):
-    category_id = request.GET.get('category_id')
-    themes = Theme.objects.filter(category_id=category_id).order_by('name')
-    return render(request, 'tracker/theme_dropdown_options.html', {'themes': themes})
+    q, category_id, limit, offset = _typeahead_params(request, "category_id")
+    page = cache_get_or_set(
+        _typeahead_key("themes", category_id, q, limit, offset),
+        lambda: _typeahead_page(list(_theme_options_qs(category_id, q)[offset:offset + limit + 1]),
+                                limit, bool(category_id)),
+        timeout=TYPEAHEAD_CACHE_SECONDS, tags=("themes",),
+    )
+    return JsonResponse(page)
 
 
 @login_required
 def get_events(request):
-    theme_id = request.GET.get('theme_id')
-    events = Event.objects.filter(theme_id=theme_id).order_by('name')
-    return render(request, 'tracker/event_dropdown_options.html', {'events': events})
+    q, theme_id, limit, offset = _typeahead_params(request, "theme_id")
+    page = cache_get_or_set(
+        _typeahead_key("events", theme_id, q, limit, offset),
+        lambda: _typeahead_page(list(_event_options_qs(theme_id, q)[offset:offset + limit + 1]),
+                                limit, bool(theme_id)),
+        timeout=TYPEAHEAD_CACHE_SECONDS, tags=(f"theme:{theme_id}",) if theme_id else ("events", "themes"),
+    )
+    return JsonResponse(page)
+
+
+# =========================================================
+# Historial de riesgo (JSON para gráficos)
+# =========================================================
+
+def _parse_range(request, default_days=365):
+    """
+    ?start=YYYY-MM-DD&end=YYYY-MM-DD → (datetime aware, datetime aware).
+    ValueError si una fecha tiene formato válido pero no existe (2024-02-30).
+    """
+    from datetime import datetime, time, timedelta
+    from django.utils import timezone
+    from django.utils.dateparse import parse_date
+
+    end_d = parse_date(request.GET.get("end") or "") or timezone.localdate()
+    start_d = parse_date(request.GET.get("start") or "") or (end_d - timedelta(days=default_days))
+    tz = timezone.get_current_timezone()
+    return (timezone.make_aware(datetime.combine(start_d, time.min), tz),
+            timezone.make_aware(datetime.combine(end_d, time.max), tz))
+
+
+def event_risk_history(request, event_id):
+    """Trayectoria de risk_rating/status de un Event en el rango pedido."""
+    get_object_or_404(Event.objects.only("id"), pk=event_id)
+    try:
+        start, end = _parse_range(request)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    field = request.GET.get("field") if request.GET.get("field") in ("risk_rating", "status") else "risk_rating"
+    return JsonResponse({
+        "event": event_id,
+        "field": field,
+        "points": risk_trajectory("event", event_id, start, end, field=field),
+    })
+
+
+def theme_risk_trends(request, pk):
+    """Tendencias de escalada (sources + cambios de rating) de un Threat por período."""
+    get_object_or_404(Theme.objects.only("id"), pk=pk)
+    try:
+        start, end = _parse_range(request)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    period = request.GET.get("period") or "month"
+    if period not in PERIODS:
+        return JsonResponse({"error": f"period: {', '.join(PERIODS)}"}, status=400)
+    trends = theme_escalation_trends(start, end, period=period, theme_ids=[pk])
+    return JsonResponse({
+        "theme": pk,
+        "period": period,
+        "trajectory": risk_trajectory("theme", pk, start, end),
+        "trends": trends.get(pk, []),
+    })
 
 
 # =========================================================
@@ -1440,10 +1731,70 @@ def register(request):
 @user_passes_test(lambda u: u.is_superuser)
 @login_required
 def access_logs(request):
-    logs = UserAccessLog.objects.all().order_by('-login_time')[:100]
+    logs = UserAccessLog.objects.select_related('user').order_by('-login_time')[:100]
     return render(request, 'tracker/access_logs.html', {'logs': logs})
 
 
+_HISTORY_MODELS = {
+    "theme": (Theme, "view_theme", "pk"),
+    "event": (Event, "view_event", "event_id"),
+    "source": (Source, "source_detail", "pk"),
+}
+
+
+@admin_required
+def object_history(request, object_type, pk):
+    """Historial de cambios (ChangeLog) de un Theme/Event/Source; usa ix_changelog_object."""
+    if object_type not in _HISTORY_MODELS:
+        raise Http404("Unknown object type")
+    model, detail_url_name, url_kwarg = _HISTORY_MODELS[object_type]
+
+    obj = model.objects.filter(pk=pk).first()  # puede haber sido eliminado
+    entries = (ChangeLog.objects
+               .filter(object_type=object_type, object_id=pk)
+               .select_related("changed_by"))
+    page_obj = Paginator(entries, 50).get_page(request.GET.get("page"))
+    return render(request, "tracker/object_history.html", {
+        "object": obj,
+        "back_url": reverse(detail_url_name, kwargs={url_kwarg: pk}) if obj else None,
+        "object_type": object_type,
+        "object_id": pk,
+        "page_obj": page_obj,
+    })
+
+
+@admin_required
+def profile_list(request):
+    """Perfiles guardados por ProfilingMiddleware (más recientes primero)."""
+    profiles = list_profiles()
+    view_filter = request.GET.get("view") or ""
+    if view_filter:
+        profiles = [p for p in profiles if p["view"] == view_filter]
+    if request.GET.get("sort") == "duration":
+        profiles.sort(key=lambda p: p["duration_ms"], reverse=True)
+    return render(request, "tracker/profile_list.html", {
+        "profiles": profiles,
+        "views": sorted({p["view"] for p in list_profiles()}),
+        "view_filter": view_filter,
+        "sort": request.GET.get("sort") or "recent",
+    })
+
+
+@admin_required
+def profile_download(request, name):
+    """JSON completo o ?format=folded (stacks para flamegraph.pl / speedscope)."""
+    path = profile_path(name)
+    if path is None:
+        raise Http404("Profile not found")
+    if request.GET.get("format") == "folded":
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        response = HttpResponse(folded_text(data), content_type="text/plain; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="{name[:-5]}.folded.txt"'
+        return response
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=name, content_type="application/json")
+
+
 def custom_logout(request):
     logout(request)
     messages.info(request, "You have been logged out")
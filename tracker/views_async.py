@@ -0,0 +1,158 @@
+# tracker/views_async.py
+"""
+Variantes async de las vistas públicas de lectura (modo ASGI, ver config/asgi.py).
+
+Mismas plantillas y mismo contexto que views.py: las consultas usan el ORM
+async y se materializan antes de renderizar, salvo la lista de eventos, que
+pasa el queryset a cached_rows como la vista sync. El render (y las llamadas al
+storage como file_upload.url) corre con sync_to_async en el hilo propio del
+request (thread_sensitive; Django abre un contexto por request), así un
+S3/Azure lento no bloquea el event loop ni a los demás requests, y si una
+plantilla consulta la BD usa la conexión de ese hilo, que se cierra al final.
+
+urls.py las usa en lugar de las sync cuando ASYNC_VIEWS = True.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404, render
+
+from . import conditional
+from .cache import aget_or_set
+from .models import Event, Source
+from .views import (
+    DASHBOARD_CACHE_TIMEOUT,
+    TYPEAHEAD_CACHE_SECONDS,
+    _dashboard_lists,
+    _event_detail_context,
+    _event_options_qs,
+    _event_sources_qs,
+    _filtered_events,
+    _group_bundles,
+    _source_bundle_qs,
+    _source_detail_context,
+    _source_versions_qs,
+    _theme_options_qs,
+    _typeahead_key,
+    _typeahead_page,
+    _typeahead_params,
+    is_admin,
+)
+
+
+async def _alist(qs):
+    return [obj async for obj in qs]
+
+
+async def _resolve_user(request):
+    # Carga sesión y usuario con el ORM async; las plantillas ya no consultan
+    request.user = await request.auser()
+    return request.user
+
+
+async def _render(request, template_name, context):
+    return await sync_to_async(render)(request, template_name, context)
+
+
+# =========================================================
+# Dashboard
+# =========================================================
+
+async def dashboard(request):
+    lists = _dashboard_lists()
+    values = await asyncio.gather(
+        _resolve_user(request),
+        *[
+            aget_or_set(f'dashboard:{name}', lambda qs=qs: _alist(qs),
+                        timeout=DASHBOARD_CACHE_TIMEOUT, tags=tags)
+            for name, qs, tags in lists
+        ],
+        aget_or_set('dashboard:lob_counts',
+                    sync_to_async(Event.objects.filter(is_active=True).lob_counts),
+                    timeout=DASHBOARD_CACHE_TIMEOUT, tags=('events',)),
+    )
+    ctx = {name: value for (name, _, _), value in zip(lists, values[1:-1])}
+    ctx['lob_counts'] = values[-1]
+    return await _render(request, 'tracker/dashboard.html', ctx)
+
+
+# =========================================================
+# Events
+# =========================================================
+
+@conditional.conditional_page(conditional.event_list_version)
+async def event_list(request):
+    user = await _resolve_user(request)
+    events, filters = _filtered_events(request)
+    # Queryset sin evaluar: cached_rows lee solo (pk, updated_at) y carga las
+    # filas completas únicamente si faltan en la caché (el render ya corre en un hilo)
+    return await _render(request, 'tracker/event_list.html', {
+        'events': events,
+        'is_paginated': False,
+        **filters,
+        'is_admin': is_admin(user),
+    })
+
+
+@conditional.conditional_page(conditional.event_version)
+async def view_event(request, event_id):
+    user = await _resolve_user(request)
+    event = await aget_object_or_404(Event.objects.select_related("theme"), pk=event_id)
+    qs, show_archived, selected_source_type = _event_sources_qs(request, event)
+    context = _event_detail_context(event, _group_bundles(await _alist(qs)), show_archived, selected_source_type)
+    context["is_admin"] = is_admin(user)
+    return await _render(request, "tracker/event_detail.html", context)
+
+
+# =========================================================
+# Sources
+# =========================================================
+
+@conditional.conditional_page(conditional.source_version)
+async def source_detail(request, pk):
+    await _resolve_user(request)
+    src = await aget_object_or_404(Source.objects.select_related("event"), pk=pk)
+    bundle_items, versions = await asyncio.gather(
+        _alist(_source_bundle_qs(src)),
+        _alist(_source_versions_qs(src)),
+    )
+
+    def build_and_render():
+        return render(request, "tracker/source_detail.html",
+                      _source_detail_context(src, bundle_items, versions))
+
+    return await sync_to_async(build_and_render)()
+
+
+# =========================================================
+# AJAX helpers
+# =========================================================
+
+@login_required
+async def get_themes(request):
+    q, category_id, limit, offset = _typeahead_params(request, 'category_id')
+
+    async def page():
+        rows = await _alist(_theme_options_qs(category_id, q)[offset:offset + limit + 1])
+        return _typeahead_page(rows, limit, bool(category_id))
+
+    return JsonResponse(await aget_or_set(
+        _typeahead_key('themes', category_id, q, limit, offset), page,
+        timeout=TYPEAHEAD_CACHE_SECONDS, tags=('themes',),
+    ))
+
+
+@login_required
+async def get_events(request):
+    q, theme_id, limit, offset = _typeahead_params(request, 'theme_id')
+
+    async def page():
+        rows = await _alist(_event_options_qs(theme_id, q)[offset:offset + limit + 1])
+        return _typeahead_page(rows, limit, bool(theme_id))
+
+    return JsonResponse(await aget_or_set(
+        _typeahead_key('events', theme_id, q, limit, offset), page,
+        timeout=TYPEAHEAD_CACHE_SECONDS, tags=(f'theme:{theme_id}',) if theme_id else ('events', 'themes'),
+    ))
@@ -0,0 +1,100 @@
+# tracker/views_live.py
+"""
+Vistas de las actualizaciones en vivo (ver tracker/live.py).
+
+- stream: text/event-stream con los avisos de los tópicos pedidos. Es una
+  tarea del event loop esperando en su cola; no consulta la base.
+- fragment: una sola fila/tarjeta re-renderizada con las mismas plantillas
+  parciales que la página; 204 si con los filtros de la página ya no va.
+"""
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+
+from . import live
+from .models import Event, Source
+from .views import (
+    _bundle_sources,
+    _dashboard_events_qs,
+    _dashboard_themes_qs,
+    _group_bundles,
+    is_admin,
+)
+from .views_async import _alist, _render, _resolve_user
+
+
+async def stream(request):
+    if not live.enabled():
+        # 204: EventSource deja de reintentar
+        return HttpResponse(status=204)
+    topics = live.parse_topics(request.GET.getlist("topic"))
+    if not topics:
+        return HttpResponseBadRequest("topic: dashboard, theme:<id>, event:<id> o source:<id>")
+    last_event_id = request.headers.get("Last-Event-ID", "")
+    hub = live.get_hub()
+    sub = await hub.subscribe(topics, int(last_event_id) if last_event_id.isdigit() else None)
+    response = StreamingHttpResponse(live.stream(hub, sub), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"    # nginx: no acumular el stream
+    return response
+
+
+# =========================================================
+# Fragmentos
+# =========================================================
+
+async def _first(qs):
+    rows = await _alist(qs[:1])
+    return rows[0] if rows else None
+
+
+async def _dashboard_event(request, pk):
+    event = await _first(_dashboard_events_qs().filter(pk=pk))
+    return event and ("tracker/_dashboard_event.html", {"event": event})
+
+
+async def _dashboard_theme(request, pk):
+    theme = await _first(_dashboard_themes_qs().filter(pk=pk))
+    return theme and ("tracker/_dashboard_theme_row.html", {"theme": theme})
+
+
+async def _event_summary(request, pk):
+    event = await _first(Event.objects.select_related("theme").filter(pk=pk))
+    return event and ("tracker/_event_summary.html", {"event": event})
+
+
+async def _source_bundle(request, pk):
+    """El bundle de la fuente `pk` tal como lo muestra event_detail con sus filtros."""
+    src = await _first(Source.objects.filter(pk=pk).only("event_id", "name", "summary", "source_date"))
+    if src is None:
+        return None
+    qs = Source.objects.filter(event_id=src.event_id, name=src.name, summary=src.summary,
+                               source_date=src.source_date)
+    if request.GET.get("show_archived") != "1":
+        qs = qs.filter(is_active=True)
+    bundle = next((b for b in _group_bundles(await _alist(_bundle_sources(qs)))
+                   if any(item.pk == src.pk for item in b["items"])), None)
+    source_type = (request.GET.get("source_type") or "").strip().upper() or "ALL"
+    if bundle is None or source_type not in ("ALL", bundle["display_type"]):
+        return None
+    return "tracker/_source_bundle_row.html", {"b": bundle, "is_admin": is_admin(request.user)}
+
+
+FRAGMENTS = {
+    "dashboard-event": _dashboard_event,
+    "dashboard-theme": _dashboard_theme,
+    "event-summary": _event_summary,
+    "source-bundle": _source_bundle,
+}
+
+
+async def fragment(request, kind, pk):
+    build = FRAGMENTS.get(kind)
+    if build is None:
+        return HttpResponseBadRequest(f"kind: {', '.join(FRAGMENTS)}")
+    await _resolve_user(request)
+    found = await build(request, pk)
+    if not found:
+        return HttpResponse(status=204)
+    template_name, context = found
+    response = await _render(request, template_name, context)
+    response["Cache-Control"] = "private, no-cache"
+    return response